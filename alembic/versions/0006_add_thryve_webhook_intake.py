@@ -0,0 +1,49 @@
+"""Add thryve_webhook_intake table (durable webhook spool)
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'thryve_webhook_intake',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('body', sa.LargeBinary(), nullable=False),
+        sa.Column('content_encoding', sa.String(length=50), nullable=True),
+        sa.Column('headers', sa.JSON(), nullable=True),
+        sa.Column('event_type', sa.String(length=100), nullable=True),
+        sa.Column('end_user_id', sa.String(length=255), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('available_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('locked_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('locked_by', sa.String(length=100), nullable=True),
+        sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_thryve_webhook_intake_id', 'thryve_webhook_intake', ['id'], unique=False)
+    # Workers claim the oldest available pending row
+    op.create_index('idx_thryve_webhook_intake_claim', 'thryve_webhook_intake', ['status', 'available_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_thryve_webhook_intake_claim', table_name='thryve_webhook_intake')
+    op.drop_index('ix_thryve_webhook_intake_id', table_name='thryve_webhook_intake')
+    op.drop_table('thryve_webhook_intake')
@@ -0,0 +1,74 @@
+"""Add unique natural key index on health_records
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Webhook create events used to insert unconditionally, so the same measurement can exist
+    # several times. Keep the most recently written row per key (highest id), which is what
+    # update events would have converged to. NULL keys compare unequal and are left alone.
+    # patient_insights.related_health_record_id has no ON DELETE, so move references off the
+    # rows about to be dropped onto the row being kept first.
+    op.execute(
+        """
+        UPDATE patient_insights pi
+        SET related_health_record_id = keep.id
+        FROM health_records dup
+        JOIN (
+            SELECT created_by, metric_id, measure_start_time, data_type, MAX(id) AS id
+            FROM health_records
+            GROUP BY created_by, metric_id, measure_start_time, data_type
+        ) keep
+          ON keep.created_by = dup.created_by
+         AND keep.metric_id = dup.metric_id
+         AND keep.measure_start_time = dup.measure_start_time
+         AND keep.data_type = dup.data_type
+        WHERE pi.related_health_record_id = dup.id
+          AND dup.id < keep.id
+        """
+    )
+
+    op.execute(
+        """
+        DELETE FROM health_records a
+        USING health_records b
+        WHERE a.created_by = b.created_by
+          AND a.metric_id = b.metric_id
+          AND a.measure_start_time = b.measure_start_time
+          AND a.data_type = b.data_type
+          AND a.id < b.id
+        """
+    )
+
+    # Build without blocking ingest on large tables
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_health_records_natural_key',
+            'health_records',
+            ['created_by', 'metric_id', 'measure_start_time', 'data_type'],
+            unique=True,
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'uq_health_records_natural_key',
+            table_name='health_records',
+            postgresql_concurrently=True
+        )
@@ -0,0 +1,91 @@
+"""Add health_record_rollups table (hourly/daily pre-aggregates)
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'health_record_rollups',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('created_by', sa.Integer(), nullable=False),
+        sa.Column('metric_id', sa.Integer(), nullable=False),
+        sa.Column('data_type', sa.String(length=20), nullable=False, server_default=''),
+        sa.Column('granularity', sa.String(length=10), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('sum', sa.Float(), nullable=False),
+        sa.Column('min', sa.Float(), nullable=False),
+        sa.Column('max', sa.Float(), nullable=False),
+        sa.Column('first_value', sa.Float(), nullable=False),
+        sa.Column('first_recorded_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('last_value', sa.Float(), nullable=False),
+        sa.Column('last_recorded_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('last_record_id', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['metric_id'], ['health_record_metrics.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_health_record_rollups_id', 'health_record_rollups', ['id'], unique=False)
+    # Upsert target and range scan for (user, metric, granularity) series
+    op.create_index(
+        'uq_health_record_rollups_bucket',
+        'health_record_rollups',
+        ['created_by', 'metric_id', 'granularity', 'bucket_start', 'data_type'],
+        unique=True
+    )
+
+    # Build the rollups for existing records (same aggregation as HealthRecordRollupService.backfill)
+    # so hourly/daily charts keep working right after the upgrade; writes keep them in sync from here on.
+    for granularity in ('hour', 'day'):
+        op.execute(
+            f"""
+            INSERT INTO health_record_rollups (
+                created_by, metric_id, data_type, granularity, bucket_start,
+                count, sum, min, max,
+                first_value, first_recorded_at, last_value, last_recorded_at, last_record_id
+            )
+            SELECT
+                created_by,
+                metric_id,
+                coalesce(data_type, ''),
+                '{granularity}',
+                timezone('UTC', date_trunc('{granularity}', timezone('UTC', coalesce(measure_start_time, created_at)))),
+                count(id),
+                sum(value),
+                min(value),
+                max(value),
+                (array_agg(value ORDER BY coalesce(measure_start_time, created_at) ASC, id ASC))[1],
+                min(coalesce(measure_start_time, created_at)),
+                (array_agg(value ORDER BY coalesce(measure_start_time, created_at) DESC, id DESC))[1],
+                max(coalesce(measure_start_time, created_at)),
+                (array_agg(id ORDER BY coalesce(measure_start_time, created_at) DESC, id DESC))[1]
+            FROM health_records
+            GROUP BY
+                created_by,
+                metric_id,
+                coalesce(data_type, ''),
+                timezone('UTC', date_trunc('{granularity}', timezone('UTC', coalesce(measure_start_time, created_at))))
+            """
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_health_record_rollups_bucket', table_name='health_record_rollups')
+    op.drop_index('ix_health_record_rollups_id', table_name='health_record_rollups')
+    op.drop_table('health_record_rollups')
@@ -0,0 +1,39 @@
+"""Add (created_by, coalesce(measure_start_time, created_at), id) index on health_records
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Backs the ORDER BY / keyset seek of GET /health-records/ and /health-records/search
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_health_records_user_effective_time',
+            'health_records',
+            ['created_by', sa.text('coalesce(measure_start_time, created_at)'), 'id'],
+            unique=False,
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'idx_health_records_user_effective_time',
+            table_name='health_records',
+            postgresql_concurrently=True
+        )
@@ -0,0 +1,45 @@
+"""Add metric_name_embeddings table (persistent metric-name embedding store)
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'metric_name_embeddings',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('text_hash', sa.String(length=64), nullable=False),
+        sa.Column('model', sa.String(length=100), nullable=False),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.Column('dimensions', sa.Integer(), nullable=False),
+        sa.Column('embedding', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_metric_name_embeddings_id', 'metric_name_embeddings', ['id'], unique=False)
+    op.create_index(
+        'uq_metric_name_embeddings_hash_model',
+        'metric_name_embeddings',
+        ['text_hash', 'model'],
+        unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_metric_name_embeddings_hash_model', table_name='metric_name_embeddings')
+    op.drop_index('ix_metric_name_embeddings_id', table_name='metric_name_embeddings')
+    op.drop_table('metric_name_embeddings')
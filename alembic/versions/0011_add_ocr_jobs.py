@@ -0,0 +1,58 @@
+"""Add ocr_jobs table (durable lab document OCR jobs)
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0011'
+down_revision: Union[str, None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ocr_jobs',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('file_name', sa.String(length=255), nullable=False),
+        sa.Column('file_content', sa.LargeBinary(), nullable=True),
+        sa.Column('s3_url', sa.Text(), nullable=True),
+        sa.Column('form_data', sa.JSON(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='queued'),
+        sa.Column('message', sa.Text(), nullable=True),
+        sa.Column('pages_done', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('pages_total', sa.Integer(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('locked_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('locked_by', sa.String(length=100), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_ocr_jobs_user_id', 'ocr_jobs', ['user_id'], unique=False)
+    # Workers claim the oldest queued job
+    op.create_index('idx_ocr_jobs_claim', 'ocr_jobs', ['status', 'created_at'], unique=False)
+    # TTL cleanup of finished jobs
+    op.create_index('idx_ocr_jobs_expires_at', 'ocr_jobs', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_ocr_jobs_expires_at', table_name='ocr_jobs')
+    op.drop_index('idx_ocr_jobs_claim', table_name='ocr_jobs')
+    op.drop_index('ix_ocr_jobs_user_id', table_name='ocr_jobs')
+    op.drop_table('ocr_jobs')
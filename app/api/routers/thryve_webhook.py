@@ -3,9 +3,14 @@ from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.services.thryve_webhook_service import ThryveWebhookService
+from app.services.thryve_webhook_queue import (
+    ThryveWebhookQueue, ThryveWebhookWorkerPool, ThryveWebhookPermanentError
+)
+from app.models.thryve_webhook_intake import ThryveWebhookIntake
 from app.schemas.thryve_webhook import ThryveWebhookResponse
 from app.core.config import settings
 import logging
+import asyncio
 import base64
 import time
 import json
@@ -163,32 +168,32 @@ async def thryve_data_push_webhook(
                 detail="Failed to decode request body"
             )
         
-        # Initialize webhook service
-        # webhook_service = ThryveWebhookService(db)
+        # HMAC verification (enable with THRYVE_WEBHOOK_VERIFY_HMAC)
+        if settings.THRYVE_WEBHOOK_VERIFY_HMAC:
+            webhook_service = ThryveWebhookService(db)
+            if not webhook_service.verify_hmac_signature(compressed_body, hmac_signature, hmac_timestamp):
+                logger.error("❌ HMAC signature verification failed - rejecting webhook")
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Invalid HMAC signature"
+                )
         
-        # HMAC verification - COMMENTED OUT FOR NOW
-        # if not webhook_service.verify_hmac_signature(compressed_body, hmac_signature, hmac_timestamp):
-        #     logger.error("❌ HMAC signature verification failed - rejecting webhook")
-        #     raise HTTPException(
-        #         status_code=status.HTTP_401_UNAUTHORIZED,
-        #         detail="Invalid HMAC signature"
-        #     )
-        
-        # Acknowledge immediately (HMAC verification disabled)
-        verification_time = time.time() - start_time
-        logger.info(f"✅ Webhook received in {verification_time:.3f} seconds - acknowledging receipt (HMAC verification disabled)")
-        
-        # Queue background processing (decompress, parse, store)
-        # Pass headers for file saving (convert to dict)
         headers_dict = {k: v for k, v in request.headers.items()}
-        background_tasks.add_task(
-            process_webhook_background,
-            compressed_body,
-            content_encoding,
-            headers_dict
-        )
         
-        logger.info("📋 Webhook queued for background processing")
+        if settings.THRYVE_INGEST_QUEUE_ENABLED:
+            # Durable path: append the raw payload to the intake spool; ingest workers do the rest
+            intake_id = ThryveWebhookQueue.enqueue(db, compressed_body, content_encoding, headers_dict)
+            ingest_worker_pool.wake()
+            logger.info(f"📋 Webhook spooled as intake {intake_id} in {time.time() - start_time:.3f} seconds")
+        else:
+            # Queue background processing (decompress, parse, store)
+            background_tasks.add_task(
+                process_webhook_background,
+                compressed_body,
+                content_encoding,
+                headers_dict
+            )
+            logger.info(f"📋 Webhook queued for background processing in {time.time() - start_time:.3f} seconds")
         logger.info("=" * 80)
         
         # Return immediate acknowledgment (200 OK)
@@ -208,76 +213,109 @@ async def thryve_data_push_webhook(
         )
 
 
-async def process_webhook_background(compressed_body: bytes, content_encoding: str, headers: Dict[str, str] = None):
+async def process_webhook_payload(
+    db: Session,
+    compressed_body: bytes,
+    content_encoding: str,
+    headers: Dict[str, str] = None
+) -> Dict[str, Any]:
     """
-    Background task to process Thryve webhook payload
-    This runs asynchronously after the webhook has been acknowledged
+    Decompress, parse and store one Thryve webhook payload.
+    Raises ThryveWebhookPermanentError for payloads that can never be processed and
+    lets any other error propagate so the caller can retry.
+    
+    Returns {"event_type", "end_user_id", "processed_count"}
     """
-    from app.core.database import SessionLocal
+    start_time = time.time()
+    
+    # Initialize webhook service with the caller's DB session
+    webhook_service = ThryveWebhookService(db)
     
-    db = SessionLocal()
     try:
-        logger.info("🔄 Starting background processing of webhook payload")
-        start_time = time.time()
-        
-        # Initialize webhook service with new DB session
-        webhook_service = ThryveWebhookService(db)
-        
         # Decompress payload based on Content-Encoding header
         decompressed = webhook_service.decompress_payload(compressed_body, content_encoding)
         
         # Parse JSON
         payload = webhook_service.parse_payload(decompressed)
-        
-        # Extract event type and end_user_id for file saving
-        event_type = payload.get("type", "")
-        end_user_id = payload.get("endUserId", "")
-        
-        # Save webhook data to files (raw data, metadata, and decompressed JSON)
-        save_webhook_data_to_files(
-            compressed_body=compressed_body,
-            decompressed_payload=payload,
-            event_type=event_type,
-            end_user_id=end_user_id,
-            headers=headers or {},
-            content_encoding=content_encoding
-        )
-        
-        # Log decompressed JSON payload (pretty formatted)
-        # logger.info("📄 Decompressed JSON Payload:")
-        # logger.info(json.dumps(payload, indent=2, ensure_ascii=False))
-        
-        # Map dataTypeIds to names
-        mapped_payload = webhook_service.map_data_type_ids(payload)
-        
-        # Validate event type
-        valid_event_types = [
-            "event.data.epoch.create",
-            "event.data.epoch.update",
-            "event.data.daily.update",
-            "event.data.daily.create"
-        ]
-        if event_type not in valid_event_types:
-            logger.warning(f"Unknown event type: {event_type}")
-            return
-        
-        # Calculate total data points count
-        processed_count = 0
-        for data_item in payload.get("data", []):
-            if "epochData" in data_item:
-                processed_count += len(data_item.get("epochData", []))
-            if "dailyData" in data_item:
-                processed_count += len(data_item.get("dailyData", []))
-        
-        # Store health data (this handles all processing and record creation)
-        await webhook_service.store_health_data(payload, mapped_payload)
-        
-        elapsed_time = time.time() - start_time
-        logger.info(f"✅ Background processing completed: {event_type} for end_user_id: {end_user_id}, count: {processed_count}")
-        logger.info(f"⏱️  Background processing time: {elapsed_time:.3f} seconds")
-        
+    except ValueError as e:
+        raise ThryveWebhookPermanentError(str(e)) from e
+    
+    # Extract event type and end_user_id for file saving
+    event_type = payload.get("type", "")
+    end_user_id = payload.get("endUserId", "")
+    result = {"event_type": event_type, "end_user_id": end_user_id, "processed_count": 0}
+    
+    # Save webhook data to files (raw data, metadata, and decompressed JSON)
+    save_webhook_data_to_files(
+        compressed_body=compressed_body,
+        decompressed_payload=payload,
+        event_type=event_type,
+        end_user_id=end_user_id,
+        headers=headers or {},
+        content_encoding=content_encoding
+    )
+    
+    # Map dataTypeIds to names
+    mapped_payload = webhook_service.map_data_type_ids(payload)
+    
+    # Validate event type
+    valid_event_types = [
+        "event.data.epoch.create",
+        "event.data.epoch.update",
+        "event.data.daily.update",
+        "event.data.daily.create"
+    ]
+    if event_type not in valid_event_types:
+        logger.warning(f"Unknown event type: {event_type}")
+        return result
+    
+    # Calculate total data points count
+    processed_count = 0
+    for data_item in payload.get("data", []):
+        if "epochData" in data_item:
+            processed_count += len(data_item.get("epochData", []))
+        if "dailyData" in data_item:
+            processed_count += len(data_item.get("dailyData", []))
+    result["processed_count"] = processed_count
+    
+    # Store health data (this handles all processing and record creation)
+    await webhook_service.store_health_data(payload, mapped_payload)
+    
+    elapsed_time = time.time() - start_time
+    logger.info(f"✅ Processing completed: {event_type} for end_user_id: {end_user_id}, count: {processed_count}")
+    logger.info(f"⏱️  Processing time: {elapsed_time:.3f} seconds")
+    return result
+
+
+def process_webhook_intake(db: Session, intake: ThryveWebhookIntake) -> Dict[str, Any]:
+    """Ingest worker handler: process one spooled payload (runs on a worker thread, not the event loop)"""
+    return asyncio.run(
+        process_webhook_payload(db, intake.body, intake.content_encoding, intake.headers)
+    )
+
+
+# Local ingest workers draining thryve_webhook_intake; started/stopped from app.main
+ingest_worker_pool = ThryveWebhookWorkerPool(
+    handler=process_webhook_intake,
+    worker_count=settings.THRYVE_INGEST_WORKERS,
+    poll_interval=settings.THRYVE_INGEST_POLL_INTERVAL_SECONDS,
+    lock_timeout_seconds=settings.THRYVE_INGEST_LOCK_TIMEOUT_SECONDS,
+    retention_hours=settings.THRYVE_INGEST_RETENTION_HOURS
+)
+
+
+async def process_webhook_background(compressed_body: bytes, content_encoding: str, headers: Dict[str, str] = None):
+    """
+    Background task to process Thryve webhook payload (used when THRYVE_INGEST_QUEUE_ENABLED is off)
+    This runs asynchronously after the webhook has been acknowledged
+    """
+    from app.core.database import SessionLocal
+    
+    db = SessionLocal()
+    try:
+        logger.info("🔄 Starting background processing of webhook payload")
+        await process_webhook_payload(db, compressed_body, content_encoding, headers)
     except Exception as e:
         logger.error(f"❌ Error in background webhook processing: {e}", exc_info=True)
     finally:
         db.close()
-
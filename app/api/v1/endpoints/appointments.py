@@ -672,7 +672,7 @@ async def acuity_webhook(
         try:
             doctor_id = await doctor_supabase_service.get_doctor_id_by_calendar_id(payload.calendarID)
             if doctor_id:
-                profile_response = supabase_service.client.table("doctor_profiles").select("address").eq("id", doctor_id).limit(1).execute()
+                profile_response = await supabase_service.run_blocking(lambda: supabase_service.client.table("doctor_profiles").select("address").eq("id", doctor_id).limit(1).execute())
                 if profile_response.data and profile_response.data[0].get("address"):
                     doctor_address = profile_response.data[0].get("address")
         except Exception as e:
@@ -1138,7 +1138,7 @@ async def create_appointment(
             doctor_id = await doctor_supabase_service.get_doctor_id_by_calendar_id(appointment.calendar_id)
             if doctor_id:
                 # Get doctor profile for name and address
-                profile_response = supabase_service.client.table("doctor_profiles").select("full_name,address").eq("id", doctor_id).limit(1).execute()
+                profile_response = await supabase_service.run_blocking(lambda: supabase_service.client.table("doctor_profiles").select("full_name,address").eq("id", doctor_id).limit(1).execute())
                 if profile_response.data:
                     doctor_name = profile_response.data[0].get("full_name", doctor_name)
                     doctor_address = profile_response.data[0].get("address")
@@ -1428,7 +1428,7 @@ async def read_appointments(
             # So we'll use a direct query here
             try:
                 client = supabase_service.client
-                profile_response = client.table("doctor_profiles").select("id,full_name,specialty").in_("id", list(unique_doctor_ids)).execute()
+                profile_response = await supabase_service.run_blocking(lambda: client.table("doctor_profiles").select("id,full_name,specialty").in_("id", list(unique_doctor_ids)).execute())
                 if profile_response.data:
                     for profile in profile_response.data:
                         doctor_id = profile.get("id")
@@ -1,19 +1,19 @@
 from datetime import timedelta
 import uuid
-import jwt
-from jwt.exceptions import InvalidTokenError
 from fastapi import APIRouter, Depends, HTTPException, status, Header
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm, HTTPBearer
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.core.config import settings
 from app.core.supabase_client import supabase_service
+from app.core.token_verifier import token_verifier
 from app.core.patient_token import generate_patient_token
 from app.services.doctor_supabase_service import doctor_supabase_service
 from app.models.user import User, UserRole
 from app.models.permissions import HealthRecordPermission
 from app.schemas.user import Token, LoginResponse, MFALoginVerifyRequest, UserResponse, UserProfile, UserRegistration, UserEmergency, UserNotifications, UserIntegrations, UserPrivacy, UserSharedAccess, UserAccessLogs, UserDataSharing, PasswordChange, MFAEnrollRequest, MFAEnrollResponse, MFAVerifyRequest, MFAFactor
 from app.crud.user import get_user_by_supabase_id
+from app.services.user_cache import get_user_snapshot_by_supabase_id
 from sqlalchemy import and_, func
 import logging
 from typing import Optional, List, Dict, Any
@@ -23,25 +23,15 @@ router = APIRouter()
 
 # Custom authentication scheme for Supabase tokens
 def extract_user_id_from_token(token: str) -> str:
-    """Extract user ID from JWT token"""
-    try:
-        # Decode JWT token without verification (since it's already verified by Supabase)
-        # We just need to extract the user ID
-        decoded = jwt.decode(token, options={"verify_signature": False})
-        user_id = decoded.get("sub")
-        if not user_id:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token: missing user ID",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        return user_id
-    except InvalidTokenError:
+    """Extract user ID from a verified Supabase JWT token"""
+    decoded = token_verifier.verify(token)
+    if not decoded:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token format",
+            detail="Invalid token",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    return decoded["sub"]
 
 async def get_supabase_token(authorization: Optional[str] = Header(None)) -> str:
     """Extract Supabase token from Authorization header and return the actual JWT token"""
@@ -816,7 +806,11 @@ async def refresh_token(refresh_token: str, db: Session = Depends(get_db)):
         )
 
 async def get_current_user(token: str = Depends(get_supabase_token), db: Session = Depends(get_db)):
-    """Get current authenticated user from Supabase token"""
+    """
+    Get current authenticated user from Supabase token.
+    
+    Returns a UserSnapshot (app/services/user_cache.py) for known users.
+    """
     try:
         # Verify token with Supabase
         user_info = supabase_service.get_user_from_token(token)
@@ -827,9 +821,9 @@ async def get_current_user(token: str = Depends(get_supabase_token), db: Session
                 detail="Invalid token"
             )
         
-        # Get internal user record by Supabase UID
+        # Get internal user record by Supabase UID (cached for active users)
         try:
-            db_user = get_user_by_supabase_id(db, supabase_user_id=user_info['id'])
+            db_user = get_user_snapshot_by_supabase_id(db, supabase_user_id=user_info['id'])
         except Exception as db_error:
             # Database connection error - log and return a mock user with Supabase info
             logger.warning(f"Database not available, using Supabase user info: {db_error}")
@@ -1153,7 +1147,7 @@ async def get_accessible_patients(
             )
             
             # Get all user_shared_access records
-            all_shared_access = fresh_client.table("user_shared_access").select("*").execute()
+            all_shared_access = await supabase_service.run_blocking(lambda: fresh_client.table("user_shared_access").select("*").execute())
             
             if all_shared_access.data:
                 for shared_access_record in all_shared_access.data:
@@ -1203,7 +1197,7 @@ async def get_accessible_patients(
                         settings.SUPABASE_URL,
                         settings.SUPABASE_SERVICE_ROLE_KEY
                     )
-                    all_shared_access = fresh_client.table("user_shared_access").select("*").execute()
+                    all_shared_access = await supabase_service.run_blocking(lambda: fresh_client.table("user_shared_access").select("*").execute())
                     logger.info(f"✅ Query succeeded after recreating client")
                     
                     # Process the data again
@@ -1395,7 +1389,7 @@ async def change_password(
         # Method 1: Try to get email from JWT token
         try:
             if user_token:
-                decoded = jwt.decode(user_token, options={"verify_signature": False})
+                decoded = token_verifier.verify(user_token) or {}
                 email = decoded.get("email")
                 if email:
                     logger.info(f"📧 Got email from JWT token: {email}")
@@ -1416,7 +1410,7 @@ async def change_password(
         if not email:
             try:
                 logger.info("📝 Attempting to get email from admin API (fallback)")
-                user_response = supabase_service.client.auth.admin.get_user_by_id(current_user_id)
+                user_response = await supabase_service.run_blocking(lambda: supabase_service.client.auth.admin.get_user_by_id(current_user_id))
                 if user_response and hasattr(user_response, 'user') and user_response.user:
                     email = user_response.user.email
                     if email:
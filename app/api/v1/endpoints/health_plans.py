@@ -10,7 +10,7 @@ from app.api.v1.endpoints.health_tasks import router as health_tasks_router
 from app.models.health_plans import Goal, HealthTask, TaskCompletion
 from app.models.health_record import HealthRecord
 from app.models.user import User
-from app.utils.translation_helpers import apply_translations_to_goal
+from app.utils.translation_helpers import apply_translations_to_goal, apply_translations_to_goals
 from app.utils.user_language import get_user_language_from_cache
 
 router = APIRouter()
@@ -160,16 +160,15 @@ async def get_health_goals(
                 "version": getattr(goal, 'version', 1)
             }
             
-            # Apply translations
-            translated_goal = await apply_translations_to_goal(
-                db, goal_dict, current_user.id
-            )
-            goal_list.append(translated_goal)
+            goal_list.append(goal_dict)
         
         # Commit progress updates
         db.commit()
         
-        return goal_list
+        # Apply translations in one batch
+        return await apply_translations_to_goals(
+            db, goal_list, current_user.id
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
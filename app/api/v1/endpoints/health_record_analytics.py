@@ -5,11 +5,16 @@ from app.core.database import get_db
 from app.models.user import User
 from app.services.health_record_analytics_service import health_record_analytics_service
 from app.api.v1.endpoints.auth import get_current_user
+from app.core.patient_access import check_patient_access
+from datetime import datetime, timedelta, timezone
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Upper bound on metrics per correlation matrix request
+MAX_CORRELATION_METRICS = 100
+
 # ============================================================================
 # HEALTH RECORD ANALYTICS ENDPOINTS
 # ============================================================================
@@ -82,6 +87,81 @@ async def get_metric_correlation(
             detail=f"Failed to analyze correlation: {str(e)}"
         )
 
+@router.get("/correlation-matrix")
+async def get_metric_correlation_matrix(
+    metric_ids: List[int] = Query(..., description="Metric IDs to correlate (repeat the parameter)"),
+    start_date: Optional[datetime] = Query(None, description="Start of the window (defaults to `days` before end_date)"),
+    end_date: Optional[datetime] = Query(None, description="End of the window (defaults to now)"),
+    days: int = Query(90, description="Window length when start_date is not given", ge=1, le=730),
+    granularity: str = Query("day", regex="^(hour|day|week)$", description="Resampling granularity"),
+    method: str = Query("pearson", regex="^(pearson|spearman)$", description="Correlation method"),
+    min_overlap: int = Query(3, ge=2, description="Minimum shared buckets for a coefficient"),
+    patient_id: Optional[int] = Query(None, description="Patient ID to access (requires permission)"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the correlation matrix of several health metrics on a common time grid"""
+    try:
+        if not 2 <= len(metric_ids) <= MAX_CORRELATION_METRICS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Provide between 2 and {MAX_CORRELATION_METRICS} metric IDs"
+            )
+        
+        target_user_id = current_user.id
+        if patient_id:
+            has_access, error_message = await check_patient_access(
+                db=db,
+                patient_id=patient_id,
+                current_user=current_user,
+                permission_type="view_health_records"
+            )
+            if not has_access:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail=error_message or "You do not have permission to access this patient's health records"
+                )
+            target_user_id = patient_id
+        
+        # Naive datetimes are taken as UTC
+        end_date = (end_date or datetime.now(timezone.utc))
+        end_date = end_date if end_date.tzinfo else end_date.replace(tzinfo=timezone.utc)
+        start_date = start_date or (end_date - timedelta(days=days))
+        start_date = start_date if start_date.tzinfo else start_date.replace(tzinfo=timezone.utc)
+        if start_date >= end_date:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="start_date must be before end_date"
+            )
+        
+        correlation_matrix = health_record_analytics_service.get_correlation_matrix(
+            db=db,
+            user_id=target_user_id,
+            metric_ids=metric_ids,
+            start_date=start_date,
+            end_date=end_date,
+            granularity=granularity,
+            method=method,
+            min_overlap=min_overlap
+        )
+        
+        if "error" in correlation_matrix:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=correlation_matrix["error"]
+            )
+        
+        return correlation_matrix
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get metric correlation matrix: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to analyze correlation matrix: {str(e)}"
+        )
+
 @router.get("/health-score")
 async def get_health_score(
     days: int = Query(30, description="Number of days to analyze", ge=7, le=365),
@@ -315,27 +395,22 @@ async def export_health_data(
 ):
     """Export health data in specified format"""
     try:
-        from datetime import datetime, timedelta
+        from datetime import datetime, timedelta, timezone
         from app.crud.health_record import health_record_crud
+        from app.schemas.health_record import HealthRecordFilter
         
         # Calculate date range
-        end_date = datetime.now()
+        end_date = datetime.now(timezone.utc)
         start_date = end_date - timedelta(days=days)
         
-        # Get health records
-        records = health_record_crud.get_by_user(
+        # Get health records in the date range (measure_start_time if available, otherwise created_at)
+        filtered_records = health_record_crud.get_by_user(
             db=db,
             user_id=current_user.id,
             limit=1000,  # Large limit for export
-            filters=None  # TODO: Add date filter support
+            filters=HealthRecordFilter(start_date=start_date, end_date=end_date)
         )
         
-        # Filter by date
-        filtered_records = [
-            record for record in records 
-            if start_date <= record.recorded_at <= end_date
-        ]
-        
         if format == "json":
             export_data = [
                 {
@@ -345,7 +420,7 @@ async def export_health_data(
                     "value": record.value,
                     "status": record.status,
                     "source": record.source,
-                    "recorded_at": record.recorded_at.isoformat(),
+                    "recorded_at": (record.measure_start_time or record.created_at).isoformat(),
                     "device_id": record.device_id,
                     "device_info": record.device_info,
                     "accuracy": record.accuracy,
@@ -372,7 +447,7 @@ async def export_health_data(
                     "value": str(record.value),
                     "status": record.status,
                     "source": record.source,
-                    "recorded_at": record.recorded_at.isoformat(),
+                    "recorded_at": (record.measure_start_time or record.created_at).isoformat(),
                     "device_id": record.device_id,
                     "accuracy": record.accuracy
                 } for record in filtered_records
@@ -7,7 +7,7 @@ from app.schemas.document import (
     HealthRecordPermissionCreate, HealthRecordPermissionUpdate, 
     HealthRecordPermissionResponse
 )
-from app.services.health_record_permission_service import health_record_permission_service
+from app.services.health_record_permission_service import PERMISSION_AREAS, health_record_permission_service
 from app.api.v1.endpoints.auth import get_current_user
 import logging
 from sqlalchemy import func
@@ -15,6 +15,9 @@ from sqlalchemy import func
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Upper bound on patients per permission matrix request
+MAX_MATRIX_PATIENTS = 500
+
 # ============================================================================
 # HEALTH RECORD PERMISSION ENDPOINTS
 # ============================================================================
@@ -393,6 +396,49 @@ async def check_imaging_permission(
             detail=f"Failed to check permission: {str(e)}"
         )
 
+@router.get("/matrix")
+async def get_permission_matrix(
+    patient_ids: List[int] = Query(..., description="Patients to evaluate (repeat the parameter)"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Current user's view access to every area of each listed patient, in one call (dashboards).
+    
+    "patients" maps each patient ID to 0/1 flags in the order of "areas"; unknown patients are omitted.
+    "incomplete" lists patients whose shared-access contacts could not be read (Supabase unavailable):
+    their flags only cover health_record_permissions grants and should be shown as unknown, not denied.
+    """
+    try:
+        if len(patient_ids) > MAX_MATRIX_PATIENTS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {MAX_MATRIX_PATIENTS} patients per request"
+            )
+        
+        from app.core.patient_access import evaluate_patient_access_matrix
+        
+        matrix, incomplete = await evaluate_patient_access_matrix(db=db, patient_ids=patient_ids, current_user=current_user)
+        
+        return {
+            "professional_id": current_user.id,
+            "areas": list(PERMISSION_AREAS),
+            "patients": {
+                patient_id: [int(areas[area]) for area in PERMISSION_AREAS]
+                for patient_id, areas in matrix.items()
+            },
+            "incomplete": incomplete
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to build permission matrix: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to build permission matrix: {str(e)}"
+        )
+
 @router.get("/patient-data/{patient_id}")
 async def get_patient_data_with_permissions(
     patient_id: int,
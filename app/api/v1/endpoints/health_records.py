@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, Form, File, BackgroundTasks, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, Form, File, BackgroundTasks, Request, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 from typing import List, Optional, Dict, Any
@@ -8,7 +8,9 @@ from app.crud.health_record import (
     health_record_crud, medical_condition_crud, 
     family_medical_history_crud, health_record_doc_lab_crud,
     health_record_section_metric_crud, health_record_metric_crud, health_record_doc_exam_crud,
-    health_record_section_crud, HealthRecordTypeCRUD
+    health_record_section_crud, HealthRecordTypeCRUD,
+    encode_record_cursor, decode_record_cursor, DEFAULT_DATA_POINT_RESOLUTION, DEFAULT_MAX_DATA_POINTS,
+    HealthRecordConflictError
 )
 from app.crud.surgery_hospitalization import surgery_hospitalization_crud
 from app.models.user import User, UserRole
@@ -40,13 +42,18 @@ from app.core.patient_token import decode_patient_token
 from app.utils.translation_helpers import (
     apply_translations_to_sections_with_metrics,
     apply_translations_to_medical_condition,
+    apply_translations_to_medical_conditions,
     apply_translations_to_family_history,
+    apply_translations_to_family_histories,
     apply_translations_to_imaging_document,
-    apply_translations_to_section_template,
-    apply_translations_to_metric_template,
+    apply_translations_to_imaging_documents,
+    apply_translations_to_section_templates,
+    apply_translations_to_metric_templates,
     apply_translations_to_surgery_hospitalization,
+    apply_translations_to_surgeries_hospitalizations,
     apply_translations_to_section,
     apply_translations_to_metric,
+    apply_translations_to_metrics,
     apply_translations_to_goal,
     apply_translations_to_task,
     apply_translations_to_medication
@@ -227,10 +234,30 @@ async def create_bulk_health_records(
             detail=f"Failed to create bulk health records: {str(e)}"
         )
 
+def _decode_cursor_param(cursor: Optional[str]):
+    """Decode the `cursor` query parameter, 400 if it was tampered with"""
+    if not cursor:
+        return None
+    try:
+        return decode_record_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _set_next_cursor(response: Response, records: list, limit: int) -> list:
+    """Trim the look-ahead row fetched beyond `limit` and advertise the next page cursor"""
+    if len(records) > limit:
+        records = records[:limit]
+        response.headers["X-Next-Cursor"] = encode_record_cursor(records[-1])
+    return records
+
+
 @router.get("/", response_model=List[HealthRecordResponse])
 async def read_health_records(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page (replaces skip)"),
     section_id: Optional[int] = Query(None),
     metric_id: Optional[int] = Query(None),
     status: Optional[str] = Query(None),
@@ -243,8 +270,13 @@ async def read_health_records(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get health records for the current user or a specific patient (if permission granted) with optional filtering"""
+    """
+    Get health records for the current user or a specific patient (if permission granted) with optional filtering.
+    When more records follow, the X-Next-Cursor response header holds the cursor for the next page.
+    """
     try:
+        after = _decode_cursor_param(cursor)
+        
         # Determine target user ID
         target_user_id = current_user.id
         
@@ -277,7 +309,8 @@ async def read_health_records(
             end_date=end_date
         )
         
-        records = health_record_crud.get_by_user(db, target_user_id, skip, limit, filters)
+        records = health_record_crud.get_by_user(db, target_user_id, skip, limit + 1, filters, after=after)
+        records = _set_next_cursor(response, records, limit)
         
         return [
             HealthRecordResponse(
@@ -303,6 +336,8 @@ async def read_health_records(
             for record in records
         ]
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to retrieve health records: {e}")
         raise HTTPException(
@@ -312,9 +347,11 @@ async def read_health_records(
 
 @router.get("/search", response_model=List[HealthRecordResponse])
 async def search_health_records(
+    response: Response,
     query: str = Query(..., description="Search query"),
     limit: int = Query(100, ge=1, le=1000),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page (replaces offset)"),
     section_id: Optional[int] = Query(None),
     metric_id: Optional[int] = Query(None),
     status: Optional[str] = Query(None),
@@ -324,8 +361,13 @@ async def search_health_records(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Search health records by text query"""
+    """
+    Search health records by text query.
+    When more results follow, the X-Next-Cursor response header holds the cursor for the next page.
+    """
     try:
+        after = _decode_cursor_param(cursor)
+        
         filters = HealthRecordFilter(
             section_id=section_id,
             metric_id=metric_id,
@@ -336,8 +378,9 @@ async def search_health_records(
         )
         
         records = health_record_crud.search_records(
-            db, current_user.id, query, filters, limit, offset
+            db, current_user.id, query, filters, limit + 1, offset, after=after
         )
+        records = _set_next_cursor(response, records, limit)
         
         return [
             HealthRecordResponse(
@@ -363,6 +406,8 @@ async def search_health_records(
             for record in records
         ]
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to search health records: {e}")
         raise HTTPException(
@@ -453,11 +498,12 @@ async def read_medical_conditions(
                 "updated_at": condition.updated_at,
                 "updated_by": condition.updated_by
             }
-            # Apply translations
-            translated_condition = await apply_translations_to_medical_condition(
-                db, condition_dict, current_user.id
-            )
-            condition_dicts.append(translated_condition)
+            condition_dicts.append(condition_dict)
+        
+        # Apply translations in one batch
+        condition_dicts = await apply_translations_to_medical_conditions(
+            db, condition_dicts, current_user.id
+        )
         
         return [
             MedicalConditionResponse(**condition_dict)
@@ -671,11 +717,12 @@ async def read_family_medical_history(
                 "updated_at": history.updated_at,
                 "updated_by": history.updated_by
             }
-            # Apply translations (language will be retrieved from user profile)
-            translated_history = await apply_translations_to_family_history(
-                db, history_dict, current_user.id
-            )
-            history_dicts.append(translated_history)
+            history_dicts.append(history_dict)
+        
+        # Apply translations in one batch (language will be retrieved from user profile)
+        history_dicts = await apply_translations_to_family_histories(
+            db, history_dicts, current_user.id
+        )
         
         return [
             FamilyMedicalHistoryResponse(**history_dict)
@@ -1314,11 +1361,12 @@ async def read_medical_conditions(
                 "updated_at": condition.updated_at,
                 "updated_by": condition.updated_by
             }
-            # Apply translations (language will be retrieved from user profile)
-            translated_condition = await apply_translations_to_medical_condition(
-                db, condition_dict, current_user.id
-            )
-            condition_dicts.append(translated_condition)
+            condition_dicts.append(condition_dict)
+        
+        # Apply translations in one batch (language will be retrieved from user profile)
+        condition_dicts = await apply_translations_to_medical_conditions(
+            db, condition_dicts, current_user.id
+        )
         
         return [MedicalConditionResponse(**cond) for cond in condition_dicts]
         
@@ -1478,6 +1526,8 @@ async def create_family_medical_history(
 async def get_sections_with_metrics(
     health_record_type_id: Optional[int] = Query(None, description="Filter by health record type ID"),
     include_inactive: bool = Query(False, description="Include inactive sections"),
+    resolution: str = Query(DEFAULT_DATA_POINT_RESOLUTION, regex="^(raw|hourly|daily|weekly)$", description="Data point resolution: raw records or hourly/daily/weekly buckets"),
+    max_points: int = Query(DEFAULT_MAX_DATA_POINTS, ge=1, le=5000, description="Keep only the most recent N data points per metric"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
     request: Request = None
@@ -1485,7 +1535,7 @@ async def get_sections_with_metrics(
     """Get all health record sections with their associated metrics"""
     try:
         sections = health_record_section_metric_crud.get_sections_with_metrics(
-            db, current_user.id, include_inactive, health_record_type_id
+            db, current_user.id, include_inactive, health_record_type_id, resolution, max_points
         )
         
         # Apply translations (language will be retrieved from Accept-Language header or user profile)
@@ -1715,6 +1765,8 @@ async def update_health_record_section(
 async def get_sections_combined(
     health_record_type_id: Optional[int] = Query(None, description="Filter by health record type ID"),
     include_inactive: bool = Query(False, description="Include inactive sections"),
+    resolution: str = Query(DEFAULT_DATA_POINT_RESOLUTION, regex="^(raw|hourly|daily|weekly)$", description="Data point resolution: raw records or hourly/daily/weekly buckets"),
+    max_points: int = Query(DEFAULT_MAX_DATA_POINTS, ge=1, le=5000, description="Keep only the most recent N data points per metric"),
     patient_id: Optional[int] = Query(None, description="Patient ID to access (requires permission)"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -1746,7 +1798,7 @@ async def get_sections_combined(
         
         # Get user sections (from normal tables - user's active sections)
         user_sections = health_record_section_metric_crud.get_sections_with_metrics(
-            db, target_user_id, include_inactive, health_record_type_id
+            db, target_user_id, include_inactive, health_record_type_id, resolution, max_points
         )
         
         # Get admin templates (from template tables - for creating new sections)
@@ -1778,6 +1830,8 @@ async def get_sections_combined(
 async def get_health_records_summary(
     patient_id: Optional[int] = Query(None, description="Patient ID to access (requires permission)"),
     patient_token: Optional[str] = Query(None, description="Patient token to access (requires permission)"),
+    resolution: str = Query("raw", regex="^(raw|hourly|daily|weekly)$", description="Chart data point resolution"),
+    max_points: int = Query(30, ge=1, le=500, description="Most recent data points per metric for charts"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
     request: Request = None
@@ -1813,7 +1867,8 @@ async def get_health_records_summary(
         wellness_metrics = []
         for type_id in wellness_types:
             sections = health_record_section_metric_crud.get_all_sections_with_user_data(
-                db, target_user_id, include_inactive=False, health_record_type_id=type_id
+                db, target_user_id, include_inactive=False, health_record_type_id=type_id,
+                resolution=resolution, max_points=max_points
             )
             for section in sections:
                 for metric in section.get("metrics", []):
@@ -1829,7 +1884,8 @@ async def get_health_records_summary(
         # Get analysis metrics (type 1)
         analysis_metrics = []
         analysis_sections = health_record_section_metric_crud.get_all_sections_with_user_data(
-            db, target_user_id, include_inactive=False, health_record_type_id=1
+            db, target_user_id, include_inactive=False, health_record_type_id=1,
+            resolution=resolution, max_points=max_points
         )
         for section in analysis_sections:
             for metric in section.get("metrics", []):
@@ -1915,7 +1971,7 @@ async def get_health_records_summary(
                     "latest_recorded_at": metric.get("latest_recorded_at"),
                     "total_records": metric.get("total_records", 0),
                     "trend": metric.get("trend"),
-                    "data_points": metric.get("data_points", [])[:30],  # Last 30 for charts
+                    "data_points": metric.get("data_points", []),  # Most recent max_points points for charts
                     "section_id": metric.get("section_id"),
                     "section_name": metric.get("section_name"),
                     "health_record_type_id": metric.get("health_record_type_id")
@@ -2002,13 +2058,12 @@ async def get_all_user_metrics(
                     "section_name": section.name,
                     "section_display_name": section.display_name
                 }
-                # Apply translations (language will be retrieved from user profile)
-                translated_metric = await apply_translations_to_metric(
-                    db, metric_data, current_user.id
-                )
-                all_metrics.append(translated_metric)
+                all_metrics.append(metric_data)
         
-        return all_metrics
+        # Apply translations in one batch (language will be retrieved from user profile)
+        return await apply_translations_to_metrics(
+            db, all_metrics, current_user.id
+        )
         
     except Exception as e:
         logger.error(f"Failed to get all user metrics: {e}")
@@ -2034,14 +2089,13 @@ async def get_section_metrics(
                 db, metric.id, current_user.id
             )
             if metric_details:
-                # Apply translations to metric
-                from app.utils.translation_helpers import apply_translations_to_metric
-                translated_metric = await apply_translations_to_metric(
-                    db, metric_details, current_user.id
-                )
-                metrics_with_stats.append(translated_metric)
+                metrics_with_stats.append(metric_details)
         
-        return metrics_with_stats
+        # Apply translations to metrics in one batch
+        from app.utils.translation_helpers import apply_translations_to_metrics
+        return await apply_translations_to_metrics(
+            db, metrics_with_stats, current_user.id
+        )
         
     except Exception as e:
         logger.error(f"Failed to get section metrics: {e}")
@@ -2730,8 +2784,8 @@ async def get_health_record_doc_exam(
             findings.value if findings else None
         )
         
-        # Convert to response schemas and generate presigned URLs
-        image_summaries = []
+        # Convert to dictionaries and generate presigned URLs
+        image_dicts = []
         for img in images:
             # Generate presigned URL if s3_key exists
             s3_url = img.s3_url
@@ -2762,15 +2816,13 @@ async def get_health_record_doc_exam(
                 "doctor_number": img.doctor_number,
                 "created_at": img.created_at
             }
-            
-            # Apply translations
-            translated_image = await apply_translations_to_imaging_document(
-                db, image_dict, current_user.id
-            )
-            
-            image_summaries.append(
-                HealthRecordDocExamSummary(**translated_image)
-            )
+            image_dicts.append(image_dict)
+        
+        # Apply translations in one batch and convert to response schemas
+        image_dicts = await apply_translations_to_imaging_documents(
+            db, image_dicts, current_user.id
+        )
+        image_summaries = [HealthRecordDocExamSummary(**image_dict) for image_dict in image_dicts]
         
         # Calculate pagination info
         total_pages = (total_count + limit - 1) // limit
@@ -3233,13 +3285,12 @@ async def get_admin_section_templates(
                 "health_record_type_id": section.health_record_type_id,
                 "is_default": section.is_default
             }
-            # Apply translations (language will be retrieved from user profile)
-            translated_section = await apply_translations_to_section_template(
-                db, section_dict, current_user.id
-            )
-            section_dicts.append(translated_section)
+            section_dicts.append(section_dict)
         
-        return section_dicts
+        # Apply translations in one batch (language will be retrieved from user profile)
+        return await apply_translations_to_section_templates(
+            db, section_dicts, current_user.id
+        )
     except Exception as e:
         logger.error(f"Failed to get admin section templates: {e}")
         raise HTTPException(
@@ -3287,13 +3338,12 @@ async def get_admin_metric_templates(
                 "data_type": metric.data_type,
                 "is_default": metric.is_default
             }
-            # Apply translations (language will be retrieved from user profile)
-            translated_metric = await apply_translations_to_metric_template(
-                db, metric_dict, current_user.id
-            )
-            metric_dicts.append(translated_metric)
+            metric_dicts.append(metric_dict)
         
-        return metric_dicts
+        # Apply translations in one batch (language will be retrieved from user profile)
+        return await apply_translations_to_metric_templates(
+            db, metric_dicts, current_user.id
+        )
     except Exception as e:
         logger.error(f"Failed to get admin metric templates: {e}")
         raise HTTPException(
@@ -3338,11 +3388,12 @@ async def get_surgeries_hospitalizations(
                 "created_by": surgery.created_by,
                 "updated_by": surgery.updated_by
             }
-            # Apply translations (language will be retrieved from user profile)
-            translated_surgery = await apply_translations_to_surgery_hospitalization(
-                db, surgery_dict, current_user.id
-            )
-            surgery_dicts.append(translated_surgery)
+            surgery_dicts.append(surgery_dict)
+        
+        # Apply translations in one batch (language will be retrieved from user profile)
+        surgery_dicts = await apply_translations_to_surgeries_hospitalizations(
+            db, surgery_dicts, current_user.id
+        )
         
         return SurgeryHospitalizationListResponse(
             surgeries=surgery_dicts,
@@ -3649,6 +3700,11 @@ async def update_health_record(
         
     except HTTPException:
         raise
+    except HealthRecordConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error(f"Failed to update health record: {e}")
         raise HTTPException(
@@ -3687,63 +3743,6 @@ async def delete_health_record(
 # LAB DOCUMENT UPLOAD ENDPOINTS (moved from lab_documents.py)
 # ============================================================================
 
-# Store OCR processing jobs in memory (in production, use Redis or database)
-ocr_processing_jobs = {}
-
-def process_ocr_background(job_id: str, file_content: bytes, filename: str, s3_url: str, user_id: int, form_data: dict = None):
-    """Background task to process OCR for lab documents"""
-    try:
-        logger.info(f"Starting OCR processing for job {job_id}")
-        ocr_processing_jobs[job_id] = {
-            "status": "processing",
-            "message": "OCR extraction in progress",
-            "progress": 0,
-            "form_data": form_data
-        }
-        
-        from app.services.ocr_lab_extractor import extract_lab_data_with_ocr
-        from app.services.lab_document_analysis_service import LabDocumentAnalysisService
-        
-        lab_service = LabDocumentAnalysisService()
-        
-        # Extract data with OCR
-        lab_data = extract_lab_data_with_ocr(file_content, filename)
-        
-        # Parse reference ranges
-        for item in lab_data:
-            if 'reference' in item or 'reference_range' in item:
-                original_reference = item.get('reference') or item.get('reference_range', '')
-                if original_reference:
-                    parsed_range = lab_service._parse_simple_range(original_reference)
-                    item['reference_range_parsed'] = {
-                        'min': parsed_range.get('min'),
-                        'max': parsed_range.get('max'),
-                        'original': original_reference
-                    }
-        
-        # Update job status
-        ocr_processing_jobs[job_id] = {
-            "status": "completed",
-            "message": "OCR extraction completed successfully",
-            "lab_data": lab_data,
-            "extracted_records_count": len(lab_data),
-            "s3_url": s3_url,
-            "ocr_used": True,
-            "progress": 100,
-            "form_data": form_data
-        }
-        
-        logger.info(f"OCR processing completed for job {job_id}: {len(lab_data)} records found")
-        
-    except Exception as e:
-        logger.error(f"OCR processing failed for job {job_id}: {e}")
-        ocr_processing_jobs[job_id] = {
-            "status": "failed",
-            "message": f"OCR extraction failed: {str(e)}",
-            "error": str(e),
-            "progress": 0
-        }
-
 @router.post("/health-record-doc-lab/upload", response_model=dict)
 async def upload_and_analyze_lab_document(
     file: UploadFile = File(..., description="Lab report PDF file"),
@@ -3752,6 +3751,7 @@ async def upload_and_analyze_lab_document(
     doc_type: Optional[str] = Form(None, description="Document type"),
     provider: Optional[str] = Form(None, description="Healthcare provider"),
     use_ocr: bool = Form(False, description="Force OCR processing for scanned documents"),
+    ocr_async: bool = Form(False, description="Queue OCR as a job and poll /ocr-status/{job_id} instead of waiting"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
     background_tasks: BackgroundTasks = BackgroundTasks()
@@ -3766,6 +3766,9 @@ async def upload_and_analyze_lab_document(
     4. Parse lab metrics using the multilingual extraction logic
     5. Return extracted data for user review (no health records created)
     
+    With use_ocr and ocr_async, OCR runs as a queued job instead and the response carries
+    a job_id to poll at /health-record-doc-lab/ocr-status/{job_id}.
+    
     Use /bulk endpoint to create health records after user confirmation.
     """
     try:
@@ -3820,6 +3823,30 @@ async def upload_and_analyze_lab_document(
                 detail=f"Failed to upload file to S3: {str(s3_error)}"
             )
 
+        # Queue OCR as a durable job; any OCR worker picks it up
+        if use_ocr and ocr_async:
+            from app.services.ocr_job_queue import OCRJobQueue, ocr_job_worker_pool
+            form_data = {
+                "doc_date": doc_date,
+                "doc_type": doc_type,
+                "provider": provider,
+                "description": description
+            }
+            job_id = OCRJobQueue.enqueue(
+                db, current_user.id, file_content, file.filename, s3_url=s3_url, form_data=form_data
+            )
+            ocr_job_worker_pool.wake()
+            logger.info(f"Queued OCR job {job_id} for user {current_user.id}")
+            return {
+                "success": True,
+                "message": "OCR extraction queued",
+                "job_id": job_id,
+                "status": "queued",
+                "s3_url": s3_url,
+                "ocr_used": True,
+                "form_data": form_data
+            }
+        
         # If OCR is explicitly requested (second request from frontend)
         if use_ocr:
             logger.info("OCR mode explicitly requested by user")
@@ -4030,7 +4057,8 @@ async def upload_and_analyze_lab_document(
 @router.get("/health-record-doc-lab/ocr-status/{job_id}", response_model=dict)
 async def get_ocr_processing_status(
     job_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     """
     Get the status of an OCR processing job
@@ -4039,23 +4067,19 @@ async def get_ocr_processing_status(
     - status: queued, processing, completed, failed
     - message: Status message
     - lab_data: Extracted data (only when completed)
-    - progress: Processing progress (0-100)
+    - progress: Processing progress (0-100), with pages_done / pages_total
+    - created_at, started_at, finished_at, duration_seconds: Timings
     """
-    if job_id not in ocr_processing_jobs:
+    from app.services.ocr_job_queue import OCRJobQueue
+    
+    job = OCRJobQueue.get_for_user(db, job_id, current_user.id)
+    if not job:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="OCR job not found"
         )
     
-    job_status = ocr_processing_jobs[job_id]
-    
-    # Include form_data in response if available
-    response = {
-        "job_id": job_id,
-        **job_status
-    }
-    
-    return response
+    return OCRJobQueue.to_status(job)
 
 @router.post("/health-record-doc-lab/check-similarity", response_model=dict)
 async def check_lab_document_similarity(
@@ -4147,7 +4171,8 @@ async def check_lab_document_similarity(
         # Calculate similarity using OpenAI
         similarity_results = await metric_similarity_service.calculate_similarity_openai_batch(
             parsed_names=parsed_names,
-            existing_metrics_data=existing_metrics_data
+            existing_metrics_data=existing_metrics_data,
+            db=db
         )
         
         # Map results back to include section names
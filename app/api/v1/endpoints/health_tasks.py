@@ -9,7 +9,7 @@ from app.core.database import get_db
 from app.api.v1.endpoints.auth import get_current_user
 from app.models.user import User
 from app.models.health_plans import HealthTask, TaskCompletion
-from app.utils.translation_helpers import apply_translations_to_task
+from app.utils.translation_helpers import apply_translations_to_task, apply_translations_to_tasks
 from app.utils.user_language import get_user_language_from_cache
 
 logger = logging.getLogger(__name__)
@@ -73,13 +73,12 @@ async def get_health_tasks(
                 "version": getattr(task, 'version', 1)
             }
             
-            # Apply translations
-            translated_task = await apply_translations_to_task(
-                db, task_dict, current_user.id
-            )
-            task_list.append(translated_task)
+            task_list.append(task_dict)
         
-        return task_list
+        # Apply translations in one batch
+        return await apply_translations_to_tasks(
+            db, task_list, current_user.id
+        )
     except Exception as e:
         logger.error(f"Failed to get health tasks: {e}")
         raise HTTPException(
@@ -8,7 +8,7 @@ from app.api.v1.endpoints.auth import get_current_user
 from app.crud.medication import medication_crud
 from app.models.medication import MedicationStatus
 from app.core.patient_access import check_patient_access
-from app.utils.translation_helpers import apply_translations_to_medication
+from app.utils.translation_helpers import apply_translations_to_medication, apply_translations_to_medications
 from app.utils.user_language import get_user_language_from_cache
 import logging
 
@@ -120,7 +120,7 @@ async def read_medications(
         medications = medications[skip:skip + limit]
         
         # Convert to dictionaries and apply translations
-        medication_list = []
+        medication_dicts = []
         for med in medications:
             medication_dict = {
                 "id": med.id,
@@ -147,13 +147,13 @@ async def read_medications(
                 "version": getattr(med, 'version', 1)
             }
             
-            # Apply translations
-            translated_medication = await apply_translations_to_medication(
-                db, medication_dict, target_user_id
-            )
-            medication_list.append(MedicationResponse(**translated_medication))
+            medication_dicts.append(medication_dict)
         
-        return medication_list
+        # Apply translations in one batch
+        medication_dicts = await apply_translations_to_medications(
+            db, medication_dicts, target_user_id
+        )
+        return [MedicationResponse(**medication_dict) for medication_dict in medication_dicts]
     except HTTPException:
         raise
     except Exception as e:
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status, WebSocket, WebSocketDisconnect, Header
 from sqlalchemy.orm import Session
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Set
 from datetime import datetime
 import json
 import os
@@ -16,33 +16,61 @@ from app.schemas.notification import (
 )
 from app.crud.notification import notification_crud
 from app.models.notification import NotificationStatus
+from app.websocket.pubsub import pubsub
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# Store active WebSocket connections
+# Store active WebSocket connections (this worker's; other workers receive notifications via pub/sub)
 class ConnectionManager:
     def __init__(self):
         self.active_connections: Dict[int, List[WebSocket]] = {}
+        self._subscribed_users: Set[int] = set()  # Users whose notify channel this worker listens on
     
     async def connect(self, websocket: WebSocket, user_id: int):
         await websocket.accept()
-        if user_id not in self.active_connections:
-            self.active_connections[user_id] = []
-        self.active_connections[user_id].append(websocket)
+        self.active_connections.setdefault(user_id, []).append(websocket)
         print(f"✅ User {user_id} connected. Total connections: {len(self.active_connections[user_id])}")
+        if user_id not in self._subscribed_users:
+            try:
+                await pubsub.subscribe(f"notify:{user_id}", self._on_published)
+                self._subscribed_users.add(user_id)
+            except Exception as e:
+                # Local delivery still works; the subscribe is retried on the user's next connect
+                logger.error(f"Failed to subscribe to notifications for user {user_id}: {e}")
     
-    def disconnect(self, websocket: WebSocket, user_id: int):
+    async def disconnect(self, websocket: WebSocket, user_id: int):
         if user_id in self.active_connections:
             if websocket in self.active_connections[user_id]:
                 self.active_connections[user_id].remove(websocket)
             if not self.active_connections[user_id]:
                 del self.active_connections[user_id]
         print(f"❌ User {user_id} disconnected")
+        if user_id not in self.active_connections and user_id in self._subscribed_users:
+            self._subscribed_users.discard(user_id)
+            try:
+                await pubsub.unsubscribe(f"notify:{user_id}")
+                if user_id in self.active_connections:
+                    # Reconnected while unsubscribing (e.g. a page refresh): its subscribe may have been undone
+                    await pubsub.subscribe(f"notify:{user_id}", self._on_published)
+                    self._subscribed_users.add(user_id)
+            except Exception as e:
+                logger.error(f"Failed to unsubscribe from notifications for user {user_id}: {e}")
     
     async def send_notification(self, user_id: int, message: dict):
+        await self._send_local(user_id, message)
+        try:
+            await pubsub.publish(f"notify:{user_id}", {"user_id": user_id, "message": message})
+        except Exception as e:
+            logger.error(f"Failed to publish notification for user {user_id}: {e}")
+    
+    async def _on_published(self, payload: dict):
+        if payload.get("origin") != pubsub.worker_id:
+            await self._send_local(int(payload["user_id"]), payload["message"])
+    
+    async def _send_local(self, user_id: int, message: dict):
         if user_id in self.active_connections:
-            for connection in self.active_connections[user_id]:
+            for connection in list(self.active_connections[user_id]):
                 try:
                     await connection.send_json(message)
                     print(f"📤 Sent notification to user {user_id}")
@@ -71,10 +99,10 @@ async def websocket_notifications(websocket: WebSocket, user_id: int):
                 if data == "ping":
                     await websocket.send_json({"action": "pong"})
     except WebSocketDisconnect:
-        manager.disconnect(websocket, user_id)
+        await manager.disconnect(websocket, user_id)
     except Exception as e:
         print(f"WebSocket error for user {user_id}: {e}")
-        manager.disconnect(websocket, user_id)
+        await manager.disconnect(websocket, user_id)
 
 @router.get("/", response_model=List[NotificationWithMedication])
 async def get_notifications(
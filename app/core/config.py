@@ -11,6 +11,14 @@ class Settings(BaseSettings):
     SUPABASE_URL: str = "https://your-project.supabase.co"
     SUPABASE_ANON_KEY: str = "your-supabase-anon-key"
     SUPABASE_SERVICE_ROLE_KEY: str = "your-supabase-service-role-key"
+    SUPABASE_MAX_CONCURRENCY: int = 16  # Concurrent Supabase calls per process (thread pool / connection pool size)
+    SUPABASE_TIMEOUT_SECONDS: float = 15.0  # Per-call timeout
+    # Access token verification (app/core/token_verifier.py)
+    SUPABASE_JWT_SECRET: str = ""  # Project JWT secret, verifies HS256 tokens
+    SUPABASE_JWKS_URL: str = ""  # Default: {SUPABASE_URL}/auth/v1/.well-known/jwks.json (ES256/RS256 signing keys)
+    SUPABASE_JWKS_REFRESH_SECONDS: int = 600
+    SUPABASE_JWT_AUDIENCE: str = "authenticated"
+    TOKEN_CLAIMS_CACHE_MAX_ENTRIES: int = 10000  # Verified tokens memoised until they expire
     
     # AWS Configuration (Sensitive Health Data)
     AWS_ACCESS_KEY_ID: str = "your-aws-access-key"
@@ -42,6 +50,23 @@ class Settings(BaseSettings):
     # Redis
     REDIS_URL: str = "redis://localhost:6379"
     
+    # WebSocket fan-out between workers: "memory" (single worker only) or "redis" (REDIS_URL)
+    WEBSOCKET_PUBSUB_BACKEND: str = "memory"
+    
+    # User profile cache (SupabaseService.get_user_profile)
+    PROFILE_CACHE_MAX_ENTRIES: int = 10000  # Per-process LRU (0 disables the local tier)
+    PROFILE_CACHE_TTL_SECONDS: int = 60
+    PROFILE_CACHE_STALE_SECONDS: int = 300  # Served for this long past the TTL while a refresh runs
+    PROFILE_CACHE_SHARED: bool = False  # Share cached profiles between workers through Redis (REDIS_URL)
+    
+    # Resolved users (get_current_user); bounds how long role/is_active edits made by other workers take to apply
+    USER_CACHE_MAX_ENTRIES: int = 10000
+    USER_CACHE_TTL_SECONDS: int = 30
+    
+    # Patient access checks (compiled user_shared_access rows and decisions)
+    PATIENT_ACCESS_CACHE_MAX_ENTRIES: int = 20000
+    PATIENT_ACCESS_CACHE_TTL_SECONDS: int = 30
+    
     # Email
     SMTP_HOST: str = "smtp.gmail.com"
     SMTP_PORT: int = 587
@@ -87,6 +112,9 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str = ""
     OPENAI_MODEL: str = "gpt-4-turbo-preview"
     OPENAI_MAX_TOKENS: int = 4000
+    TRANSLATION_BATCH_MAX_ITEMS: int = 100  # Texts per batched translation call
+    TRANSLATION_CACHE_MAX_ENTRIES: int = 50000  # In-process LRU of stored translations (0 disables)
+    TRANSLATION_CACHE_TTL_SECONDS: int = 600  # Bounds staleness of edits made through other workers
     
     # Lambda Webhook Configuration
     LAMBDA_WEBHOOK_TOKEN: str = "your-lambda-webhook-token"
@@ -111,5 +139,46 @@ class Settings(BaseSettings):
     THRYVE_WEB_AUTH_USERNAME: str = ""  # Basic auth username
     THRYVE_WEB_AUTH_PASSWORD: str = ""  # Basic auth password
     THRYVE_APP_AUTHORIZATION: str = ""  # AppAuthorization header value
+    THRYVE_BULK_INGEST_ENABLED: bool = True  # Resolve mappings and write records set-wise per webhook payload
+    THRYVE_INGEST_BATCH_SIZE: int = 1000  # Records per INSERT/UPDATE statement in bulk ingest mode
+    THRYVE_WEBHOOK_VERIFY_HMAC: bool = False  # Reject pushes with an invalid X-HMAC-Signature
+    THRYVE_INGEST_QUEUE_ENABLED: bool = True  # Spool pushes to thryve_webhook_intake instead of BackgroundTasks
+    THRYVE_INGEST_WORKERS: int = 2  # Ingest worker threads per app process (0 = only external workers drain the spool)
+    THRYVE_INGEST_POLL_INTERVAL_SECONDS: float = 2.0
+    THRYVE_INGEST_MAX_ATTEMPTS: int = 5  # Attempts before a payload is dead-lettered
+    THRYVE_INGEST_RETRY_BASE_SECONDS: int = 30  # Exponential backoff base between attempts
+    THRYVE_INGEST_RETRY_MAX_SECONDS: int = 3600
+    THRYVE_INGEST_LOCK_TIMEOUT_SECONDS: int = 900  # Claims older than this are assumed dead and requeued
+    THRYVE_INGEST_RETENTION_HOURS: int = 72  # Processed payloads are purged after this
+
+    # Health record rollups (hourly/daily pre-aggregates kept in sync on every write; hourly and
+    # daily chart data points are read from them - migration 0008 fills them for existing records)
+    HEALTH_RECORD_ROLLUPS_ENABLED: bool = True
+
+    # Metric-name embeddings (similarity check for parsed lab metrics)
+    METRIC_EMBEDDING_MODEL: str = "text-embedding-3-small"
+    METRIC_EMBEDDING_BATCH_SIZE: int = 1000  # Texts per embeddings API call
+    METRIC_EMBEDDING_INDEX_MAX_SIZE: int = 50000  # Vectors kept in memory per process
+
+    # Lab PDF OCR (page-parallel process pool)
+    OCR_MAX_WORKERS: int = 0  # 0 = one worker per CPU core; 1 = OCR in-process
+    OCR_PAGE_TIMEOUT_SECONDS: int = 300  # Give up if no page finishes within this
+
+    # Medical exam PDF OCR: start at EXAM_OCR_MIN_DPI, escalate towards the requested DPI on low confidence
+    EXAM_OCR_ADAPTIVE_DPI: bool = True
+    EXAM_OCR_MIN_DPI: int = 150
+    EXAM_OCR_MIN_CONFIDENCE: float = 70.0  # Mean Tesseract word confidence (0-100) needed to accept a pass
+
+    # Lab OCR jobs (ocr_jobs table, drained by in-app workers and/or run_ocr_worker.py)
+    OCR_JOB_WORKERS: int = 1  # OCR job worker threads per app process (0 = only external workers run jobs)
+    OCR_JOB_POLL_INTERVAL_SECONDS: float = 2.0
+    OCR_JOB_MAX_ATTEMPTS: int = 2  # Attempts before a job is marked failed
+    OCR_JOB_LOCK_TIMEOUT_SECONDS: int = 900  # Claims without progress for this long are assumed dead and requeued
+    OCR_JOB_RETENTION_HOURS: int = 24  # Finished jobs (and their results) are purged after this
+
+    # Content-addressed cache of PDF text / OCR results (local disk, shared by workers on a host)
+    EXTRACTION_CACHE_ENABLED: bool = False  # Entries hold PHI; also requires EXTRACTION_CACHE_DIR
+    EXTRACTION_CACHE_DIR: str = ""  # Owned by the app user, mode 0700, on encrypted storage
+    EXTRACTION_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
 
 settings = Settings() 
\ No newline at end of file
@@ -1,15 +1,15 @@
 """
 Helper functions for checking patient access permissions
 """
-from typing import Optional, Tuple, Any, Dict
+from typing import Optional, Tuple, Any, Dict, List
 import asyncio
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from app.models.user import User
 from app.core.supabase_client import supabase_service
-from app.services.health_record_permission_service import health_record_permission_service
-from app.core.config import settings
-from supabase import create_client
+from app.services.user_cache import get_user_snapshot, get_user_snapshots
+from app.services.health_record_permission_service import PERMISSION_AREAS, health_record_permission_service
+from app.services.patient_access_cache import SharedAccessGrants, patient_access_cache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -29,6 +29,10 @@ def _parse_permission_type(permission_type: Optional[str]) -> Tuple[Optional[str
     return None, None
 
 
+# Permission areas whose shared-access contact flags use a different name (<name>_<action>)
+CONTACT_FLAG_AREAS = {"health_plans": "health_plan"}
+
+
 def _contact_has_permission(
     contact: Dict[str, Any],
     action: Optional[str],
@@ -44,7 +48,7 @@ def _contact_has_permission(
     if not permission_type or not action or not area:
         return True
 
-    permission_key = f"{area}_{action}"
+    permission_key = f"{CONTACT_FLAG_AREAS.get(area, area)}_{action}"
     permission_value = contact.get(permission_key)
 
     if permission_value is None:
@@ -77,141 +81,206 @@ async def check_patient_access(
     try:
         logger.info(f"🔍 Checking patient access: current_user_id={current_user.id}, patient_id={patient_id}, permission_type={permission_type}")
 
-        action, area = _parse_permission_type(permission_type)
-        reason = None
-        
         # If user is trying to access their own data, allow it
         if current_user.id == patient_id:
             logger.info(f"✅ User accessing own data, allowing access")
             return True, None
         
-        # Get patient user from database
-        patient_user = db.query(User).filter(User.id == patient_id).first()
-        if not patient_user:
-            logger.warning(f"❌ Patient not found in database: patient_id={patient_id}")
-            return False, "Patient not found"
-        
-        logger.info(f"📋 Found patient: id={patient_user.id}, email={patient_user.email}, supabase_id={patient_user.supabase_user_id}")
+        cached_decision = patient_access_cache.get_decision(patient_id, current_user.id, permission_type)
+        if cached_decision is not None:
+            logger.info(f"{'✅' if cached_decision[0] else '❌'} Cached access decision for patient {patient_id}")
+            return cached_decision
         
-        # Get current user's email
-        current_user_email = current_user.email
-        if not current_user_email:
-            logger.warning(f"❌ Current user has no email address: user_id={current_user.id}")
-            return False, "Current user has no email address"
-        
-        logger.info(f"📧 Checking access for current_user_email={current_user_email} in patient's shared access")
-        
-        # Check user_shared_access table in Supabase (primary method)
-        # Use service role client which bypasses RLS and doesn't require JWT
-        try:
-            # Create a fresh client with service role key to avoid token expiration issues
-            # This ensures we always use a valid service role client that bypasses RLS
-            service_client = create_client(
-                settings.SUPABASE_URL,
-                settings.SUPABASE_SERVICE_ROLE_KEY
-            )
-            
-            try:
-                shared_access_response = await asyncio.wait_for(
-                    asyncio.to_thread(
-                        lambda: service_client.table("user_shared_access").select("*").eq(
-                            "user_id", patient_user.supabase_user_id
-                        ).execute()
-                    ),
-                    timeout=5.0
-                )
-            except asyncio.TimeoutError:
-                logger.warning(
-                    "⚠️ Supabase shared access query timed out for patient_id=%s", patient_id
-                )
-                shared_access_response = None
-            except Exception as supabase_error:
-                logger.error(f"❌ Error checking user_shared_access: {supabase_error}", exc_info=True)
-                shared_access_response = None
-            
-            shared_access_data = []
-            if shared_access_response is not None and getattr(shared_access_response, "data", None):
-                shared_access_data = shared_access_response.data
-            
-            logger.info(f"📊 Found {len(shared_access_data)} shared_access records for patient")
-            
-            if shared_access_data:
-                shared_access_record = shared_access_data[0]
-                
-                # Check health_professionals
-                health_professionals = shared_access_record.get("health_professionals", [])
-                logger.info(f"👨‍⚕️ Checking {len(health_professionals) if isinstance(health_professionals, list) else 0} health professionals")
-                if isinstance(health_professionals, list):
-                    for contact in health_professionals:
-                        contact_email = contact.get("profile_email") or contact.get("email")
-                        is_active = contact.get("is_active", True)
-                        logger.info(f"  - Contact: email={contact_email}, is_active={is_active}")
-                        if contact_email and contact_email.lower() == current_user_email.lower():
-                            if is_active:
-                                if _contact_has_permission(contact, action, area, permission_type):
-                                    logger.info(f"✅ Access granted via user_shared_access (health_professionals) for patient {patient_id}")
-                                    return True, None
-                                logger.warning(
-                                    "⚠️ Contact located but missing '%s' permission for patient %s",
-                                    permission_type,
-                                    patient_id,
-                                )
-                            else:
-                                logger.warning(f"⚠️ Contact found but is_active=False")
-                
-                # Check family_friends
-                family_friends = shared_access_record.get("family_friends", [])
-                logger.info(f"👨‍👩‍👧 Checking {len(family_friends) if isinstance(family_friends, list) else 0} family/friends")
-                if isinstance(family_friends, list):
-                    for contact in family_friends:
-                        contact_email = contact.get("profile_email") or contact.get("email")
-                        is_active = contact.get("is_active", True)
-                        logger.info(f"  - Contact: email={contact_email}, is_active={is_active}")
-                        if contact_email and contact_email.lower() == current_user_email.lower():
-                            if is_active:
-                                if _contact_has_permission(contact, action, area, permission_type):
-                                    logger.info(f"✅ Access granted via user_shared_access (family_friends) for patient {patient_id}")
-                                    return True, None
-                                logger.warning(
-                                    "⚠️ Family/friend contact located but missing '%s' permission for patient %s",
-                                    permission_type,
-                                    patient_id,
-                                )
-                            else:
-                                logger.warning(f"⚠️ Contact found but is_active=False")
-            else:
-                logger.warning(f"⚠️ No shared_access records found for patient {patient_id} (supabase_id={patient_user.supabase_user_id})")
-        except Exception as e:
-            error_msg = str(e)
-            # Check if it's a JWT expiration error
-            if "JWT expired" in error_msg or "PGRST303" in error_msg:
-                logger.warning(f"⚠️ JWT expired error when checking user_shared_access. This may indicate service role key configuration issue. Falling back to database permissions check. Error: {e}")
-            else:
-                logger.error(f"❌ Error checking user_shared_access: {e}", exc_info=True)
-        
-        # Fallback: Check health_record_permissions table
-        if area == "health_records":
-            access_type = action or "view"
-            # health_record_permission_service currently supports view/edit/download tokens
-            has_access, reason = health_record_permission_service.check_health_record_access(
-                db=db,
-                patient_id=patient_id,
-                professional_id=current_user.id,
-                access_type=access_type or "view"
-            )
-
-            if has_access:
-                logger.info(f"✅ Access granted via health_record_permissions for patient {patient_id} with access_type={access_type}")
-                return True, None
-        
-        logger.warning(f"❌ Access denied for patient {patient_id}: {reason}")
-        return False, reason or "No permission to access this patient's data"
+        has_access, reason, cacheable = await _evaluate_patient_access(db, patient_id, current_user, permission_type)
+        if cacheable:
+            patient_access_cache.put_decision(patient_id, current_user.id, permission_type, (has_access, reason))
+        return has_access, reason
         
     except Exception as e:
         logger.error(f"❌ Error checking patient access: {e}")
         return False, f"Error checking permissions: {str(e)}"
 
 
+async def _get_shared_access_grants(patient_user) -> Optional[SharedAccessGrants]:
+    """Compiled user_shared_access row of a patient (cached); None if it could not be read"""
+    return (await _get_shared_access_grants_bulk([patient_user])).get(patient_user.supabase_user_id)
+
+
+async def _get_shared_access_grants_bulk(patient_users) -> Dict[str, Optional[SharedAccessGrants]]:
+    """
+    Compiled user_shared_access rows of many patients, keyed by Supabase UID: cached ones plus a
+    single Supabase query for the rest. A patient maps to None if their row could not be read.
+    """
+    grants_by_patient: Dict[str, Optional[SharedAccessGrants]] = {}
+    missing = {}
+    for patient_user in patient_users:
+        if not patient_user.supabase_user_id:
+            continue
+        grants = patient_access_cache.get_grants(patient_user.supabase_user_id)
+        if grants is not None:
+            grants_by_patient[patient_user.supabase_user_id] = grants
+        else:
+            missing[patient_user.supabase_user_id] = patient_user
+    if not missing:
+        return grants_by_patient
+    
+    # Service role client bypasses RLS and doesn't require a user JWT
+    try:
+        shared_access_response = await supabase_service.run_blocking(
+            lambda: supabase_service.client.table("user_shared_access").select("*").in_(
+                "user_id", list(missing)
+            ).execute(),
+            timeout=5.0
+        )
+    except asyncio.TimeoutError:
+        logger.warning(
+            "⚠️ Supabase shared access query timed out for patient_ids=%s", [p.id for p in missing.values()]
+        )
+        return {**grants_by_patient, **dict.fromkeys(missing)}
+    except Exception as supabase_error:
+        error_msg = str(supabase_error)
+        # Check if it's a JWT expiration error
+        if "JWT expired" in error_msg or "PGRST303" in error_msg:
+            logger.warning(f"⚠️ JWT expired error when checking user_shared_access. This may indicate service role key configuration issue. Falling back to database permissions check. Error: {supabase_error}")
+        else:
+            logger.error(f"❌ Error checking user_shared_access: {supabase_error}", exc_info=True)
+        return {**grants_by_patient, **dict.fromkeys(missing)}
+    
+    records = {}
+    for record in getattr(shared_access_response, "data", None) or []:
+        records.setdefault(record.get("user_id"), record)
+    logger.info(f"📊 Found {len(records)} shared_access records for {len(missing)} patients")
+    for supabase_user_id, patient_user in missing.items():
+        grants = SharedAccessGrants(records.get(supabase_user_id))
+        patient_access_cache.put_grants(patient_user.id, supabase_user_id, grants)
+        grants_by_patient[supabase_user_id] = grants
+    return grants_by_patient
+
+
+async def _evaluate_patient_access(
+    db: Session,
+    patient_id: int,
+    current_user: User,
+    permission_type: str
+) -> Tuple[bool, Optional[str], bool]:
+    """Uncached access check: (has_access, error_message, whether the outcome may be cached)"""
+    action, area = _parse_permission_type(permission_type)
+    reason = None
+    
+    # Get patient user from database
+    patient_user = get_user_snapshot(db, patient_id)
+    if not patient_user:
+        logger.warning(f"❌ Patient not found in database: patient_id={patient_id}")
+        return False, "Patient not found", False
+    
+    logger.info(f"📋 Found patient: id={patient_user.id}, email={patient_user.email}, supabase_id={patient_user.supabase_user_id}")
+    
+    # Get current user's email
+    current_user_email = current_user.email
+    if not current_user_email:
+        logger.warning(f"❌ Current user has no email address: user_id={current_user.id}")
+        return False, "Current user has no email address", False
+    
+    # Check user_shared_access table in Supabase (primary method)
+    grants = await _get_shared_access_grants(patient_user)
+    cacheable = grants is not None
+    if grants is not None:
+        contacts = grants.contacts_for(current_user_email)
+        for source, flags in contacts:
+            if _contact_has_permission(flags, action, area, permission_type):
+                logger.info(f"✅ Access granted via user_shared_access ({source}) for patient {patient_id}")
+                return True, None, True
+        if contacts:
+            logger.warning(
+                "⚠️ Contact located but missing '%s' permission for patient %s",
+                permission_type,
+                patient_id,
+            )
+        elif grants.is_inactive_contact(current_user_email):
+            logger.warning(f"⚠️ Contact found but is_active=False")
+    
+    # Fallback: Check health_record_permissions table
+    if area == "health_records":
+        access_type = action or "view"
+        # health_record_permission_service currently supports view/edit/download tokens
+        has_access, reason = health_record_permission_service.check_health_record_access(
+            db=db,
+            patient_id=patient_id,
+            professional_id=current_user.id,
+            access_type=access_type or "view"
+        )
+
+        if has_access:
+            logger.info(f"✅ Access granted via health_record_permissions for patient {patient_id} with access_type={access_type}")
+            return True, None, True
+        # The service reports its own database errors as a denial reason
+        if reason and reason.startswith("Error checking permissions"):
+            cacheable = False
+    
+    logger.warning(f"❌ Access denied for patient {patient_id}: {reason}")
+    return False, reason or "No permission to access this patient's data", cacheable
+
+
+async def evaluate_patient_access_matrix(
+    db: Session,
+    patient_ids: List[int],
+    current_user: User
+) -> Tuple[Dict[int, Dict[str, bool]], List[int]]:
+    """
+    View access of the current user to every area (PERMISSION_AREAS) of many patients at once,
+    e.g. for a professional's dashboard: one users query, one health_record_permissions query and
+    at most one Supabase query, however many patients are listed.
+    
+    An area is granted by an active shared-access contact allowing "view_<area>" exactly as
+    check_patient_access decides it (so areas without a contact flag, such as lab_results and
+    imaging, follow its missing-view-flag default), or by the area's flag on an active,
+    unexpired health_record_permissions record. The user's own data is fully accessible.
+    
+    Database errors propagate. Patients whose shared access could not be read from Supabase
+    are listed as incomplete: their flags only reflect health_record_permissions.
+    
+    Args:
+        db: Database session
+        patient_ids: Patients to evaluate
+        current_user: Current authenticated user
+        
+    Returns:
+        ({patient_id: {area: has_access}}, incomplete patient IDs); unknown patients are left out
+    """
+    matrix: Dict[int, Dict[str, bool]] = {}
+    incomplete: List[int] = []
+    other_ids = set(patient_ids)
+    if current_user.id in other_ids:
+        other_ids.discard(current_user.id)
+        matrix[current_user.id] = dict.fromkeys(PERMISSION_AREAS, True)
+    if not other_ids:
+        return matrix, incomplete
+    
+    patients = get_user_snapshots(db, other_ids)
+    grants_by_patient = await _get_shared_access_grants_bulk(patients.values())
+    permission_matrix = health_record_permission_service.get_access_matrix(
+        db, professional_id=current_user.id, patient_ids=list(patients)
+    )
+    
+    for patient_id, patient_user in patients.items():
+        granted = permission_matrix.get(patient_id) or dict.fromkeys(PERMISSION_AREAS, False)
+        grants = grants_by_patient.get(patient_user.supabase_user_id)
+        if patient_user.supabase_user_id and grants is None:
+            incomplete.append(patient_id)
+        contacts = grants.contacts_for(current_user.email) if grants is not None and current_user.email else []
+        matrix[patient_id] = {
+            area: granted[area] or any(
+                _contact_has_permission(flags, "view", area, f"view_{area}") for _, flags in contacts
+            )
+            for area in PERMISSION_AREAS
+        }
+    
+    if incomplete:
+        logger.warning(f"⚠️ Shared access unavailable for {len(incomplete)} patients; matrix flags are incomplete")
+    logger.info(f"📊 Evaluated access of user {current_user.id} to {len(matrix)} patients")
+    return matrix, sorted(incomplete)
+
+
 def get_target_user_id(
     db: Session,
     patient_id: Optional[int],
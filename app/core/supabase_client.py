@@ -1,63 +1,85 @@
 from supabase import create_client, Client
+from supabase.lib.client_options import ClientOptions
 from app.core.config import settings
-from typing import Optional, Dict, Any, List
+from app.core.token_verifier import token_verifier
+from app.services.patient_access_cache import patient_access_cache
+from app.services.profile_cache import profile_cache
+from typing import Optional, Dict, Any, List, Callable, TypeVar
 from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 import logging
 import httpx
-import jwt
 import asyncio
-import time
-from jwt.exceptions import InvalidTokenError, ExpiredSignatureError
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+
+def _client_options() -> ClientOptions:
+    # Timeouts on the underlying HTTP clients, so calls abandoned by run_blocking's timeout also end
+    return ClientOptions(
+        postgrest_client_timeout=settings.SUPABASE_TIMEOUT_SECONDS,
+        storage_client_timeout=int(settings.SUPABASE_TIMEOUT_SECONDS)
+    )
+
+
+# supabase-py is synchronous: its calls run on this pool (see SupabaseService.run_blocking) so they never
+# block the event loop. Shared by every SupabaseService instance, so the per-process bound holds.
+_executor = ThreadPoolExecutor(
+    max_workers=max(settings.SUPABASE_MAX_CONCURRENCY, 1),
+    thread_name_prefix="supabase"
+)
+
+
 class SupabaseService:
     def __init__(self):
+        # The service clients are shared across the pool's threads and reuse their HTTP connections
         self.client: Client = create_client(
             settings.SUPABASE_URL,
-            settings.SUPABASE_SERVICE_ROLE_KEY
+            settings.SUPABASE_SERVICE_ROLE_KEY,
+            options=_client_options()
         )
         self.anon_client: Client = create_client(
             settings.SUPABASE_URL,
-            settings.SUPABASE_ANON_KEY
+            settings.SUPABASE_ANON_KEY,
+            options=_client_options()
         )
-        # Profile cache: {user_id: (profile_data, timestamp)}
-        self._profile_cache: Dict[str, tuple] = {}
-        self._cache_lock = asyncio.Lock()
-        self._cache_ttl = 60  # Cache TTL in seconds (60 seconds = 1 minute)
+        # Shared client for the Auth REST endpoints called directly (created on first use, in the event loop)
+        self._http_client: Optional[httpx.AsyncClient] = None
     
-    async def _get_cached_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
-        """Get profile from cache if it exists and is not expired"""
-        async with self._cache_lock:
-            if user_id in self._profile_cache:
-                profile_data, timestamp = self._profile_cache[user_id]
-                current_time = time.time()
-                
-                # Check if cache is still valid
-                if current_time - timestamp < self._cache_ttl:
-                    # Return a copy to prevent mutations affecting cache
-                    return profile_data.copy() if profile_data else None
-                else:
-                    # Cache expired, remove it
-                    del self._profile_cache[user_id]
-            return None
+    async def run_blocking(self, call: Callable[[], T], timeout: Optional[float] = None) -> T:
+        """
+        Run a blocking supabase-py call (e.g. ``lambda: client.table(...).execute()``) on the Supabase
+        thread pool. At most SUPABASE_MAX_CONCURRENCY calls run at once per process; the rest queue.
+        Raises asyncio.TimeoutError after SUPABASE_TIMEOUT_SECONDS (or ``timeout``).
+        """
+        loop = asyncio.get_running_loop()
+        return await asyncio.wait_for(
+            loop.run_in_executor(_executor, call),
+            timeout or settings.SUPABASE_TIMEOUT_SECONDS
+        )
     
-    async def _set_cached_profile(self, user_id: str, profile_data: Dict[str, Any]) -> None:
-        """Store profile in cache with current timestamp"""
-        async with self._cache_lock:
-            # Store a copy to prevent mutations affecting cache
-            self._profile_cache[user_id] = (profile_data.copy() if profile_data else {}, time.time())
+    @asynccontextmanager
+    async def _http(self):
+        """Shared, pooled httpx.AsyncClient for direct Supabase REST calls"""
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.AsyncClient(
+                timeout=settings.SUPABASE_TIMEOUT_SECONDS,
+                limits=httpx.Limits(max_connections=max(settings.SUPABASE_MAX_CONCURRENCY, 1))
+            )
+        yield self._http_client
     
-    async def _invalidate_cache(self, user_id: str) -> None:
-        """Remove profile from cache (called when profile is updated)"""
-        async with self._cache_lock:
-            if user_id in self._profile_cache:
-                del self._profile_cache[user_id]
+    async def close(self) -> None:
+        """Release the shared HTTP client (application shutdown)"""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
     
     async def get_user_language_from_cache(self, supabase_user_id: str) -> str:
         """
-        Get user's language from cached profile.
-        If cache is expired or missing, fetches fresh profile and updates cache.
+        Get user's language from the cached profile (fetched and cached on a miss).
         
         Args:
             supabase_user_id: Supabase user ID (string UUID)
@@ -66,15 +88,6 @@ class SupabaseService:
             Language code: 'en', 'es', or 'pt' (defaults to 'en')
         """
         try:
-            # Check cache first
-            cached_profile = await self._get_cached_profile(supabase_user_id)
-            if cached_profile is not None:
-                language = cached_profile.get('language', 'en')
-                if language in ['en', 'es', 'pt']:
-                    return language
-                return 'en'
-            
-            # Cache miss or expired - fetch fresh profile (which will cache it)
             profile = await self.get_user_profile(supabase_user_id)
             if profile and profile.get('language'):
                 language = profile['language']
@@ -117,14 +130,14 @@ class SupabaseService:
     async def sign_up(self, email: str, password: str, user_metadata: Dict[str, Any]) -> Dict[str, Any]:
         """Register a new user with Supabase Auth"""
         try:
-            response = self.anon_client.auth.sign_up({
+            response = await self.run_blocking(lambda: self.anon_client.auth.sign_up({
                 "email": email,
                 "password": password,
                 "options": {
                     "data": user_metadata,
                     "email_confirm": True  # Enable email confirmation
                 }
-            })
+            }))
             return response
         except Exception as e:
             logger.error(f"Supabase sign up error: {e}")
@@ -134,13 +147,13 @@ class SupabaseService:
         """Force-confirm a user's email address using the service role key."""
         try:
             logger.info(f"Confirming email for user {user_id}")
-            self.client.auth.admin.update_user_by_id(
+            await self.run_blocking(lambda: self.client.auth.admin.update_user_by_id(
                 user_id,
                 {
                     "email_confirm": True,
                     "email_confirmed_at": datetime.now(timezone.utc).isoformat()
                 }
-            )
+            ))
             return True
         except Exception as e:
             logger.warning(f"Unable to auto-confirm email for user {user_id}: {e}")
@@ -149,10 +162,10 @@ class SupabaseService:
     async def sign_in(self, email: str, password: str) -> Dict[str, Any]:
         """Sign in user with Supabase Auth"""
         try:
-            response = self.anon_client.auth.sign_in_with_password({
+            response = await self.run_blocking(lambda: self.anon_client.auth.sign_in_with_password({
                 "email": email,
                 "password": password
-            })
+            }))
             
             # Check if response has error
             if hasattr(response, 'error') and response.error:
@@ -197,42 +210,25 @@ class SupabaseService:
     async def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Get user profile from Supabase"""
         try:
-            response = self.client.auth.admin.get_user_by_id(user_id)
+            response = await self.run_blocking(lambda: self.client.auth.admin.get_user_by_id(user_id))
             return response
         except Exception as e:
             logger.debug(f"Supabase get user error (may be expected): {e}")
             return None
     
     def get_user_from_token(self, token: str) -> Optional[Dict[str, Any]]:
-        """Get user information from JWT token
-        
-        Note: This decodes the JWT token without signature verification.
-        The token is already validated by Supabase when issued, and we're
-        extracting user info from a token that the client has already authenticated.
-        """
+        """Get user information from a Supabase JWT token (signature and expiry verified, see token_verifier)"""
         try:
-            # Decode JWT token without verification to extract user info
-            # This avoids making an API call that could fail with "Invalid API key" errors
-            decoded = jwt.decode(token, options={"verify_signature": False})
-            
-            # Extract user information from token
-            user_id = decoded.get("sub")
-            email = decoded.get("email")
-            user_metadata = decoded.get("user_metadata", {})
-            
-            if not user_id:
-                logger.debug("JWT token missing 'sub' (user ID)")
+            decoded = token_verifier.verify(token)
+            if not decoded:
                 return None
             
             # Return user info extracted from token
             return {
-                "id": user_id,
-                "email": email,
-                "user_metadata": user_metadata
+                "id": decoded["sub"],
+                "email": decoded.get("email"),
+                "user_metadata": decoded.get("user_metadata", {})
             }
-        except (InvalidTokenError, ExpiredSignatureError) as e:
-            logger.debug(f"Invalid JWT token format: {e}")
-            return None
         except Exception as e:
             logger.error(f"Supabase get user from token error: {e}")
             return None
@@ -240,10 +236,10 @@ class SupabaseService:
     async def update_user_metadata(self, user_id: str, metadata: Dict[str, Any]) -> bool:
         """Update user metadata in Supabase"""
         try:
-            response = self.client.auth.admin.update_user_by_id(
+            response = await self.run_blocking(lambda: self.client.auth.admin.update_user_by_id(
                 user_id,
                 {"user_metadata": metadata}
-            )
+            ))
             return True
         except Exception as e:
             logger.error(f"Supabase update user metadata error: {e}")
@@ -253,10 +249,10 @@ class SupabaseService:
         """Store personal information in Supabase user_profiles table"""
         try:
             # Store in user_profiles table with profile_data field
-            response = self.client.table("user_profiles").insert({
+            response = await self.run_blocking(lambda: self.client.table("user_profiles").insert({
                 "user_id": user_id,
                 "profile_data": personal_info
-            }).execute()
+            }).execute())
             return True
         except Exception as e:
             logger.error(f"Supabase store personal info error: {e}")
@@ -265,7 +261,7 @@ class SupabaseService:
     async def get_personal_info(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve personal information from Supabase user_profiles table"""
         try:
-            response = self.client.table("user_profiles").select("profile_data").eq("user_id", user_id).execute()
+            response = await self.run_blocking(lambda: self.client.table("user_profiles").select("profile_data").eq("user_id", user_id).execute())
             if response.data and len(response.data) > 0:
                 return response.data[0].get("profile_data", {})
             return None
@@ -277,16 +273,16 @@ class SupabaseService:
         """Store lightweight user settings in Supabase user metadata"""
         try:
             # Get existing metadata first
-            user_response = self.client.auth.admin.get_user_by_id(user_id)
+            user_response = await self.run_blocking(lambda: self.client.auth.admin.get_user_by_id(user_id))
             existing_metadata = user_response.user_metadata if user_response else {}
             
             # Merge with new settings
             updated_metadata = {**existing_metadata, "settings": settings}
             
-            response = self.client.auth.admin.update_user_by_id(
+            response = await self.run_blocking(lambda: self.client.auth.admin.update_user_by_id(
                 user_id,
                 {"user_metadata": updated_metadata}
-            )
+            ))
             return True
         except Exception as e:
             logger.debug(f"Supabase store user settings error (may be expected): {e}")
@@ -295,7 +291,7 @@ class SupabaseService:
     async def get_user_settings(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve user settings from Supabase user metadata"""
         try:
-            user_response = self.client.auth.admin.get_user_by_id(user_id)
+            user_response = await self.run_blocking(lambda: self.client.auth.admin.get_user_by_id(user_id))
             if user_response and user_response.user_metadata and "settings" in user_response.user_metadata:
                 return user_response.user_metadata["settings"]
             return None
@@ -311,20 +307,21 @@ class SupabaseService:
             client = self.client
             
             # Use upsert to insert or update existing record
-            response = client.table("user_profiles").upsert({
+            response = await self.run_blocking(lambda: client.table("user_profiles").upsert({
                 "user_id": user_id,
                 **profile  # Store each field as individual column
-            }).execute()
+            }).execute())
             
-            # Invalidate cache and update with new data immediately
+            # Update the cache with the new data immediately
             # This ensures subsequent calls get the fresh profile data right away
-            await self._invalidate_cache(user_id)
             if response.data and len(response.data) > 0:
                 profile_data = response.data[0].copy()
                 # Remove system columns
                 for field in ("id", "user_id", "created_at", "updated_at"):
                     profile_data.pop(field, None)
-                await self._set_cached_profile(user_id, profile_data)
+                await profile_cache.set(user_id, profile_data)
+            else:
+                await profile_cache.invalidate(user_id)
             
             return True
         except Exception as e:
@@ -332,19 +329,22 @@ class SupabaseService:
             return False
     
     async def get_user_profile(self, user_id: str, user_token: Optional[str] = None) -> Optional[Dict[str, Any]]:
-        """Retrieve user profile from Supabase database with caching"""
+        """Retrieve user profile from Supabase database with caching (see app/services/profile_cache.py)"""
+        try:
+            profile = await profile_cache.get_or_fetch(user_id, self._fetch_user_profile)
+            return profile if profile is not None else {}
+        except Exception as e:
+            logger.error(f"Supabase get user profile error: {e}", exc_info=True)
+            return {}
+    
+    async def _fetch_user_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Load a user profile from Supabase; None if the query failed (so it is not cached)"""
         try:
-            # Check cache first
-            cached_profile = await self._get_cached_profile(user_id)
-            if cached_profile is not None:
-                return cached_profile
-            
-            # Cache miss - fetch from database
             try:
-                profile_response = self.client.table("user_profiles").select("*").eq("user_id", user_id).execute()
+                profile_response = await self.run_blocking(lambda: self.client.table("user_profiles").select("*").eq("user_id", user_id).execute())
             except Exception as query_error:
                 logger.error(f"Database query error when fetching profile for {user_id}: {query_error}", exc_info=True)
-                return {}
+                return None
 
             profile_data: Dict[str, Any] = {}
             if profile_response.data:
@@ -377,7 +377,7 @@ class SupabaseService:
 
             if "email" not in profile_data or not profile_data.get("email"):
                 try:
-                    user_response = self.client.auth.admin.get_user_by_id(user_id)
+                    user_response = await self.run_blocking(lambda: self.client.auth.admin.get_user_by_id(user_id))
                     if user_response and getattr(user_response, "user", None):
                         email_value = getattr(user_response.user, "email", None)
                         if email_value:
@@ -385,21 +385,16 @@ class SupabaseService:
                 except Exception as admin_error:
                     logger.error(f"Could not get email from admin auth for {user_id}: {admin_error}")
 
-            final_profile = profile_data if profile_data else {}
-            
-            # Cache the profile before returning
-            await self._set_cached_profile(user_id, final_profile)
-            
-            return final_profile
+            return profile_data if profile_data else {}
         except Exception as e:
             logger.error(f"Supabase get user profile error: {e}", exc_info=True)
-            return {}
+            return None
     
     async def get_avatar_signed_url(self, user_id: str) -> Optional[str]:
         """Get avatar URL from user_profiles table or Supabase Storage."""
         try:
             try:
-                profile_response = self.client.table("user_profiles").select("avatar_url").eq("user_id", user_id).execute()
+                profile_response = await self.run_blocking(lambda: self.client.table("user_profiles").select("avatar_url").eq("user_id", user_id).execute())
                 if profile_response.data:
                     avatar_url = profile_response.data[0].get("avatar_url")
                     if avatar_url and str(avatar_url).strip().lower() not in {"null", "none", ""}:
@@ -425,19 +420,19 @@ class SupabaseService:
                 return None
 
             try:
-                user_folder_files = storage.list(user_id) or []
+                user_folder_files = await self.run_blocking(lambda: storage.list(user_id)) or []
                 file_name = _first_matching_file(user_folder_files)
                 if file_name:
                     file_path = f"{user_id}/{file_name}"
                 else:
-                    root_files = storage.list("") or []
+                    root_files = await self.run_blocking(lambda: storage.list("")) or []
                     file_name = _first_matching_file([f for f in root_files if isinstance(f, dict) and user_id in f.get("name", "")])
                     file_path = file_name if file_name else None
 
                 if not file_path:
                     return None
 
-                signed_url_response = storage.create_signed_url(file_path, 3600)
+                signed_url_response = await self.run_blocking(lambda: storage.create_signed_url(file_path, 3600))
                 if isinstance(signed_url_response, dict):
                     return signed_url_response.get("signedURL") or signed_url_response.get("signed_url")
                 if isinstance(signed_url_response, str):
@@ -460,24 +455,24 @@ class SupabaseService:
             client = self.client
 
             try:
-                existing_profile = client.table("user_profiles").select("*").eq("user_id", user_id).execute()
+                existing_profile = await self.run_blocking(lambda: client.table("user_profiles").select("*").eq("user_id", user_id).execute())
             except Exception as query_error:
                     logger.error(f"Database query error when checking existing profile for {user_id}: {query_error}")
                     existing_profile = type("obj", (object,), {"data": []})()
 
             try:
                 if existing_profile.data:
-                    response = client.table("user_profiles").update({
+                    response = await self.run_blocking(lambda: client.table("user_profiles").update({
                         **profile_update,
                         "updated_at": "now()"
-                    }).eq("user_id", user_id).execute()
+                    }).eq("user_id", user_id).execute())
                 else:
-                    response = client.table("user_profiles").insert({
+                    response = await self.run_blocking(lambda: client.table("user_profiles").insert({
                         "user_id": user_id,
                         **profile_update,
                         "created_at": "now()",
                         "updated_at": "now()"
-                    }).execute()
+                    }).execute())
             except Exception as upsert_error:
                     logger.error(f"Error updating user profile for {user_id}: {upsert_error}")
                     return None
@@ -517,7 +512,7 @@ class SupabaseService:
                 # Add email if missing (same as get_user_profile)
                 if "email" not in profile_data or not profile_data.get("email"):
                     try:
-                        user_response = self.client.auth.admin.get_user_by_id(user_id)
+                        user_response = await self.run_blocking(lambda: self.client.auth.admin.get_user_by_id(user_id))
                         if user_response and getattr(user_response, "user", None):
                             email_value = getattr(user_response.user, "email", None)
                             if email_value:
@@ -525,15 +520,14 @@ class SupabaseService:
                     except Exception as admin_error:
                         logger.warning(f"Could not get email from admin auth for {user_id}: {admin_error}")
                 
-                # Invalidate cache and immediately update with FULL profile data
+                # Immediately update the cache (both tiers) with the FULL profile data
                 # This ensures subsequent calls get the fresh profile data immediately
-                await self._invalidate_cache(user_id)
-                await self._set_cached_profile(user_id, profile_data)
+                await profile_cache.set(user_id, profile_data)
                 
                 return profile_data
 
             # Invalidate cache even if no data returned (profile might have been deleted)
-            await self._invalidate_cache(user_id)
+            await profile_cache.invalidate(user_id)
 
             return profile
         except Exception as e:
@@ -547,7 +541,7 @@ class SupabaseService:
             client = self.client
             
             try:
-                emergency_response = client.table("user_emergency").select("*").eq("user_id", user_id).execute()
+                emergency_response = await self.run_blocking(lambda: client.table("user_emergency").select("*").eq("user_id", user_id).execute())
             except Exception as query_error:
                 logger.error(f"Database query error (table may not exist): {query_error}")
                 return {}
@@ -575,7 +569,7 @@ class SupabaseService:
             
             # First, check if emergency record exists
             try:
-                existing_emergency = client.table("user_emergency").select("*").eq("user_id", user_id).execute()
+                existing_emergency = await self.run_blocking(lambda: client.table("user_emergency").select("*").eq("user_id", user_id).execute())
             except Exception as query_error:
                 logger.error(f"Database query error (table may not exist): {query_error}")
                 # Try to create the record anyway
@@ -585,30 +579,30 @@ class SupabaseService:
             try:
                 if existing_emergency.data and len(existing_emergency.data) > 0:
                     # Emergency record exists, update it
-                    response = client.table("user_emergency").update({
+                    response = await self.run_blocking(lambda: client.table("user_emergency").update({
                         **emergency,
                         "updated_at": "now()"
-                    }).eq("user_id", user_id).execute()
+                    }).eq("user_id", user_id).execute())
                 else:
                     # Emergency record doesn't exist, create it
-                    response = client.table("user_emergency").insert({
+                    response = await self.run_blocking(lambda: client.table("user_emergency").insert({
                         "user_id": user_id,
                         **emergency,
                         "created_at": "now()",
                         "updated_at": "now()"
-                    }).execute()
+                    }).execute())
             except Exception as timestamp_error:
                 # Column might not exist yet - try without timestamp fields
                 logger.warning(f"Timestamp field error, retrying without updated_at: {timestamp_error}")
                 if existing_emergency.data and len(existing_emergency.data) > 0:
-                    response = client.table("user_emergency").update({
+                    response = await self.run_blocking(lambda: client.table("user_emergency").update({
                         **emergency
-                    }).eq("user_id", user_id).execute()
+                    }).eq("user_id", user_id).execute())
                 else:
-                    response = client.table("user_emergency").insert({
+                    response = await self.run_blocking(lambda: client.table("user_emergency").insert({
                         "user_id": user_id,
                         **emergency
-                    }).execute()
+                    }).execute())
             
             # Return the updated emergency data
             if response.data and len(response.data) > 0:
@@ -631,7 +625,7 @@ class SupabaseService:
             client = self.client
             
             try:
-                notifications_response = client.table("user_notifications").select("*").eq("user_id", user_id).execute()
+                notifications_response = await self.run_blocking(lambda: client.table("user_notifications").select("*").eq("user_id", user_id).execute())
             except Exception as query_error:
                 logger.error(f"Database query error (table may not exist): {query_error}")
                 return {}
@@ -659,7 +653,7 @@ class SupabaseService:
             
             # First, check if notifications record exists
             try:
-                existing_notifications = client.table("user_notifications").select("*").eq("user_id", user_id).execute()
+                existing_notifications = await self.run_blocking(lambda: client.table("user_notifications").select("*").eq("user_id", user_id).execute())
             except Exception as query_error:
                 logger.error(f"Database query error (table may not exist): {query_error}")
                 # Try to create the record anyway
@@ -669,30 +663,30 @@ class SupabaseService:
             try:
                 if existing_notifications.data and len(existing_notifications.data) > 0:
                     # Notifications record exists, update it
-                    response = client.table("user_notifications").update({
+                    response = await self.run_blocking(lambda: client.table("user_notifications").update({
                         **notifications,
                         "updated_at": "now()"
-                    }).eq("user_id", user_id).execute()
+                    }).eq("user_id", user_id).execute())
                 else:
                     # Notifications record doesn't exist, create it
-                    response = client.table("user_notifications").insert({
+                    response = await self.run_blocking(lambda: client.table("user_notifications").insert({
                         "user_id": user_id,
                         **notifications,
                         "created_at": "now()",
                         "updated_at": "now()"
-                    }).execute()
+                    }).execute())
             except Exception as timestamp_error:
                 # Column might not exist yet - try without timestamp fields
                 logger.warning(f"Timestamp field error, retrying without updated_at: {timestamp_error}")
                 if existing_notifications.data and len(existing_notifications.data) > 0:
-                    response = client.table("user_notifications").update({
+                    response = await self.run_blocking(lambda: client.table("user_notifications").update({
                         **notifications
-                    }).eq("user_id", user_id).execute()
+                    }).eq("user_id", user_id).execute())
                 else:
-                    response = client.table("user_notifications").insert({
+                    response = await self.run_blocking(lambda: client.table("user_notifications").insert({
                         "user_id": user_id,
                         **notifications
-                    }).execute()
+                    }).execute())
             
             # Return the updated notifications data
             if response.data and len(response.data) > 0:
@@ -714,7 +708,7 @@ class SupabaseService:
             client = self.client
             
             try:
-                integrations_response = client.table("user_integrations").select("*").eq("user_id", user_id).execute()
+                integrations_response = await self.run_blocking(lambda: client.table("user_integrations").select("*").eq("user_id", user_id).execute())
             except Exception as query_error:
                 logger.error(f"Database query error (table may not exist): {query_error}")
                 return {}
@@ -739,35 +733,35 @@ class SupabaseService:
             client = self.client
             
             try:
-                existing_integrations = client.table("user_integrations").select("*").eq("user_id", user_id).execute()
+                existing_integrations = await self.run_blocking(lambda: client.table("user_integrations").select("*").eq("user_id", user_id).execute())
             except Exception as query_error:
                 logger.error(f"Database query error (table may not exist): {query_error}")
                 existing_integrations = type('obj', (object,), {'data': []})()
             
             try:
                 if existing_integrations.data and len(existing_integrations.data) > 0:
-                    response = client.table("user_integrations").update({
+                    response = await self.run_blocking(lambda: client.table("user_integrations").update({
                         **integrations,
                         "updated_at": "now()"
-                    }).eq("user_id", user_id).execute()
+                    }).eq("user_id", user_id).execute())
                 else:
-                    response = client.table("user_integrations").insert({
+                    response = await self.run_blocking(lambda: client.table("user_integrations").insert({
                         "user_id": user_id,
                         **integrations,
                         "created_at": "now()",
                         "updated_at": "now()"
-                    }).execute()
+                    }).execute())
             except Exception as timestamp_error:
                 logger.warning(f"Timestamp field error, retrying without updated_at: {timestamp_error}")
                 if existing_integrations.data and len(existing_integrations.data) > 0:
-                    response = client.table("user_integrations").update({
+                    response = await self.run_blocking(lambda: client.table("user_integrations").update({
                         **integrations
-                    }).eq("user_id", user_id).execute()
+                    }).eq("user_id", user_id).execute())
                 else:
-                    response = client.table("user_integrations").insert({
+                    response = await self.run_blocking(lambda: client.table("user_integrations").insert({
                         "user_id": user_id,
                         **integrations
-                    }).execute()
+                    }).execute())
             
             if response.data and len(response.data) > 0:
                 integrations_data = response.data[0]
@@ -788,7 +782,7 @@ class SupabaseService:
             client = self.client
             
             try:
-                privacy_response = client.table("user_privacy").select("*").eq("user_id", user_id).execute()
+                privacy_response = await self.run_blocking(lambda: client.table("user_privacy").select("*").eq("user_id", user_id).execute())
             except Exception as query_error:
                 logger.error(f"Database query error (table may not exist): {query_error}")
                 return {}
@@ -813,35 +807,35 @@ class SupabaseService:
             client = self.client
             
             try:
-                existing_privacy = client.table("user_privacy").select("*").eq("user_id", user_id).execute()
+                existing_privacy = await self.run_blocking(lambda: client.table("user_privacy").select("*").eq("user_id", user_id).execute())
             except Exception as query_error:
                 logger.error(f"Database query error (table may not exist): {query_error}")
                 existing_privacy = type('obj', (object,), {'data': []})()
             
             try:
                 if existing_privacy.data and len(existing_privacy.data) > 0:
-                    response = client.table("user_privacy").update({
+                    response = await self.run_blocking(lambda: client.table("user_privacy").update({
                         **privacy,
                         "updated_at": "now()"
-                    }).eq("user_id", user_id).execute()
+                    }).eq("user_id", user_id).execute())
                 else:
-                    response = client.table("user_privacy").insert({
+                    response = await self.run_blocking(lambda: client.table("user_privacy").insert({
                         "user_id": user_id,
                         **privacy,
                         "created_at": "now()",
                         "updated_at": "now()"
-                    }).execute()
+                    }).execute())
             except Exception as timestamp_error:
                 logger.warning(f"Timestamp field error, retrying without updated_at: {timestamp_error}")
                 if existing_privacy.data and len(existing_privacy.data) > 0:
-                    response = client.table("user_privacy").update({
+                    response = await self.run_blocking(lambda: client.table("user_privacy").update({
                         **privacy
-                    }).eq("user_id", user_id).execute()
+                    }).eq("user_id", user_id).execute())
                 else:
-                    response = client.table("user_privacy").insert({
+                    response = await self.run_blocking(lambda: client.table("user_privacy").insert({
                         "user_id": user_id,
                         **privacy
-                    }).execute()
+                    }).execute())
             
             if response.data and len(response.data) > 0:
                 privacy_data = response.data[0]
@@ -862,12 +856,12 @@ class SupabaseService:
             redirect_to = redirect_url or f"{settings.FRONTEND_URL}/auth/reset-password"
             
             # Use anon client for password reset
-            response = self.anon_client.auth.reset_password_email(
+            response = await self.run_blocking(lambda: self.anon_client.auth.reset_password_email(
                 email,
                 {
                     "redirectTo": redirect_to
                 }
-            )
+            ))
             return response
         except Exception as e:
             logger.error(f"Supabase reset password error: {e}")
@@ -895,7 +889,7 @@ class SupabaseService:
                             "password": new_password
                         }
                         
-                        async with httpx.AsyncClient() as client:
+                        async with self._http() as client:
                             response = await client.put(url, json=payload, headers=headers, timeout=30.0)
                             
                             if response.status_code >= 200 and response.status_code < 300:
@@ -925,16 +919,16 @@ class SupabaseService:
             try:
                 # Verify we can get the user first (to ensure permissions work)
                 try:
-                    test_user = self.client.auth.admin.get_user_by_id(user_id)
+                    test_user = await self.run_blocking(lambda: self.client.auth.admin.get_user_by_id(user_id))
                     if not (test_user and hasattr(test_user, 'user') and test_user.user):
                         logger.warning("Could not retrieve user info via admin API")
                 except Exception as test_error:
                     logger.warning(f"Could not verify user access via admin API: {test_error}")
                 
-                update_response = self.client.auth.admin.update_user_by_id(
+                update_response = await self.run_blocking(lambda: self.client.auth.admin.update_user_by_id(
                     user_id,
                     {"password": new_password}
-                )
+                ))
                 
                 # Check if update was successful
                 if update_response and hasattr(update_response, 'user') and update_response.user:
@@ -973,7 +967,7 @@ class SupabaseService:
                 
                 logger.info(f"📝 Making PUT request to: {url}")
                 
-                async with httpx.AsyncClient() as client:
+                async with self._http() as client:
                     response = await client.put(url, json=payload, headers=headers, timeout=30.0)
                     
                     # Always log the response status and body for debugging
@@ -1048,7 +1042,7 @@ class SupabaseService:
         """Retrieve user shared access data from Supabase user_shared_access table"""
         try:
             try:
-                shared_access_response = self.client.table("user_shared_access").select("*").eq("user_id", user_id).execute()
+                shared_access_response = await self.run_blocking(lambda: self.client.table("user_shared_access").select("*").eq("user_id", user_id).execute())
             except Exception as query_error:
                 logger.error(f"❌ Database query error (table may not exist): {query_error}")
                 return {}
@@ -1071,35 +1065,38 @@ class SupabaseService:
             client = self.client
             
             try:
-                existing_shared_access = client.table("user_shared_access").select("*").eq("user_id", user_id).execute()
+                existing_shared_access = await self.run_blocking(lambda: client.table("user_shared_access").select("*").eq("user_id", user_id).execute())
             except Exception as query_error:
                 logger.error(f"Database query error (table may not exist): {query_error}")
                 existing_shared_access = type('obj', (object,), {'data': []})()
             
             try:
                 if existing_shared_access.data and len(existing_shared_access.data) > 0:
-                    response = client.table("user_shared_access").update({
+                    response = await self.run_blocking(lambda: client.table("user_shared_access").update({
                         **shared_access,
                         "updated_at": "now()"
-                    }).eq("user_id", user_id).execute()
+                    }).eq("user_id", user_id).execute())
                 else:
-                    response = client.table("user_shared_access").insert({
+                    response = await self.run_blocking(lambda: client.table("user_shared_access").insert({
                         "user_id": user_id,
                         **shared_access,
                         "created_at": "now()",
                         "updated_at": "now()"
-                    }).execute()
+                    }).execute())
             except Exception as timestamp_error:
                 logger.warning(f"Timestamp field error, retrying without updated_at: {timestamp_error}")
                 if existing_shared_access.data and len(existing_shared_access.data) > 0:
-                    response = client.table("user_shared_access").update({
+                    response = await self.run_blocking(lambda: client.table("user_shared_access").update({
                         **shared_access
-                    }).eq("user_id", user_id).execute()
+                    }).eq("user_id", user_id).execute())
                 else:
-                    response = client.table("user_shared_access").insert({
+                    response = await self.run_blocking(lambda: client.table("user_shared_access").insert({
                         "user_id": user_id,
                         **shared_access
-                    }).execute()
+                    }).execute())
+            
+            # Access checks against this patient must see the new grants right away
+            patient_access_cache.invalidate_patient(patient_supabase_id=user_id)
             
             if response.data and len(response.data) > 0:
                 shared_access_data = response.data[0]
@@ -1118,7 +1115,7 @@ class SupabaseService:
         """Retrieve user access logs from Supabase user_access_logs table"""
         try:
             try:
-                access_logs_response = self.client.table("user_access_logs").select("*").eq("user_id", user_id).order("created_at", desc=True).execute()
+                access_logs_response = await self.run_blocking(lambda: self.client.table("user_access_logs").select("*").eq("user_id", user_id).order("created_at", desc=True).execute())
             except Exception as query_error:
                 logger.error(f"Database query error (table may not exist): {query_error}")
                 return {"logs": []}
@@ -1163,7 +1160,7 @@ class SupabaseService:
                         })
                 
                 if logs_to_insert:
-                    response = client.table("user_access_logs").insert(logs_to_insert).execute()
+                    response = await self.run_blocking(lambda: client.table("user_access_logs").insert(logs_to_insert).execute())
                     return {"logs": response.data if response.data else []}
             
             return {"logs": []}
@@ -1175,7 +1172,7 @@ class SupabaseService:
         """Retrieve user data sharing preferences from Supabase user_data_sharing table"""
         try:
             try:
-                data_sharing_response = self.client.table("user_data_sharing").select("*").eq("user_id", user_id).execute()
+                data_sharing_response = await self.run_blocking(lambda: self.client.table("user_data_sharing").select("*").eq("user_id", user_id).execute())
             except Exception as query_error:
                 logger.error(f"Database query error (table may not exist): {query_error}")
                 return {}
@@ -1200,7 +1197,7 @@ class SupabaseService:
             
             # First, check if data sharing record exists
             try:
-                existing_data_sharing = client.table("user_data_sharing").select("*").eq("user_id", user_id).execute()
+                existing_data_sharing = await self.run_blocking(lambda: client.table("user_data_sharing").select("*").eq("user_id", user_id).execute())
             except Exception as query_error:
                 logger.error(f"Database query error (table may not exist): {query_error}")
                 existing_data_sharing = type('obj', (object,), {'data': []})()
@@ -1209,30 +1206,30 @@ class SupabaseService:
             try:
                 if existing_data_sharing.data and len(existing_data_sharing.data) > 0:
                     # Data sharing record exists, update it
-                    response = client.table("user_data_sharing").update({
+                    response = await self.run_blocking(lambda: client.table("user_data_sharing").update({
                         **data_sharing,
                         "updated_at": "now()"
-                    }).eq("user_id", user_id).execute()
+                    }).eq("user_id", user_id).execute())
                 else:
                     # Data sharing record doesn't exist, create it
-                    response = client.table("user_data_sharing").insert({
+                    response = await self.run_blocking(lambda: client.table("user_data_sharing").insert({
                         "user_id": user_id,
                         **data_sharing,
                         "created_at": "now()",
                         "updated_at": "now()"
-                    }).execute()
+                    }).execute())
             except Exception as timestamp_error:
                 # Column might not exist yet - try without timestamp fields
                 logger.warning(f"Timestamp field error, retrying without updated_at: {timestamp_error}")
                 if existing_data_sharing.data and len(existing_data_sharing.data) > 0:
-                    response = client.table("user_data_sharing").update({
+                    response = await self.run_blocking(lambda: client.table("user_data_sharing").update({
                         **data_sharing
-                    }).eq("user_id", user_id).execute()
+                    }).eq("user_id", user_id).execute())
                 else:
-                    response = client.table("user_data_sharing").insert({
+                    response = await self.run_blocking(lambda: client.table("user_data_sharing").insert({
                         "user_id": user_id,
                         **data_sharing
-                    }).execute()
+                    }).execute())
             
             # Return the updated data sharing info
             if response.data and len(response.data) > 0:
@@ -1266,7 +1263,7 @@ class SupabaseService:
                 "friendly_name": friendly_name
             }
             
-            async with httpx.AsyncClient() as client:
+            async with self._http() as client:
                 response = await client.post(url, json=payload, headers=headers, timeout=30.0)
                 response.raise_for_status()
                 result = response.json()
@@ -1292,7 +1289,7 @@ class SupabaseService:
                 "code": code
             }
             
-            async with httpx.AsyncClient() as client:
+            async with self._http() as client:
                 response = await client.post(url, json=payload, headers=headers, timeout=30.0)
                 response.raise_for_status()
                 result = response.json()
@@ -1315,7 +1312,7 @@ class SupabaseService:
                 "Content-Type": "application/json"
             }
             
-            async with httpx.AsyncClient() as client:
+            async with self._http() as client:
                 response = await client.get(url, headers=headers, timeout=30.0)
                 response.raise_for_status()
                 result = response.json()
@@ -1348,7 +1345,7 @@ class SupabaseService:
                 "Content-Type": "application/json"
             }
             
-            async with httpx.AsyncClient() as client:
+            async with self._http() as client:
                 response = await client.delete(url, headers=headers, timeout=30.0)
                 response.raise_for_status()
                 logger.info("✅ MFA factor unenrolled successfully")
@@ -1370,7 +1367,7 @@ class SupabaseService:
                 "Content-Type": "application/json"
             }
             
-            async with httpx.AsyncClient() as client:
+            async with self._http() as client:
                 # Create challenge
                 challenge_response = await client.post(challenge_url, headers=challenge_headers, timeout=30.0)
                 challenge_response.raise_for_status()
@@ -0,0 +1,159 @@
+"""
+Verification of Supabase access tokens (the bearer tokens of HTTP and WebSocket requests).
+
+Signatures are checked against the project's JWT secret (HS256, SUPABASE_JWT_SECRET) or its
+signing keys (ES256/RS256) from the Supabase JWKS endpoint. The key set is loaded at app
+startup (prefetch_keys) and refreshed in a background thread every
+SUPABASE_JWKS_REFRESH_SECONDS. verify() runs on the event loop and never fetches keys itself: a
+token signed with an unknown key id is rejected and schedules a background refresh (at most
+every JWKS_MIN_REFETCH_SECONDS), which picks up rotated keys for the following requests.
+
+Verified claims are memoised per token until the token expires, in a bounded LRU, so repeat
+requests with the same bearer token skip decoding and signature checks.
+"""
+
+import copy
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+import jwt
+from jwt.exceptions import InvalidTokenError, PyJWKError, PyJWKSetError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SYMMETRIC_ALGORITHMS = ("HS256",)
+ASYMMETRIC_ALGORITHMS = ("ES256", "RS256")
+# Bounds refetches caused by tokens carrying unknown key ids
+JWKS_MIN_REFETCH_SECONDS = 30
+JWKS_FETCH_TIMEOUT_SECONDS = 5.0
+
+
+class SupabaseTokenVerifier:
+    """Verifies Supabase JWTs and memoises their claims until expiry"""
+
+    def __init__(self, jwt_secret: Optional[str] = None, jwks_url: Optional[str] = None,
+                 max_entries: Optional[int] = None):
+        self.jwt_secret = settings.SUPABASE_JWT_SECRET if jwt_secret is None else jwt_secret
+        self.jwks_url = jwks_url or settings.SUPABASE_JWKS_URL or f"{settings.SUPABASE_URL}/auth/v1/.well-known/jwks.json"
+        self.max_entries = settings.TOKEN_CLAIMS_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self._claims: "OrderedDict[bytes, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._keys: Dict[str, Any] = {}  # kid -> public key
+        self._keys_fetched_at = 0.0
+        self._keys_attempted_at = 0.0
+        self._keys_lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._secret_warning_logged = False
+
+    def verify(self, token: str) -> Optional[Dict[str, Any]]:
+        """Claims of a valid, unexpired token signed by Supabase; None otherwise"""
+        if not token:
+            return None
+        memo_key = hashlib.sha256(token.encode("utf-8")).digest()
+        now = time.time()
+        with self._lock:
+            entry = self._claims.get(memo_key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._claims.move_to_end(memo_key)
+                    # Callers get their own copy: the memoised dict is shared across requests
+                    return copy.deepcopy(entry[0])
+                del self._claims[memo_key]
+
+        claims = self._decode(token)
+        if claims is None:
+            return None
+
+        if self.max_entries > 0:
+            with self._lock:
+                self._claims[memo_key] = (copy.deepcopy(claims), float(claims["exp"]))
+                while len(self._claims) > self.max_entries:
+                    self._claims.popitem(last=False)
+        return claims
+
+    def prefetch_keys(self) -> None:
+        """Load the signing keys now (blocking; run off the event loop at app startup)"""
+        with self._keys_lock:
+            self._keys_attempted_at = time.monotonic()
+        self._fetch_keys()
+
+    def _decode(self, token: str) -> Optional[Dict[str, Any]]:
+        try:
+            header = jwt.get_unverified_header(token)
+            algorithm = header.get("alg")
+            if algorithm in SYMMETRIC_ALGORITHMS:
+                key = self.jwt_secret
+                if not key:
+                    if not self._secret_warning_logged:
+                        logger.error("Received an HS256 Supabase token but SUPABASE_JWT_SECRET is not set; rejecting")
+                        self._secret_warning_logged = True
+                    return None
+            elif algorithm in ASYMMETRIC_ALGORITHMS:
+                key = self._signing_key(header.get("kid"))
+                if key is None:
+                    logger.debug(f"No Supabase signing key for kid={header.get('kid')}")
+                    return None
+            else:
+                logger.debug(f"Unsupported token algorithm: {algorithm}")
+                return None
+
+            return jwt.decode(
+                token,
+                key,
+                algorithms=[algorithm],
+                audience=settings.SUPABASE_JWT_AUDIENCE or None,
+                options={"require": ["exp", "sub"], "verify_aud": bool(settings.SUPABASE_JWT_AUDIENCE)}
+            )
+        except InvalidTokenError as e:
+            logger.debug(f"Invalid Supabase token: {e}")
+            return None
+
+    def _signing_key(self, kid: Optional[str]) -> Optional[Any]:
+        key = self._keys.get(kid)
+        stale = time.monotonic() - self._keys_fetched_at > settings.SUPABASE_JWKS_REFRESH_SECONDS
+        if key is None or stale:
+            # Unknown key id (rotation, cold start, or a forged header) or due refresh - never inline
+            self._refresh_in_background()
+        return key
+
+    def _refresh_in_background(self) -> None:
+        with self._keys_lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            if time.monotonic() - self._keys_attempted_at < JWKS_MIN_REFETCH_SECONDS:
+                return
+            self._keys_attempted_at = time.monotonic()
+            self._refresh_thread = threading.Thread(target=self._fetch_keys, name="jwks-refresh", daemon=True)
+            self._refresh_thread.start()
+
+    def _fetch_keys(self) -> None:
+        try:
+            response = httpx.get(
+                self.jwks_url,
+                headers={"apikey": settings.SUPABASE_ANON_KEY},
+                timeout=JWKS_FETCH_TIMEOUT_SECONDS
+            )
+            response.raise_for_status()
+            keys = {}
+            try:
+                for jwk in jwt.PyJWKSet.from_dict(response.json()).keys:
+                    keys[jwk.key_id] = jwk.key
+            except PyJWKSetError:
+                pass  # No asymmetric keys published (project signs with the HS256 secret only)
+            self._keys = keys
+            self._keys_fetched_at = time.monotonic()
+            logger.info(f"Loaded {len(keys)} Supabase signing key(s)")
+        except (httpx.HTTPError, ValueError, PyJWKError) as e:
+            # Keep serving the keys we have; the next refresh retries
+            logger.warning(f"Could not fetch Supabase JWKS from {self.jwks_url}: {e}")
+
+
+# Global instance
+token_verifier = SupabaseTokenVerifier()
@@ -0,0 +1,82 @@
+"""
+Bounded, thread-safe LRU with a fixed time-to-live per entry.
+
+In-process only: each worker process holds its own copy, so callers that cache data other
+workers can change rely on the TTL to bound how stale an entry can get.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    LRU of at most max_entries values, each expiring ttl_seconds after it was put.
+
+    on_evict(key, value) runs for every entry that leaves the cache other than through
+    clear() - LRU eviction, expiry, replacement and pop - so owners can keep secondary
+    indexes in step. It runs with `lock` held; the lock is reentrant, and owners hold it
+    to combine several calls (and their own index updates) atomically.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        on_evict: Optional[Callable[[K, V], None]] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.on_evict = on_evict
+        self.lock = threading.RLock()
+        self._entries: "OrderedDict[K, Tuple[V, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Optional[K]) -> Optional[V]:
+        """Value of a live entry (marked most recently used), or None"""
+        with self.lock:
+            entry = self._entries.get(key) if key is not None else None
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    self.pop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: K, value: V) -> None:
+        if self.max_entries <= 0:
+            return
+        with self.lock:
+            self.pop(key)
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            while len(self._entries) > self.max_entries:
+                self.pop(next(iter(self._entries)))
+
+    def pop(self, key: K) -> Optional[V]:
+        """Remove an entry, expired or not, and return its value (None if absent)"""
+        with self.lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            if self.on_evict is not None:
+                self.on_evict(key, entry[0])
+            return entry[0]
+
+    def clear(self) -> None:
+        with self.lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,7 +1,11 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc, asc, String
+from sqlalchemy import and_, or_, func, desc, asc, String, literal_column, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert, aggregate_order_by
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta
+import base64
+import json
 from app.models.health_record import (
     HealthRecord, MedicalCondition, FamilyMedicalHistory, 
     HealthRecordDocLab, HealthRecordSection, HealthRecordMetric, HealthRecordType, HealthRecordDocExam
@@ -13,10 +17,54 @@ from app.schemas.health_record import (
     FamilyMedicalHistoryCreate, FamilyMedicalHistoryUpdate,
     HealthRecordDocLabCreate, HealthRecordDocLabUpdate
 )
+from app.core.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Columns of uq_health_records_natural_key - the ON CONFLICT target for upserts
+HEALTH_RECORD_NATURAL_KEY_INDEX = "uq_health_records_natural_key"
+HEALTH_RECORD_NATURAL_KEY = ["created_by", "metric_id", "measure_start_time", "data_type"]
+
+# Columns overwritten when an upsert hits an existing record
+HEALTH_RECORD_UPSERT_FIELDS = [
+    "value", "status", "source", "measure_end_time",
+    "device_id", "device_info", "accuracy", "location_data"
+]
+
+# Supported data_points resolutions and their date_trunc unit (None = one point per record)
+DATA_POINT_RESOLUTIONS = {
+    "raw": None,
+    "hourly": "hour",
+    "daily": "day",
+    "weekly": "week"
+}
+# Defaults for the section read paths: one point per record, capped in SQL to the most
+# recent records per metric. Bucketing is opt-in; full history needs max_points=None
+DEFAULT_DATA_POINT_RESOLUTION = "raw"
+DEFAULT_MAX_DATA_POINTS = 1000
+
+
+class HealthRecordConflictError(Exception):
+    """An update would give a record the natural key of another record of the same user"""
+
+
+def encode_record_cursor(record: HealthRecord) -> str:
+    """Opaque keyset cursor pointing just past `record` in (effective time, id) DESC order"""
+    effective_time = record.measure_start_time or record.created_at
+    payload = json.dumps({"t": effective_time.isoformat(), "i": record.id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_record_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor from encode_record_cursor. Raises ValueError if it is malformed."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(payload["t"]), int(payload["i"])
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+
 class HealthRecordCRUD:
     """CRUD operations for HealthRecord model"""
     
@@ -40,6 +88,8 @@ class HealthRecordCRUD:
                     )
                     
                     if duplicate_record:
+                        previous_key = self._rollup_key(duplicate_record)
+                        
                         # Update existing record instead of creating new one
                         duplicate_record.value = health_record.value
                         duplicate_record.status = health_record.status
@@ -53,12 +103,17 @@ class HealthRecordCRUD:
                         duplicate_record.data_type = health_record.data_type
                         duplicate_record.updated_at = func.now()
                         
+                        self._refresh_rollups(db, [previous_key, self._rollup_key(duplicate_record)])
                         db.commit()
                         db.refresh(duplicate_record)
                         
                         logger.info(f"Updated duplicate health record {duplicate_record.id} for user {user_id}")
                         return duplicate_record, False  # False = was not created new, was updated
             
+            # Records with a complete natural key are written with INSERT ... ON CONFLICT
+            if health_record.measure_start_time and health_record.data_type:
+                return self.upsert(db, health_record, user_id)
+            
             # Create new record if no duplicate found or duplicate check skipped
             db_health_record = HealthRecord(
                 created_by=user_id,
@@ -77,6 +132,8 @@ class HealthRecordCRUD:
             )
             
             db.add(db_health_record)
+            db.flush()
+            self._refresh_rollups(db, [self._rollup_key(db_health_record)])
             db.commit()
             db.refresh(db_health_record)
             
@@ -88,6 +145,89 @@ class HealthRecordCRUD:
             db.rollback()
             raise
     
+    def upsert(self, db: Session, health_record: HealthRecordCreate, user_id: int) -> tuple[HealthRecord, bool]:
+        """
+        Insert or update on the natural key (created_by, metric_id, measure_start_time, data_type)
+        with a single INSERT ... ON CONFLICT DO UPDATE.
+        Requires measure_start_time and data_type to be set.
+        Returns (record, was_created_new)
+        """
+        try:
+            values = {
+                "created_by": user_id,
+                "section_id": health_record.section_id,
+                "metric_id": health_record.metric_id,
+                "value": health_record.value,
+                "status": health_record.status,
+                "source": health_record.source,
+                "measure_start_time": health_record.measure_start_time,
+                "measure_end_time": health_record.measure_end_time,
+                "data_type": health_record.data_type,
+                "device_id": health_record.device_id,
+                "device_info": health_record.device_info,
+                "accuracy": health_record.accuracy,
+                "location_data": health_record.location_data
+            }
+            stmt = self._upsert_statement([values]).returning(
+                HealthRecord, literal_column("(xmax = 0)").label("inserted")
+            )
+            row = db.execute(stmt, execution_options={"populate_existing": True}).one()
+            db_health_record, was_created = row[0], bool(row[1])
+            self._refresh_rollups(db, [self._rollup_key(db_health_record)])
+            db.commit()
+            db.refresh(db_health_record)
+            
+            action = "Created" if was_created else "Updated"
+            logger.info(f"{action} health record {db_health_record.id} for user {user_id} (upsert)")
+            return db_health_record, was_created
+            
+        except Exception as e:
+            logger.error(f"Failed to upsert health record: {e}")
+            db.rollback()
+            raise
+    
+    def bulk_upsert(self, db: Session, rows: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """
+        Upsert many records (dicts of HealthRecord columns incl. created_by) with one
+        INSERT ... ON CONFLICT statement. Rows must have a complete natural key and must not
+        repeat a key within the call. Refreshes the touched rollup buckets; does not commit.
+        Returns (created_count, updated_count)
+        """
+        if not rows:
+            return 0, 0
+        
+        stmt = self._upsert_statement(rows).returning(literal_column("(xmax = 0)").label("inserted"))
+        inserted_flags = db.execute(stmt).scalars().all()
+        self._refresh_rollups(db, [
+            (row["created_by"], row["metric_id"], row["measure_start_time"]) for row in rows
+        ])
+        created_count = sum(1 for inserted in inserted_flags if inserted)
+        return created_count, len(inserted_flags) - created_count
+    
+    def _upsert_statement(self, rows: List[Dict[str, Any]]):
+        """INSERT ... ON CONFLICT (natural key) DO UPDATE for the given rows"""
+        stmt = pg_insert(HealthRecord).values(rows)
+        update_fields = [field for field in HEALTH_RECORD_UPSERT_FIELDS if field in rows[0]]
+        return stmt.on_conflict_do_update(
+            index_elements=HEALTH_RECORD_NATURAL_KEY,
+            set_={
+                **{field: stmt.excluded[field] for field in update_fields},
+                "updated_at": func.now()
+            }
+        )
+    
+    @staticmethod
+    def _rollup_key(record: HealthRecord) -> Tuple[int, int, Optional[datetime]]:
+        """(user_id, metric_id, recorded_at) identifying the rollup buckets a record belongs to"""
+        return record.created_by, record.metric_id, record.measure_start_time or record.created_at
+    
+    def _refresh_rollups(self, db: Session, keys: List[Tuple[int, int, Optional[datetime]]]) -> None:
+        """Recompute the rollup buckets touched by a write, in the caller's transaction"""
+        if not settings.HEALTH_RECORD_ROLLUPS_ENABLED:
+            return
+        from app.services.health_record_rollup_service import HealthRecordRollupService
+        HealthRecordRollupService.refresh_for_records(db, keys)
+    
     def _check_duplicate_record(
         self, 
         db: Session, 
@@ -170,12 +310,18 @@ class HealthRecordCRUD:
                 logger.warning("No measure_start_time available for update_or_create, creating new record")
                 return self.create(db, health_record, user_id, skip_duplicate_check=True)
             
+            # Complete natural key: let the unique index decide between insert and update
+            if health_record.data_type and (not data_type or data_type == health_record.data_type):
+                return self.upsert(db, health_record, user_id)
+            
             # Find existing record by exact timestamp
             existing_record = self._find_record_by_exact_timestamp(
                 db, user_id, health_record.metric_id, timestamp_to_match, data_type
             )
             
             if existing_record:
+                previous_key = self._rollup_key(existing_record)
+                
                 # Update existing record
                 existing_record.value = health_record.value
                 existing_record.status = health_record.status
@@ -189,6 +335,7 @@ class HealthRecordCRUD:
                 existing_record.data_type = health_record.data_type
                 existing_record.updated_at = func.now()
                 
+                self._refresh_rollups(db, [previous_key, self._rollup_key(existing_record)])
                 db.commit()
                 db.refresh(existing_record)
                 
@@ -223,9 +370,14 @@ class HealthRecordCRUD:
         user_id: int, 
         skip: int = 0, 
         limit: int = 100,
-        filters: Optional[HealthRecordFilter] = None
+        filters: Optional[HealthRecordFilter] = None,
+        after: Optional[Tuple[datetime, int]] = None
     ) -> List[HealthRecord]:
-        """Get health records for a specific user with optional filtering"""
+        """
+        Get health records for a specific user with optional filtering.
+        If `after` (a decoded cursor) is given, returns the page following it by keyset
+        instead of OFFSET, and `skip` is ignored.
+        """
         try:
             query = db.query(HealthRecord).filter(HealthRecord.created_by == user_id)
             
@@ -269,12 +421,7 @@ class HealthRecordCRUD:
                         )
                     )
             
-            # Order by measure_start_time if available, otherwise created_at
-            return query.order_by(
-                desc(
-                    func.coalesce(HealthRecord.measure_start_time, HealthRecord.created_at)
-                )
-            ).offset(skip).limit(limit).all()
+            return self._paginate(query, skip, limit, after)
             
         except Exception as e:
             logger.error(f"Failed to get health records for user {user_id}: {e}")
@@ -287,9 +434,13 @@ class HealthRecordCRUD:
         query: str, 
         filters: Optional[HealthRecordFilter] = None,
         limit: int = 100, 
-        offset: int = 0
+        offset: int = 0,
+        after: Optional[Tuple[datetime, int]] = None
     ) -> List[HealthRecord]:
-        """Search health records by text query"""
+        """
+        Search health records by text query.
+        If `after` (a decoded cursor) is given, pages by keyset instead of `offset`.
+        """
         try:
             base_query = db.query(HealthRecord).filter(HealthRecord.created_by == user_id)
             
@@ -342,17 +493,26 @@ class HealthRecordCRUD:
                         )
                     )
             
-            # Order by measure_start_time if available, otherwise created_at
-            return base_query.order_by(
-                desc(
-                    func.coalesce(HealthRecord.measure_start_time, HealthRecord.created_at)
-                )
-            ).offset(offset).limit(limit).all()
+            return self._paginate(base_query, offset, limit, after)
             
         except Exception as e:
             logger.error(f"Failed to search health records for user {user_id}: {e}")
             return []
     
+    def _paginate(self, query, offset: int, limit: int, after: Optional[Tuple[datetime, int]] = None):
+        """
+        Order by effective time (measure_start_time if available, otherwise created_at) DESC with
+        id as tie-breaker, matching idx_health_records_user_effective_time. With `after`, seek past
+        the cursor row instead of skipping `offset` rows, so page cost doesn't grow with depth and
+        records ingested meanwhile don't shift later pages.
+        """
+        effective_time = func.coalesce(HealthRecord.measure_start_time, HealthRecord.created_at)
+        if after:
+            query = query.filter(tuple_(effective_time, HealthRecord.id) < tuple_(*after))
+        else:
+            query = query.offset(offset)
+        return query.order_by(desc(effective_time), desc(HealthRecord.id)).limit(limit).all()
+    
     def get_stats(self, db: Session, user_id: int) -> Dict[str, Any]:
         """Get health record statistics for a user"""
         try:
@@ -452,16 +612,27 @@ class HealthRecordCRUD:
             
             update_data = health_record_update.dict(exclude_unset=True)
             update_data['updated_by'] = user_id
+            previous_key = self._rollup_key(db_health_record)
             
             for field, value in update_data.items():
                 setattr(db_health_record, field, value)
             
+            self._refresh_rollups(db, [previous_key, self._rollup_key(db_health_record)])
             db.commit()
             db.refresh(db_health_record)
             
             logger.info(f"Updated health record {record_id} for user {user_id}")
             return db_health_record
             
+        except IntegrityError as e:
+            db.rollback()
+            if HEALTH_RECORD_NATURAL_KEY_INDEX in str(e.orig):
+                logger.warning(f"Update of health record {record_id} collides with an existing record: {e.orig}")
+                raise HealthRecordConflictError(
+                    "Another health record already exists for this metric, measurement time and data type"
+                ) from e
+            logger.error(f"Failed to update health record {record_id}: {e}")
+            return None
         except Exception as e:
             logger.error(f"Failed to update health record {record_id}: {e}")
             db.rollback()
@@ -474,7 +645,9 @@ class HealthRecordCRUD:
             if not db_health_record:
                 return False
             
+            previous_key = self._rollup_key(db_health_record)
             db.delete(db_health_record)
+            self._refresh_rollups(db, [previous_key])
             db.commit()
             
             logger.info(f"Deleted health record {record_id} for user {user_id}")
@@ -1381,6 +1554,7 @@ class HealthRecordMetricCRUD:
             
             update_data = metric_update.dict(exclude_unset=True)
             update_data['updated_by'] = user_id
+            previous_name = db_metric.display_name
             
             for field, value in update_data.items():
                 setattr(db_metric, field, value)
@@ -1388,6 +1562,11 @@ class HealthRecordMetricCRUD:
             db.commit()
             db.refresh(db_metric)
             
+            if db_metric.display_name != previous_name:
+                # Renamed: the old name's embedding may no longer be needed
+                from app.services.metric_embedding_index import metric_embedding_index
+                metric_embedding_index.invalidate(db, [previous_name])
+            
             logger.info(f"Updated health record metric {metric_id} for user {user_id}")
             return db_metric
             
@@ -1474,9 +1653,15 @@ class HealthRecordSectionMetricCRUD:
         db: Session, 
         user_id: int,
         include_inactive: bool = False,
-        health_record_type_id: Optional[int] = None
+        health_record_type_id: Optional[int] = None,
+        resolution: str = DEFAULT_DATA_POINT_RESOLUTION,
+        max_points: Optional[int] = DEFAULT_MAX_DATA_POINTS
     ) -> List[Dict[str, Any]]:
-        """Get all sections with their associated metrics"""
+        """
+        Get all sections with their associated metrics.
+        data_points are aggregated in SQL per `resolution` bucket (see DATA_POINT_RESOLUTIONS)
+        and limited to the most recent `max_points` per metric.
+        """
         try:
             # Get only user-created sections (not admin defaults)
             query = db.query(HealthRecordSection).filter(
@@ -1495,13 +1680,20 @@ class HealthRecordSectionMetricCRUD:
                 pass
             
             sections = query.all()
+            recorded_at = func.coalesce(HealthRecord.measure_start_time, HealthRecord.created_at)
             
             sections_with_metrics = []
             for section in sections:
-                # Get metrics for this section - order by name to maintain consistent order
-                metrics = db.query(HealthRecordMetric).filter(
+                # Get metrics for this section with the template thryve_type - order by name to maintain consistent order
+                metric_rows = db.query(
+                    HealthRecordMetric, HealthRecordMetricTemplate.thryve_type
+                ).outerjoin(
+                    HealthRecordMetricTemplate, HealthRecordMetricTemplate.id == HealthRecordMetric.metric_tmp_id
+                ).filter(
                     HealthRecordMetric.section_id == section.id
                 ).order_by(HealthRecordMetric.name.asc()).all()
+                metrics = [metric for metric, _ in metric_rows]
+                thryve_types = {metric.id: thryve_type for metric, thryve_type in metric_rows}
                 
                 # Get section statistics
                 total_records = db.query(func.count(HealthRecord.id)).filter(
@@ -1543,91 +1735,49 @@ class HealthRecordSectionMetricCRUD:
                     "metrics": []
                 }
                 
-                # Add metrics data
-                for metric in metrics:
-                    # Get metric template to check thryve_type
-                    from app.models.health_metrics import HealthRecordMetricTemplate
-                    metric_template = None
-                    if metric.metric_tmp_id:
-                        metric_template = db.query(HealthRecordMetricTemplate).filter(
-                            HealthRecordMetricTemplate.id == metric.metric_tmp_id
-                        ).first()
-                    
-                    # Get metric statistics
-                    metric_total_records = db.query(func.count(HealthRecord.id)).filter(
-                        and_(
-                            HealthRecord.created_by == user_id,
-                            HealthRecord.metric_id == metric.id
-                        )
-                    ).scalar()
+                metric_ids = [metric.id for metric in metrics]
+                metric_totals = {}
+                latest_records = {}
+                data_points_by_metric: Dict[int, List[Dict[str, Any]]] = {}
+                if metric_ids:
+                    # Metric statistics for the whole section in one grouped scan
+                    metric_totals = dict(db.query(
+                        HealthRecord.metric_id, func.count(HealthRecord.id)
+                    ).filter(
+                        HealthRecord.created_by == user_id,
+                        HealthRecord.metric_id.in_(metric_ids)
+                    ).group_by(HealthRecord.metric_id).all())
                     
-                    # Get latest record for this metric - use measure_start_time if available, otherwise created_at
-                    latest_record = db.query(HealthRecord).filter(
-                        and_(
-                            HealthRecord.created_by == user_id,
-                            HealthRecord.metric_id == metric.id
-                        )
-                    ).order_by(
-                        desc(
-                            func.coalesce(HealthRecord.measure_start_time, HealthRecord.created_at)
-                        )
-                    ).first()
+                    # Latest record per metric - use measure_start_time if available, otherwise created_at
+                    ranked = db.query(
+                        HealthRecord.metric_id.label("metric_id"),
+                        HealthRecord.value.label("value"),
+                        HealthRecord.status.label("status"),
+                        recorded_at.label("recorded_at"),
+                        func.row_number().over(
+                            partition_by=HealthRecord.metric_id,
+                            order_by=(recorded_at.desc(), HealthRecord.id.desc())
+                        ).label("rn")
+                    ).filter(
+                        HealthRecord.created_by == user_id,
+                        HealthRecord.metric_id.in_(metric_ids)
+                    ).subquery()
+                    latest_records = {
+                        row.metric_id: row
+                        for row in db.query(ranked).filter(ranked.c.rn == 1).all()
+                    }
                     
-                    # Get all historical data points for trend analysis
-                    # Filter based on thryve_type from metric template:
+                    # Historical data points for trend analysis, filtered by the template thryve_type:
                     # - If thryve_type is "Daily": show only daily data (one value per date)
                     # - If thryve_type is "Epoch": show all epoch data (multiple values per date)
                     # - If thryve_type is None: show all data (backward compatibility)
-                    historical_records_query = db.query(HealthRecord).filter(
-                        and_(
-                            HealthRecord.created_by == user_id,
-                            HealthRecord.metric_id == metric.id
-                        )
+                    data_points_by_metric = self._get_data_points(
+                        db, user_id, thryve_types, resolution, max_points
                     )
-                    
-                    if metric_template and metric_template.thryve_type == "Daily":
-                        # For Daily type: only show daily data
-                        historical_records_query = historical_records_query.filter(
-                            or_(
-                                HealthRecord.data_type == 'daily',
-                                HealthRecord.data_type.is_(None)  # Backward compatibility
-                            )
-                        )
-                    elif metric_template and metric_template.thryve_type == "Epoch":
-                        # For Epoch type: show all epoch data (multiple values per date allowed)
-                        historical_records_query = historical_records_query.filter(
-                            or_(
-                                HealthRecord.data_type == 'epoch',
-                                HealthRecord.data_type.is_(None)  # Backward compatibility
-                            )
-                        )
-                    # If thryve_type is None, show all data (no additional filter)
-                    
-                    historical_records = historical_records_query.order_by(
-                        func.coalesce(HealthRecord.measure_start_time, HealthRecord.created_at).asc()
-                    ).all()
-                    
-                    # Debug logging
-                    
-                    # Convert historical records to data points format
-                    data_points = []
-                    for record in historical_records:
-                        # Use measure_start_time if available, otherwise created_at
-                        timestamp = record.measure_start_time if record.measure_start_time else record.created_at
-                        data_points.append({
-                            "id": record.id,
-                            "value": record.value,
-                            "status": record.status,
-                            "recorded_at": timestamp.isoformat() if timestamp else None,
-                            "source": record.source
-                        })
-                    
-                    
-                    # Get thryve_type from metric template if available
-                    thryve_type = None
-                    if metric_template:
-                        thryve_type = metric_template.thryve_type
-                    
+                
+                # Add metrics data
+                for metric in metrics:
+                    latest_record = latest_records.get(metric.id)
                     metric_data = {
                         "id": metric.id,
                         "name": metric.name,
@@ -1638,12 +1788,12 @@ class HealthRecordSectionMetricCRUD:
                         "reference_data": metric.reference_data,
                         "data_type": metric.data_type,
                         "is_default": metric.is_default,
-                        "thryve_type": thryve_type,  # Add thryve_type from template
-                        "total_records": metric_total_records,
+                        "thryve_type": thryve_types.get(metric.id),  # Add thryve_type from template
+                        "total_records": metric_totals.get(metric.id, 0),
                         "latest_value": latest_record.value if latest_record else None,
                         "latest_status": latest_record.status if latest_record else None,
-                        "latest_recorded_at": (latest_record.measure_start_time if latest_record.measure_start_time else latest_record.created_at) if latest_record else None,
-                        "data_points": data_points  # Add historical data points for trend analysis
+                        "latest_recorded_at": latest_record.recorded_at if latest_record else None,
+                        "data_points": data_points_by_metric.get(metric.id, [])  # Add historical data points for trend analysis
                     }
                     
                     section_data["metrics"].append(metric_data)
@@ -1727,9 +1877,20 @@ class HealthRecordSectionMetricCRUD:
         db: Session, 
         user_id: int,
         include_inactive: bool = False,
-        health_record_type_id: Optional[int] = None
+        health_record_type_id: Optional[int] = None,
+        resolution: str = DEFAULT_DATA_POINT_RESOLUTION,
+        max_points: Optional[int] = DEFAULT_MAX_DATA_POINTS
     ) -> List[Dict[str, Any]]:
-        """Get ALL sections (both user-created and admin defaults) that have user's health records"""
+        """
+        Get ALL sections (both user-created and admin defaults) that have user's health records.
+        data_points are aggregated in SQL per `resolution` bucket (see DATA_POINT_RESOLUTIONS)
+        and limited to the most recent `max_points` per metric.
+        
+        Builds the section -> metric -> stats tree with a fixed number of queries (sections,
+        metrics with template thryve_type, grouped section counts, grouped metric counts,
+        latest record per metric via window function, data points), independent of how
+        many sections and metrics the user has.
+        """
         try:
             # First, find all sections that have health records for this user
             sections_with_data = db.query(HealthRecordSection).join(
@@ -1739,44 +1900,86 @@ class HealthRecordSectionMetricCRUD:
                     HealthRecord.created_by == user_id,
                     HealthRecordSection.health_record_type_id == health_record_type_id
                 )
-            ).distinct().all()
+            ).distinct().order_by(HealthRecordSection.id).all()
             
+            if not sections_with_data:
+                return []
             
-            sections_with_metrics = []
-            for section in sections_with_data:
-                
-                # Get metrics for this section - order by name to maintain consistent order
-                metrics = db.query(HealthRecordMetric).filter(
-                    HealthRecordMetric.section_id == section.id
-                ).order_by(HealthRecordMetric.name.asc()).all()
+            section_ids = [section.id for section in sections_with_data]
+            recorded_at = func.coalesce(HealthRecord.measure_start_time, HealthRecord.created_at)
+            
+            # Metrics of all sections, with the template thryve_type - order by name to maintain consistent order
+            metric_rows = db.query(
+                HealthRecordMetric, HealthRecordMetricTemplate.thryve_type
+            ).outerjoin(
+                HealthRecordMetricTemplate, HealthRecordMetricTemplate.id == HealthRecordMetric.metric_tmp_id
+            ).filter(
+                HealthRecordMetric.section_id.in_(section_ids)
+            ).order_by(HealthRecordMetric.section_id, HealthRecordMetric.name.asc()).all()
+            
+            metrics_by_section: Dict[int, List[Any]] = {section_id: [] for section_id in section_ids}
+            thryve_types = {}
+            for metric, thryve_type in metric_rows:
+                metrics_by_section[metric.section_id].append(metric)
+                thryve_types[metric.id] = thryve_type
+            metric_ids = list(thryve_types.keys())
+            
+            # Section statistics: total and recent activity (last 7 days) in one grouped scan
+            seven_days_ago = datetime.utcnow() - timedelta(days=7)
+            section_stats = {
+                section_id: (total, recent)
+                for section_id, total, recent in db.query(
+                    HealthRecord.section_id,
+                    func.count(HealthRecord.id),
+                    func.count(HealthRecord.id).filter(recorded_at >= seven_days_ago)
+                ).filter(
+                    HealthRecord.created_by == user_id,
+                    HealthRecord.section_id.in_(section_ids)
+                ).group_by(HealthRecord.section_id).all()
+            }
+            
+            metric_totals = {}
+            latest_records = {}
+            data_points_by_metric: Dict[int, List[Dict[str, Any]]] = {}
+            if metric_ids:
+                metric_totals = dict(db.query(
+                    HealthRecord.metric_id, func.count(HealthRecord.id)
+                ).filter(
+                    HealthRecord.created_by == user_id,
+                    HealthRecord.metric_id.in_(metric_ids)
+                ).group_by(HealthRecord.metric_id).all())
                 
-                # Get section statistics
-                total_records = db.query(func.count(HealthRecord.id)).filter(
-                    and_(
-                        HealthRecord.created_by == user_id,
-                        HealthRecord.section_id == section.id
-                    )
-                ).scalar()
+                # Latest and historical records honour the template thryve_type
+                record_filter = and_(
+                    HealthRecord.created_by == user_id,
+                    self._thryve_type_filter(thryve_types)
+                )
                 
-                # Get recent activity (last 7 days) - use measure_start_time if available, otherwise created_at
-                seven_days_ago = datetime.utcnow() - timedelta(days=7)
-                recent_activity = db.query(func.count(HealthRecord.id)).filter(
-                    and_(
-                        HealthRecord.created_by == user_id,
-                        HealthRecord.section_id == section.id,
-                        or_(
-                            and_(
-                                HealthRecord.measure_start_time.isnot(None),
-                                HealthRecord.measure_start_time >= seven_days_ago
-                            ),
-                            and_(
-                                HealthRecord.measure_start_time.is_(None),
-                                HealthRecord.created_at >= seven_days_ago
-                            )
-                        )
-                    )
-                ).scalar()
+                # Latest record per metric - use measure_start_time if available, otherwise created_at
+                ranked = db.query(
+                    HealthRecord.metric_id.label("metric_id"),
+                    HealthRecord.value.label("value"),
+                    HealthRecord.status.label("status"),
+                    recorded_at.label("recorded_at"),
+                    func.row_number().over(
+                        partition_by=HealthRecord.metric_id,
+                        order_by=(recorded_at.desc(), HealthRecord.id.desc())
+                    ).label("rn")
+                ).filter(record_filter).subquery()
+                latest_records = {
+                    row.metric_id: row
+                    for row in db.query(ranked).filter(ranked.c.rn == 1).all()
+                }
                 
+                # Historical data points for trend analysis, for every metric at once
+                data_points_by_metric = self._get_data_points(db, user_id, thryve_types, resolution, max_points)
+                for data_points in data_points_by_metric.values():
+                    for data_point in data_points:
+                        data_point["notes"] = None  # health_records has no notes column
+            
+            sections_with_metrics = []
+            for section in sections_with_data:
+                total_records, recent_activity = section_stats.get(section.id, (0, 0))
                 section_data = {
                     "id": section.id,
                     "name": section.name,
@@ -1790,89 +1993,8 @@ class HealthRecordSectionMetricCRUD:
                     "metrics": []
                 }
                 
-                # Add metrics data
-                for metric in metrics:
-                    # Get metric template to check thryve_type
-                    from app.models.health_metrics import HealthRecordMetricTemplate
-                    metric_template = None
-                    if metric.metric_tmp_id:
-                        metric_template = db.query(HealthRecordMetricTemplate).filter(
-                            HealthRecordMetricTemplate.id == metric.metric_tmp_id
-                        ).first()
-                    
-                    # Get metric statistics
-                    metric_total_records = db.query(func.count(HealthRecord.id)).filter(
-                        and_(
-                            HealthRecord.created_by == user_id,
-                            HealthRecord.metric_id == metric.id
-                        )
-                    ).scalar()
-                    
-                    # Build filter for latest record and historical records based on thryve_type
-                    latest_record_filter = and_(
-                        HealthRecord.created_by == user_id,
-                        HealthRecord.metric_id == metric.id
-                    )
-                    historical_records_filter = and_(
-                        HealthRecord.created_by == user_id,
-                        HealthRecord.metric_id == metric.id
-                    )
-                    
-                    # Apply thryve_type filtering
-                    if metric_template and metric_template.thryve_type == "Daily":
-                        # For Daily type: only show daily data
-                        daily_filter = or_(
-                            HealthRecord.data_type == 'daily',
-                            HealthRecord.data_type.is_(None)  # Backward compatibility
-                        )
-                        latest_record_filter = and_(latest_record_filter, daily_filter)
-                        historical_records_filter = and_(historical_records_filter, daily_filter)
-                    elif metric_template and metric_template.thryve_type == "Epoch":
-                        # For Epoch type: show all epoch data (multiple values per date allowed)
-                        epoch_filter = or_(
-                            HealthRecord.data_type == 'epoch',
-                            HealthRecord.data_type.is_(None)  # Backward compatibility
-                        )
-                        latest_record_filter = and_(latest_record_filter, epoch_filter)
-                        historical_records_filter = and_(historical_records_filter, epoch_filter)
-                    # If thryve_type is None, show all data (no additional filter)
-                    
-                    # Get latest record for this metric - use measure_start_time if available, otherwise created_at
-                    latest_record = db.query(HealthRecord).filter(
-                        latest_record_filter
-                    ).order_by(
-                        desc(
-                            func.coalesce(HealthRecord.measure_start_time, HealthRecord.created_at)
-                        )
-                    ).first()
-                    
-                    # Get all historical data points for trend analysis
-                    historical_records = db.query(HealthRecord).filter(
-                        historical_records_filter
-                    ).order_by(
-                        func.coalesce(HealthRecord.measure_start_time, HealthRecord.created_at).asc()
-                    ).all()
-                    
-                    
-                    # Convert historical records to data points format
-                    data_points = []
-                    for record in historical_records:
-                        # Use measure_start_time if available, otherwise created_at
-                        timestamp = record.measure_start_time if record.measure_start_time else record.created_at
-                        data_points.append({
-                            "id": record.id,
-                            "value": record.value,
-                            "status": record.status,
-                            "recorded_at": timestamp.isoformat() if timestamp else None,
-                            "source": record.source,
-                            "notes": getattr(record, 'notes', None)  # Use getattr to safely access notes field
-                        })
-                    
-                    # Get thryve_type from metric template if available
-                    thryve_type = None
-                    if metric_template:
-                        thryve_type = metric_template.thryve_type
-                    
+                for metric in metrics_by_section[section.id]:
+                    latest_record = latest_records.get(metric.id)
                     metric_data = {
                         "id": metric.id,
                         "name": metric.name,
@@ -1883,12 +2005,12 @@ class HealthRecordSectionMetricCRUD:
                         "default_unit": metric.default_unit,
                         "unit": metric.default_unit,  # For compatibility
                         "reference_data": metric.reference_data,
-                        "thryve_type": thryve_type,  # Add thryve_type from template
-                        "total_records": metric_total_records,
+                        "thryve_type": thryve_types.get(metric.id),  # Add thryve_type from template
+                        "total_records": metric_totals.get(metric.id, 0),
                         "latest_value": latest_record.value if latest_record else None,
                         "latest_status": latest_record.status if latest_record else "unknown",
-                        "latest_recorded_at": (latest_record.measure_start_time if latest_record.measure_start_time else latest_record.created_at).isoformat() if latest_record and (latest_record.measure_start_time or latest_record.created_at) else None,
-                        "data_points": data_points,
+                        "latest_recorded_at": latest_record.recorded_at.isoformat() if latest_record and latest_record.recorded_at else None,
+                        "data_points": data_points_by_metric.get(metric.id, []),
                         "trend": "unknown"  # Could be calculated based on data points
                     }
                     
@@ -1902,6 +2024,118 @@ class HealthRecordSectionMetricCRUD:
             logger.error(f"Failed to get all sections with user data for user {user_id}: {e}")
             return []
     
+    def _get_data_points(
+        self,
+        db: Session,
+        user_id: int,
+        thryve_types: Dict[int, Optional[str]],
+        resolution: str = "raw",
+        max_points: Optional[int] = None
+    ) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Load chart data points for a user's metrics (metric_id -> template thryve_type, see
+        _thryve_type_filter), grouped by metric_id and ordered oldest first.
+        
+        - resolution "raw": one point per record
+        - "hourly" / "daily" / "weekly": one point per date_trunc bucket; value is the bucket
+          average, with min/max/last/count alongside, and id/status/source taken from the
+          latest record in the bucket. Hourly and daily points are read from
+          health_record_rollups (UTC buckets) when HEALTH_RECORD_ROLLUPS_ENABLED, weekly
+          points are aggregated from health_records in SQL
+        - max_points: keep only the most recent N points per metric (applied in SQL)
+        """
+        if resolution not in DATA_POINT_RESOLUTIONS:
+            raise ValueError(f"Unsupported resolution '{resolution}', expected one of {list(DATA_POINT_RESOLUTIONS)}")
+        
+        bucket_unit = DATA_POINT_RESOLUTIONS[resolution]
+        from app.services.health_record_rollup_service import HealthRecordRollupService, ROLLUP_GRANULARITIES
+        if settings.HEALTH_RECORD_ROLLUPS_ENABLED and bucket_unit in ROLLUP_GRANULARITIES:
+            return HealthRecordRollupService.get_data_points(db, user_id, thryve_types, bucket_unit, max_points)
+        
+        record_filter = and_(HealthRecord.created_by == user_id, self._thryve_type_filter(thryve_types))
+        recorded_at = func.coalesce(HealthRecord.measure_start_time, HealthRecord.created_at)
+        newest_first = (recorded_at.desc(), HealthRecord.id.desc())
+        
+        if bucket_unit is None:
+            points = db.query(
+                HealthRecord.metric_id.label("metric_id"),
+                HealthRecord.id.label("id"),
+                HealthRecord.value.label("value"),
+                HealthRecord.status.label("status"),
+                HealthRecord.source.label("source"),
+                recorded_at.label("recorded_at"),
+                func.row_number().over(
+                    partition_by=HealthRecord.metric_id, order_by=newest_first
+                ).label("rn")
+            ).filter(record_filter).subquery()
+        else:
+            # UTC buckets, the same boundaries as the rollups
+            bucket = HealthRecordRollupService.bucket_expression(bucket_unit)
+            
+            def latest(column):
+                return func.array_agg(aggregate_order_by(column, *newest_first))[1]
+            
+            buckets = db.query(
+                HealthRecord.metric_id.label("metric_id"),
+                latest(HealthRecord.id).label("id"),
+                func.avg(HealthRecord.value).label("value"),
+                latest(HealthRecord.status).label("status"),
+                latest(HealthRecord.source).label("source"),
+                bucket.label("recorded_at"),
+                func.min(HealthRecord.value).label("min"),
+                func.max(HealthRecord.value).label("max"),
+                latest(HealthRecord.value).label("last"),
+                func.count(HealthRecord.id).label("count")
+            ).filter(record_filter).group_by(HealthRecord.metric_id, bucket).subquery()
+            points = db.query(
+                buckets,
+                func.row_number().over(
+                    partition_by=buckets.c.metric_id, order_by=buckets.c.recorded_at.desc()
+                ).label("rn")
+            ).subquery()
+        
+        query = db.query(points)
+        if max_points:
+            query = query.filter(points.c.rn <= max_points)
+        rows = query.order_by(points.c.metric_id, points.c.rn.desc()).all()
+        
+        data_points_by_metric: Dict[int, List[Dict[str, Any]]] = {}
+        for row in rows:
+            data_point = {
+                "id": row.id,
+                "value": row.value,
+                "status": row.status,
+                "recorded_at": row.recorded_at.isoformat() if row.recorded_at else None,
+                "source": row.source
+            }
+            if bucket_unit is not None:
+                data_point.update({"min": row.min, "max": row.max, "last": row.last, "count": row.count})
+            data_points_by_metric.setdefault(row.metric_id, []).append(data_point)
+        return data_points_by_metric
+    
+    @staticmethod
+    def _thryve_type_filter(thryve_types: Dict[int, Optional[str]]):
+        """
+        Restrict records of the given metrics by their template thryve_type:
+        - "Daily": only daily data, "Epoch": only epoch data (NULL data_type kept for backward compatibility)
+        - None / no template: all data
+        """
+        metric_ids_by_data_type = {"daily": [], "epoch": [], None: []}
+        for metric_id, thryve_type in thryve_types.items():
+            data_type = thryve_type.lower() if thryve_type in ("Daily", "Epoch") else None
+            metric_ids_by_data_type[data_type].append(metric_id)
+        
+        conditions = []
+        if metric_ids_by_data_type[None]:
+            conditions.append(HealthRecord.metric_id.in_(metric_ids_by_data_type[None]))
+        for data_type in ("daily", "epoch"):
+            if metric_ids_by_data_type[data_type]:
+                conditions.append(and_(
+                    HealthRecord.metric_id.in_(metric_ids_by_data_type[data_type]),
+                    or_(HealthRecord.data_type == data_type, HealthRecord.data_type.is_(None))
+                ))
+        return or_(*conditions)
+    
     def get_metric_details(self, db: Session, metric_id: int, user_id: int):
         """Get detailed information about a specific metric"""
         try:
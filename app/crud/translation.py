@@ -1,8 +1,10 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from typing import List, Optional, Dict, Any
+from sqlalchemy import and_, func, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 from app.models.translation import Translation
+from app.services.translation_cache import translation_cache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -86,6 +88,68 @@ class TranslationCRUD:
             logger.error(f"Failed to get bulk translations: {e}")
             return {}
     
+    def get_translations_by_keys(
+        self,
+        db: Session,
+        keys: List[Tuple[str, int, str, str]]
+    ) -> Dict[tuple, Translation]:
+        """
+        Get translations for many (entity_type, entity_id, field_name, language) keys with one
+        row-value IN query (served by idx_translations_lookup).
+        Returns a dictionary keyed by the same 4-tuple.
+        """
+        if not keys:
+            return {}
+        try:
+            translations = db.query(Translation).filter(
+                tuple_(
+                    Translation.entity_type,
+                    Translation.entity_id,
+                    Translation.field_name,
+                    Translation.language
+                ).in_(list(keys))
+            ).all()
+            return {
+                (trans.entity_type, trans.entity_id, trans.field_name, trans.language): trans
+                for trans in translations
+            }
+        except Exception as e:
+            logger.error(f"Failed to get translations by keys: {e}")
+            return {}
+    
+    def upsert_translations(
+        self,
+        db: Session,
+        rows: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Create or update many translations with one INSERT ... ON CONFLICT statement.
+        Each row has entity_type, entity_id, field_name, language, translated_text,
+        source_language and content_version.
+        """
+        if not rows:
+            return
+        try:
+            stmt = pg_insert(Translation).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                constraint='uq_translations_entity_field_language',
+                set_={
+                    "translated_text": stmt.excluded.translated_text,
+                    # Same fallbacks as create_translation: keep stored values when none given
+                    "source_language": func.coalesce(stmt.excluded.source_language, Translation.source_language),
+                    "content_version": func.coalesce(stmt.excluded.content_version, Translation.content_version),
+                    "updated_at": func.now()
+                }
+            )
+            db.execute(stmt)
+            db.commit()
+            for row in rows:
+                translation_cache.invalidate_entity(row["entity_type"], row["entity_id"])
+        except Exception as e:
+            logger.error(f"Failed to upsert translations: {e}")
+            db.rollback()
+            raise
+    
     def create_translation(
         self,
         db: Session,
@@ -112,6 +176,7 @@ class TranslationCRUD:
                 existing.updated_at = datetime.utcnow()
                 db.commit()
                 db.refresh(existing)
+                translation_cache.invalidate_entity(entity_type, entity_id)
                 return existing
             else:
                 # Create new translation
@@ -127,6 +192,7 @@ class TranslationCRUD:
                 db.add(new_translation)
                 db.commit()
                 db.refresh(new_translation)
+                translation_cache.invalidate_entity(entity_type, entity_id)
                 return new_translation
         except Exception as e:
             logger.error(f"Failed to create translation: {e}")
@@ -148,6 +214,7 @@ class TranslationCRUD:
                 )
             ).delete()
             db.commit()
+            translation_cache.invalidate_entity(entity_type, entity_id)
             logger.info(f"Deleted {deleted_count} translations for {entity_type}:{entity_id}")
             return True
         except Exception as e:
@@ -174,6 +241,7 @@ class TranslationCRUD:
                 )
             ).delete()
             db.commit()
+            translation_cache.invalidate_entity(entity_type, entity_id)
             return deleted_count > 0
         except Exception as e:
             logger.error(f"Failed to delete translation: {e}")
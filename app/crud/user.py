@@ -15,6 +15,12 @@ def get_user_by_supabase_id(db: Session, supabase_user_id: str) -> Optional[User
     """Get user by Supabase user ID"""
     return db.query(User).filter(User.supabase_user_id == supabase_user_id).first()
 
+def get_users_by_ids(db: Session, user_ids: List[int]) -> List[User]:
+    """Get the users with the given internal IDs (missing IDs are skipped)"""
+    if not user_ids:
+        return []
+    return db.query(User).filter(User.id.in_(user_ids)).all()
+
 def get_users(db: Session, skip: int = 0, limit: int = 100):
     """Get all users with pagination"""
     return db.query(User).offset(skip).limit(limit).all()
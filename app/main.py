@@ -81,6 +81,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # Keyset pagination of health record listings
 )
 
 # Trusted host middleware
@@ -95,6 +96,59 @@ app.include_router(api_router, prefix=settings.API_V1_STR)
 # Include WebSocket router
 app.include_router(websocket_router, prefix=settings.API_V1_STR)
 
+@app.on_event("startup")
+async def start_thryve_ingest_workers():
+    """Start local workers draining the Thryve webhook intake spool"""
+    if settings.THRYVE_INGEST_QUEUE_ENABLED:
+        from app.api.routers.thryve_webhook import ingest_worker_pool
+        ingest_worker_pool.start()
+
+@app.on_event("shutdown")
+async def stop_thryve_ingest_workers():
+    """Let in-flight payloads finish; anything unclaimed stays in the spool for the next start"""
+    if settings.THRYVE_INGEST_QUEUE_ENABLED:
+        from app.api.routers.thryve_webhook import ingest_worker_pool
+        ingest_worker_pool.stop()
+
+@app.on_event("startup")
+async def start_ocr_job_workers():
+    """Start local workers running queued lab document OCR jobs"""
+    from app.services.ocr_job_queue import ocr_job_worker_pool
+    ocr_job_worker_pool.start()
+
+@app.on_event("shutdown")
+async def stop_ocr_job_workers():
+    """Stop OCR workers; interrupted jobs are requeued by any worker once their claim goes stale"""
+    from app.services.ocr_job_queue import ocr_job_worker_pool
+    ocr_job_worker_pool.stop()
+    from app.services.ocr_page_engine import ocr_page_engine
+    ocr_page_engine.shutdown()
+
+@app.on_event("shutdown")
+async def close_supabase_client():
+    """Close the pooled HTTP connections used for direct Supabase REST calls"""
+    from app.core.supabase_client import supabase_service
+    await supabase_service.close()
+
+@app.on_event("startup")
+async def prefetch_supabase_signing_keys():
+    """Load the Supabase JWKS before serving; token verification never fetches keys on the event loop"""
+    import asyncio
+    from app.core.token_verifier import token_verifier
+    await asyncio.to_thread(token_verifier.prefetch_keys)
+
+@app.on_event("startup")
+async def start_websocket_pubsub():
+    """Connect this worker to the pub/sub backend that fans WebSocket deliveries out across workers"""
+    from app.websocket.pubsub import pubsub
+    await pubsub.start()
+
+@app.on_event("shutdown")
+async def stop_websocket_pubsub():
+    """Withdraw this worker's presence and close the pub/sub connection"""
+    from app.websocket.pubsub import pubsub
+    await pubsub.stop()
+
 @app.get("/")
 async def root():
     return {
@@ -104,6 +104,10 @@ from .health_metrics import (
 # Thryve Integration System
 from .thryve_data_type import ThryveDataType, ThryveDailyEpoch
 from .thryve_data_source import ThryveDataSource
+from .thryve_webhook_intake import ThryveWebhookIntake, ThryveWebhookIntakeStatus
+from .health_record_rollup import HealthRecordRollup
+from .metric_name_embedding import MetricNameEmbedding
+from .ocr_job import OCRJob, OCRJobStatus
 
 # Surgery & Hospitalization System
 from .surgery_hospitalization import (
@@ -250,6 +254,12 @@ __all__ = [
     "ThryveDataType",
     "ThryveDailyEpoch",
     "ThryveDataSource",
+    "ThryveWebhookIntake",
+    "ThryveWebhookIntakeStatus",
+    "HealthRecordRollup",
+    "MetricNameEmbedding",
+    "OCRJob",
+    "OCRJobStatus",
     
     # AI Analysis System
     "AIAnalysisHistory",
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, JSON, Float, Enum, Date
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, JSON, Float, Enum, Date, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -271,6 +271,18 @@ class HealthRecord(Base):
     metric = relationship("HealthRecordMetric", back_populates="health_records")
     device = relationship("IOSDevice", back_populates="health_records")
     # task_tracking_details = relationship("TaskTrackingDetail", back_populates="health_record")  # TaskTrackingDetail model removed
+    
+    # Natural key: one value per user, metric, measurement time and data type.
+    # measure_start_time comes before data_type so time-range probes on (user, metric) use the same index.
+    # Rows with NULL measure_start_time/data_type (manual entries) never conflict.
+    __table_args__ = (
+        Index('uq_health_records_natural_key', 'created_by', 'metric_id', 'measure_start_time', 'data_type', unique=True),
+        # Keyset pagination of a user's records by effective time (see HealthRecordCRUD._paginate)
+        Index(
+            'idx_health_records_user_effective_time',
+            created_by, func.coalesce(measure_start_time, created_at), id
+        ),
+    )
 
 class HealthRecordDocLab(Base):
     __tablename__ = "health_record_doc_lab"
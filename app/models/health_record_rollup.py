@@ -0,0 +1,44 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class HealthRecordRollup(Base):
+    """
+    Pre-aggregated health_records per user, metric, data type and time bucket.
+    Maintained incrementally by HealthRecordRollupService whenever records are written;
+    filled for existing data by migration 0008 and rebuilt with backfill_health_record_rollups.py.
+    Buckets are UTC-aligned (date_trunc on the record time at UTC).
+    """
+    __tablename__ = "health_record_rollups"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=False)  # Owner of the underlying records
+    metric_id = Column(Integer, ForeignKey("health_record_metrics.id", ondelete="CASCADE"), nullable=False)
+    data_type = Column(String(20), nullable=False, default="")  # "epoch", "daily" or "" for records without a data_type
+    granularity = Column(String(10), nullable=False)  # "hour" or "day"
+    bucket_start = Column(DateTime(timezone=True), nullable=False)
+
+    # Aggregates over coalesce(measure_start_time, created_at) within the bucket
+    count = Column(Integer, nullable=False)
+    sum = Column(Float, nullable=False)
+    min = Column(Float, nullable=False)
+    max = Column(Float, nullable=False)
+    first_value = Column(Float, nullable=False)
+    first_recorded_at = Column(DateTime(timezone=True), nullable=False)
+    last_value = Column(Float, nullable=False)
+    last_recorded_at = Column(DateTime(timezone=True), nullable=False)
+    last_record_id = Column(Integer, nullable=False)  # Latest record in the bucket (status/source for chart points)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index(
+            'uq_health_record_rollups_bucket',
+            'created_by', 'metric_id', 'granularity', 'bucket_start', 'data_type',
+            unique=True
+        ),
+    )
+
+    def __repr__(self):
+        return f"<HealthRecordRollup(metric_id={self.metric_id}, {self.granularity} {self.bucket_start}, count={self.count})>"
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, LargeBinary, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class MetricNameEmbedding(Base):
+    """
+    Embedding vector of a metric/template display name, stored once per (text, model).
+    Rows are keyed by the SHA-256 of the embedded text, so a renamed metric simply maps to
+    a different row; see MetricEmbeddingIndex for the in-memory side.
+    """
+    __tablename__ = "metric_name_embeddings"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    text_hash = Column(String(64), nullable=False)  # sha256 hex of the embedded text
+    model = Column(String(100), nullable=False)  # Embedding model that produced the vector
+    text = Column(Text, nullable=False)
+    dimensions = Column(Integer, nullable=False)
+    embedding = Column(LargeBinary, nullable=False)  # float32 vector, L2-normalised, native byte order
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index('uq_metric_name_embeddings_hash_model', 'text_hash', 'model', unique=True),
+    )
+
+    def __repr__(self):
+        return f"<MetricNameEmbedding(text='{self.text}', model='{self.model}')>"
@@ -0,0 +1,58 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, LargeBinary, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+import enum
+
+
+class OCRJobStatus(str, enum.Enum):
+    QUEUED = "queued"          # Waiting for an OCR worker (new or requeued after a worker died)
+    PROCESSING = "processing"  # Claimed by a worker
+    COMPLETED = "completed"    # Result stored
+    FAILED = "failed"          # Gave up after OCR_JOB_MAX_ATTEMPTS
+
+
+class OCRJob(Base):
+    """
+    Lab document OCR job.
+    The upload endpoint stores the PDF here and returns the job id; OCR workers in any app
+    process (or run_ocr_worker.py) claim jobs with SELECT ... FOR UPDATE SKIP LOCKED and
+    report progress on the row, so every worker can answer status polls.
+    """
+    __tablename__ = "ocr_jobs"
+
+    id = Column(String(36), primary_key=True)  # uuid4, returned to the client as job_id
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    # Input; file_content is cleared once the job finishes
+    file_name = Column(String(255), nullable=False)
+    file_content = Column(LargeBinary)
+    s3_url = Column(Text)
+    form_data = Column(JSON)
+
+    # State and progress
+    status = Column(String(20), nullable=False, default=OCRJobStatus.QUEUED.value)
+    message = Column(Text)
+    pages_done = Column(Integer, nullable=False, default=0)
+    pages_total = Column(Integer)
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text)
+    locked_at = Column(DateTime(timezone=True))
+    locked_by = Column(String(100))  # "<hostname>:<pid>:<thread>" of the claiming worker
+
+    # Output
+    result = Column(JSON)  # {"lab_data": [...]} once completed
+
+    # Timings
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    expires_at = Column(DateTime(timezone=True))  # Finished jobs are purged after this
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        Index('idx_ocr_jobs_claim', 'status', 'created_at'),
+        Index('idx_ocr_jobs_expires_at', 'expires_at'),
+    )
+
+    def __repr__(self):
+        return f"<OCRJob(id='{self.id}', status='{self.status}', pages={self.pages_done}/{self.pages_total})>"
@@ -0,0 +1,50 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, LargeBinary, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+import enum
+
+
+class ThryveWebhookIntakeStatus(str, enum.Enum):
+    PENDING = "pending"        # Waiting for a worker (new or scheduled for retry)
+    PROCESSING = "processing"  # Claimed by a worker
+    DONE = "done"              # Stored successfully
+    DEAD = "dead"              # Gave up after max attempts or unparseable payload (dead letter)
+
+
+class ThryveWebhookIntake(Base):
+    """
+    Durable spool for Thryve data-push webhooks.
+    The HTTP endpoint appends the raw (still compressed) body here and returns;
+    ingest workers claim rows with SELECT ... FOR UPDATE SKIP LOCKED.
+    """
+    __tablename__ = "thryve_webhook_intake"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+
+    # Payload exactly as received (before decompression)
+    body = Column(LargeBinary, nullable=False)
+    content_encoding = Column(String(50))
+    headers = Column(JSON)
+
+    # Filled in once the payload has been parsed (for inspection of dead letters)
+    event_type = Column(String(100))
+    end_user_id = Column(String(255))
+
+    # Queue state
+    status = Column(String(20), nullable=False, default=ThryveWebhookIntakeStatus.PENDING.value)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text)
+    available_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)  # Not claimable before this (retry backoff)
+    locked_at = Column(DateTime(timezone=True))
+    locked_by = Column(String(100))  # "<hostname>:<pid>:<thread>" of the claiming worker
+    processed_at = Column(DateTime(timezone=True))
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        Index('idx_thryve_webhook_intake_claim', 'status', 'available_at', 'id'),
+    )
+
+    def __repr__(self):
+        return f"<ThryveWebhookIntake(id={self.id}, status='{self.status}', attempts={self.attempts})>"
@@ -448,8 +448,10 @@ class AIAnalysisService:
             
             # Get sections with metrics and data points
             # We need to get ALL sections (both user-created and admin defaults) that have user's health records
+            # Full raw history: the analysis looks at every reading, not chart buckets
             sections_data = health_record_section_metric_crud.get_all_sections_with_user_data(
-                db, user_id, include_inactive=False, health_record_type_id=health_record_type_id
+                db, user_id, include_inactive=False, health_record_type_id=health_record_type_id,
+                resolution="raw", max_points=None
             )
             
             
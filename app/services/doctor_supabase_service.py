@@ -38,11 +38,11 @@ class DoctorSupabaseService:
             client = supabase_service._get_user_client(user_token) if user_token else supabase_service.client
             
             # Use upsert to insert or update existing record
-            response = client.table("doctor_profiles").upsert({
+            response = await supabase_service.run_blocking(lambda: client.table("doctor_profiles").upsert({
                 "id": user_id,  # Primary key
                 "user_id": user_id,  # Also store as user_id for consistency
                 **profile  # Store each field as individual column
-            }).execute()
+            }).execute())
             return True
         except Exception as e:
             logger.error(f"Supabase store doctor profile error: {e}")
@@ -54,10 +54,10 @@ class DoctorSupabaseService:
             client = supabase_service.client
             
             # Update the profile
-            response = client.table("doctor_profiles").update({
+            response = await supabase_service.run_blocking(lambda: client.table("doctor_profiles").update({
                 **profile,
                 "updated_at": "now()"
-            }).eq("user_id", user_id).execute()
+            }).eq("user_id", user_id).execute())
             
             if response.data and len(response.data) > 0:
                 return response.data[0]
@@ -70,10 +70,10 @@ class DoctorSupabaseService:
         """Store Acuity calendar mapping in doctor_acuity_calendars table"""
         try:
             client = supabase_service.client
-            response = client.table("doctor_acuity_calendars").upsert({
+            response = await supabase_service.run_blocking(lambda: client.table("doctor_acuity_calendars").upsert({
                 "doctor_id": doctor_id,
                 "calendar_id": calendar_id
-            }).execute()
+            }).execute())
             return True
         except Exception as e:
             logger.error(f"Error storing Acuity calendar: {e}")
@@ -103,11 +103,11 @@ class DoctorSupabaseService:
             
             # Query by id (primary key) which equals supabase_user_id
             # Also try user_id as fallback in case data is inconsistent
-            profile_response = client.table("doctor_profiles").select("*").eq("id", supabase_user_id).execute()
+            profile_response = await supabase_service.run_blocking(lambda: client.table("doctor_profiles").select("*").eq("id", supabase_user_id).execute())
             
             # If no result, try querying by user_id as fallback
             if not profile_response.data or len(profile_response.data) == 0:
-                profile_response = client.table("doctor_profiles").select("*").eq("user_id", supabase_user_id).execute()
+                profile_response = await supabase_service.run_blocking(lambda: client.table("doctor_profiles").select("*").eq("user_id", supabase_user_id).execute())
             
             if profile_response.data and len(profile_response.data) > 0:
                 profile_data = profile_response.data[0].copy()
@@ -152,7 +152,7 @@ class DoctorSupabaseService:
             client = supabase_service.client
             
             # Fetch all profiles in one query using IN clause
-            profile_response = client.table("doctor_profiles").select("*").in_("id", supabase_user_ids).execute()
+            profile_response = await supabase_service.run_blocking(lambda: client.table("doctor_profiles").select("*").in_("id", supabase_user_ids).execute())
             
             # Build dictionary mapping id -> profile
             profiles_dict = {}
@@ -188,7 +188,7 @@ class DoctorSupabaseService:
             client = supabase_service.client
             
             # Fetch all calendar mappings in one query
-            calendar_response = client.table("doctor_acuity_calendars").select("doctor_id,calendar_id").in_("doctor_id", doctor_ids).execute()
+            calendar_response = await supabase_service.run_blocking(lambda: client.table("doctor_acuity_calendars").select("doctor_id,calendar_id").in_("doctor_id", doctor_ids).execute())
             
             # Build dictionary mapping doctor_id -> calendar_id
             calendars_dict = {}
@@ -221,7 +221,7 @@ class DoctorSupabaseService:
             client = supabase_service.client
             
             # Fetch all doctor IDs in one query using IN clause
-            calendar_response = client.table("doctor_acuity_calendars").select("doctor_id,calendar_id").in_("calendar_id", calendar_ids).execute()
+            calendar_response = await supabase_service.run_blocking(lambda: client.table("doctor_acuity_calendars").select("doctor_id,calendar_id").in_("calendar_id", calendar_ids).execute())
             
             # Build dictionary mapping calendar_id -> doctor_id
             calendars_dict = {}
@@ -257,7 +257,7 @@ class DoctorSupabaseService:
             calendar_id = calendar_id.strip()
             
             client = supabase_service.client
-            calendar_response = client.table("doctor_acuity_calendars").select("doctor_id").eq("calendar_id", calendar_id).execute()
+            calendar_response = await supabase_service.run_blocking(lambda: client.table("doctor_acuity_calendars").select("doctor_id").eq("calendar_id", calendar_id).execute())
             
             if calendar_response.data and len(calendar_response.data) > 0:
                 calendar_data = calendar_response.data[0]
@@ -324,7 +324,7 @@ class DoctorSupabaseService:
             client = supabase_service.client
             
             # Get calendar by doctor_id from doctor_acuity_calendars table
-            calendar_response = client.table("doctor_acuity_calendars").select("calendar_id").eq("doctor_id", doctor_id).execute()
+            calendar_response = await supabase_service.run_blocking(lambda: client.table("doctor_acuity_calendars").select("calendar_id").eq("doctor_id", doctor_id).execute())
             
             if calendar_response.data and len(calendar_response.data) > 0:
                 calendar_data = calendar_response.data[0]
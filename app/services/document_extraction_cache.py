@@ -0,0 +1,173 @@
+"""
+Content-addressed cache for document text extraction and OCR.
+
+Entries are keyed by the SHA-256 of the document bytes plus everything that influences the
+output (extractor/parser version, DPI, languages, PSM, ...), so identical uploads, retries
+and re-parses reuse earlier work while any change to the inputs is a clean miss.
+
+Values are JSON files under EXTRACTION_CACHE_DIR, written atomically so every worker process
+on the host can share them. Reads refresh the file mtime and eviction drops the least
+recently used files once the directory exceeds EXTRACTION_CACHE_MAX_BYTES.
+
+The files hold extracted health data (OCR text, parsed lab rows), so the cache is off unless
+EXTRACTION_CACHE_ENABLED is set together with an explicit EXTRACTION_CACHE_DIR, which should
+sit on encrypted storage. The directory must be owned by the process user with mode 0700
+(it is created that way if missing); otherwise the cache disables itself rather than read
+or write entries another user could see or plant.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import stat
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Eviction trims the cache to this fraction of the limit, so it doesn't run on every write
+EVICTION_TARGET_RATIO = 0.8
+
+
+def content_sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class DocumentExtractionCache:
+    """Size-bounded LRU cache of JSON-serialisable extraction results on local disk"""
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None, enabled: Optional[bool] = None):
+        self.enabled = settings.EXTRACTION_CACHE_ENABLED if enabled is None else enabled
+        directory = directory or settings.EXTRACTION_CACHE_DIR
+        self.directory = Path(directory) if directory else None
+        self.max_bytes = max_bytes or settings.EXTRACTION_CACHE_MAX_BYTES
+        self._lock = threading.Lock()
+        self._approx_size: Optional[int] = None  # Bytes on disk as last seen by this process
+        if self.enabled:
+            self.enabled = self._prepare_directory()
+
+    def _prepare_directory(self) -> bool:
+        """Create the cache directory owner-only, or check that an existing one is; False if unusable"""
+        if self.directory is None:
+            logger.error("EXTRACTION_CACHE_ENABLED is set but EXTRACTION_CACHE_DIR is not; extraction cache disabled")
+            return False
+        try:
+            self.directory.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.mkdir(self.directory, 0o700)
+            except FileExistsError:
+                pass
+            info = os.lstat(self.directory)
+        except OSError as e:
+            logger.error(f"Cannot create extraction cache directory {self.directory}: {e}; extraction cache disabled")
+            return False
+        if not stat.S_ISDIR(info.st_mode):
+            problem = "is not a directory (or is a symlink)"
+        elif info.st_uid != os.geteuid():
+            problem = f"is owned by uid {info.st_uid}, not the process user {os.geteuid()}"
+        elif stat.S_IMODE(info.st_mode) != 0o700:
+            problem = f"has mode {oct(stat.S_IMODE(info.st_mode))}, expected 0o700"
+        else:
+            return True
+        logger.error(f"Extraction cache directory {self.directory} {problem}; extraction cache disabled")
+        return False
+
+    @staticmethod
+    def make_key(kind: str, content_hash: str, **params: Any) -> str:
+        """Cache key for one kind of result of a document (or text) with the given parameters"""
+        material = json.dumps({"kind": kind, "sha256": content_hash, "params": params}, sort_keys=True, default=str)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                value = json.load(fh)
+            os.utime(path)  # LRU: a hit counts as a use
+            return value
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable extraction cache entry {key}: {e}")
+            return None
+
+    def put(self, key: str, value: Any) -> None:
+        if not self.enabled:
+            return
+        path = self._path(key)
+        try:
+            path.parent.mkdir(mode=0o700, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                    json.dump(value, fh, ensure_ascii=False)
+                os.replace(tmp_path, path)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+            self._account(path.stat().st_size)
+        except Exception as e:
+            logger.warning(f"Failed to write extraction cache entry {key}: {e}")
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Cached value for `key`, computing and storing it on a miss (exceptions are not cached)"""
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def _account(self, added: int) -> None:
+        with self._lock:
+            if self._approx_size is None:
+                self._approx_size = self._disk_usage()
+            else:
+                self._approx_size += added
+            if self._approx_size <= self.max_bytes:
+                return
+            # Other processes write here too - re-measure before evicting
+            self._approx_size = self._evict()
+
+    def _entries(self):
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+                yield path, stat.st_size, stat.st_mtime
+            except FileNotFoundError:
+                continue
+
+    def _disk_usage(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self) -> int:
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * EVICTION_TARGET_RATIO)
+        removed = 0
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+                total -= size
+                removed += 1
+            except FileNotFoundError:
+                total -= size
+        if removed:
+            logger.info(f"Evicted {removed} extraction cache entries, {total} bytes remain")
+        return total
+
+
+# Global instance
+document_extraction_cache = DocumentExtractionCache()
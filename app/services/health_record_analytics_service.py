@@ -1,27 +1,264 @@
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Tuple, NamedTuple, Union
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc, asc
-from datetime import datetime, timedelta
+from sqlalchemy import and_, or_, func, cast, Float
+from datetime import datetime, timedelta, timezone
 from app.models.health_record import (
-    HealthRecord, HealthRecordSection, HealthRecordMetric, 
+    HealthRecord, HealthRecordSection, HealthRecordMetric,
     VitalMetric, LifestyleMetric, BodyMetric
 )
 from app.models.health_record import (
     VitalStatus, LifestyleStatus, BodyStatus, MedicalConditionStatus
 )
 import logging
-import json
-from collections import defaultdict
+import numpy as np
+from collections import Counter
 
 logger = logging.getLogger(__name__)
 
+SECONDS_PER_DAY = 86400.0
+
+# Trend data_points are returned per record up to this many records, as daily means beyond it
+MAX_RAW_DATA_POINTS = 1000
+
+# Window of the rolling mean over the daily series
+ROLLING_WINDOW_DAYS = 7
+
+# |z-score| from which a value is reported as an anomaly, and how many are reported at most
+ANOMALY_Z_THRESHOLD = 3.0
+MAX_ANOMALIES = 50
+
+# Relative change over the period (regression slope * span / |mean|) that counts as a trend
+TREND_CHANGE_THRESHOLD = 0.1
+
+# Bucket length of each correlation matrix resampling granularity
+CORRELATION_GRANULARITIES = {
+    "hour": 3600.0,
+    "day": SECONDS_PER_DAY,
+    "week": 7 * SECONDS_PER_DAY
+}
+
+# Strongest metric pairs listed alongside the correlation matrix
+MAX_STRONGEST_PAIRS = 10
+
+# Score per record status for each health score category (statuses compared case-insensitively)
+VITAL_STATUS_SCORES = {
+    VitalStatus.NORMAL.value.lower(): 100,
+    VitalStatus.ELEVATED.value.lower(): 80,
+    VitalStatus.HIGH.value.lower(): 60,
+    VitalStatus.LOW.value.lower(): 60,
+    VitalStatus.CRITICAL.value.lower(): 20
+}
+LIFESTYLE_STATUS_SCORES = {
+    LifestyleStatus.EXCELLENT.value.lower(): 100,
+    LifestyleStatus.GOOD.value.lower(): 80,
+    LifestyleStatus.FAIR.value.lower(): 60,
+    LifestyleStatus.POOR.value.lower(): 40,
+    LifestyleStatus.NEEDS_IMPROVEMENT.value.lower(): 30
+}
+BODY_STATUS_SCORES = {
+    BodyStatus.ATHLETIC.value.lower(): 100,
+    BodyStatus.HEALTHY.value.lower(): 90,
+    BodyStatus.OVERWEIGHT.value.lower(): 60,
+    BodyStatus.UNDERWEIGHT.value.lower(): 70,
+    BodyStatus.OBESE.value.lower(): 40
+}
+
+
+class MetricSeries(NamedTuple):
+    """Columnar (time-ordered) records of one metric"""
+    timestamps: np.ndarray  # float64 epoch seconds
+    values: np.ndarray      # float64
+    statuses: np.ndarray    # object (str or None)
+
+
+def _to_date(day: int) -> str:
+    """ISO date for an epoch day number"""
+    return datetime.fromtimestamp(int(day) * SECONDS_PER_DAY, tz=timezone.utc).date().isoformat()
+
+
+def _daily_means(timestamps: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Group a series by UTC day. Returns (epoch days, mean per day, count per day)"""
+    days = np.floor(timestamps / SECONDS_PER_DAY).astype(np.int64)
+    unique_days, inverse = np.unique(days, return_inverse=True)
+    counts = np.bincount(inverse)
+    means = np.bincount(inverse, weights=values) / counts
+    return unique_days, means, counts
+
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over up to `window` points (shorter at the start of the series)"""
+    cumulative = np.concatenate(([0.0], np.cumsum(values)))
+    index = np.arange(1, len(values) + 1)
+    lower = np.maximum(index - window, 0)
+    return (cumulative[index] - cumulative[lower]) / (index - lower)
+
+
+def _linear_slope(x: np.ndarray, y: np.ndarray) -> float:
+    """Least-squares slope of y over x (0 if x has no spread)"""
+    if len(x) < 2:
+        return 0.0
+    x_centered = x - x.mean()
+    denominator = np.dot(x_centered, x_centered)
+    if denominator == 0:
+        return 0.0
+    return float(np.dot(x_centered, y - y.mean()) / denominator)
+
+
+def _z_scores(values: np.ndarray) -> np.ndarray:
+    std = values.std()
+    if std == 0:
+        return np.zeros_like(values)
+    return (values - values.mean()) / std
+
+
+def _pearson(values1: np.ndarray, values2: np.ndarray) -> float:
+    """Pearson correlation coefficient (0 if either series is constant)"""
+    if len(values1) < 2:
+        return 0.0
+    centered1 = values1 - values1.mean()
+    centered2 = values2 - values2.mean()
+    denominator = np.sqrt(np.dot(centered1, centered1) * np.dot(centered2, centered2))
+    if denominator == 0:
+        return 0.0
+    return float(np.dot(centered1, centered2) / denominator)
+
+
+def _rank(values: np.ndarray) -> np.ndarray:
+    """1-based ranks, ties get their average rank"""
+    ranks = np.empty(len(values), dtype=np.float64)
+    ranks[np.argsort(values, kind="mergesort")] = np.arange(1, len(values) + 1)
+    _, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    return (np.bincount(inverse, weights=ranks) / counts)[inverse]
+
+
+def _column_ranks(matrix: np.ndarray) -> np.ndarray:
+    """Rank each column over its non-NaN entries (NaN stays NaN)"""
+    ranked = np.full(matrix.shape, np.nan)
+    for column in range(matrix.shape[1]):
+        present = ~np.isnan(matrix[:, column])
+        if present.any():
+            ranked[present, column] = _rank(matrix[present, column])
+    return ranked
+
+
+def _pairwise_correlation(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pearson correlation of every column pair of a (time buckets x metrics) matrix with NaN
+    for missing buckets, each pair over the buckets where both are present.
+    Everything is computed with a few matrix products instead of a loop over pairs.
+    Returns (correlations, overlap counts); correlations are NaN where undefined.
+    """
+    present = (~np.isnan(matrix)).astype(np.float64)
+    values = np.nan_to_num(matrix)
+
+    overlap = present.T @ present                 # n_ij: buckets where both i and j are present
+    sums = values.T @ present                     # sum of x_i over those buckets
+    squares = (values * values).T @ present       # sum of x_i^2 over those buckets
+    products = values.T @ values                  # sum of x_i * x_j
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        covariance = products - sums * sums.T / overlap
+        variance = squares - sums * sums / overlap
+        correlation = covariance / np.sqrt(variance * variance.T)
+    correlation[overlap < 2] = np.nan
+    return np.clip(correlation, -1.0, 1.0), overlap.astype(np.int64)
+
+
+def _spearman(values1: np.ndarray, values2: np.ndarray) -> float:
+    """Spearman rank correlation coefficient"""
+    if len(values1) < 2:
+        return 0.0
+    return _pearson(_rank(values1), _rank(values2))
+
+
 class HealthRecordAnalyticsService:
     """Service for health record analytics and trend analysis"""
     
+    @staticmethod
+    def _recorded_at():
+        """Effective record time: measure_start_time if available, otherwise created_at"""
+        return func.coalesce(HealthRecord.measure_start_time, HealthRecord.created_at)
+    
+    @staticmethod
+    def _metric_name_candidates(metric_name: str) -> List[str]:
+        """Lowercase spellings a metric name may be stored under ("heart_rate" -> "heart rate")"""
+        name = metric_name.strip().lower()
+        return list({name, name.replace("_", " ")})
+    
+    def load_series(
+        self,
+        db: Session,
+        user_id: int,
+        metrics: List[Union[int, str]],
+        start_date: datetime,
+        end_date: datetime
+    ) -> Dict[Union[int, str], MetricSeries]:
+        """
+        Load the records of several metrics as NumPy arrays with a single query.
+        
+        Args:
+            metrics: Metric IDs and/or metric names (matched case-insensitively against
+                     name and display_name; a name may cover several of the user's metrics)
+        
+        Returns:
+            Dict keyed like `metrics` with a time-ordered MetricSeries per metric
+            (metrics without records in the window are omitted)
+        """
+        metric_ids = [metric for metric in metrics if isinstance(metric, int)]
+        candidates_by_name = {
+            metric: self._metric_name_candidates(metric)
+            for metric in metrics if isinstance(metric, str)
+        }
+        all_candidates = sorted({name for names in candidates_by_name.values() for name in names})
+        
+        conditions = []
+        if metric_ids:
+            conditions.append(HealthRecord.metric_id.in_(metric_ids))
+        if all_candidates:
+            conditions.append(func.lower(HealthRecordMetric.name).in_(all_candidates))
+            conditions.append(func.lower(HealthRecordMetric.display_name).in_(all_candidates))
+        if not conditions:
+            return {}
+        
+        recorded_at = self._recorded_at()
+        rows = db.query(
+            HealthRecord.metric_id,
+            func.lower(HealthRecordMetric.name),
+            func.lower(HealthRecordMetric.display_name),
+            cast(func.extract('epoch', recorded_at), Float),
+            HealthRecord.value,
+            HealthRecord.status
+        ).join(
+            HealthRecordMetric, HealthRecordMetric.id == HealthRecord.metric_id
+        ).filter(
+            HealthRecord.created_by == user_id,
+            recorded_at >= start_date,
+            recorded_at <= end_date,
+            or_(*conditions)
+        ).order_by(recorded_at, HealthRecord.id).all()
+        
+        if not rows:
+            return {}
+        
+        row_metric_ids, names, display_names, timestamps, values, statuses = (np.array(column) for column in zip(*rows))
+        timestamps = timestamps.astype(np.float64)
+        values = values.astype(np.float64)
+        statuses = statuses.astype(object)
+        
+        masks = {metric_id: row_metric_ids == metric_id for metric_id in metric_ids}
+        for metric_name, candidates in candidates_by_name.items():
+            masks[metric_name] = np.isin(names, candidates) | np.isin(display_names, candidates)
+        
+        return {
+            metric: MetricSeries(timestamps[mask], values[mask], statuses[mask])
+            for metric, mask in masks.items()
+            if mask.any()
+        }
+    
     def get_trend_analysis(
-        self, 
-        db: Session, 
-        user_id: int, 
+        self,
+        db: Session,
+        user_id: int,
         metric_name: str,
         days: int = 30
     ) -> Dict[str, Any]:
@@ -33,25 +270,18 @@ class HealthRecordAnalyticsService:
             user_id: ID of the user
             metric_name: Name of the metric to analyze
             days: Number of days to analyze
-            
+        
         Returns:
             Dict containing trend analysis data
         """
         try:
             # Calculate date range
-            end_date = datetime.now()
+            end_date = datetime.now(timezone.utc)
             start_date = end_date - timedelta(days=days)
             
-            # Get health records for the specified metric
-            records = db.query(HealthRecord).filter(
-                and_(
-                    HealthRecord.created_by == user_id,
-                    HealthRecord.recorded_at >= start_date,
-                    HealthRecord.recorded_at <= end_date
-                )
-            ).order_by(HealthRecord.recorded_at).all()
+            series = self.load_series(db, user_id, [metric_name], start_date, end_date).get(metric_name)
             
-            if not records:
+            if series is None:
                 return {
                     "metric": metric_name,
                     "period_days": days,
@@ -60,94 +290,86 @@ class HealthRecordAnalyticsService:
                     "analysis": "No data available for analysis"
                 }
             
-            # Extract values and dates
-            values = []
-            dates = []
-            statuses = []
-            
-            for record in records:
-                if isinstance(record.value, dict) and metric_name in record.value:
-                    values.append(record.value[metric_name])
-                    dates.append(record.recorded_at)
-                    statuses.append(record.status)
-                elif isinstance(record.value, (int, float)):
-                    values.append(record.value)
-                    dates.append(record.recorded_at)
-                    statuses.append(record.status)
-            
-            if not values:
-                return {
-                    "metric": metric_name,
-                    "period_days": days,
-                    "total_records": len(records),
-                    "trend": "insufficient_data",
-                    "analysis": "No valid values found for the specified metric"
-                }
-            
-            # Calculate basic statistics
-            numeric_values = [v for v in values if isinstance(v, (int, float))]
-            if numeric_values:
-                min_val = min(numeric_values)
-                max_val = max(numeric_values)
-                avg_val = sum(numeric_values) / len(numeric_values)
-                
-                # Calculate trend
-                if len(numeric_values) >= 2:
-                    first_half = numeric_values[:len(numeric_values)//2]
-                    second_half = numeric_values[len(numeric_values)//2:]
-                    first_avg = sum(first_half) / len(first_half)
-                    second_avg = sum(second_half) / len(second_half)
-                    
-                    if second_avg > first_avg * 1.1:
-                        trend = "increasing"
-                    elif second_avg < first_avg * 0.9:
-                        trend = "decreasing"
-                    else:
-                        trend = "stable"
+            timestamps, values, statuses = series
+            total_records = len(values)
+            
+            # Trend: least-squares slope per day, judged by the change it implies over the period
+            slope_per_day = _linear_slope(timestamps / SECONDS_PER_DAY, values)
+            mean_value = float(values.mean())
+            if total_records >= 2:
+                span_days = (timestamps[-1] - timestamps[0]) / SECONDS_PER_DAY
+                relative_change = slope_per_day * span_days / abs(mean_value) if mean_value else 0.0
+                if relative_change > TREND_CHANGE_THRESHOLD:
+                    trend = "increasing"
+                elif relative_change < -TREND_CHANGE_THRESHOLD:
+                    trend = "decreasing"
                 else:
-                    trend = "insufficient_data"
+                    trend = "stable"
             else:
-                min_val = max_val = avg_val = None
-                trend = "non_numeric"
+                trend = "insufficient_data"
             
-            # Analyze status distribution
-            status_counts = defaultdict(int)
-            for status in statuses:
-                status_counts[status] += 1
+            daily_days, daily_means, daily_counts = _daily_means(timestamps, values)
+            rolling = _rolling_mean(daily_means, ROLLING_WINDOW_DAYS)
             
-            # Calculate frequency
-            total_days = (end_date - start_date).days
-            frequency = len(records) / total_days if total_days > 0 else 0
+            # Anomalies: values far from the period mean, strongest first
+            z_scores = _z_scores(values)
+            anomaly_index = np.flatnonzero(np.abs(z_scores) >= ANOMALY_Z_THRESHOLD)
+            anomaly_index = anomaly_index[np.argsort(-np.abs(z_scores[anomaly_index]))][:MAX_ANOMALIES]
+            
+            if total_records <= MAX_RAW_DATA_POINTS:
+                data_points_resolution = "raw"
+                data_points = [
+                    {
+                        "date": datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat(),
+                        "value": value,
+                        "status": status
+                    } for timestamp, value, status in zip(timestamps.tolist(), values.tolist(), statuses.tolist())
+                ]
+            else:
+                data_points_resolution = "daily"
+                data_points = [
+                    {"date": _to_date(day), "value": mean, "count": count}
+                    for day, mean, count in zip(daily_days.tolist(), daily_means.tolist(), daily_counts.tolist())
+                ]
             
             return {
                 "metric": metric_name,
                 "period_days": days,
-                "total_records": len(records),
+                "total_records": total_records,
                 "trend": trend,
                 "statistics": {
-                    "min_value": min_val,
-                    "max_value": max_val,
-                    "average_value": avg_val,
-                    "frequency_per_day": round(frequency, 2)
+                    "min_value": float(values.min()),
+                    "max_value": float(values.max()),
+                    "average_value": mean_value,
+                    "median_value": float(np.median(values)),
+                    "std_dev": float(values.std()),
+                    "slope_per_day": slope_per_day,
+                    "frequency_per_day": round(total_records / days, 2) if days > 0 else 0
                 },
-                "status_distribution": dict(status_counts),
-                "data_points": [
+                "status_distribution": dict(Counter(statuses.tolist())),
+                "rolling_mean": [
+                    {"date": _to_date(day), "value": value}
+                    for day, value in zip(daily_days.tolist(), rolling.tolist())
+                ],
+                "anomalies": [
                     {
-                        "date": date.isoformat(),
-                        "value": value,
-                        "status": status
-                    } for date, value, status in zip(dates, values, statuses)
-                ]
+                        "date": datetime.fromtimestamp(timestamps[i], tz=timezone.utc).isoformat(),
+                        "value": float(values[i]),
+                        "z_score": round(float(z_scores[i]), 2)
+                    } for i in anomaly_index
+                ],
+                "data_points_resolution": data_points_resolution,
+                "data_points": data_points
             }
-            
+        
         except Exception as e:
             logger.error(f"Error in trend analysis: {e}")
             return {"error": f"Failed to analyze trends: {str(e)}"}
     
     def get_correlation_analysis(
-        self, 
-        db: Session, 
-        user_id: int, 
+        self,
+        db: Session,
+        user_id: int,
         metric1: str,
         metric2: str,
         days: int = 30
@@ -161,33 +383,19 @@ class HealthRecordAnalyticsService:
             metric1: First metric name
             metric2: Second metric name
             days: Number of days to analyze
-            
+        
         Returns:
             Dict containing correlation analysis data
         """
         try:
             # Calculate date range
-            end_date = datetime.now()
+            end_date = datetime.now(timezone.utc)
             start_date = end_date - timedelta(days=days)
             
-            # Get health records for both metrics
-            records1 = db.query(HealthRecord).filter(
-                and_(
-                    HealthRecord.created_by == user_id,
-                    HealthRecord.recorded_at >= start_date,
-                    HealthRecord.recorded_at <= end_date
-                )
-            ).order_by(HealthRecord.recorded_at).all()
-            
-            records2 = db.query(HealthRecord).filter(
-                and_(
-                    HealthRecord.created_by == user_id,
-                    HealthRecord.recorded_at >= start_date,
-                    HealthRecord.recorded_at <= end_date
-                )
-            ).order_by(HealthRecord.recorded_at).all()
+            # Both metrics in one query
+            series = self.load_series(db, user_id, [metric1, metric2], start_date, end_date)
             
-            if not records1 or not records2:
+            if metric1 not in series or metric2 not in series:
                 return {
                     "metric1": metric1,
                     "metric2": metric2,
@@ -196,26 +404,12 @@ class HealthRecordAnalyticsService:
                     "analysis": "Insufficient data for correlation analysis"
                 }
             
-            # Create date-value mappings
-            metric1_data = {}
-            metric2_data = {}
-            
-            for record in records1:
-                if isinstance(record.value, dict) and metric1 in record.value:
-                    metric1_data[record.recorded_at.date()] = record.value[metric1]
-                elif isinstance(record.value, (int, float)):
-                    metric1_data[record.recorded_at.date()] = record.value
-            
-            for record in records2:
-                if isinstance(record.value, dict) and metric2 in record.value:
-                    metric2_data[record.recorded_at.date()] = record.value[metric2]
-                elif isinstance(record.value, (int, float)):
-                    metric2_data[record.recorded_at.date()] = record.value
-            
-            # Find common dates
-            common_dates = set(metric1_data.keys()) & set(metric2_data.keys())
+            # Align both metrics on the days where each has data (daily means)
+            days1, means1, _ = _daily_means(series[metric1].timestamps, series[metric1].values)
+            days2, means2, _ = _daily_means(series[metric2].timestamps, series[metric2].values)
+            common_days, index1, index2 = np.intersect1d(days1, days2, assume_unique=True, return_indices=True)
             
-            if len(common_dates) < 3:
+            if len(common_days) < 3:
                 return {
                     "metric1": metric1,
                     "metric2": metric2,
@@ -224,12 +418,10 @@ class HealthRecordAnalyticsService:
                     "analysis": "Insufficient overlapping data for correlation analysis"
                 }
             
-            # Calculate correlation
-            values1 = [metric1_data[date] for date in sorted(common_dates)]
-            values2 = [metric2_data[date] for date in sorted(common_dates)]
-            
-            # Simple correlation calculation (Pearson correlation coefficient)
-            correlation = self._calculate_correlation(values1, values2)
+            values1 = means1[index1]
+            values2 = means2[index2]
+            correlation = _pearson(values1, values2)
+            spearman = _spearman(values1, values2)
             
             # Determine correlation strength
             if abs(correlation) >= 0.7:
@@ -251,58 +443,153 @@ class HealthRecordAnalyticsService:
                 "metric1": metric1,
                 "metric2": metric2,
                 "period_days": days,
-                "common_data_points": len(common_dates),
+                "common_data_points": len(common_days),
                 "correlation_coefficient": round(correlation, 3),
+                "spearman_coefficient": round(spearman, 3),
                 "correlation_strength": strength,
                 "correlation_direction": direction,
                 "analysis": f"There is a {strength} {direction} correlation between {metric1} and {metric2}",
                 "data_points": [
                     {
-                        "date": date.isoformat(),
-                        "metric1_value": metric1_data[date],
-                        "metric2_value": metric2_data[date]
-                    } for date in sorted(common_dates)
+                        "date": _to_date(day),
+                        "metric1_value": value1,
+                        "metric2_value": value2
+                    } for day, value1, value2 in zip(common_days.tolist(), values1.tolist(), values2.tolist())
                 ]
             }
-            
+        
         except Exception as e:
             logger.error(f"Error in correlation analysis: {e}")
             return {"error": f"Failed to analyze correlation: {str(e)}"}
     
-    def _calculate_correlation(self, values1: List[float], values2: List[float]) -> float:
-        """Calculate Pearson correlation coefficient"""
-        try:
-            if len(values1) != len(values2) or len(values1) < 2:
-                return 0.0
-            
-            # Convert to numeric values
-            numeric_values1 = [float(v) for v in values1 if isinstance(v, (int, float))]
-            numeric_values2 = [float(v) for v in values2 if isinstance(v, (int, float))]
-            
-            if len(numeric_values1) != len(numeric_values2) or len(numeric_values1) < 2:
-                return 0.0
-            
-            n = len(numeric_values1)
-            sum1 = sum(numeric_values1)
-            sum2 = sum(numeric_values2)
-            sum1_sq = sum(x * x for x in numeric_values1)
-            sum2_sq = sum(x * x for x in numeric_values2)
-            sum_xy = sum(x * y for x, y in zip(numeric_values1, numeric_values2))
-            
-            numerator = n * sum_xy - sum1 * sum2
-            denominator = ((n * sum1_sq - sum1 * sum1) * (n * sum2_sq - sum2 * sum2)) ** 0.5
+    def get_correlation_matrix(
+        self,
+        db: Session,
+        user_id: int,
+        metric_ids: List[int],
+        start_date: datetime,
+        end_date: datetime,
+        granularity: str = "day",
+        method: str = "pearson",
+        min_overlap: int = 3
+    ) -> Dict[str, Any]:
+        """
+        Correlation matrix across many metrics
+        
+        All metrics are loaded with one query, resampled to bucket means on a common
+        `granularity` grid anchored at start_date, and correlated pairwise over the buckets
+        both metrics share.
+        
+        Args:
+            db: Database session
+            user_id: ID of the user
+            metric_ids: Metric IDs to correlate
+            start_date: Start of the window
+            end_date: End of the window
+            granularity: "hour", "day" or "week"
+            method: "pearson", or "spearman" (ranks are taken per metric over all its
+                    buckets, which equals true Spearman wherever series fully overlap)
+            min_overlap: Minimum shared buckets for a coefficient to be reported
             
-            if denominator == 0:
-                return 0.0
+        Returns:
+            Dict with the metrics, the correlation matrix (None where undefined or below
+            min_overlap), the overlap counts and the strongest pairs
+        """
+        try:
+            if granularity not in CORRELATION_GRANULARITIES:
+                return {"error": f"Unsupported granularity '{granularity}', expected one of {list(CORRELATION_GRANULARITIES)}"}
+            if method not in ("pearson", "spearman"):
+                return {"error": f"Unsupported method '{method}', expected 'pearson' or 'spearman'"}
+            
+            metric_ids = list(dict.fromkeys(metric_ids))
+            series = self.load_series(db, user_id, metric_ids, start_date, end_date)
+            
+            # Metadata only for metrics the user has records of
+            metrics_info = {
+                metric.id: metric
+                for metric in db.query(HealthRecordMetric).filter(
+                    HealthRecordMetric.id.in_(list(series.keys()))
+                ).all()
+            } if series else {}
+            
+            # Resample every series onto one grid in a single bincount:
+            # cell = bucket * n_metrics + column
+            bucket_seconds = CORRELATION_GRANULARITIES[granularity]
+            origin = start_date.timestamp()
+            n_metrics = len(metric_ids)
+            n_buckets = max(int(np.ceil((end_date.timestamp() - origin) / bucket_seconds)), 1)
+            
+            cells = []
+            weights = []
+            for column, metric_id in enumerate(metric_ids):
+                if metric_id in series:
+                    buckets = np.clip(
+                        ((series[metric_id].timestamps - origin) // bucket_seconds).astype(np.int64), 0, n_buckets - 1
+                    )
+                    cells.append(buckets * n_metrics + column)
+                    weights.append(series[metric_id].values)
+            
+            grid = np.full(n_buckets * n_metrics, np.nan)
+            if cells:
+                cells = np.concatenate(cells)
+                counts = np.bincount(cells, minlength=n_buckets * n_metrics)
+                sums = np.bincount(cells, weights=np.concatenate(weights), minlength=n_buckets * n_metrics)
+                filled = counts > 0
+                grid[filled] = sums[filled] / counts[filled]
+            matrix = grid.reshape(n_buckets, n_metrics)
+            
+            # Drop buckets where no metric has data
+            matrix = matrix[~np.isnan(matrix).all(axis=1)]
+            if method == "spearman":
+                matrix = _column_ranks(matrix)
+            
+            correlation, overlap = _pairwise_correlation(matrix)
+            correlation[overlap < max(min_overlap, 2)] = np.nan
+            
+            correlation_rows = [
+                [None if np.isnan(value) else round(float(value), 3) for value in row]
+                for row in correlation
+            ]
+            
+            # Strongest off-diagonal pairs
+            upper_i, upper_j = np.triu_indices(n_metrics, k=1)
+            pair_values = correlation[upper_i, upper_j]
+            defined = np.flatnonzero(~np.isnan(pair_values))
+            strongest = defined[np.argsort(-np.abs(pair_values[defined]))][:MAX_STRONGEST_PAIRS]
             
-            return numerator / denominator
+            return {
+                "start_date": start_date.isoformat(),
+                "end_date": end_date.isoformat(),
+                "granularity": granularity,
+                "method": method,
+                "min_overlap": min_overlap,
+                "metrics": [
+                    {
+                        "id": metric_id,
+                        "name": metrics_info[metric_id].name if metric_id in metrics_info else None,
+                        "display_name": metrics_info[metric_id].display_name if metric_id in metrics_info else None,
+                        "data_points": int((~np.isnan(matrix[:, column])).sum())
+                    } for column, metric_id in enumerate(metric_ids)
+                ],
+                "matrix": correlation_rows,
+                "overlap": overlap.tolist(),
+                "strongest_pairs": [
+                    {
+                        "metric1_id": metric_ids[upper_i[index]],
+                        "metric2_id": metric_ids[upper_j[index]],
+                        "correlation_coefficient": round(float(pair_values[index]), 3),
+                        "common_data_points": int(overlap[upper_i[index], upper_j[index]])
+                    } for index in strongest
+                ]
+            }
             
-        except Exception:
-            return 0.0
+        except Exception as e:
+            logger.error(f"Error in correlation matrix analysis: {e}")
+            return {"error": f"Failed to analyze correlation matrix: {str(e)}"}
     
     def get_health_score(
-        self, 
-        db: Session, 
+        self,
+        db: Session,
         user_id: int,
         days: int = 30
     ) -> Dict[str, Any]:
@@ -313,25 +600,27 @@ class HealthRecordAnalyticsService:
             db: Database session
             user_id: ID of the user
             days: Number of days to analyze
-            
+        
         Returns:
             Dict containing health score and breakdown
         """
         try:
             # Calculate date range
-            end_date = datetime.now()
+            end_date = datetime.now(timezone.utc)
             start_date = end_date - timedelta(days=days)
             
-            # Get recent health records
-            records = db.query(HealthRecord).filter(
+            # Scores only depend on how many records have each status - count them in SQL
+            recorded_at = self._recorded_at()
+            status = func.lower(HealthRecord.status)
+            status_counts = dict(db.query(status, func.count(HealthRecord.id)).filter(
                 and_(
                     HealthRecord.created_by == user_id,
-                    HealthRecord.recorded_at >= start_date,
-                    HealthRecord.recorded_at <= end_date
+                    recorded_at >= start_date,
+                    recorded_at <= end_date
                 )
-            ).all()
+            ).group_by(status).all())
             
-            if not records:
+            if not status_counts:
                 return {
                     "health_score": 0,
                     "period_days": days,
@@ -340,9 +629,9 @@ class HealthRecordAnalyticsService:
                 }
             
             # Calculate scores for different categories
-            vital_score = self._calculate_vital_score(records)
-            lifestyle_score = self._calculate_lifestyle_score(records)
-            body_score = self._calculate_body_score(records)
+            vital_score = self._calculate_status_score(status_counts, VITAL_STATUS_SCORES)
+            lifestyle_score = self._calculate_status_score(status_counts, LIFESTYLE_STATUS_SCORES)
+            body_score = self._calculate_status_score(status_counts, BODY_STATUS_SCORES)
             
             # Calculate overall score (weighted average)
             overall_score = (vital_score * 0.4 + lifestyle_score * 0.4 + body_score * 0.2)
@@ -379,113 +668,21 @@ class HealthRecordAnalyticsService:
                     vital_score, lifestyle_score, body_score
                 )
             }
-            
+        
         except Exception as e:
             logger.error(f"Error calculating health score: {e}")
             return {"error": f"Failed to calculate health score: {str(e)}"}
-    
-    def _calculate_vital_score(self, records: List[HealthRecord]) -> float:
-        """Calculate score for vital signs"""
-        try:
-            vital_records = [r for r in records if r.status in [
-                VitalStatus.NORMAL, VitalStatus.ELEVATED, VitalStatus.HIGH, 
-                VitalStatus.LOW, VitalStatus.CRITICAL
-            ]]
-            
-            if not vital_records:
-                return 0.0
-            
-            score = 0
-            total = 0
-            
-            for record in vital_records:
-                if record.status == VitalStatus.NORMAL:
-                    score += 100
-                elif record.status == VitalStatus.ELEVATED:
-                    score += 80
-                elif record.status == VitalStatus.HIGH:
-                    score += 60
-                elif record.status == VitalStatus.LOW:
-                    score += 60
-                elif record.status == VitalStatus.CRITICAL:
-                    score += 20
-                total += 1
-            
-            return score / total if total > 0 else 0.0
-            
-        except Exception:
-            return 0.0
-    
-    def _calculate_lifestyle_score(self, records: List[HealthRecord]) -> float:
-        """Calculate score for lifestyle metrics"""
-        try:
-            lifestyle_records = [r for r in records if r.status in [
-                LifestyleStatus.EXCELLENT, LifestyleStatus.GOOD, 
-                LifestyleStatus.FAIR, LifestyleStatus.POOR, 
-                LifestyleStatus.NEEDS_IMPROVEMENT
-            ]]
-            
-            if not lifestyle_records:
-                return 0.0
-            
-            score = 0
-            total = 0
-            
-            for record in lifestyle_records:
-                if record.status == LifestyleStatus.EXCELLENT:
-                    score += 100
-                elif record.status == LifestyleStatus.GOOD:
-                    score += 80
-                elif record.status == LifestyleStatus.FAIR:
-                    score += 60
-                elif record.status == LifestyleStatus.POOR:
-                    score += 40
-                elif record.status == LifestyleStatus.NEEDS_IMPROVEMENT:
-                    score += 30
-                total += 1
-            
-            return score / total if total > 0 else 0.0
-            
-        except Exception:
-            return 0.0
-    
-    def _calculate_body_score(self, records: List[HealthRecord]) -> float:
-        """Calculate score for body composition metrics"""
-        try:
-            body_records = [r for r in records if r.status in [
-                BodyStatus.HEALTHY, BodyStatus.OVERWEIGHT, 
-                BodyStatus.UNDERWEIGHT, BodyStatus.OBESE, 
-                BodyStatus.ATHLETIC
-            ]]
-            
-            if not body_records:
-                return 0.0
-            
-            score = 0
-            total = 0
-            
-            for record in body_records:
-                if record.status == BodyStatus.ATHLETIC:
-                    score += 100
-                elif record.status == BodyStatus.HEALTHY:
-                    score += 90
-                elif record.status == BodyStatus.OVERWEIGHT:
-                    score += 60
-                elif record.status == BodyStatus.UNDERWEIGHT:
-                    score += 70
-                elif record.status == BodyStatus.OBESE:
-                    score += 40
-                total += 1
-            
-            return score / total if total > 0 else 0.0
-            
-        except Exception:
-            return 0.0
-    
+
+    def _calculate_status_score(self, status_counts: Dict[Optional[str], int], status_scores: Dict[str, int]) -> float:
+        """Average score of the records whose status belongs to a category (0 if there are none)"""
+        weighted = sum(score * status_counts.get(status, 0) for status, score in status_scores.items())
+        total = sum(status_counts.get(status, 0) for status in status_scores)
+        return weighted / total if total > 0 else 0.0
+
     def _generate_health_recommendations(
-        self, 
-        vital_score: float, 
-        lifestyle_score: float, 
+        self,
+        vital_score: float,
+        lifestyle_score: float,
         body_score: float
     ) -> List[str]:
         """Generate health recommendations based on scores"""
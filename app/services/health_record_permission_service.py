@@ -19,6 +19,12 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Areas covered by the can_view_<area> flags of HealthRecordPermission
+PERMISSION_AREAS = (
+    "health_records", "medical_history", "health_plans", "medications",
+    "appointments", "messages", "lab_results", "imaging"
+)
+
 class HealthRecordPermissionService:
     """Service for managing and checking health record permissions"""
     
@@ -292,6 +298,49 @@ class HealthRecordPermissionService:
             logger.error(f"Error checking imaging access: {e}")
             return False, f"Error checking permissions: {str(e)}"
     
+    def get_access_matrix(
+        self,
+        db: Session,
+        professional_id: int,
+        patient_ids: Optional[List[int]] = None
+    ) -> Dict[int, Dict[str, bool]]:
+        """
+        View access of a professional to every area (PERMISSION_AREAS) of many patients in one query
+        
+        Same rules as the check_*_access methods: active, unexpired permission records only.
+        Database errors are raised rather than reported as "no access".
+        
+        Args:
+            db: Database session
+            professional_id: ID of the professional
+            patient_ids: Patients to evaluate (None: every patient with a permission record)
+            
+        Returns:
+            Dict[int, Dict[str, bool]]: {patient_id: {area: has_access}} for patients with a valid record
+        """
+        if patient_ids is not None and not patient_ids:
+            return {}
+        query = db.query(HealthRecordPermission).filter(
+            and_(
+                HealthRecordPermission.professional_id == professional_id,
+                HealthRecordPermission.is_active == True,
+                or_(
+                    HealthRecordPermission.expires_at.is_(None),
+                    HealthRecordPermission.expires_at >= func.now()
+                )
+            )
+        )
+        if patient_ids is not None:
+            query = query.filter(HealthRecordPermission.patient_id.in_(patient_ids))
+        
+        matrix: Dict[int, Dict[str, bool]] = {}
+        for permission in query.all():
+            areas = matrix.setdefault(permission.patient_id, dict.fromkeys(PERMISSION_AREAS, False))
+            for area in PERMISSION_AREAS:
+                if getattr(permission, f"can_view_{area}"):
+                    areas[area] = True
+        return matrix
+    
     def get_patient_data_with_permissions(
         self, 
         db: Session, 
@@ -0,0 +1,281 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, delete, func, literal, literal_column, or_, select, tuple_
+from sqlalchemy.dialects.postgresql import aggregate_order_by, insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.health_record import HealthRecord
+from app.models.health_record_rollup import HealthRecordRollup
+
+logger = logging.getLogger(__name__)
+
+# Rollup granularities and their bucket length
+ROLLUP_GRANULARITIES: Dict[str, timedelta] = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1)
+}
+
+# Touched buckets per DELETE / INSERT ... SELECT statement
+REFRESH_CHUNK_SIZE = 500
+
+
+def _bucket_start(recorded_at: datetime, granularity: str) -> datetime:
+    """UTC bucket start for a record time, matching bucket_expression in SQL"""
+    if recorded_at.tzinfo is None:
+        recorded_at = recorded_at.replace(tzinfo=timezone.utc)
+    recorded_at = recorded_at.astimezone(timezone.utc)
+    if granularity == "hour":
+        return recorded_at.replace(minute=0, second=0, microsecond=0)
+    return recorded_at.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class HealthRecordRollupService:
+    """
+    Maintains health_record_rollups (count/sum/min/max/first/last per user, metric,
+    data type and hour/day bucket).
+
+    Writes don't adjust aggregates arithmetically (min/max can't be "un-applied" when a
+    value changes); instead every bucket touched by a write is recomputed from
+    health_records. A bucket holds at most one day of a metric's records, so this stays
+    cheap and is always exact, including after updates and deletes.
+    """
+
+    @staticmethod
+    def _recorded_at():
+        return func.coalesce(HealthRecord.measure_start_time, HealthRecord.created_at)
+
+    @classmethod
+    def bucket_expression(cls, granularity: str):
+        """
+        SQL bucket start of a record (any date_trunc unit, e.g. hour/day/week). Truncates in UTC
+        regardless of the session time zone, so every resolution buckets like the rollups do.
+        """
+        # Literal unit so SELECT and GROUP BY match
+        utc = literal_column("'UTC'")
+        return func.timezone(
+            utc, func.date_trunc(literal_column(f"'{granularity}'"), func.timezone(utc, cls._recorded_at()))
+        )
+
+    @classmethod
+    def _aggregate_select(cls, granularity: str, *conditions):
+        """SELECT producing rollup rows for the health_records matching `conditions`"""
+        recorded_at = cls._recorded_at()
+        bucket = cls.bucket_expression(granularity)
+        data_type = func.coalesce(HealthRecord.data_type, literal_column("''"))
+        return select(
+            HealthRecord.created_by,
+            HealthRecord.metric_id,
+            data_type,
+            literal(granularity),
+            bucket,
+            func.count(HealthRecord.id),
+            func.sum(HealthRecord.value),
+            func.min(HealthRecord.value),
+            func.max(HealthRecord.value),
+            func.array_agg(aggregate_order_by(HealthRecord.value, recorded_at.asc(), HealthRecord.id.asc()))[1],
+            func.min(recorded_at),
+            func.array_agg(aggregate_order_by(HealthRecord.value, recorded_at.desc(), HealthRecord.id.desc()))[1],
+            func.max(recorded_at),
+            func.array_agg(aggregate_order_by(HealthRecord.id, recorded_at.desc(), HealthRecord.id.desc()))[1]
+        ).where(and_(*conditions)).group_by(
+            HealthRecord.created_by, HealthRecord.metric_id, data_type, bucket
+        )
+
+    @classmethod
+    def _insert_rollups(cls, db: Session, aggregate_select) -> None:
+        stmt = pg_insert(HealthRecordRollup).from_select(
+            [
+                "created_by", "metric_id", "data_type", "granularity", "bucket_start",
+                "count", "sum", "min", "max",
+                "first_value", "first_recorded_at", "last_value", "last_recorded_at", "last_record_id"
+            ],
+            aggregate_select
+        )
+        # A concurrent writer may have refreshed the same bucket first - last writer wins
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["created_by", "metric_id", "granularity", "bucket_start", "data_type"],
+            set_={
+                **{
+                    column: stmt.excluded[column]
+                    for column in (
+                        "count", "sum", "min", "max",
+                        "first_value", "first_recorded_at", "last_value", "last_recorded_at", "last_record_id"
+                    )
+                },
+                "updated_at": func.now()
+            }
+        )
+        db.execute(stmt)
+
+    @classmethod
+    def refresh_for_records(cls, db: Session, records: Iterable[Tuple[int, int, Optional[datetime]]]) -> int:
+        """
+        Recompute every hour/day bucket touched by the given (user_id, metric_id, recorded_at)
+        tuples, where recorded_at is coalesce(measure_start_time, created_at) of a record
+        that was inserted, updated or deleted (pass both old and new time for moved records).
+        Runs in the caller's transaction and does not commit. Returns the number of buckets refreshed.
+        """
+        touched: Set[Tuple[int, int, datetime]] = {
+            (user_id, metric_id, recorded_at)
+            for user_id, metric_id, recorded_at in records
+            if user_id and metric_id and recorded_at
+        }
+        if not touched:
+            return 0
+
+        db.flush()
+        refreshed = 0
+        for granularity in ROLLUP_GRANULARITIES:
+            bucket_keys = sorted({
+                (user_id, metric_id, _bucket_start(recorded_at, granularity))
+                for user_id, metric_id, recorded_at in touched
+            })
+            for start in range(0, len(bucket_keys), REFRESH_CHUNK_SIZE):
+                chunk = bucket_keys[start:start + REFRESH_CHUNK_SIZE]
+                cls._refresh_bucket_chunk(db, granularity, chunk)
+                refreshed += len(chunk)
+        return refreshed
+
+    @classmethod
+    def _refresh_bucket_chunk(cls, db: Session, granularity: str, bucket_keys: List[Tuple[int, int, datetime]]) -> None:
+        # Drop the old aggregates first so buckets that lost their last record disappear
+        db.execute(
+            delete(HealthRecordRollup).where(
+                HealthRecordRollup.granularity == granularity,
+                tuple_(
+                    HealthRecordRollup.created_by, HealthRecordRollup.metric_id, HealthRecordRollup.bucket_start
+                ).in_(bucket_keys)
+            ).execution_options(synchronize_session=False)
+        )
+
+        # Range predicate lets the planner use the (user, metric, time) indexes before the exact bucket match
+        bucket_starts = [bucket for _, _, bucket in bucket_keys]
+        recorded_at = cls._recorded_at()
+        cls._insert_rollups(db, cls._aggregate_select(
+            granularity,
+            tuple_(HealthRecord.created_by, HealthRecord.metric_id).in_(
+                sorted({(user_id, metric_id) for user_id, metric_id, _ in bucket_keys})
+            ),
+            recorded_at >= min(bucket_starts),
+            recorded_at < max(bucket_starts) + ROLLUP_GRANULARITIES[granularity],
+            tuple_(
+                HealthRecord.created_by, HealthRecord.metric_id, cls.bucket_expression(granularity)
+            ).in_(bucket_keys)
+        ))
+
+    @classmethod
+    def backfill(cls, db: Session, user_id: Optional[int] = None) -> Dict[str, int]:
+        """
+        Rebuild all rollups from health_records, one user per transaction (all users unless
+        user_id is given). Safe to re-run. Returns {"users": n, "rollups": n}.
+        """
+        if user_id is not None:
+            user_ids = [user_id]
+        else:
+            user_ids = [row[0] for row in db.query(HealthRecord.created_by).distinct().order_by(HealthRecord.created_by).all()]
+
+        total_rollups = 0
+        for current_user_id in user_ids:
+            try:
+                db.execute(
+                    delete(HealthRecordRollup).where(HealthRecordRollup.created_by == current_user_id)
+                    .execution_options(synchronize_session=False)
+                )
+                for granularity in ROLLUP_GRANULARITIES:
+                    cls._insert_rollups(db, cls._aggregate_select(granularity, HealthRecord.created_by == current_user_id))
+                db.commit()
+
+                user_rollups = db.query(func.count(HealthRecordRollup.id)).filter(
+                    HealthRecordRollup.created_by == current_user_id
+                ).scalar()
+                total_rollups += user_rollups
+                logger.info(f"Backfilled {user_rollups} rollups for user {current_user_id}")
+            except Exception as e:
+                logger.error(f"Failed to backfill rollups for user {current_user_id}: {e}")
+                db.rollback()
+                raise
+
+        return {"users": len(user_ids), "rollups": total_rollups}
+
+    @staticmethod
+    def get_data_points(
+        db: Session,
+        user_id: int,
+        thryve_types: Dict[int, Optional[str]],
+        granularity: str,
+        max_points: Optional[int] = None
+    ) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Chart data points per metric read from the rollups, oldest first, in the shape
+        HealthRecordCRUD._get_data_points returns: value is the bucket average, with
+        min/max/last/count alongside and id/status/source of the bucket's latest record.
+
+        thryve_types maps metric_id -> template thryve_type and selects data types the same
+        way as the record filter: "Daily"/"Epoch" keep that data type plus records without
+        one, None keeps all. Rows of the selected data types are merged per bucket.
+        max_points keeps only the most recent N buckets per metric (applied in SQL).
+        """
+        if granularity not in ROLLUP_GRANULARITIES:
+            raise ValueError(f"Unsupported granularity '{granularity}', expected one of {list(ROLLUP_GRANULARITIES)}")
+        if not thryve_types:
+            return {}
+
+        metric_ids_by_data_type = {"daily": [], "epoch": [], None: []}
+        for metric_id, thryve_type in thryve_types.items():
+            data_type = thryve_type.lower() if thryve_type in ("Daily", "Epoch") else None
+            metric_ids_by_data_type[data_type].append(metric_id)
+        conditions = []
+        if metric_ids_by_data_type[None]:
+            conditions.append(HealthRecordRollup.metric_id.in_(metric_ids_by_data_type[None]))
+        for data_type in ("daily", "epoch"):
+            if metric_ids_by_data_type[data_type]:
+                conditions.append(and_(
+                    HealthRecordRollup.metric_id.in_(metric_ids_by_data_type[data_type]),
+                    HealthRecordRollup.data_type.in_([data_type, ""])
+                ))
+
+        newest_first = (HealthRecordRollup.last_recorded_at.desc(), HealthRecordRollup.last_record_id.desc())
+        buckets = db.query(
+            HealthRecordRollup.metric_id.label("metric_id"),
+            HealthRecordRollup.bucket_start.label("recorded_at"),
+            (func.sum(HealthRecordRollup.sum) / func.sum(HealthRecordRollup.count)).label("value"),
+            func.min(HealthRecordRollup.min).label("min"),
+            func.max(HealthRecordRollup.max).label("max"),
+            func.array_agg(aggregate_order_by(HealthRecordRollup.last_value, *newest_first))[1].label("last"),
+            func.array_agg(aggregate_order_by(HealthRecordRollup.last_record_id, *newest_first))[1].label("id"),
+            func.sum(HealthRecordRollup.count).label("count")
+        ).filter(
+            HealthRecordRollup.created_by == user_id,
+            HealthRecordRollup.granularity == granularity,
+            or_(*conditions)
+        ).group_by(HealthRecordRollup.metric_id, HealthRecordRollup.bucket_start).subquery()
+        points = db.query(
+            buckets,
+            func.row_number().over(
+                partition_by=buckets.c.metric_id, order_by=buckets.c.recorded_at.desc()
+            ).label("rn")
+        ).subquery()
+
+        query = db.query(points, HealthRecord.status, HealthRecord.source).outerjoin(
+            HealthRecord, HealthRecord.id == points.c.id
+        )
+        if max_points:
+            query = query.filter(points.c.rn <= max_points)
+        rows = query.order_by(points.c.metric_id, points.c.rn.desc()).all()
+
+        data_points_by_metric: Dict[int, List[Dict[str, Any]]] = {}
+        for row in rows:
+            data_points_by_metric.setdefault(row.metric_id, []).append({
+                "id": row.id,
+                "value": row.value,
+                "status": row.status,
+                "recorded_at": row.recorded_at.isoformat() if row.recorded_at else None,
+                "source": row.source,
+                "min": row.min,
+                "max": row.max,
+                "last": row.last,
+                "count": int(row.count)
+            })
+        return data_points_by_metric
@@ -1,8 +1,7 @@
 import re
 import json
 import logging
-import unicodedata
-from typing import List, Dict, Optional, Any, Tuple, Iterable
+from typing import List, Dict, Optional, Any, Iterable
 from datetime import datetime
 from pathlib import Path
 from sqlalchemy.orm import Session
@@ -14,270 +13,21 @@ from app.models.health_record import (
 )
 from app.schemas.health_record import HealthRecordCreate, HealthRecordDocLabCreate, HealthRecordSectionCreate, HealthRecordMetricCreate
 from app.services.language_detection_service import detect_document_language
+from app.services.document_extraction_cache import content_sha256, document_extraction_cache
+from app.services.lab_line_parser import lab_text_parser, norm
 
 logger = logging.getLogger(__name__)
 
+# Part of the extraction cache keys: bump when pdfplumber settings / the text parser change
+PDF_TEXT_EXTRACTOR_VERSION = "1"
+LAB_TEXT_PARSER_VERSION = "1"
+
 class LabDocumentAnalysisService:
     """Advanced service for analyzing lab report documents with multilingual support"""
     
     def __init__(self):
-        self._init_patterns()
         self._detected_language: Optional[str] = None  # Store detected language for document
     
-    def _init_patterns(self):
-        """Initialize comprehensive regex patterns for lab report extraction"""
-        
-        # Superscript characters for unit normalization
-        self.SUPERS = "⁰¹²³⁴⁵⁶⁷⁸⁹"
-        
-        # Comprehensive unit patterns
-        self.UNIT_ABS = (
-            r"(?:"
-            r"x\s*10(?:\^?\s*\d+|[" + self.SUPERS + r"]+)(?:/L)?|"
-            r"g/dL|mg/dL|mmol/L|µmol/L|μmol/L|nmol/L|pmol/L|ng/mL|pg/mL|mIU/L|mUI/L|UI/L|U/L|/µL|/uL|/L|fL|pg|mEq/L|seg\."
-            r")"
-        )
-        self.UNIT_ANY = rf"(?:{self.UNIT_ABS}|%)"
-        
-        # Date patterns
-        self.MULTI_DATE_RE = re.compile(
-            r"\b(?:(?P<d1>\d{2})[./-](?P<m1>\d{2})[./-](?P<y1>\d{2,4})|(?P<y2>\d{4})[./-](?P<m2>\d{2})[./-](?P<d2>\d{2}))\b"
-        )
-        
-        # Comprehensive text value patterns for urine analysis (multilingual)
-        self.TEXT_VALUE_PATTERNS = [
-            # PT/ES/IT/RO
-            r"Não\s+revelou(?:\s*\([^)]+\))?", r"Nao\s+revelou(?:\s*\([^)]+\))?",
-            r"No\s+revel[oó]", r"No\s+detectado", r"No\s+se\s+detect[oó]", r"Ausente",
-            r"Presente", r"Presencia", r"Presenza", r"Prezent",
-            r"Raros(?:\s*\([^)]+\))?", r"Escasos", r"Pocos", r"Occasionali?",
-            r"Vest[ií]gios", r"Vestigios", r"Tracce", r"Urme",
-            r"Límpid[ao]", r"Limpid[eo]", r"Claro", r"Clara", r"Chiaro",
-            r"Amarela(?:\s+clara)?", r"Amarill[oa]", r"Giallo", r"Galben[ăa]?",
-            r"Negativo", r"Positivo",
-            # EN/FR/DE/NL/DK/SE/NO/PL
-            r"Not\s+detected", r"None\s+detected", r"Absent", r"Present",
-            r"Rare", r"Few", r"Occasional",
-            r"Trace(?:s)?", r"Traces?", r"Spur(?:e|en)?", r"Spor", r"Spår", r"Ślad(?:y)?",
-            r"Clear", r"Limpid", r"Clair", r"Klar", r"Helder", r"Bistr[ăa]?",
-            r"Yellow", r"Jaune", r"Gelb", r"Geel", r"Gul", r"Żółty",
-            r"Negativ(?:e|o|t)?", r"Positiv(?:e|o|t)?",
-            # EL / HR / SR / BG / TR
-            r"Αρνητικ[όή]", r"Θετικ[όή]", r"Ίχνη", r"Διαυγές", r"Κίτρινο",
-            r"Negativno", r"Pozitivno", r"Tragovi", r"Bistro", r"Žuto",
-            r"Негативно", r"Позитивно", r"Трагови", r"Бистро", r"Жълт[о]?",
-            r"Negatif", r"Pozitif", r"İz", r"Berrak", r"Sarı",
-            # with /campo / field / HPF
-            r"(?:Raros|Rare|Few|Occasional).*?\(\s*<?\s*\d+\s*/\s*(?:campo|field|HPF)\s*\)",
-        ]
-        self.TEXT_VALUE_RE = re.compile("|".join(self.TEXT_VALUE_PATTERNS), re.IGNORECASE)
-        
-        # Historical value pattern (numeric OR qualitative text)
-        self.HIST_VALUE_RE = re.compile(
-            r"(?:"
-            + self.TEXT_VALUE_RE.pattern +
-            r"|(?:[<>]=?\s*)?[\d.,]+(?:\s*/\s*(?:campo|field|HPF))?"
-            r")",
-            re.IGNORECASE
-        )
-        
-        # Comprehensive meta/header patterns (multilingual)
-        self.META_NAME_RE = re.compile(
-            r"^(?:"
-            # Hospital / Clinic / Lab
-            r"hospital|clin(?:ic|iqu)e|cl[ií]nica|krankenhaus|klin(?:ik|ika)|"
-            r"lab(?:or(?:atorio|atoire|oratorium)|or)|laborat[óo]rio|laboratuvar|"
-            # Phone / Web
-            r"tel(?:ephone|efo[oó]n|[eé]fono|efon|efonnummer)?|tlf\.?|telefon|téléphone|"
-            r"www\.|http|https|e-?mail|correo|mail|email|"
-            # Page
-            r"p[áa]g\.?|page\b|seite|pagina|pagin[ăa]?|strona|stranica|sida|side|σελίδα|страница|sayfa|"
-            r"pag\.|p[oó]lg\.?"
-            r"|"
-            # Date words
-            r"data\b|fecha\b|date\b|datum\b|dato\b|ημερομηνία|дата|tarih\b"
-            r"|"
-            # Method / Methodology
-            r"m[ée]t(?:odo|\.?)|met(?:hod|hode|odo|ode)?\b|méthode|methode|metode|"
-            # Admin / identity
-            r"impress|imprimi|druk|drucken|drukker|drukă|drukăre|drukati|print|"
-            r"epis[óo]dio|episode|episod|akten|dossier|processo|proc[eé]s|"
-            r"utente|pacient|patient|paciente|paziente|"
-            r"n[º°#]\b|num(?:ero)?\b|refer[ée]ncia|ref\.:?|adres[se]?|end[eé]re[cç]o|morada|adresse|indirizzo|adres|adresa|adrese|adresi|adresă|адрес|"
-            r"nif|nie|cif|dni|pesel|oib|egn|tc\s*kimlik|kimlik|"
-            # Section/title-like
-            r"ionogram(?:me|a|m)?|ionograma|hemograma|hemogramme|hemogramma|"
-            r"urina\s*ii.*exame\s+sum[áa]rio"
-            r"|"
-            # Explicit prefixes to drop
-            r"exma|exmo|hfe|phu\b"
-            r")",
-            re.IGNORECASE
-        )
-        
-        # Additional patterns from the new version
-        self.VALUE_WITH_UNIT_RE = re.compile(
-            rf"(?:^|\s)(?P<val>[<>]=?\s*\d[\d.,]*)\s*(?P<u>{self.UNIT_ANY})\b"
-        )
-        self.RANGE_OR_CMP_RE = re.compile(r"(?:[\d.,]+\s*-\s*[\d.,]+|[<>]=?\s*[\d.,]+)")
-        
-        # Blocklist patterns for lines to skip
-        self.START_BLOCKLIST = tuple(
-            self._norm(s) for s in [
-                "Referência", "Referência normal", "ReferÃªncia", "ReferÃªncia normal",
-                "Insuficiência:", "InsuficiÃªncia:",
-                "Recomendações", "Recomendações:", "RecomendaÃ§Ãµes", "RecomendaÃ§Ãµes:",
-                "PHEV",
-                "Deficiência", "Deficiência:", "DeficiÃªncia", "DeficiÃªncia:"  # block entire lines with this header
-            ]
-        )
-        
-        # Date labels (multilingual)
-        self.DATE_LABELS = [
-            # Portuguese
-            r"data\s+colheita", r"data\s+da\s+colheita", r"data\s+do\s+relat[oó]rio", r"data\s+do\s+resultado",
-            # Spanish
-            r"fecha\s+de\s+extracci[oó]n", r"fecha\s+de\s+toma\s+de\s+muestra", r"fecha\s+del?\s+informe", r"fecha\s+del?\s+resultado",
-            # English
-            r"(collection|sample\s+collection|specimen\s+collection)\s+date", r"report\s+date", r"result\s+date",
-            # French
-            r"date\s+de\s+pr[ée]l[èe]vement", r"date\s+du\s+rapport", r"date\s+du\s+r[ée]sultat",
-            # German
-            r"entnahme(?:-|\s*)datum", r"berichtsdatum", r"ergebnisdatum",
-            # Italian
-            r"data\s+prelievo", r"data\s+del\s+referto", r"data\s+referto", r"data\s+del\s+rapporto", r"data\s+del\s+risultato",
-            # Polish
-            r"data\s+pobrania", r"data\s+raportu", r"data\s+wyniku",
-            # Dutch
-            r"afnamedatum", r"rapportdatum", r"resultaatdatum",
-            # Danish / Swedish / Norwegian
-            r"pr[øo]vetagningsdato|pr[øo]vetakingsdato", r"rapportdato", r"resultatdato", r"provtagningsdatum",
-            # Greek
-            r"ημερομηνία\s+λήψης", r"ημερομηνία\s+αναφοράς", r"ημερομηνία\s+αποτελέσματος",
-            # Croatian / Serbian (Latin + Cyrillic)
-            r"datum\s+uzorkovanj[ae]", r"datum\s+izv[je]s?ta[ja]", r"datum\s+rezultata",
-            r"датум\s+узорковања", r"датум\s+извештаја", r"датум\s+резултата",
-            # Romanian
-            r"data\s+recolt[ăa]rii", r"data\s+raportului", r"data\s+rezultatului",
-            # Bulgarian
-            r"дата\s+на\s+вземане\s+на\s+пробата", r"дата\s+на\s+отчета", r"дата\s+на\s+резултата",
-            # Turkish
-            r"(?:[öo]rnek|numune)\s+al[ıi]m\s+tarihi", r"rapor\s+tarihi", r"sonu[cç]\s+tarihi",
-        ]
-    
-    # Utility functions
-    def _strip_accents(self, s: str) -> str:
-        if not s:
-            return s
-        return "".join(c for c in unicodedata.normalize("NFKD", s) if not unicodedata.combining(c))
-
-    def _norm(self, s: str) -> str:
-        return self._strip_accents(s or "").lower()
-
-    def _normalize_units(self, s: str) -> str:
-        """Coalesce spaces, fix common x10 variants, and normalize spacing."""
-        if not s:
-            return s
-        s = s.replace("\u00a0", " ")
-        for bad, good in [
-            ("x109 / L", "x10^9/L"), ("x10 9 / L", "x10^9/L"), ("x109/ L", "x10^9/L"),
-            ("x109 /L", "x10^9/L"), ("x 109 / L", "x10^9/L"), (" / ", "/"),
-        ]:
-            s = s.replace(bad, good)
-        # Normalize common caret-less/spacey power-of-ten variants
-        s = re.sub(r"x\s*10\s*\^?\s*9(?:\s*/\s*L)?", "x10^9/L", s, flags=re.IGNORECASE)
-        s = re.sub(r"x\s*109(?:\s*/\s*L)?", "x10^9/L", s, flags=re.IGNORECASE)
-        s = re.sub(r"\s+", " ", s)
-        return s.strip()
-
-    def _protect_x10_units(self, s: str) -> str:
-        # prevent the "10" in x10^… units from being treated as historical tokens
-        return re.sub(r"x\s*10[\^¹²³]?\s*\d*\s*/?\s*[A-Za-zµ/]+", "xTEN", s)
-    
-    def _is_blocklisted_line(self, raw: str) -> bool:
-        """Check if a line should be blocked based on start patterns"""
-        if not raw:
-            return False
-        r = self._norm(raw).strip()
-        for prefix in self.START_BLOCKLIST:
-            if r.startswith(prefix):
-                return True
-        return False
-    
-    def _is_blocklisted_metric_name(self, name: str) -> bool:
-        """Check if a metric name should be blocked (handles exact 'Deficiência' as a name)"""
-        # Normalize: remove accents and trailing punctuation like ":".
-        n = self._norm(name)
-        n = re.sub(r"[:\s]+$", "", n)
-        # Accept both proper encoding and mojibake variants by normalization.
-        # Only block if it's exactly the bare label "deficiencia"
-        return n == "deficiencia"
-
-    def _canonicalize_date(self, ds: Any) -> str:
-        """Return dd-mm-yyyy if possible; accept either a string or a tuple from regex .findall()."""
-        if isinstance(ds, tuple):
-            s = next((x for x in ds if x), "")
-        else:
-            s = str(ds or "")
-        if not s:
-            return ""
-        m = self.MULTI_DATE_RE.search(s)
-        if not m:
-            return s
-        if m.group("y2"):  # yyyy-mm-dd
-            y = int(m.group("y2"))
-            mo = int(m.group("m2"))
-            d = int(m.group("d2"))
-        else:             # dd-mm-yyyy or dd-mm-yy
-            d = int(m.group("d1"))
-            mo = int(m.group("m1"))
-            y = int(m.group("y1"))
-            if y < 100:
-                y += 2000 if y < 50 else 1900
-        try:
-            return f"{d:02d}-{mo:02d}-{y:04d}"
-        except Exception:
-            return s
-
-    def _detect_section_type(self, line: str, current_type: str) -> str:
-        """Detect section type with multilingual support"""
-        t = self._norm(line)
-        # Hematology keywords
-        if any(k in t for k in [
-            "hematolog", "hemograma", "hematologe", "hématolog", "hämatolog", "ematolog", "αιματολογ", "хематолог", "hematoloji"
-        ]):
-            return "HEMATOLOGIA"
-        # Biochemistry keywords
-        if any(k in t for k in [
-            "bioquim", "biochim", "biochem", "biokem", "biokjem", "biochemie", "βιοχημ", "биохим", "biyokim"
-        ]):
-            return "BIOQUIMICA"
-        # Urine / urinalysis keywords
-        if any(k in t for k in [
-            "urina", "urine", "urin ", "urin-", "urinalys", "urinaliz", "ουρ", "урин", "idrar", "mocz", "moczu"
-        ]):
-            return "URINA E DOSEAMENTOS URINÁRIOS"
-        return current_type
-
-    def _extract_report_date(self, first_page_text: str, full_text: str) -> str:
-        """Extract report date with multilingual support"""
-        # Look for labeled date on first page
-        t = self._norm(first_page_text)
-        for lbl in self.DATE_LABELS:
-            for m in re.finditer(lbl, t, flags=re.IGNORECASE):
-                start = max(0, m.end())
-                window = first_page_text[start:start+160]
-                md = self.MULTI_DATE_RE.search(window)
-                if md:
-                    return self._canonicalize_date(md.group(0))
-        # fallback: any date on first page
-        md = self.MULTI_DATE_RE.search(first_page_text)
-        if md:
-            return self._canonicalize_date(md.group(0))
-        # last resort: any date anywhere
-        md = self.MULTI_DATE_RE.search(full_text)
-        return self._canonicalize_date(md.group(0)) if md else ""
-
     def _extract_lab_name(self, full_text: str, override: str = "") -> str:
         """Extract lab name with multilingual support"""
         if override:
@@ -285,13 +35,13 @@ class LabDocumentAnalysisService:
         # High-priority specific name first (avoid "Certificado" footers)
         for line in (full_text.splitlines() if full_text else []):
             l = line.strip()
-            ln = self._norm(l)
+            ln = norm(l)
             if ("laboratorio de analises clinicas" in ln or "laboratório de análises clínicas" in ln) and "certific" not in ln:
                 return l
         # Generic multilingual lab/clinic/hospital lines (avoid certificate lines)
         for line in (full_text.splitlines() if full_text else []):
             l = line.strip()
-            ln = self._norm(l)
+            ln = norm(l)
             if "certific" in ln:
                 continue
             if re.search(r"\b(hospital|clin|clinic|clínic|klin|krankenhaus|ospedale|szpital|ziekenhuis|hospitalet|sjukhus|sykehus|spital|болниц|hastane)\b", ln):
@@ -300,176 +50,6 @@ class LabDocumentAnalysisService:
                 return l
         return ""
 
-    def _split_name_and_tail_safe(self, line: str) -> Tuple[Optional[str], Optional[str]]:
-        """
-        Safe splitter:
-        1) If we see a value+unit, split there.
-        2) Else if we see a textual value, split there.
-        3) Else try a last-resort numeric split ONLY if the remainder clearly contains a unit or a range/comparator.
-           This prevents cutting names like 'CA 19-9', 'IGF-1', 'T4 Livre (FT4)', etc.
-        """
-        m_val = self.VALUE_WITH_UNIT_RE.search(line)
-        if m_val:
-            idx = m_val.start()
-            return line[:idx].strip().lstrip("-:•·").strip(), line[idx:].strip()
-
-        m_text = self.TEXT_VALUE_RE.search(line)
-        if m_text:
-            idx = m_text.start()
-            return line[:idx].strip().lstrip("-:•·").strip(), line[idx:].strip()
-
-        # Last resort: split at the first number ONLY if unit or range/comparator follows somewhere
-        m_num = re.search(r"[<>]?\s*\d", line)
-        if m_num:
-            tail = line[m_num.start():]
-            if self.VALUE_WITH_UNIT_RE.search(tail) or self.RANGE_OR_CMP_RE.search(tail):
-                return line[:m_num.start()].strip().lstrip("-:•·").strip(), line[m_num.start():].strip()
-
-        return None, None
-
-    def _pick_central_from_left(self, left: str):
-        """Prefer absolute units over % on the same line."""
-        cand_re = re.compile(rf"(?P<val>[<>]?\s*[\d.,]+)\s*(?P<unit>{self.UNIT_ANY})?")
-        cands = list(cand_re.finditer(left))
-        if not cands:
-            return None, None
-        # Prefer absolute unit
-        for m in cands:
-            u = (m.group('unit') or "").strip()
-            if u and re.fullmatch(self.UNIT_ABS, u):
-                val = m.group('val').replace(" ", "").replace(",", ".")
-                return val, self._normalize_units(u)
-        # Fallback: first candidate
-        m = cands[0]
-        val = m.group('val').replace(" ", "").replace(",", ".")
-        return val, self._normalize_units((m.group('unit') or "").strip())
-
-    def _parse_numeric_metric_line(self, line: str, page_hist_dates: List[str], report_date: str):
-        """Parse numeric metric line with historical data support"""
-        line = self._normalize_units(line)
-        if self._is_blocklisted_line(line):
-            return None
-        
-        name, tail = self._split_name_and_tail_safe(line)
-        if not name:
-            return None
-        
-        if self._is_blocklisted_metric_name(name):
-            return None
-        
-        nl = self._norm(name)
-        # Drop meta names + explicit prefixes
-        if self.META_NAME_RE.search(name) or nl.startswith("exmo") or nl.startswith("hfe"):
-            return None
-
-        tail_clean = self._protect_x10_units(tail)
-
-        # Identify reference part (range or comparator) to the rightmost occurrence
-        mref = None
-        last_range = None
-        for m in re.finditer(r"[\d.,]+\s*-\s*[\d.,]+", tail_clean):
-            last_range = m
-        if last_range:
-            mref = last_range
-        else:
-            last_cmp = None
-            for m in re.finditer(r"[<>]=?\s*[\d.,]+", tail_clean):
-                last_cmp = m
-            if last_cmp:
-                mref = last_cmp
-
-        if mref:
-            left = tail_clean[:mref.start()].strip()
-            reference = (mref.group(0) or "").strip()
-            right = tail_clean[mref.end():].strip()
-            left_original = (tail or "")[:mref.start()].strip()
-        else:
-            left = tail_clean
-            right = ""
-            reference = ""
-            left_original = (tail or "")
-        central_val, central_unit = self._pick_central_from_left(left_original)
-        if not central_val:
-            return None
-
-        # historical values (numeric OR qualitative text)
-        right_vals = [h.strip() for h in self.HIST_VALUE_RE.findall(right)]
-        left_vals = []
-        for m in self.HIST_VALUE_RE.finditer(left):
-            tok = m.group(0).strip()
-            # avoid echoing the central numeric token if same
-            if tok.replace(" ", "").replace(",", ".") == central_val:
-                continue
-            # don't pick the reference range
-            if reference and tok in reference:
-                continue
-            left_vals.append(tok)
-        hist_vals = right_vals if right_vals else left_vals
-
-        rows = []
-        rows.append({
-            "metric_name": name,
-            "date_of_value": report_date,
-            "value": central_val,
-            "unit": central_unit or "",
-            "reference": reference,
-        })
-        if hist_vals and page_hist_dates:
-            for i, hv in enumerate(hist_vals[:2]):
-                if i < len(page_hist_dates):
-                    rows.append({
-                        "metric_name": name,
-                        "date_of_value": page_hist_dates[i],
-                        "value": hv,
-                        "unit": central_unit or "",
-                        "reference": reference,
-                    })
-        return rows
-
-    def _parse_urine_metric_line(self, line: str, report_date: str, page_hist_dates: List[str]):
-        """Parse qualitative urine metrics with historical data support"""
-        if self._is_blocklisted_line(line):
-            return None
-        
-        name, tail = self._split_name_and_tail_safe(line)
-        if not name or not tail:
-            return None
-        
-        if self._is_blocklisted_metric_name(name):
-            return None
-        
-        nl = self._norm(name)
-        if self.META_NAME_RE.search(name) or nl.startswith("exmo") or nl.startswith("hfe"):
-            return None
-
-        # Find ALL qualitative tokens across the tail, in order
-        all_texts = [m.group(0).strip() for m in self.TEXT_VALUE_RE.finditer(tail)]
-        if not all_texts:
-            return None
-
-        central_val = all_texts[0]
-        hist_vals = all_texts[1:]  # any further tokens are historical columns (left-to-right)
-
-        rows = [{
-            "metric_name": name,
-            "date_of_value": report_date,
-            "value": central_val,
-            "unit": "",
-            "reference": "",
-        }]
-
-        if hist_vals and page_hist_dates:
-            for i, hv in enumerate(hist_vals[:2]):
-                if i < len(page_hist_dates):
-                    rows.append({
-                        "metric_name": name,
-                        "date_of_value": page_hist_dates[i],
-                        "value": hv,
-                        "unit": "",
-                        "reference": "",
-                    })
-        return rows
-
     async def analyze_lab_document(
         self, 
         db: Session, 
@@ -602,8 +182,16 @@ class LabDocumentAnalysisService:
             raise
 
     def _extract_text_from_pdf(self, file_data: bytes) -> str:
-        """Extract text from PDF bytes"""
+        """Extract text from PDF bytes (cached by file content)"""
         try:
+            cache_key = document_extraction_cache.make_key(
+                "pdf_text", content_sha256(file_data),
+                version=PDF_TEXT_EXTRACTOR_VERSION, x_tolerance=2, y_tolerance=2
+            )
+            cached_pages = document_extraction_cache.get(cache_key)
+            if cached_pages is not None:
+                return "\n".join(cached_pages)
+            
             import pdfplumber
             import io
             
@@ -615,8 +203,9 @@ class LabDocumentAnalysisService:
                     text = page.extract_text(x_tolerance=2, y_tolerance=2) or ""
                     if text:
                         pages_text.append(text)
-                
-                return "\n".join(pages_text)
+            
+            document_extraction_cache.put(cache_key, pages_text)
+            return "\n".join(pages_text)
                 
         except ImportError:
             raise ImportError("pdfplumber is required for PDF text extraction")
@@ -625,7 +214,20 @@ class LabDocumentAnalysisService:
             raise
 
     def _extract_lab_data_advanced(self, text: str) -> List[Dict[str, Any]]:
-        """Extract lab data using advanced multilingual parsing"""
+        """Extract lab data using advanced multilingual parsing (cached by text content)"""
+        cache_key = document_extraction_cache.make_key(
+            "lab_text_rows", content_sha256(text.encode("utf-8")), version=LAB_TEXT_PARSER_VERSION
+        )
+        cached_rows = document_extraction_cache.get(cache_key)
+        if cached_rows is not None:
+            logger.info(f"Lab data extraction served from cache: {len(cached_rows)} records")
+            return cached_rows
+        
+        rows = self._parse_lab_text(text)
+        document_extraction_cache.put(cache_key, rows)
+        return rows
+    
+    def _parse_lab_text(self, text: str) -> List[Dict[str, Any]]:
         try:
             logger.info("Starting advanced lab data extraction from text")
             
@@ -637,85 +239,12 @@ class LabDocumentAnalysisService:
             
             first_page = pages_text[0] if pages_text else ""
             
-            report_date = self._extract_report_date(first_page, text)
+            report_date = lab_text_parser.extract_report_date(first_page, text)
             lab_name = self._extract_lab_name(text)
             
             logger.info(f"Extracted report date: {report_date}, lab name: {lab_name}")
             
-            records: List[Dict] = []
-            current_type = ""
-            
-            # Iterate page-by-page to use page-level historical dates
-            for page_text in pages_text:
-                if not page_text:
-                    continue
-                
-                # Historical dates present on this page (ignore report_date)
-                page_dates = [self._canonicalize_date(m.group(0)) for m in self.MULTI_DATE_RE.finditer(page_text)]
-                page_hist_dates = [d for d in page_dates if d and d != report_date][-2:]  # use the two rightmost dates if present
-                
-                # Process lines in this page
-                raw_lines = [self._normalize_units(l) for l in page_text.splitlines() if l.strip()]
-                last_metric_name = ""
-                started_section = False
-                
-                for raw in raw_lines:
-                    # Skip blocklisted lines early
-                    if self._is_blocklisted_line(raw):
-                        continue
-                    
-                    # Track section (mapped to PT canonical names)
-                    current_type = self._detect_section_type(raw, current_type)
-                    
-                    # Skip obvious meta lines early
-                    if self.META_NAME_RE.search(raw.strip(": ").strip()):
-                        continue
-                    
-                    # Numeric lines (usual center + reference + historical numbers)
-                    rowset = self._parse_numeric_metric_line(raw, page_hist_dates, report_date)
-                    
-                    # Urine qualitative fallback (only within urine section)
-                    if not rowset and current_type == "URINA E DOSEAMENTOS URINÁRIOS":
-                        rowset = self._parse_urine_metric_line(raw, report_date, page_hist_dates)
-                    
-                    if not rowset:
-                        # try multi-line metric (previous line name + current numbers)
-                        if last_metric_name and re.search(r"\d", raw):
-                            combo = f"{last_metric_name} {raw}"
-                            rowset = self._parse_numeric_metric_line(combo, page_hist_dates, report_date)
-                        
-                        # remember plausible metric-only header (require parentheses/colon/comma)
-                        if not rowset and (re.search(r"[A-Za-zÁ-úÀ-ÿ]+", raw) and not re.search(r"\d", raw) and len(raw) < 100):
-                            candidate = raw.strip(': ').strip()
-                            cn = self._norm(candidate)
-                            if not self.META_NAME_RE.search(candidate) and re.search(r"[(:,)]", candidate) and not (cn.startswith("exmo") or cn.startswith("hfe")):
-                                last_metric_name = candidate
-                            else:
-                                last_metric_name = ""
-                    else:
-                        last_metric_name = ""
-                    
-                    if rowset:
-                        started_section = True
-                        for r in rowset:
-                            out = {
-                                "lab_name": lab_name,
-                                "type_of_analysis": current_type,
-                                **r
-                            }
-                            records.append(out)
-                    elif not started_section:
-                        continue
-            
-            # Deduplicate by (type_of_analysis, metric_name, date_of_value, value)
-            seen = set()
-            deduped = []
-            for r in records:
-                key = (r["type_of_analysis"], r["metric_name"], r["date_of_value"], r["value"])
-                if key in seen:
-                    continue
-                seen.add(key)
-                deduped.append(r)
+            deduped = lab_text_parser.parse_pages(pages_text, report_date, lab_name)
             
             logger.info(f"Extracted {len(deduped)} lab records from text")
             for i, record in enumerate(deduped):
@@ -0,0 +1,576 @@
+"""
+Line parser for lab report text, shared by LabDocumentAnalysisService (embedded PDF text)
+and ocr_lab_extractor (OCR text).
+
+All patterns are compiled once at import. Each line is unit-normalised and accent-folded
+once, and the expensive value/reference regexes only run on lines that can actually yield
+a row: numeric parsing needs a digit, '.' or ',' in the line, qualitative urine parsing
+only runs inside the urine section. The two extractors differ only in their vocabularies
+(qualitative values, meta/header prefixes, blocklists, section keywords, date labels),
+which are the LabLineParser constructor arguments; see lab_text_parser and ocr_text_parser.
+
+benchmark_lab_parser.py measures throughput and checks output against golden files.
+"""
+
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+SUPERS = "⁰¹²³⁴⁵⁶⁷⁸⁹"
+
+UNIT_ABS = (
+    r"(?:"
+    r"x\s*10(?:\^?\s*\d+|[" + SUPERS + r"]+)(?:/L)?|"
+    r"g/dL|mg/dL|mmol/L|µmol/L|μmol/L|nmol/L|pmol/L|ng/mL|pg/mL|mIU/L|mUI/L|UI/L|U/L|/µL|/uL|/L|fL|pg|mEq/L|seg\."
+    r")"
+)
+UNIT_ANY = rf"(?:{UNIT_ABS}|%)"
+
+URINE_SECTION = "URINA E DOSEAMENTOS URINÁRIOS"
+
+MULTI_DATE_RE = re.compile(
+    r"\b(?:(?P<d1>\d{2})[./-](?P<m1>\d{2})[./-](?P<y1>\d{2,4})|(?P<y2>\d{4})[./-](?P<m2>\d{2})[./-](?P<d2>\d{2}))\b"
+)
+VALUE_WITH_UNIT_RE = re.compile(rf"(?:^|\s)(?P<val>[<>]=?\s*\d[\d.,]*)\s*(?P<u>{UNIT_ANY})\b")
+RANGE_OR_CMP_RE = re.compile(r"(?:[\d.,]+\s*-\s*[\d.,]+|[<>]=?\s*[\d.,]+)")
+UNIT_ABS_RE = re.compile(UNIT_ABS)
+CENTRAL_CANDIDATE_RE = re.compile(rf"(?P<val>[<>]?\s*[\d.,]+)\s*(?P<unit>{UNIT_ANY})?")
+
+_RANGE_RE = re.compile(r"[\d.,]+\s*-\s*[\d.,]+")
+_COMPARATOR_RE = re.compile(r"[<>]=?\s*[\d.,]+")
+_FIRST_NUMBER_RE = re.compile(r"[<>]?\s*\d")
+_DIGIT_RE = re.compile(r"\d")
+_NUMERIC_HINT_RE = re.compile(r"[\d.,]")  # A central value needs at least one of these
+_LETTER_RE = re.compile(r"[A-Za-zÁ-úÀ-ÿ]+")
+_HEADER_PUNCT_RE = re.compile(r"[(:,)]")
+_X10_9_RE = re.compile(r"x\s*10\s*\^?\s*9(?:\s*/\s*L)?", re.IGNORECASE)
+_X109_RE = re.compile(r"x\s*109(?:\s*/\s*L)?", re.IGNORECASE)
+_X10_UNIT_RE = re.compile(r"x\s*10[\^¹²³]?\s*\d*\s*/?\s*[A-Za-zµ/]+")
+_WHITESPACE_RE = re.compile(r"\s+")
+_TRAILING_COLON_RE = re.compile(r"[:\s]+$")
+
+_UNIT_REPLACEMENTS = (
+    ("x109 / L", "x10^9/L"), ("x10 9 / L", "x10^9/L"), ("x109/ L", "x10^9/L"),
+    ("x109 /L", "x10^9/L"), ("x 109 / L", "x10^9/L"), (" / ", "/"),
+)
+
+# Metric names starting with these are letterhead fragments ("Exmo. Sr.", hospital codes)
+_DROPPED_NAME_PREFIXES = ("exmo", "hfe")
+
+
+def strip_accents(s: str) -> str:
+    if not s or s.isascii():
+        return s
+    decomposed = unicodedata.normalize("NFKD", s)
+    if decomposed.isascii():
+        return decomposed
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def norm(s: str) -> str:
+    return strip_accents(s or "").lower()
+
+
+def normalize_units(s: str) -> str:
+    """Coalesce spaces, fix common x10 variants, and normalize spacing (idempotent)."""
+    if not s:
+        return s
+    s = s.replace("\u00a0", " ")
+    for bad, good in _UNIT_REPLACEMENTS:
+        s = s.replace(bad, good)
+    if "10" in s:
+        # Normalize common caret-less/spacey power-of-ten variants
+        s = _X10_9_RE.sub("x10^9/L", s)
+        s = _X109_RE.sub("x10^9/L", s)
+    s = _WHITESPACE_RE.sub(" ", s)
+    return s.strip()
+
+
+def protect_x10_units(s: str) -> str:
+    # prevent the "10" in x10^… units from being treated as historical tokens
+    return _X10_UNIT_RE.sub("xTEN", s)
+
+
+def canonicalize_date(ds: Any) -> str:
+    """Return dd-mm-yyyy if possible; accept either a string or a tuple from regex .findall()."""
+    if isinstance(ds, tuple):
+        s = next((x for x in ds if x), "")
+    else:
+        s = str(ds or "")
+    if not s:
+        return ""
+    m = MULTI_DATE_RE.search(s)
+    if not m:
+        return s
+    if m.group("y2"):  # yyyy-mm-dd
+        y = int(m.group("y2"))
+        mo = int(m.group("m2"))
+        d = int(m.group("d2"))
+    else:             # dd-mm-yyyy or dd-mm-yy
+        d = int(m.group("d1"))
+        mo = int(m.group("m1"))
+        y = int(m.group("y1"))
+        if y < 100:
+            y += 2000 if y < 50 else 1900
+    try:
+        return f"{d:02d}-{mo:02d}-{y:04d}"
+    except Exception:
+        return s
+
+
+class LabLineParser:
+    """Turns the lines of a lab report into metric rows, for one report vocabulary"""
+
+    def __init__(
+        self,
+        text_value_patterns: Sequence[str],
+        meta_name_pattern: str,
+        start_blocklist: Iterable[str],
+        section_keywords: Sequence[Tuple[str, Sequence[str]]],
+        date_labels: Sequence[str],
+        blocked_name_substrings: Sequence[str] = ()
+    ):
+        self.text_value_re = re.compile("|".join(text_value_patterns), re.IGNORECASE)
+        # Historical value pattern (numeric OR qualitative text)
+        self.hist_value_re = re.compile(
+            r"(?:"
+            + self.text_value_re.pattern +
+            r"|(?:[<>]=?\s*)?[\d.,]+(?:\s*/\s*(?:campo|field|HPF))?"
+            r")",
+            re.IGNORECASE
+        )
+        self.meta_name_re = re.compile(meta_name_pattern, re.IGNORECASE)
+        self.start_blocklist = tuple(dict.fromkeys(norm(s) for s in start_blocklist))
+        # One alternation per section, tried in order (first matching section wins)
+        self.section_res = tuple(
+            (section, re.compile("|".join(re.escape(k) for k in keywords)))
+            for section, keywords in section_keywords
+        )
+        self.date_label_res = tuple(re.compile(label, re.IGNORECASE) for label in date_labels)
+        self.blocked_name_substrings = tuple(blocked_name_substrings)
+
+    # Line classification
+    def is_blocklisted_line(self, line: str) -> bool:
+        """Check if a line should be blocked based on start patterns"""
+        if not line:
+            return False
+        return norm(line).strip().startswith(self.start_blocklist)
+
+    def is_blocklisted_metric_name(self, name: str) -> bool:
+        """Check if a metric name should be blocked (exact bare 'Deficiência' label, or a blocked substring)"""
+        n = _TRAILING_COLON_RE.sub("", norm(name))
+        if n == "deficiencia":
+            return True
+        return any(k in n for k in self.blocked_name_substrings)
+
+    def _is_metric_name(self, name: str) -> bool:
+        if self.is_blocklisted_metric_name(name):
+            return False
+        # Drop meta names + explicit prefixes
+        return not (self.meta_name_re.search(name) or norm(name).startswith(_DROPPED_NAME_PREFIXES))
+
+    def detect_section_type(self, line_norm: str, current_type: str) -> str:
+        """Section a line starts, given the line already passed through norm()"""
+        for section, keywords_re in self.section_res:
+            if keywords_re.search(line_norm):
+                return section
+        return current_type
+
+    # Document-level fields
+    def extract_report_date(self, first_page_text: str, full_text: str) -> str:
+        """Labelled date on the first page, else the first date on it, else the first date anywhere"""
+        t = norm(first_page_text)
+        for label_re in self.date_label_res:
+            for m in label_re.finditer(t):
+                window = first_page_text[m.end():m.end() + 160]
+                md = MULTI_DATE_RE.search(window)
+                if md:
+                    return canonicalize_date(md.group(0))
+        md = MULTI_DATE_RE.search(first_page_text)
+        if md:
+            return canonicalize_date(md.group(0))
+        md = MULTI_DATE_RE.search(full_text)
+        return canonicalize_date(md.group(0)) if md else ""
+
+    # Line splitting
+    def split_name_and_tail(self, line: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Safe splitter:
+        1) If we see a value+unit, split there.
+        2) Else if we see a textual value, split there.
+        3) Else try a last-resort numeric split ONLY if the remainder clearly contains a unit or a range/comparator.
+           This prevents cutting names like 'CA 19-9', 'IGF-1', 'T4 Livre (FT4)', etc.
+        """
+        m_val = VALUE_WITH_UNIT_RE.search(line)
+        if m_val:
+            idx = m_val.start()
+            return line[:idx].strip().lstrip("-:•·").strip(), line[idx:].strip()
+
+        m_text = self.text_value_re.search(line)
+        if m_text:
+            idx = m_text.start()
+            return line[:idx].strip().lstrip("-:•·").strip(), line[idx:].strip()
+
+        m_num = _FIRST_NUMBER_RE.search(line)
+        if m_num:
+            tail = line[m_num.start():]
+            if VALUE_WITH_UNIT_RE.search(tail) or RANGE_OR_CMP_RE.search(tail):
+                return line[:m_num.start()].strip().lstrip("-:•·").strip(), tail.strip()
+
+        return None, None
+
+    @staticmethod
+    def pick_central_from_left(left: str) -> Tuple[Optional[str], Optional[str]]:
+        """Prefer absolute units over % on the same line."""
+        cands = list(CENTRAL_CANDIDATE_RE.finditer(left))
+        if not cands:
+            return None, None
+        for m in cands:
+            u = (m.group("unit") or "").strip()
+            if u and UNIT_ABS_RE.fullmatch(u):
+                return m.group("val").replace(" ", "").replace(",", "."), normalize_units(u)
+        m = cands[0]
+        return m.group("val").replace(" ", "").replace(",", "."), normalize_units((m.group("unit") or "").strip())
+
+    # Row builders
+    def parse_numeric_line(self, line: str, page_hist_dates: List[str], report_date: str) -> Optional[List[Dict[str, str]]]:
+        """Parse a numeric metric line (value, unit, reference and up to two historical values)"""
+        line = normalize_units(line)
+        if self.is_blocklisted_line(line) or not _NUMERIC_HINT_RE.search(line):
+            return None
+        name, tail = self.split_name_and_tail(line)
+        if not name or not self._is_metric_name(name):
+            return None
+        return self._numeric_rows(name, tail, page_hist_dates, report_date)
+
+    def parse_urine_line(self, line: str, page_hist_dates: List[str], report_date: str) -> Optional[List[Dict[str, str]]]:
+        """Parse a qualitative (urine) metric line with historical data support"""
+        if self.is_blocklisted_line(line):
+            return None
+        name, tail = self.split_name_and_tail(line)
+        if not name or not tail or not self._is_metric_name(name):
+            return None
+        return self._qualitative_rows(name, tail, page_hist_dates, report_date)
+
+    def _numeric_rows(self, name: str, tail: str, page_hist_dates: List[str], report_date: str) -> Optional[List[Dict[str, str]]]:
+        tail = tail or ""
+        tail_clean = protect_x10_units(tail)
+
+        # Reference is the rightmost range, else the rightmost comparator
+        mref = None
+        for mref in _RANGE_RE.finditer(tail_clean):
+            pass
+        if mref is None:
+            for mref in _COMPARATOR_RE.finditer(tail_clean):
+                pass
+
+        if mref:
+            left = tail_clean[:mref.start()].strip()
+            reference = (mref.group(0) or "").strip()
+            right = tail_clean[mref.end():].strip()
+            left_original = tail[:mref.start()].strip()
+        else:
+            left = tail_clean
+            right = ""
+            reference = ""
+            left_original = tail
+        central_val, central_unit = self.pick_central_from_left(left_original)
+        if not central_val:
+            return None
+
+        # historical values (numeric OR qualitative text)
+        hist_vals = [h.strip() for h in self.hist_value_re.findall(right)]
+        if not hist_vals:
+            for m in self.hist_value_re.finditer(left):
+                tok = m.group(0).strip()
+                # avoid echoing the central numeric token, and don't pick the reference range
+                if tok.replace(" ", "").replace(",", ".") == central_val or (reference and tok in reference):
+                    continue
+                hist_vals.append(tok)
+
+        return self._rows(name, central_val, central_unit or "", reference, hist_vals, page_hist_dates, report_date)
+
+    def _qualitative_rows(self, name: str, tail: str, page_hist_dates: List[str], report_date: str) -> Optional[List[Dict[str, str]]]:
+        # All qualitative tokens across the tail, in order; any after the first are historical columns
+        all_texts = [m.group(0).strip() for m in self.text_value_re.finditer(tail)]
+        if not all_texts:
+            return None
+        return self._rows(name, all_texts[0], "", "", all_texts[1:], page_hist_dates, report_date)
+
+    @staticmethod
+    def _rows(
+        name: str,
+        value: str,
+        unit: str,
+        reference: str,
+        hist_vals: List[str],
+        page_hist_dates: List[str],
+        report_date: str
+    ) -> List[Dict[str, str]]:
+        rows = [{
+            "metric_name": name,
+            "date_of_value": report_date,
+            "value": value,
+            "unit": unit,
+            "reference": reference,
+        }]
+        if page_hist_dates:
+            for hv, hist_date in zip(hist_vals[:2], page_hist_dates):
+                rows.append({
+                    "metric_name": name,
+                    "date_of_value": hist_date,
+                    "value": hv,
+                    "unit": unit,
+                    "reference": reference,
+                })
+        return rows
+
+    def _parse_normalized_line(
+        self,
+        raw: str,
+        current_type: str,
+        page_hist_dates: List[str],
+        report_date: str
+    ) -> Optional[List[Dict[str, str]]]:
+        # raw is unit-normalised and known not to be blocklisted: split it once for both row kinds
+        numeric = _NUMERIC_HINT_RE.search(raw) is not None
+        urine = current_type == URINE_SECTION
+        if not (numeric or urine):
+            return None
+        name, tail = self.split_name_and_tail(raw)
+        if not name or not self._is_metric_name(name):
+            return None
+        rowset = self._numeric_rows(name, tail, page_hist_dates, report_date) if numeric else None
+        # Urine qualitative fallback (only within urine section)
+        if not rowset and urine and tail:
+            rowset = self._qualitative_rows(name, tail, page_hist_dates, report_date)
+        return rowset
+
+    # Document
+    def parse_pages(self, pages_text: List[str], report_date: str, lab_name: str) -> List[Dict[str, str]]:
+        """Metric rows of all pages, deduplicated by (type_of_analysis, metric_name, date_of_value, value)"""
+        records: List[Dict[str, str]] = []
+        current_type = ""
+
+        for page_text in pages_text:
+            if not page_text:
+                continue
+
+            # Historical dates present on this page (ignore report_date): the two rightmost
+            page_dates = [canonicalize_date(m.group(0)) for m in MULTI_DATE_RE.finditer(page_text)]
+            page_hist_dates = [d for d in page_dates if d and d != report_date][-2:]
+            last_metric_name = ""
+
+            for line in page_text.splitlines():
+                if not line.strip():
+                    continue
+                raw = normalize_units(line)
+                raw_norm = norm(raw)
+                if raw_norm.lstrip().startswith(self.start_blocklist):
+                    continue
+
+                current_type = self.detect_section_type(raw_norm, current_type)
+
+                # Skip obvious meta lines early
+                if self.meta_name_re.search(raw.strip(": ").strip()):
+                    continue
+
+                rowset = self._parse_normalized_line(raw, current_type, page_hist_dates, report_date)
+
+                if not rowset:
+                    has_digit = _DIGIT_RE.search(raw) is not None
+                    # try multi-line metric (previous line name + current numbers)
+                    if last_metric_name and has_digit:
+                        rowset = self.parse_numeric_line(f"{last_metric_name} {raw}", page_hist_dates, report_date)
+
+                    # remember plausible metric-only header (require parentheses/colon/comma)
+                    if not rowset and not has_digit and len(raw) < 100 and _LETTER_RE.search(raw):
+                        candidate = raw.strip(": ").strip()
+                        if (
+                            not self.meta_name_re.search(candidate)
+                            and _HEADER_PUNCT_RE.search(candidate)
+                            and not norm(candidate).startswith(_DROPPED_NAME_PREFIXES)
+                        ):
+                            last_metric_name = candidate
+                        else:
+                            last_metric_name = ""
+                else:
+                    last_metric_name = ""
+
+                if rowset:
+                    for r in rowset:
+                        records.append({
+                            "lab_name": lab_name,
+                            "type_of_analysis": current_type,
+                            **r
+                        })
+
+        seen = set()
+        deduped = []
+        for r in records:
+            key = (r["type_of_analysis"], r["metric_name"], r["date_of_value"], r["value"])
+            if key in seen:
+                continue
+            seen.add(key)
+            deduped.append(r)
+        return deduped
+
+
+# ---------------------------- Vocabularies ----------------------------
+
+# Qualitative values, shared core
+_TEXT_VALUES_CORE = [
+    # PT/ES/IT/RO
+    r"Não\s+revelou(?:\s*\([^)]+\))?", r"Nao\s+revelou(?:\s*\([^)]+\))?",
+    r"No\s+revel[oó]", r"No\s+detectado", r"No\s+se\s+detect[oó]", r"Ausente",
+    r"Presente", r"Presencia", r"Presenza", r"Prezent",
+    r"Raros(?:\s*\([^)]+\))?", r"Escasos", r"Pocos", r"Occasionali?",
+    r"Vest[ií]gios", r"Vestigios", r"Tracce", r"Urme",
+    r"Límpid[ao]", r"Limpid[eo]", r"Claro", r"Clara", r"Chiaro",
+    r"Amarela(?:\s+clara)?", r"Amarill[oa]", r"Giallo", r"Galben[ăa]?",
+    r"Negativo", r"Positivo",
+    # EN/FR/DE/NL/DK/SE/NO/PL
+    r"Not\s+detected", r"None\s+detected", r"Absent", r"Present",
+    r"Rare", r"Few", r"Occasional",
+    r"Trace(?:s)?", r"Traces?", r"Spur(?:e|en)?", r"Spor", r"Spår", r"Ślad(?:y)?",
+    r"Clear", r"Limpid", r"Clair", r"Klar", r"Helder", r"Bistr[ăa]?",
+    r"Yellow", r"Jaune", r"Gelb", r"Geel", r"Gul", r"Żółty",
+    r"Negativ(?:e|o|t)?", r"Positiv(?:e|o|t)?",
+]
+
+_TEXT_VALUES_EXTENDED = _TEXT_VALUES_CORE + [
+    # EL / HR / SR / BG / TR
+    r"Αρνητικ[όή]", r"Θετικ[όή]", r"Ίχνη", r"Διαυγές", r"Κίτρινο",
+    r"Negativno", r"Pozitivno", r"Tragovi", r"Bistro", r"Žuto",
+    r"Негативно", r"Позитивно", r"Трагови", r"Бистро", r"Жълт[о]?",
+    r"Negatif", r"Pozitif", r"İz", r"Berrak", r"Sarı",
+    # with /campo / field / HPF
+    r"(?:Raros|Rare|Few|Occasional).*?\(\s*<?\s*\d+\s*/\s*(?:campo|field|HPF)\s*\)",
+]
+
+_META_NAMES_CORE = (
+    # Hospital / Clinic / Lab
+    r"hospital|clin(?:ic|iqu)e|cl[ií]nica|krankenhaus|klin(?:ik|ika)|"
+    r"lab(?:or(?:atorio|atoire|oratorium)|or)|laborat[óo]rio|laboratuvar|"
+    # Phone / Web
+    r"tel(?:ephone|efo[oó]n|[eé]fono|efon|efonnummer)?|tlf\.?|telefon|téléphone|"
+    r"www\.|http|https|e-?mail|correo|mail|email|"
+)
+
+_META_NAME_CORE_PATTERN = (
+    r"^(?:"
+    + _META_NAMES_CORE +
+    r"data\b|fecha\b|date\b|datum\b|dato\b"
+    r")"
+)
+
+_META_NAME_EXTENDED_PATTERN = (
+    r"^(?:"
+    + _META_NAMES_CORE +
+    # Page
+    r"p[áa]g\.?|page\b|seite|pagina|pagin[ăa]?|strona|stranica|sida|side|σελίδα|страница|sayfa|"
+    r"pag\.|p[oó]lg\.?"
+    r"|"
+    # Date words
+    r"data\b|fecha\b|date\b|datum\b|dato\b|ημερομηνία|дата|tarih\b"
+    r"|"
+    # Method / Methodology
+    r"m[ée]t(?:odo|\.?)|met(?:hod|hode|odo|ode)?\b|méthode|methode|metode|"
+    # Admin / identity
+    r"impress|imprimi|druk|drucken|drukker|drukă|drukăre|drukati|print|"
+    r"epis[óo]dio|episode|episod|akten|dossier|processo|proc[eé]s|"
+    r"utente|pacient|patient|paciente|paziente|"
+    r"n[º°#]\b|num(?:ero)?\b|refer[ée]ncia|ref\.:?|adres[se]?|end[eé]re[cç]o|morada|adresse|indirizzo|adres|adresa|adrese|adresi|adresă|адрес|"
+    r"nif|nie|cif|dni|pesel|oib|egn|tc\s*kimlik|kimlik|"
+    # Section/title-like
+    r"ionogram(?:me|a|m)?|ionograma|hemograma|hemogramme|hemogramma|"
+    r"urina\s*ii.*exame\s+sum[áa]rio"
+    r"|"
+    # Explicit prefixes to drop
+    r"exma|exmo|hfe|phu\b"
+    r")"
+)
+
+_START_BLOCKLIST = [
+    "Referência", "Referência normal", "Insuficiência:", "Recomendações", "Recomendações:",
+    "PHEV",
+    "Deficiência", "Deficiência:",  # block entire lines with this header
+]
+
+# Mojibake (UTF-8 read as Latin-1) variants seen in embedded PDF text
+_START_BLOCKLIST_MOJIBAKE = [
+    "ReferÃªncia", "ReferÃªncia normal", "InsuficiÃªncia:", "RecomendaÃ§Ãµes", "RecomendaÃ§Ãµes:",
+    "DeficiÃªncia", "DeficiÃªncia:",
+]
+
+_SECTION_KEYWORDS_CORE = [
+    ("HEMATOLOGIA", ["hematolog", "hemograma", "hematologe", "hématolog", "hämatolog", "ematolog"]),
+    ("BIOQUIMICA", ["bioquim", "biochim", "biochem", "biokem", "biokjem", "biochemie"]),
+    (URINE_SECTION, ["urina", "urine", "urin ", "urin-", "urinalys", "urinaliz"]),
+]
+
+_SECTION_KEYWORDS_EXTENDED = [
+    ("HEMATOLOGIA", _SECTION_KEYWORDS_CORE[0][1] + ["αιματολογ", "хематолог", "hematoloji"]),
+    ("BIOQUIMICA", _SECTION_KEYWORDS_CORE[1][1] + ["βιοχημ", "биохим", "biyokim"]),
+    (URINE_SECTION, _SECTION_KEYWORDS_CORE[2][1] + ["ουρ", "урин", "idrar", "mocz", "moczu"]),
+]
+
+_DATE_LABELS_CORE = [
+    r"data\s+colheita", r"data\s+da\s+colheita", r"data\s+do\s+relat[oó]rio",
+    r"fecha\s+de\s+extracci[oó]n", r"fecha\s+del?\s+informe",
+    r"collection\s+date", r"report\s+date", r"result\s+date",
+]
+
+_DATE_LABELS_EXTENDED = [
+    # Portuguese
+    r"data\s+colheita", r"data\s+da\s+colheita", r"data\s+do\s+relat[oó]rio", r"data\s+do\s+resultado",
+    # Spanish
+    r"fecha\s+de\s+extracci[oó]n", r"fecha\s+de\s+toma\s+de\s+muestra", r"fecha\s+del?\s+informe", r"fecha\s+del?\s+resultado",
+    # English
+    r"(collection|sample\s+collection|specimen\s+collection)\s+date", r"report\s+date", r"result\s+date",
+    # French
+    r"date\s+de\s+pr[ée]l[èe]vement", r"date\s+du\s+rapport", r"date\s+du\s+r[ée]sultat",
+    # German
+    r"entnahme(?:-|\s*)datum", r"berichtsdatum", r"ergebnisdatum",
+    # Italian
+    r"data\s+prelievo", r"data\s+del\s+referto", r"data\s+referto", r"data\s+del\s+rapporto", r"data\s+del\s+risultato",
+    # Polish
+    r"data\s+pobrania", r"data\s+raportu", r"data\s+wyniku",
+    # Dutch
+    r"afnamedatum", r"rapportdatum", r"resultaatdatum",
+    # Danish / Swedish / Norwegian
+    r"pr[øo]vetagningsdato|pr[øo]vetakingsdato", r"rapportdato", r"resultatdato", r"provtagningsdatum",
+    # Greek
+    r"ημερομηνία\s+λήψης", r"ημερομηνία\s+αναφοράς", r"ημερομηνία\s+αποτελέσματος",
+    # Croatian / Serbian (Latin + Cyrillic)
+    r"datum\s+uzorkovanj[ae]", r"datum\s+izv[je]s?ta[ja]", r"datum\s+rezultata",
+    r"датум\s+узорковања", r"датум\s+извештаја", r"датум\s+резултата",
+    # Romanian
+    r"data\s+recolt[ăa]rii", r"data\s+raportului", r"data\s+rezultatului",
+    # Bulgarian
+    r"дата\s+на\s+вземане\s+на\s+пробата", r"дата\s+на\s+отчета", r"дата\s+на\s+резултата",
+    # Turkish
+    r"(?:[öo]rnek|numune)\s+al[ıi]m\s+tarihi", r"rapor\s+tarihi", r"sonu[cç]\s+tarihi",
+]
+
+# Embedded PDF text: full multilingual vocabulary
+lab_text_parser = LabLineParser(
+    text_value_patterns=_TEXT_VALUES_EXTENDED,
+    meta_name_pattern=_META_NAME_EXTENDED_PATTERN,
+    start_blocklist=_START_BLOCKLIST + _START_BLOCKLIST_MOJIBAKE,
+    section_keywords=_SECTION_KEYWORDS_EXTENDED,
+    date_labels=_DATE_LABELS_EXTENDED
+)
+
+# OCR text: narrower vocabulary, plus names OCR tends to glue onto footnotes
+ocr_text_parser = LabLineParser(
+    text_value_patterns=_TEXT_VALUES_CORE,
+    meta_name_pattern=_META_NAME_CORE_PATTERN,
+    start_blocklist=_START_BLOCKLIST,
+    section_keywords=_SECTION_KEYWORDS_CORE,
+    date_labels=_DATE_LABELS_CORE,
+    blocked_name_substrings=[
+        "(met", "tarde", "manha", "manana", "afternoon", "morning",
+        "insuficien", "insufficien", "insuffizien", "insufficienz",
+    ]
+)
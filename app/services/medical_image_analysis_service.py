@@ -12,9 +12,13 @@ from PIL import Image, ImageOps, ImageFilter
 
 from app.core.config import settings
 from app.core.aws_service import aws_service
+from app.services.document_extraction_cache import content_sha256, document_extraction_cache
 
 logger = logging.getLogger(__name__)
 
+# Part of the extraction cache keys: bump when page text extraction / OCR preprocessing changes
+EXAM_TEXT_EXTRACTOR_VERSION = "2"
+
 # ---------- text helpers ----------
 def strip_accents(s: str) -> str:
     return "".join(c for c in unicodedata.normalize("NFKD", s or "") if not unicodedata.combining(c))
@@ -39,40 +43,123 @@ def fix_mojibake(s: str) -> str:
     return s
 
 # ---------- OCR helpers ----------
-def _pixmap_to_pil(pix: "fitz.Pixmap") -> Image.Image:
-    try: data = pix.tobytes("png")
-    except TypeError: data = pix.getPNGData()
-    return Image.open(io.BytesIO(data))
-
 def _preprocess_for_ocr(img: Image.Image) -> Image.Image:
     g = ImageOps.grayscale(img)
     g = g.filter(ImageFilter.MedianFilter(size=3))
     g = ImageOps.autocontrast(g)
     return g
 
-def _ocr_image(img: Image.Image, ocr_langs: str, psm: int) -> str:
-    return pytesseract.image_to_string(img, lang=ocr_langs, config=f"--oem 1 --psm {psm}")
-
-def _ocr_page(doc, page_index: int, dpi: int, ocr_langs: str, psm: int) -> str:
-    page = doc.load_page(page_index)
-    mat = fitz.Matrix(dpi/72.0, dpi/72.0)
-    pix = page.get_pixmap(matrix=mat, alpha=False)
-    return _ocr_image(_preprocess_for_ocr(_pixmap_to_pil(pix)), ocr_langs, psm)
+def _ocr_lines(img: Image.Image, ocr_langs: str, psm: int) -> Tuple[List[Tuple[float, str]], float]:
+    """OCR an image into (relative vertical centre, text) lines plus the character-weighted mean word confidence."""
+    data = pytesseract.image_to_data(img, lang=ocr_langs, config=f"--oem 1 --psm {psm}", output_type=pytesseract.Output.DICT)
+    lines: Dict[Tuple[int, int, int], List] = {}
+    conf_sum = chars = 0.0
+    for i, word in enumerate(data["text"]):
+        word = (word or "").strip()
+        if not word: continue
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        entry = lines.setdefault(key, [[], data["top"][i], data["top"][i] + data["height"][i]])
+        entry[0].append(word)
+        entry[1] = min(entry[1], data["top"][i]); entry[2] = max(entry[2], data["top"][i] + data["height"][i])
+        conf = float(data["conf"][i])
+        if conf >= 0:
+            conf_sum += conf * len(word); chars += len(word)
+    height = max(img.size[1], 1)
+    out = [((top + bottom) / 2 / height, " ".join(words)) for words, top, bottom in lines.values()]
+    return out, (conf_sum / chars if chars else 0.0)
+
+def _ocr_plan_params() -> Dict:
+    """Settings that change OCR output, for extraction cache keys"""
+    return {"adaptive_dpi": settings.EXAM_OCR_ADAPTIVE_DPI, "min_dpi": settings.EXAM_OCR_MIN_DPI,
+            "min_confidence": settings.EXAM_OCR_MIN_CONFIDENCE}
+
+class ExamOCRPlanner:
+    """
+    OCR plan for one exam PDF: pages are rendered once per OCR pass (grayscale, at the requested DPI)
+    from a single open document, and the render is dropped as soon as that pass is done - full-page
+    renders run to several MB each, so only the OCR'd lines are kept. OCR runs on a downscaled copy
+    first and only escalates to higher DPIs when the word confidence or the meaningful-text check
+    fails; full-page results keep line positions, so the bottom strip (signature) of an already
+    OCR'd page costs no further render or Tesseract call.
+    """
+    def __init__(self, pdf_data: bytes, ocr_langs: str, dpi: int, psm: int):
+        self.pdf_data, self.ocr_langs, self.dpi, self.psm = pdf_data, ocr_langs, dpi, psm
+        self._doc = None
+        self._page_lines: Dict[int, List[Tuple[float, str]]] = {}
+        if settings.EXAM_OCR_ADAPTIVE_DPI and settings.EXAM_OCR_MIN_DPI < dpi:
+            low = settings.EXAM_OCR_MIN_DPI
+            self.dpi_steps = sorted({low, (low + dpi) // 2, dpi})
+        else:
+            self.dpi_steps = [dpi]
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
+
+    def close(self):
+        if self._doc is not None: self._doc.close(); self._doc = None
+
+    def _render(self, page_index: int) -> Image.Image:
+        if self._doc is None: self._doc = fitz.open(stream=self.pdf_data, filetype="pdf")
+        mat = fitz.Matrix(self.dpi/72.0, self.dpi/72.0)
+        pix = self._doc.load_page(page_index).get_pixmap(matrix=mat, colorspace=fitz.csGRAY, alpha=False)
+        return Image.frombytes("L", (pix.width, pix.height), pix.samples)
+
+    def _ocr_adaptive(self, img: Image.Image, need_meaningful: bool) -> List[Tuple[float, str]]:
+        best, best_conf = [], -1.0
+        for step in self.dpi_steps:
+            scaled = img if step >= self.dpi else img.resize((max(1, img.width*step//self.dpi), max(1, img.height*step//self.dpi)), Image.LANCZOS)
+            lines, conf = _ocr_lines(_preprocess_for_ocr(scaled), self.ocr_langs, self.psm)
+            if conf > best_conf: best, best_conf = lines, conf
+            good_text = is_meaningful_text(" ".join(t for _, t in lines)) if need_meaningful else bool(lines)
+            if conf >= settings.EXAM_OCR_MIN_CONFIDENCE and good_text:
+                if step < self.dpi: logger.debug(f"OCR accepted at {step} dpi (confidence {conf:.0f})")
+                return lines
+        return best
+
+    def page_text(self, page_index: int) -> str:
+        """Full-page OCR text"""
+        lines = self._page_lines.get(page_index)
+        if lines is None:
+            lines = self._ocr_adaptive(self._render(page_index), need_meaningful=True)
+            self._page_lines[page_index] = lines
+        return "\n".join(t for _, t in lines)
+
+    def bottom_text(self, page_index: int, frac: float) -> str:
+        """OCR text of the bottom `frac` of a page, reusing full-page OCR when the page already had it"""
+        cut = 1 - frac
+        if page_index in self._page_lines:
+            return "\n".join(t for y, t in self._page_lines[page_index] if y >= cut)
+        img = self._render(page_index)
+        crop = img.crop((0, int(img.height*cut), img.width, img.height))
+        return "\n".join(t for _, t in self._ocr_adaptive(crop, need_meaningful=False))
 
 # ---------- PDF text extraction ----------
-def extract_pages_text(pdf_data: bytes, ocr_langs: str, dpi: int, force_ocr: bool, allow_ocr: bool, psm: int) -> List[str]:
+def extract_pages_text(pdf_data: bytes, ocr_langs: str, dpi: int, force_ocr: bool, allow_ocr: bool, psm: int,
+                       planner: Optional[ExamOCRPlanner] = None) -> List[str]:
+    cache_key = document_extraction_cache.make_key(
+        "exam_pages_text", content_sha256(pdf_data), version=EXAM_TEXT_EXTRACTOR_VERSION,
+        ocr_langs=ocr_langs, dpi=dpi, force_ocr=force_ocr, allow_ocr=allow_ocr, psm=psm, **_ocr_plan_params()
+    )
+    cached = document_extraction_cache.get(cache_key)
+    if cached is not None: return cached
+
+    own_planner = planner is None
+    if own_planner: planner = ExamOCRPlanner(pdf_data, ocr_langs, dpi, psm)
     pages_text: List[str] = []
-    with pdfplumber.open(io.BytesIO(pdf_data)) as pdf:
-        try: doc = fitz.open(stream=pdf_data, filetype="pdf")
-        except Exception: doc = None
-        for i, p in enumerate(pdf.pages):
-            embedded = p.extract_text(x_tolerance=2, y_tolerance=2) or p.extract_text() or ""
-            need_ocr = force_ocr or not is_meaningful_text(embedded)
-            if not allow_ocr: need_ocr = False
-            if need_ocr and doc is not None:
-                try: pages_text.append(_ocr_page(doc, i, dpi, ocr_langs, psm) or ""); continue
-                except Exception: pass
-            pages_text.append(embedded or "")
+    complete = True  # False if OCR failed somewhere - don't cache the degraded result
+    try:
+        with pdfplumber.open(io.BytesIO(pdf_data)) as pdf:
+            for i, p in enumerate(pdf.pages):
+                embedded = p.extract_text(x_tolerance=2, y_tolerance=2) or p.extract_text() or ""
+                need_ocr = force_ocr or not is_meaningful_text(embedded)
+                if not allow_ocr: need_ocr = False
+                if need_ocr:
+                    try: pages_text.append(planner.page_text(i) or ""); continue
+                    except Exception: complete = False
+                pages_text.append(embedded or "")
+    finally:
+        if own_planner: planner.close()
+    if complete: document_extraction_cache.put(cache_key, pages_text)
     return pages_text
 
 # ---------- patterns ----------
@@ -268,9 +355,18 @@ def _doctor_from_lines_forward(lines: List[str]) -> Tuple[str, str]:
             return nm.group(1).strip(), ""
     return "", ""
 
-def _page_bottom_lines(pdf_data: bytes, page_index: int, ocr_langs: str, dpi: int, psm: int, frac: float = 0.35) -> List[str]:
+def _page_bottom_lines(pdf_data: bytes, page_index: int, ocr_langs: str, dpi: int, psm: int, frac: float = 0.35,
+                       planner: Optional[ExamOCRPlanner] = None) -> List[str]:
     """Bottom strip of a page (pdf text + OCR), cleaned to lines."""
+    cache_key = document_extraction_cache.make_key(
+        "exam_page_bottom", content_sha256(pdf_data), version=EXAM_TEXT_EXTRACTOR_VERSION,
+        page_index=page_index, ocr_langs=ocr_langs, dpi=dpi, psm=psm, frac=frac, **_ocr_plan_params()
+    )
+    cached = document_extraction_cache.get(cache_key)
+    if cached is not None: return cached
+
     out = []
+    complete = True
     try:
         with pdfplumber.open(io.BytesIO(pdf_data)) as pdf:
             p = pdf.pages[page_index]
@@ -285,30 +381,29 @@ def _page_bottom_lines(pdf_data: bytes, page_index: int, ocr_langs: str, dpi: in
             for _, items in sorted(rows.items()):
                 out.append(" ".join(t for _, t in sorted(items)))
     except Exception:
-        pass
-    # OCR bottom crop
+        complete = False
+    # OCR bottom crop (shares the page render / full-page OCR with extract_pages_text via the planner)
+    own_planner = planner is None
+    if own_planner: planner = ExamOCRPlanner(pdf_data, ocr_langs, dpi, psm)
     try:
-        doc = fitz.open(stream=pdf_data, filetype="pdf")
-        page = doc.load_page(page_index)
-        mat = fitz.Matrix(dpi/72.0, dpi/72.0)
-        pix = page.get_pixmap(matrix=mat, alpha=False)
-        img = _pixmap_to_pil(pix)
-        h, w = img.size[1], img.size[0]
-        crop = img.crop((0, int(h*(1-frac)), w, h))
-        txt = _ocr_image(_preprocess_for_ocr(crop), ocr_langs, psm)
-        out += cleanup_lines(txt)
+        out += cleanup_lines(planner.bottom_text(page_index, frac))
     except Exception:
-        pass
-    return cleanup_lines("\n".join(out))
-
-def detect_doctor_from_pages(pdf_data: bytes, pages_text: List[str], preferred_idx: int, ocr_langs: str, dpi: int, psm: int) -> Tuple[str, str]:
+        complete = False
+    finally:
+        if own_planner: planner.close()
+    lines = cleanup_lines("\n".join(out))
+    if complete: document_extraction_cache.put(cache_key, lines)
+    return lines
+
+def detect_doctor_from_pages(pdf_data: bytes, pages_text: List[str], preferred_idx: int, ocr_langs: str, dpi: int, psm: int,
+                             planner: Optional[ExamOCRPlanner] = None) -> Tuple[str, str]:
     # Search conclusions page first, then last, then others
     order = []
     if preferred_idx >= 0: order.append(preferred_idx)
     if (len(pages_text)-1) not in order: order.append(len(pages_text)-1)
     order += [i for i in range(len(pages_text)) if i not in order]
     for idx in order:
-        lines = _page_bottom_lines(pdf_data, idx, ocr_langs, dpi, psm)
+        lines = _page_bottom_lines(pdf_data, idx, ocr_langs, dpi, psm, planner=planner)
         name, num = _doctor_from_lines_forward(lines)
         if name or num:
             # Prefer letter+digits formats if both encountered
@@ -326,6 +421,8 @@ class MedicalImageAnalysisService:
                           dpi: int = 300, force_ocr: bool = False, allow_ocr: bool = True, psm: int = 6,
                           tesseract_cmd: str = "", tessdata_dir: str = "") -> Dict:
         """Extract structured information from medical exam PDFs"""
+        # One render/OCR plan shared by the page text and doctor signature passes
+        planner = ExamOCRPlanner(pdf_data, ocr_langs, dpi, psm)
         try:
             # Configure Tesseract
             if tesseract_cmd:
@@ -338,7 +435,7 @@ class MedicalImageAnalysisService:
             if tessdata_dir: 
                 os.environ["TESSDATA_PREFIX"] = str(Path(tessdata_dir).resolve())
 
-            pages_text = extract_pages_text(pdf_data, ocr_langs, dpi, force_ocr, allow_ocr, psm)
+            pages_text = extract_pages_text(pdf_data, ocr_langs, dpi, force_ocr, allow_ocr, psm, planner=planner)
             full_text = "\n".join(pages_text)
             lines = cleanup_lines(full_text)
 
@@ -372,7 +469,7 @@ class MedicalImageAnalysisService:
             interpretation = fix_mojibake(parse_interpretation(lines))
 
             # Doctor (prefer conclusions page; capture IDs AFTER the name)
-            doctor_name, doctor_number = detect_doctor_from_pages(pdf_data, pages_text, concl_page, ocr_langs, dpi, psm)
+            doctor_name, doctor_number = detect_doctor_from_pages(pdf_data, pages_text, concl_page, ocr_langs, dpi, psm, planner=planner)
 
             return {
                 "file": "uploaded_pdf",
@@ -396,6 +493,8 @@ class MedicalImageAnalysisService:
                 "doctor_name": "",
                 "doctor_number": ""
             }
+        finally:
+            planner.close()
 
     def categorize_findings(self, body_part: str, interpretation: str, conclusion: str) -> str:
         """Categorize findings using AI based on interpretation and conclusion"""
@@ -0,0 +1,236 @@
+import hashlib
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.metric_name_embedding import MetricNameEmbedding
+
+logger = logging.getLogger(__name__)
+
+
+def embedding_text_hash(text: str) -> str:
+    """Key of a text in metric_name_embeddings"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _normalise_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class EmbeddingProvider(ABC):
+    """
+    Turns texts into embedding vectors. MetricEmbeddingIndex only relies on `model`
+    and `embed()`, so tests can plug in a local stand-in instead of OpenAI.
+    """
+    model: str = ""
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """One vector per text, in order"""
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """Embeddings from the OpenAI embeddings API"""
+
+    def __init__(self, client, model: str = None, batch_size: int = None):
+        self.client = client
+        self.model = model or settings.METRIC_EMBEDDING_MODEL
+        self.batch_size = batch_size or settings.METRIC_EMBEDDING_BATCH_SIZE
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            response = self.client.embeddings.create(
+                model=self.model,
+                input=texts[start:start + self.batch_size]
+            )
+            vectors.extend(item.embedding for item in response.data)
+        return vectors
+
+
+class MetricEmbeddingIndex:
+    """
+    In-memory index of L2-normalised metric-name embeddings backed by metric_name_embeddings.
+
+    Texts resolve memory -> database -> provider, so a name is embedded once per model
+    and only names never seen before reach the provider. Entries are keyed by the hash of
+    the text itself: a renamed metric maps to a new key and can never be served a stale
+    vector, which also keeps per-worker indexes correct without any cross-process sync.
+    invalidate() only reclaims entries for names that went away.
+    """
+
+    def __init__(self, provider: Optional[EmbeddingProvider] = None, max_size: int = None):
+        self._provider = provider
+        self._max_size = max_size or settings.METRIC_EMBEDDING_INDEX_MAX_SIZE
+        self._lock = threading.Lock()
+        self._rows: Dict[str, int] = {}
+        self._vectors: Optional[np.ndarray] = None  # (capacity, dimensions) float32
+        self._size = 0
+
+    @property
+    def provider(self) -> Optional[EmbeddingProvider]:
+        return self._provider
+
+    def set_provider(self, provider: Optional[EmbeddingProvider]) -> None:
+        """Swap the embedding backend; cached vectors belong to the old model and are dropped"""
+        with self._lock:
+            self._provider = provider
+            self._rows = {}
+            self._vectors = None
+            self._size = 0
+
+    def embed(self, texts: Sequence[str], db: Optional[Session] = None) -> np.ndarray:
+        """
+        Normalised float32 matrix with one row per text, in input order, so cosine
+        similarity between two sets of texts is a single matrix product.
+        Vectors missing from the database are persisted through `db` when given.
+        """
+        provider = self._provider
+        if provider is None:
+            raise RuntimeError("No embedding provider configured")
+
+        hashes = [embedding_text_hash(text) for text in texts]
+        with self._lock:
+            missing = {h: text for h, text in zip(hashes, texts) if h not in self._rows}
+
+        new_vectors: Dict[str, np.ndarray] = {}
+        if missing and db is not None:
+            new_vectors.update(self._load(db, provider.model, list(missing)))
+
+        to_embed = [(h, text) for h, text in missing.items() if h not in new_vectors]
+        if to_embed:
+            logger.info(f"Embedding {len(to_embed)} new metric names with {provider.model}")
+            embedded = _normalise_rows(np.asarray(
+                provider.embed([text for _, text in to_embed]), dtype=np.float32
+            ))
+            for (h, _), vector in zip(to_embed, embedded):
+                new_vectors[h] = vector
+            if db is not None:
+                self._persist(db, provider.model, [(h, text, embedded[i]) for i, (h, text) in enumerate(to_embed)])
+
+        with self._lock:
+            if provider is not self._provider:
+                # Don't mix vectors of two models in one index
+                raise RuntimeError("Embedding provider changed during lookup")
+            if new_vectors:
+                self._add_locked(new_vectors, hashes)
+            if all(h in self._rows for h in hashes):
+                return self._vectors[[self._rows[h] for h in hashes]]
+
+        # A concurrent invalidate() or compaction dropped an entry this lookup relied on
+        return self.embed(texts, db)
+
+    def invalidate(self, db: Optional[Session], texts: Sequence[str]) -> None:
+        """
+        Drop names that are no longer a metric/template display name (e.g. the old name after
+        a rename) from memory and, unless another metric or template still uses them, from the
+        database. Names are re-embedded on demand if they show up again.
+        """
+        hashes = {embedding_text_hash(text) for text in texts if text}
+        if not hashes:
+            return
+
+        with self._lock:
+            for h in hashes:
+                self._rows.pop(h, None)
+
+        if db is None:
+            return
+
+        from app.models.health_record import HealthRecordMetric
+        from app.models.health_metrics import HealthRecordMetricTemplate
+
+        try:
+            unused = []
+            for text in {text for text in texts if text}:
+                in_use = (
+                    db.query(HealthRecordMetric.id).filter(HealthRecordMetric.display_name == text).first()
+                    or db.query(HealthRecordMetricTemplate.id).filter(HealthRecordMetricTemplate.display_name == text).first()
+                )
+                if not in_use:
+                    unused.append(embedding_text_hash(text))
+            if unused:
+                db.query(MetricNameEmbedding).filter(
+                    MetricNameEmbedding.text_hash.in_(unused)
+                ).delete(synchronize_session=False)
+                db.commit()
+        except Exception as e:
+            logger.warning(f"Failed to invalidate stored metric name embeddings: {e}")
+            db.rollback()
+
+    def _add_locked(self, new_vectors: Dict[str, np.ndarray], working_set: List[str]) -> None:
+        # Another lookup may have added some of these meanwhile
+        new_vectors = {h: vector for h, vector in new_vectors.items() if h not in self._rows}
+        if not new_vectors:
+            return
+
+        dimensions = len(next(iter(new_vectors.values())))
+        if self._vectors is not None and self._vectors.shape[1] != dimensions:
+            raise ValueError(f"Embedding dimension changed from {self._vectors.shape[1]} to {dimensions}")
+
+        if self._size + len(new_vectors) > self._max_size:
+            # Full (invalidated rows count until compacted): keep only what the current lookup still needs
+            keep = [h for h in dict.fromkeys(working_set) if h in self._rows]
+            kept_vectors = self._vectors[[self._rows[h] for h in keep]] if keep else None
+            self._rows = {h: i for i, h in enumerate(keep)}
+            self._vectors = kept_vectors
+            self._size = len(keep)
+            logger.info(f"Metric embedding index full, compacted to {len(keep)} entries")
+
+        needed = self._size + len(new_vectors)
+        capacity = 0 if self._vectors is None else self._vectors.shape[0]
+        if needed > capacity:
+            grown = np.zeros((max(needed, min(max(capacity * 2, 64), self._max_size)), dimensions), dtype=np.float32)
+            if self._size:
+                grown[:self._size] = self._vectors[:self._size]
+            self._vectors = grown
+
+        for h, vector in new_vectors.items():
+            self._vectors[self._size] = vector
+            self._rows[h] = self._size
+            self._size += 1
+
+    @staticmethod
+    def _load(db: Session, model: str, hashes: List[str]) -> Dict[str, np.ndarray]:
+        try:
+            rows = db.query(MetricNameEmbedding.text_hash, MetricNameEmbedding.embedding).filter(
+                MetricNameEmbedding.model == model,
+                MetricNameEmbedding.text_hash.in_(hashes)
+            ).all()
+            return {row.text_hash: np.frombuffer(row.embedding, dtype=np.float32) for row in rows}
+        except Exception as e:
+            logger.warning(f"Failed to load stored metric name embeddings: {e}")
+            db.rollback()
+            return {}
+
+    @staticmethod
+    def _persist(db: Session, model: str, entries: List[tuple]) -> None:
+        try:
+            stmt = pg_insert(MetricNameEmbedding).values([
+                {
+                    "text_hash": h,
+                    "model": model,
+                    "text": text,
+                    "dimensions": len(vector),
+                    "embedding": vector.astype(np.float32).tobytes()
+                }
+                for h, text, vector in entries
+            ]).on_conflict_do_nothing(index_elements=["text_hash", "model"])
+            db.execute(stmt)
+            db.commit()
+        except Exception as e:
+            # The vectors are still served from memory; they'll be persisted on a later call
+            logger.warning(f"Failed to store metric name embeddings: {e}")
+            db.rollback()
+
+
+# Global instance; MetricSimilarityService configures the provider
+metric_embedding_index = MetricEmbeddingIndex()
@@ -1,12 +1,20 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set, Tuple
+from collections import OrderedDict, defaultdict
 from difflib import SequenceMatcher
+from functools import lru_cache
 import re
+import threading
 import unicodedata
 import numpy as np
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 # from app.models.health_record import MetricCategories, MetricSubCategories  # These classes don't exist
 from app.core.config import settings
+from app.services.metric_embedding_index import (
+    EmbeddingProvider,
+    OpenAIEmbeddingProvider,
+    metric_embedding_index
+)
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,6 +27,158 @@ except ImportError:
     OPENAI_AVAILABLE = False
     logger.warning("OpenAI package not installed. Similarity calculation will use fallback mode.")
 
+# Names per lookup handed from the trigram index to the pairwise scorers
+SIMILARITY_CANDIDATE_LIMIT = 10
+NORMALIZED_NAME_CACHE_SIZE = 50000
+# Candidate indexes kept per user/section/template set
+CANDIDATE_INDEX_CACHE_SIZE = 256
+
+# Common abbreviations and synonyms, expanded in this order
+NAME_ABBREVIATIONS = {
+    'bp': 'blood pressure',
+    'hr': 'heart rate',
+    'bpm': 'beats per minute',
+    'temp': 'temperature',
+    'wt': 'weight',
+    'ht': 'height',
+    'bmi': 'body mass index',
+    'o2': 'oxygen',
+    'sat': 'saturation',
+    'glucose': 'blood glucose',
+    'sugar': 'blood glucose',
+    'chol': 'cholesterol',
+    'hdl': 'high density lipoprotein',
+    'ldl': 'low density lipoprotein',
+    'trig': 'triglycerides',
+    'wbc': 'white blood cells',
+    'rbc': 'red blood cells',
+    'hgb': 'hemoglobin',
+    'hct': 'hematocrit',
+    'plt': 'platelets',
+    'na': 'sodium',
+    'k': 'potassium',
+    'cl': 'chloride',
+    'co2': 'carbon dioxide',
+    'bun': 'blood urea nitrogen',
+    'creat': 'creatinine',
+    'alt': 'alanine aminotransferase',
+    'ast': 'aspartate aminotransferase',
+    'alk phos': 'alkaline phosphatase',
+    'bil': 'bilirubin',
+    'alb': 'albumin',
+    'protein': 'total protein',
+    'ca': 'calcium',
+    'mg': 'magnesium',
+    'phos': 'phosphorus',
+    'fe': 'iron',
+    'ferritin': 'ferritin',
+    'tibc': 'total iron binding capacity',
+    'vit d': 'vitamin d',
+    'vit b12': 'vitamin b12',
+    'folate': 'folic acid',
+    'tsh': 'thyroid stimulating hormone',
+    't4': 'thyroxine',
+    't3': 'triiodothyronine',
+    'psa': 'prostate specific antigen',
+    'hba1c': 'hemoglobin a1c',
+    'a1c': 'hemoglobin a1c',
+    'urine': 'urinalysis',
+    'ua': 'urinalysis',
+    # Portuguese abbreviations
+    'leuc': 'leucocitos',
+    'plaquetas': 'platelets',
+    'glicose': 'glucose',
+    'colesterol': 'cholesterol',
+    'triglicerides': 'triglycerides',
+}
+
+_ABBREVIATION_PATTERNS = [
+    (re.compile(r'\b' + re.escape(abbrev) + r'\b'), full)
+    for abbrev, full in NAME_ABBREVIATIONS.items()
+]
+
+
+@lru_cache(maxsize=NORMALIZED_NAME_CACHE_SIZE)
+def _normalize_metric_name(name: str) -> str:
+    """Normalised form of a metric/section name (memoised - the same names are compared over and over)"""
+    if not name:
+        return ""
+    
+    # Remove diacritics (á → a, ç → c, etc.)
+    normalized = unicodedata.normalize('NFKD', name)
+    normalized = ''.join(c for c in normalized if not unicodedata.combining(c))
+    
+    # Convert to lowercase
+    normalized = normalized.lower()
+    
+    # Remove special characters and extra spaces
+    normalized = re.sub(r'[^\w\s]', ' ', normalized)
+    normalized = re.sub(r'\s+', ' ', normalized).strip()
+    
+    # Replace abbreviations
+    for pattern, full in _ABBREVIATION_PATTERNS:
+        normalized = pattern.sub(full, normalized)
+    
+    return normalized
+
+
+def _name_initials(normalized: str, min_word_length: int) -> str:
+    """First letters of the words that are at least min_word_length long"""
+    return ''.join(word[0] for word in normalized.split() if len(word) >= min_word_length)
+
+
+def _name_trigrams(normalized: str) -> Set[str]:
+    """Character trigrams of a normalised name, padded so short names and word starts still produce some"""
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameCandidateIndex:
+    """
+    Character-trigram inverted index over normalised names.
+    
+    Returns the few names sharing the most trigrams with a query (plus names with the same
+    initials, which the abbreviation scorer rewards) so that SequenceMatcher and friends only
+    run on plausible matches instead of every existing name.
+    """
+    
+    def __init__(self, names: Tuple[str, ...], min_word_length: int):
+        self.names = names
+        self.words = [set(name.split()) for name in names]
+        self.initials = [_name_initials(name, min_word_length) for name in names]
+        trigram_counts = []
+        postings: Dict[str, List[int]] = defaultdict(list)
+        self._by_initials: Dict[str, List[int]] = defaultdict(list)
+        for position, name in enumerate(names):
+            trigrams = _name_trigrams(name)
+            trigram_counts.append(len(trigrams))
+            for trigram in trigrams:
+                postings[trigram].append(position)
+            if len(self.initials[position]) >= 2:
+                self._by_initials[self.initials[position]].append(position)
+        self._trigram_counts = np.array(trigram_counts, dtype=np.float64)
+        self._postings = {trigram: np.array(positions, dtype=np.int64) for trigram, positions in postings.items()}
+    
+    def candidates(self, normalized: str, initials: str, limit: int) -> Set[int]:
+        """Positions of the names most likely to be similar to `normalized`"""
+        result: Set[int] = set()
+        trigrams = _name_trigrams(normalized)
+        postings = [self._postings[trigram] for trigram in trigrams if trigram in self._postings]
+        if postings:
+            shared = np.bincount(np.concatenate(postings), minlength=len(self.names))
+            matching = np.flatnonzero(shared)
+            if len(matching) > limit:
+                # Rank by Dice coefficient so long names don't win on raw overlap alone
+                dice = shared[matching] / (len(trigrams) + self._trigram_counts[matching])
+                matching = matching[np.argpartition(-dice, limit - 1)[:limit]]
+            result.update(matching.tolist())
+        
+        if len(initials) >= 2:
+            # All of these score at least 0.9 on initials; the first ones are enough to keep the best match
+            result.update(self._by_initials.get(initials, ())[:limit])
+        return result
+
+
 class MetricSimilarityService:
     """
     AI-powered service to detect similar metrics and prevent duplication.
@@ -40,6 +200,15 @@ class MetricSimilarityService:
             except Exception as e:
                 logger.warning(f"Failed to initialize OpenAI client: {e}")
                 self.openai_client = None
+        self._candidate_indexes: "OrderedDict[Any, NameCandidateIndex]" = OrderedDict()
+        self._candidate_index_lock = threading.Lock()
+        self.embedding_index = metric_embedding_index
+        if self.openai_client and not self.embedding_index.provider:
+            self.embedding_index.set_provider(OpenAIEmbeddingProvider(self.openai_client))
+    
+    def set_embedding_provider(self, provider: Optional[EmbeddingProvider]) -> None:
+        """Swap the embedding backend (e.g. a local stand-in in tests); None forces the difflib fallback"""
+        self.embedding_index.set_provider(provider)
         
     def check_similar_categories(
         self, 
@@ -154,84 +323,7 @@ class MetricSimilarityService:
         Returns:
             Normalized name
         """
-        if not name:
-            return ""
-        
-        # Remove diacritics (á → a, ç → c, etc.)
-        normalized = unicodedata.normalize('NFKD', name)
-        normalized = ''.join(c for c in normalized if not unicodedata.combining(c))
-        
-        # Convert to lowercase
-        normalized = normalized.lower()
-        
-        # Remove special characters and extra spaces
-        normalized = re.sub(r'[^\w\s]', ' ', normalized)
-        normalized = re.sub(r'\s+', ' ', normalized).strip()
-        
-        # Common abbreviations and synonyms
-        abbreviations = {
-            'bp': 'blood pressure',
-            'hr': 'heart rate',
-            'bpm': 'beats per minute',
-            'temp': 'temperature',
-            'wt': 'weight',
-            'ht': 'height',
-            'bmi': 'body mass index',
-            'o2': 'oxygen',
-            'sat': 'saturation',
-            'glucose': 'blood glucose',
-            'sugar': 'blood glucose',
-            'chol': 'cholesterol',
-            'hdl': 'high density lipoprotein',
-            'ldl': 'low density lipoprotein',
-            'trig': 'triglycerides',
-            'wbc': 'white blood cells',
-            'rbc': 'red blood cells',
-            'hgb': 'hemoglobin',
-            'hct': 'hematocrit',
-            'plt': 'platelets',
-            'na': 'sodium',
-            'k': 'potassium',
-            'cl': 'chloride',
-            'co2': 'carbon dioxide',
-            'bun': 'blood urea nitrogen',
-            'creat': 'creatinine',
-            'alt': 'alanine aminotransferase',
-            'ast': 'aspartate aminotransferase',
-            'alk phos': 'alkaline phosphatase',
-            'bil': 'bilirubin',
-            'alb': 'albumin',
-            'protein': 'total protein',
-            'ca': 'calcium',
-            'mg': 'magnesium',
-            'phos': 'phosphorus',
-            'fe': 'iron',
-            'ferritin': 'ferritin',
-            'tibc': 'total iron binding capacity',
-            'vit d': 'vitamin d',
-            'vit b12': 'vitamin b12',
-            'folate': 'folic acid',
-            'tsh': 'thyroid stimulating hormone',
-            't4': 'thyroxine',
-            't3': 'triiodothyronine',
-            'psa': 'prostate specific antigen',
-            'hba1c': 'hemoglobin a1c',
-            'a1c': 'hemoglobin a1c',
-            'urine': 'urinalysis',
-            'ua': 'urinalysis',
-            # Portuguese abbreviations
-            'leuc': 'leucocitos',
-            'plaquetas': 'platelets',
-            'glicose': 'glucose',
-            'colesterol': 'cholesterol',
-            'triglicerides': 'triglycerides',
-        }
-        
-        # Replace abbreviations
-        for abbrev, full in abbreviations.items():
-            normalized = re.sub(r'\b' + re.escape(abbrev) + r'\b', full, normalized)
-        
-        return normalized
+        return _normalize_metric_name(name or "")
     
     def _calculate_word_similarity(self, name1: str, name2: str) -> float:
         """
@@ -270,14 +362,13 @@ class MetricSimilarityService:
         Returns:
             Abbreviation similarity score
         """
-        # Extract first letters of each word
-        def get_initials(name: str) -> str:
-            words = name.split()
-            return ''.join(word[0] for word in words if len(word) >= self.min_word_length)
-        
-        initials1 = get_initials(name1)
-        initials2 = get_initials(name2)
-        
+        return self._initials_similarity(
+            _name_initials(name1, self.min_word_length), _name_initials(name2, self.min_word_length), name1, name2
+        )
+    
+    @staticmethod
+    def _initials_similarity(initials1: str, initials2: str, name1: str, name2: str) -> float:
+        """Abbreviation score for two normalized names given their initials"""
         if not initials1 or not initials2:
             return 0.0
         
@@ -365,6 +456,104 @@ class MetricSimilarityService:
             "message": f"Found {len(similar_items)} similar metrics. Please review before proceeding."
         }
 
+    def _get_candidate_index(self, scope: Any, names: Tuple[str, ...]) -> NameCandidateIndex:
+        """
+        Candidate index over `names` (normalized), cached per scope (user sections, section
+        metrics, user metrics + templates) and rebuilt whenever the scope's names change.
+        """
+        with self._candidate_index_lock:
+            index = self._candidate_indexes.get(scope)
+            if index is not None and index.names == names:
+                self._candidate_indexes.move_to_end(scope)
+                return index
+        
+        index = NameCandidateIndex(names, self.min_word_length)
+        with self._candidate_index_lock:
+            self._candidate_indexes[scope] = index
+            self._candidate_indexes.move_to_end(scope)
+            while len(self._candidate_indexes) > CANDIDATE_INDEX_CACHE_SIZE:
+                self._candidate_indexes.popitem(last=False)
+        return index
+    
+    def _score_candidate(self, normalized: str, words: Set[str], initials: str, index: NameCandidateIndex, position: int) -> float:
+        """_calculate_similarity for a normalized name against an indexed one, reusing precomputed words/initials"""
+        other = index.names[position]
+        if normalized == other:
+            return 1.0
+        
+        other_words = index.words[position]
+        union = len(words | other_words)
+        word_similarity = len(words & other_words) / union if union else 0.0
+        abbreviation_similarity = self._initials_similarity(initials, index.initials[position], normalized, other)
+        best = max(word_similarity, abbreviation_similarity)
+        
+        # ratio() is the expensive part - skip it when its cheap upper bounds can't beat the other scores
+        matcher = SequenceMatcher(None, normalized, other)
+        if matcher.real_quick_ratio() > best and matcher.quick_ratio() > best:
+            best = max(best, matcher.ratio())
+        return best
+    
+    def _rank_candidates(self, name: str, index: NameCandidateIndex, threshold: float = 0.0) -> List[Tuple[int, float]]:
+        """(position, score) of indexed names scoring above zero and at least `threshold`, best first"""
+        normalized = self._normalize_name(name)
+        if not normalized:
+            return []
+        
+        words = set(normalized.split())
+        initials = _name_initials(normalized, self.min_word_length)
+        ranked = []
+        for position in index.candidates(normalized, initials, SIMILARITY_CANDIDATE_LIMIT):
+            score = self._score_candidate(normalized, words, initials, index, position)
+            if score > 0.0 and score >= threshold:
+                ranked.append((position, score))
+        
+        # Ties keep index order, like the previous first-wins scan
+        ranked.sort(key=lambda item: (-item[1], item[0]))
+        return ranked
+    
+    def _load_section_index(self, user_id: int, health_record_type_id: int, db: Session):
+        """User's sections of a type as (rows, candidate index); rows are aligned with index positions"""
+        from app.models.health_record import HealthRecordSection
+        
+        rows = db.query(
+            HealthRecordSection.id, HealthRecordSection.name, HealthRecordSection.display_name
+        ).filter(
+            and_(
+                HealthRecordSection.created_by == user_id,
+                HealthRecordSection.health_record_type_id == health_record_type_id
+            )
+        ).order_by(HealthRecordSection.id).all()
+        rows = [row for row in rows if row.display_name or row.name]
+        
+        names = tuple(self._normalize_name(row.display_name or row.name) for row in rows)
+        return rows, self._get_candidate_index(("sections", user_id, health_record_type_id), names)
+    
+    def _load_metric_index(self, section_id: int, db: Session):
+        """Metrics of a section as (rows, candidate index); rows are aligned with index positions"""
+        from app.models.health_record import HealthRecordMetric
+        
+        rows = db.query(
+            HealthRecordMetric.id, HealthRecordMetric.name, HealthRecordMetric.display_name
+        ).filter(
+            HealthRecordMetric.section_id == section_id
+        ).order_by(HealthRecordMetric.id).all()
+        rows = [row for row in rows if row.display_name or row.name]
+        
+        names = tuple(self._normalize_name(row.display_name or row.name) for row in rows)
+        return rows, self._get_candidate_index(("section_metrics", section_id), names)
+    
+    def _similar_rows(self, name: str, rows, index: NameCandidateIndex, threshold: float) -> List[Dict[str, Any]]:
+        return [
+            {
+                "id": rows[position].id,
+                "name": rows[position].name,
+                "display_name": rows[position].display_name,
+                "similarity_score": similarity,
+                "match_type": self._get_match_type(similarity)
+            }
+            for position, similarity in self._rank_candidates(name, index, threshold)
+        ]
+    
     def find_similar_sections(
         self,
         user_id: int,
@@ -386,40 +575,11 @@ class MetricSimilarityService:
         Returns:
             List of similar sections with similarity scores, sorted by score descending
         """
-        from app.models.health_record import HealthRecordSection
-        
         threshold = threshold or self.section_similarity_threshold
         
-        # Get all user sections of the same type
-        existing_sections = db.query(HealthRecordSection).filter(
-            and_(
-                HealthRecordSection.created_by == user_id,
-                HealthRecordSection.health_record_type_id == health_record_type_id
-            )
-        ).all()
-        
-        similar_sections = []
-        normalized_new_name = self._normalize_name(section_name)
-        
-        for section in existing_sections:
-            similarity = self._calculate_similarity(
-                normalized_new_name,
-                self._normalize_name(section.display_name or section.name)
-            )
-            
-            if similarity >= threshold:
-                similar_sections.append({
-                    "id": section.id,
-                    "name": section.name,
-                    "display_name": section.display_name,
-                    "similarity_score": similarity,
-                    "match_type": self._get_match_type(similarity)
-                })
-        
-        # Sort by similarity score descending
-        similar_sections.sort(key=lambda x: x["similarity_score"], reverse=True)
-        
-        return similar_sections
+        # All user sections of the same type, narrowed to trigram candidates before scoring
+        rows, index = self._load_section_index(user_id, health_record_type_id, db)
+        return self._similar_rows(section_name, rows, index, threshold)
     
     def find_similar_metrics(
         self,
@@ -440,37 +600,11 @@ class MetricSimilarityService:
         Returns:
             List of similar metrics with similarity scores, sorted by score descending
         """
-        from app.models.health_record import HealthRecordMetric
-        
         threshold = threshold or self.metric_similarity_threshold
         
-        # Get all metrics in this section
-        existing_metrics = db.query(HealthRecordMetric).filter(
-            HealthRecordMetric.section_id == section_id
-        ).all()
-        
-        similar_metrics = []
-        normalized_new_name = self._normalize_name(metric_name)
-        
-        for metric in existing_metrics:
-            similarity = self._calculate_similarity(
-                normalized_new_name,
-                self._normalize_name(metric.display_name or metric.name)
-            )
-            
-            if similarity >= threshold:
-                similar_metrics.append({
-                    "id": metric.id,
-                    "name": metric.name,
-                    "display_name": metric.display_name,
-                    "similarity_score": similarity,
-                    "match_type": self._get_match_type(similarity)
-                })
-        
-        # Sort by similarity score descending
-        similar_metrics.sort(key=lambda x: x["similarity_score"], reverse=True)
-        
-        return similar_metrics
+        # All metrics in this section, narrowed to trigram candidates before scoring
+        rows, index = self._load_metric_index(section_id, db)
+        return self._similar_rows(metric_name, rows, index, threshold)
     
     def batch_check_similarity(
         self,
@@ -493,13 +627,17 @@ class MetricSimilarityService:
         Returns:
             Dictionary with similarity status for each section and metric
         """
-        from app.models.health_record import HealthRecordSection
-        
         result = {
             "sections": [],
             "metrics": []
         }
         
+        # User sections are loaded once for the whole batch; exact matches are looked up by name
+        section_rows, section_index = self._load_section_index(user_id, health_record_type_id, db)
+        sections_by_name = {}
+        for row in section_rows:
+            sections_by_name.setdefault(row.name, row)
+        
         # Check sections
         for section_data in sections:
             section_name = section_data.get("name") or section_data.get("type_of_analysis", "")
@@ -508,13 +646,7 @@ class MetricSimilarityService:
                 
             # First check exact match
             normalized_name = section_name.lower().replace(" ", "_")
-            exact_match = db.query(HealthRecordSection).filter(
-                and_(
-                    HealthRecordSection.name == normalized_name,
-                    HealthRecordSection.health_record_type_id == health_record_type_id,
-                    HealthRecordSection.created_by == user_id
-                )
-            ).first()
+            exact_match = sections_by_name.get(normalized_name)
             
             if exact_match:
                 result["sections"].append({
@@ -526,9 +658,7 @@ class MetricSimilarityService:
                 })
             else:
                 # Check for similar sections
-                similar = self.find_similar_sections(
-                    user_id, section_name, health_record_type_id, db
-                )
+                similar = self._similar_rows(section_name, section_rows, section_index, self.section_similarity_threshold)
                 
                 if similar and similar[0]["similarity_score"] >= 0.90:
                     # Very similar - treat as existing
@@ -560,6 +690,7 @@ class MetricSimilarityService:
         
         # Check metrics - need to find section first
         section_cache = {}  # Cache section lookups
+        metric_cache = {}  # Section id -> (metrics by name, rows, candidate index)
         
         for metric_data in metrics:
             metric_name = metric_data.get("metric_name", "")
@@ -571,23 +702,13 @@ class MetricSimilarityService:
             # Get or find section
             if section_name not in section_cache:
                 normalized_section_name = section_name.lower().replace(" ", "_")
-                section = db.query(HealthRecordSection).filter(
-                    and_(
-                        HealthRecordSection.name == normalized_section_name,
-                        HealthRecordSection.health_record_type_id == health_record_type_id,
-                        HealthRecordSection.created_by == user_id
-                    )
-                ).first()
+                section = sections_by_name.get(normalized_section_name)
                 
                 # If not found, check similar sections
                 if not section:
-                    similar_sections = self.find_similar_sections(
-                        user_id, section_name, health_record_type_id, db, threshold=0.90
-                    )
+                    similar_sections = self._rank_candidates(section_name, section_index, threshold=0.90)
                     if similar_sections:
-                        section = db.query(HealthRecordSection).filter(
-                            HealthRecordSection.id == similar_sections[0]["id"]
-                        ).first()
+                        section = section_rows[similar_sections[0][0]]
                 
                 section_cache[section_name] = section
             
@@ -605,15 +726,17 @@ class MetricSimilarityService:
                 })
                 continue
             
+            if section.id not in metric_cache:
+                metric_rows, metric_index = self._load_metric_index(section.id, db)
+                metrics_by_name = {}
+                for row in metric_rows:
+                    metrics_by_name.setdefault(row.name, row)
+                metric_cache[section.id] = (metrics_by_name, metric_rows, metric_index)
+            metrics_by_name, metric_rows, metric_index = metric_cache[section.id]
+            
             # Check exact match
             normalized_metric_name = metric_name.lower().replace(" ", "_")
-            from app.models.health_record import HealthRecordMetric
-            exact_match = db.query(HealthRecordMetric).filter(
-                and_(
-                    HealthRecordMetric.section_id == section.id,
-                    HealthRecordMetric.name == normalized_metric_name
-                )
-            ).first()
+            exact_match = metrics_by_name.get(normalized_metric_name)
             
             if exact_match:
                 result["metrics"].append({
@@ -626,7 +749,7 @@ class MetricSimilarityService:
                 })
             else:
                 # Check for similar metrics
-                similar = self.find_similar_metrics(section.id, metric_name, db)
+                similar = self._similar_rows(metric_name, metric_rows, metric_index, self.metric_similarity_threshold)
                 
                 if similar and similar[0]["similarity_score"] >= 0.90:
                     # Very similar - treat as existing
@@ -661,35 +784,22 @@ class MetricSimilarityService:
         
         return result
     
-    def _cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
-        """Calculate cosine similarity between two vectors"""
-        try:
-            vec1_array = np.array(vec1)
-            vec2_array = np.array(vec2)
-            
-            dot_product = np.dot(vec1_array, vec2_array)
-            norm1 = np.linalg.norm(vec1_array)
-            norm2 = np.linalg.norm(vec2_array)
-            
-            if norm1 == 0 or norm2 == 0:
-                return 0.0
-            
-            return float(dot_product / (norm1 * norm2))
-        except Exception as e:
-            logger.error(f"Error calculating cosine similarity: {e}")
-            return 0.0
-    
     async def calculate_similarity_openai_batch(
         self,
         parsed_names: List[str],
-        existing_metrics_data: List[Dict[str, Any]]
+        existing_metrics_data: List[Dict[str, Any]],
+        db: Optional[Session] = None
     ) -> List[Dict[str, Any]]:
         """
-        Calculate similarity between parsed and existing metric names using OpenAI embeddings.
+        Calculate similarity between parsed and existing metric names using embeddings.
+        
+        Existing names are served from the persistent embedding index, so normally only
+        parsed names that were never seen before are sent to the embedding provider.
         
         Args:
             parsed_names: List of metric names from document analysis
             existing_metrics_data: List of dicts with keys: 'name', 'display_name', 'id', etc.
+            db: Database session used to load and store embeddings (in-memory only if omitted)
         
         Returns:
             List of dicts with similarity results for each parsed name
@@ -697,17 +807,20 @@ class MetricSimilarityService:
         if not parsed_names or not existing_metrics_data:
             return []
         
-        # Fallback to difflib if OpenAI not available
-        if not self.openai_client:
+        # Fallback to difflib if no embedding provider is available
+        if not self.embedding_index.provider:
             logger.warning("OpenAI not available, using difflib fallback for similarity")
             return self._calculate_similarity_fallback(parsed_names, existing_metrics_data)
         
         try:
-            # Extract existing names
-            existing_names = [metric.get('display_name') or metric.get('name', '') for metric in existing_metrics_data]
-            existing_names = [name for name in existing_names if name]  # Filter empty names
-            
-            if not existing_names:
+            # Keep metrics aligned with their names when filtering out empty ones
+            existing_candidates = [
+                (metric, metric.get('display_name') or metric.get('name', ''))
+                for metric in existing_metrics_data
+            ]
+            existing_candidates = [(metric, name) for metric, name in existing_candidates if name]
+            
+            if not existing_candidates:
                 # No existing metrics, return all as new
                 return [
                     {
@@ -719,42 +832,26 @@ class MetricSimilarityService:
                     for name in parsed_names
                 ]
             
-            # Combine all names for batch embedding
-            all_names = parsed_names + existing_names
-            
-            logger.info(f"Calculating OpenAI embeddings for {len(all_names)} metric names")
-            
-            # Get embeddings in batch
-            response = self.openai_client.embeddings.create(
-                model="text-embedding-3-small",
-                input=all_names
+            # One normalised matrix for all names: rows are unit vectors, so a dot product is the cosine similarity
+            embeddings = self.embedding_index.embed(
+                parsed_names + [name for _, name in existing_candidates],
+                db=db
             )
+            scores = embeddings[:len(parsed_names)] @ embeddings[len(parsed_names):].T
+            best_indices = scores.argmax(axis=1)
             
-            # Extract embeddings
-            embeddings = [item.embedding for item in response.data]
-            parsed_embeddings = embeddings[:len(parsed_names)]
-            existing_embeddings = embeddings[len(parsed_names):]
-            
-            # Calculate similarities
             results = []
             for i, parsed_name in enumerate(parsed_names):
+                best_similarity = float(scores[i, best_indices[i]])
                 best_match = None
-                best_similarity = 0.0
-                
-                for j, existing_metric in enumerate(existing_metrics_data):
-                    similarity = self._cosine_similarity(
-                        parsed_embeddings[i],
-                        existing_embeddings[j]
-                    )
-                    
-                    if similarity > best_similarity:
-                        best_similarity = similarity
-                        best_match = {
-                            "existing_name": existing_metric.get('name', ''),
-                            "display_name": existing_metric.get('display_name') or existing_metric.get('name', ''),
-                            "metric_id": existing_metric.get('id'),
-                            "similarity_score": similarity
-                        }
+                if best_similarity > 0.0:
+                    existing_metric, existing_name = existing_candidates[best_indices[i]]
+                    best_match = {
+                        "existing_name": existing_metric.get('name', ''),
+                        "display_name": existing_name,
+                        "metric_id": existing_metric.get('id'),
+                        "similarity_score": best_similarity
+                    }
                 
                 # Determine suggested name and toggle availability
                 if best_match and best_match["similarity_score"] >= self.openai_similarity_threshold:
@@ -773,7 +870,7 @@ class MetricSimilarityService:
                     "can_toggle": can_toggle
                 })
             
-            logger.info(f"OpenAI similarity calculation completed for {len(results)} metrics")
+            logger.info(f"Embedding similarity calculation completed for {len(results)} metrics")
             return results
             
         except Exception as e:
@@ -787,28 +884,34 @@ class MetricSimilarityService:
         parsed_names: List[str],
         existing_metrics_data: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]]:
-        """Fallback similarity calculation using difflib"""
+        """Fallback similarity calculation using difflib, scored only against trigram candidates"""
+        existing_candidates = [
+            (metric, metric.get('display_name') or metric.get('name', ''))
+            for metric in existing_metrics_data
+        ]
+        existing_candidates = [(metric, name) for metric, name in existing_candidates if name]
+        
+        # The ids identify the user's metrics plus the template set, so the index is reused across checks
+        index = self._get_candidate_index(
+            ("existing_metrics", tuple(metric.get('id') for metric, _ in existing_candidates)),
+            tuple(self._normalize_name(name) for _, name in existing_candidates)
+        )
+        
         results = []
         
         for parsed_name in parsed_names:
             best_match = None
-            best_similarity = 0.0
             
-            for existing_metric in existing_metrics_data:
-                existing_name = existing_metric.get('display_name') or existing_metric.get('name', '')
-                if not existing_name:
-                    continue
-                
-                similarity = self._calculate_similarity(parsed_name, existing_name)
-                
-                if similarity > best_similarity:
-                    best_similarity = similarity
-                    best_match = {
-                        "existing_name": existing_metric.get('name', ''),
-                        "display_name": existing_name,
-                        "metric_id": existing_metric.get('id'),
-                        "similarity_score": similarity
-                    }
+            ranked = self._rank_candidates(parsed_name, index)
+            if ranked:
+                position, similarity = ranked[0]
+                existing_metric, existing_name = existing_candidates[position]
+                best_match = {
+                    "existing_name": existing_metric.get('name', ''),
+                    "display_name": existing_name,
+                    "metric_id": existing_metric.get('id'),
+                    "similarity_score": similarity
+                }
             
             # Determine suggested name
             if best_match and best_match["similarity_score"] >= self.openai_similarity_threshold:
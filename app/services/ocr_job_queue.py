@@ -0,0 +1,373 @@
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.ocr_job import OCRJob, OCRJobStatus
+
+logger = logging.getLogger(__name__)
+
+
+class OCRJobQueue:
+    """Durable lab document OCR jobs, backed by the ocr_jobs table"""
+
+    @staticmethod
+    def enqueue(
+        db: Session,
+        user_id: int,
+        file_content: bytes,
+        file_name: str,
+        s3_url: Optional[str] = None,
+        form_data: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Store a PDF for OCR. Returns the job id."""
+        job = OCRJob(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            file_name=file_name,
+            file_content=file_content,
+            s3_url=s3_url,
+            form_data=form_data,
+            status=OCRJobStatus.QUEUED.value,
+            message="Waiting for an OCR worker",
+            pages_done=0,
+            attempts=0
+        )
+        db.add(job)
+        db.commit()
+        return job.id
+
+    @staticmethod
+    def get_for_user(db: Session, job_id: str, user_id: int) -> Optional[OCRJob]:
+        """A job, only if it belongs to the user"""
+        return db.query(OCRJob).filter(OCRJob.id == job_id, OCRJob.user_id == user_id).first()
+
+    @staticmethod
+    def claim(db: Session, worker_name: str) -> Optional[OCRJob]:
+        """
+        Claim the oldest queued job.
+        FOR UPDATE SKIP LOCKED lets any number of workers (threads or processes) poll concurrently.
+        """
+        job = db.query(OCRJob).filter(
+            OCRJob.status == OCRJobStatus.QUEUED.value
+        ).order_by(
+            OCRJob.created_at.asc()
+        ).with_for_update(skip_locked=True).first()
+
+        if not job:
+            db.rollback()
+            return None
+
+        now = datetime.now(timezone.utc)
+        job.status = OCRJobStatus.PROCESSING.value
+        job.message = "OCR extraction in progress"
+        job.attempts = (job.attempts or 0) + 1
+        job.started_at = now
+        job.locked_at = now
+        job.locked_by = worker_name
+        db.commit()
+        db.refresh(job)
+        return job
+
+    @staticmethod
+    def update_progress(db: Session, job_id: str, pages_done: int, pages_total: int) -> None:
+        """Record page progress; also refreshes the claim so long documents aren't requeued as stale"""
+        db.query(OCRJob).filter(OCRJob.id == job_id).update({
+            OCRJob.pages_done: pages_done,
+            OCRJob.pages_total: pages_total,
+            OCRJob.locked_at: datetime.now(timezone.utc)
+        }, synchronize_session=False)
+        db.commit()
+
+    @staticmethod
+    def mark_completed(db: Session, job_id: str, lab_data: List[Dict[str, Any]]) -> None:
+        """Store the result and drop the uploaded file"""
+        now = datetime.now(timezone.utc)
+        db.query(OCRJob).filter(OCRJob.id == job_id).update({
+            OCRJob.status: OCRJobStatus.COMPLETED.value,
+            OCRJob.message: "OCR extraction completed successfully",
+            OCRJob.result: {"lab_data": lab_data},
+            OCRJob.error: None,
+            OCRJob.file_content: None,
+            OCRJob.finished_at: now,
+            OCRJob.expires_at: now + timedelta(hours=settings.OCR_JOB_RETENTION_HOURS),
+            OCRJob.locked_at: None,
+            OCRJob.locked_by: None
+        }, synchronize_session=False)
+        db.commit()
+
+    @staticmethod
+    def mark_failed(db: Session, job_id: str, error: str) -> str:
+        """
+        Record a failed attempt. Requeues the job, or fails it for good after
+        OCR_JOB_MAX_ATTEMPTS. Returns the new status.
+        """
+        job = db.query(OCRJob).filter(OCRJob.id == job_id).first()
+        if not job:
+            return OCRJobStatus.FAILED.value
+
+        job.error = error[:5000] if error else None
+        job.locked_at = None
+        job.locked_by = None
+
+        if (job.attempts or 0) >= settings.OCR_JOB_MAX_ATTEMPTS:
+            now = datetime.now(timezone.utc)
+            job.status = OCRJobStatus.FAILED.value
+            job.message = f"OCR extraction failed: {error}"
+            job.file_content = None
+            job.finished_at = now
+            job.expires_at = now + timedelta(hours=settings.OCR_JOB_RETENTION_HOURS)
+        else:
+            job.status = OCRJobStatus.QUEUED.value
+            job.message = "OCR extraction failed, retrying"
+
+        db.commit()
+        return job.status
+
+    @staticmethod
+    def requeue_stale(db: Session, lock_timeout_seconds: int) -> int:
+        """Return jobs whose worker died mid-processing (e.g. restart) to the queue"""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=lock_timeout_seconds)
+        stale = db.query(OCRJob).filter(
+            OCRJob.status == OCRJobStatus.PROCESSING.value,
+            OCRJob.locked_at < cutoff
+        ).with_for_update(skip_locked=True).all()
+        for job in stale:
+            job.locked_at = None
+            job.locked_by = None
+            if (job.attempts or 0) >= settings.OCR_JOB_MAX_ATTEMPTS:
+                now = datetime.now(timezone.utc)
+                job.status = OCRJobStatus.FAILED.value
+                job.message = "OCR extraction failed: worker stopped responding"
+                job.error = "Worker stopped responding"
+                job.file_content = None
+                job.finished_at = now
+                job.expires_at = now + timedelta(hours=settings.OCR_JOB_RETENTION_HOURS)
+            else:
+                job.status = OCRJobStatus.QUEUED.value
+                job.message = "Waiting for an OCR worker"
+        db.commit()
+        return len(stale)
+
+    @staticmethod
+    def purge_expired(db: Session) -> int:
+        """Delete finished jobs past their expiry"""
+        count = db.query(OCRJob).filter(
+            OCRJob.expires_at < func.now()
+        ).delete(synchronize_session=False)
+        db.commit()
+        return count
+
+    @staticmethod
+    def to_status(job: OCRJob) -> Dict[str, Any]:
+        """Status payload served by the ocr-status endpoint"""
+        if job.status == OCRJobStatus.COMPLETED.value:
+            progress = 100
+        elif job.pages_total:
+            # Parsing still follows the last page
+            progress = min(int(job.pages_done * 100 / job.pages_total), 99)
+        else:
+            progress = 0
+
+        response = {
+            "job_id": job.id,
+            "status": job.status,
+            "message": job.message,
+            "progress": progress,
+            "pages_done": job.pages_done,
+            "pages_total": job.pages_total,
+            "attempts": job.attempts,
+            "form_data": job.form_data,
+            "s3_url": job.s3_url,
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "started_at": job.started_at.isoformat() if job.started_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+            "duration_seconds": (
+                (job.finished_at - job.started_at).total_seconds()
+                if job.started_at and job.finished_at else None
+            )
+        }
+        if job.status == OCRJobStatus.COMPLETED.value:
+            lab_data = (job.result or {}).get("lab_data", [])
+            response.update({
+                "lab_data": lab_data,
+                "extracted_records_count": len(lab_data),
+                "ocr_used": True
+            })
+        elif job.status == OCRJobStatus.FAILED.value:
+            response["error"] = job.error
+        return response
+
+
+def process_lab_ocr_job(db: Session, job: OCRJob) -> List[Dict[str, Any]]:
+    """OCR worker handler: extract lab data from the job's PDF, reporting page progress on the row"""
+    from app.services.ocr_lab_extractor import extract_lab_data_with_ocr
+    from app.services.lab_document_analysis_service import LabDocumentAnalysisService
+
+    job_id = job.id
+
+    def report_progress(pages_done: int, pages_total: int) -> None:
+        try:
+            OCRJobQueue.update_progress(db, job_id, pages_done, pages_total)
+        except Exception as e:
+            # Progress is best effort; never fail the OCR over it
+            logger.warning(f"Failed to record progress for OCR job {job_id}: {e}")
+            db.rollback()
+
+    lab_data = extract_lab_data_with_ocr(
+        job.file_content, job.file_name, progress_callback=report_progress, raise_on_error=True
+    )
+
+    # Parse reference ranges
+    lab_service = LabDocumentAnalysisService()
+    for item in lab_data:
+        if 'reference' in item or 'reference_range' in item:
+            original_reference = item.get('reference') or item.get('reference_range', '')
+            if original_reference:
+                parsed_range = lab_service._parse_simple_range(original_reference)
+                item['reference_range_parsed'] = {
+                    'min': parsed_range.get('min'),
+                    'max': parsed_range.get('max'),
+                    'original': original_reference
+                }
+    return lab_data
+
+
+class OCRJobWorkerPool:
+    """
+    Pool of local OCR worker threads draining the ocr_jobs table.
+
+    Each worker claims one job at a time and hands it to `handler(db, job)`, which returns
+    the extracted lab data; an exception requeues the job until OCR_JOB_MAX_ATTEMPTS.
+    Page-level parallelism comes from ocr_page_engine, so one or two workers per process
+    is enough. Several app processes and run_ocr_worker.py can each run a pool against
+    the same table; claims never overlap.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Session, OCRJob], List[Dict[str, Any]]],
+        worker_count: int = 1,
+        poll_interval: float = 2.0,
+        lock_timeout_seconds: int = 900
+    ):
+        self.handler = handler
+        self.worker_count = max(worker_count, 0)
+        self.poll_interval = poll_interval
+        self.lock_timeout_seconds = lock_timeout_seconds
+        self._threads: List[threading.Thread] = []
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._maintenance_lock = threading.Lock()
+        self._last_maintenance = 0.0
+        self._name_prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+    @property
+    def is_running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    def start(self) -> None:
+        """Start the worker threads (no-op if already running or worker_count is 0)"""
+        if self.is_running or self.worker_count == 0:
+            return
+
+        self._stop_event.clear()
+        self._threads = [
+            threading.Thread(
+                target=self._run,
+                args=(f"{self._name_prefix}:{i}",),
+                name=f"ocr-job-{i}",
+                daemon=True
+            )
+            for i in range(self.worker_count)
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Started {self.worker_count} OCR job workers")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Signal workers to stop; a job still running is requeued once its claim goes stale"""
+        self._stop_event.set()
+        self._wake_event.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+        logger.info("Stopped OCR job workers")
+
+    def wake(self) -> None:
+        """Nudge idle workers after a local enqueue so they don't wait for the next poll"""
+        self._wake_event.set()
+
+    def _run(self, worker_name: str) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self._maybe_run_maintenance()
+                processed = self.process_next(worker_name)
+            except Exception as e:
+                logger.error(f"OCR job worker {worker_name} error: {e}", exc_info=True)
+                processed = False
+
+            if not processed:
+                self._wake_event.wait(self.poll_interval)
+                self._wake_event.clear()
+
+    def process_next(self, worker_name: str) -> bool:
+        """Claim and process a single job. Returns False if the queue was empty."""
+        db = SessionLocal()
+        try:
+            job = OCRJobQueue.claim(db, worker_name)
+            if not job:
+                return False
+
+            job_id = job.id
+            attempt = job.attempts
+            start_time = time.time()
+            try:
+                lab_data = self.handler(db, job)
+                OCRJobQueue.mark_completed(db, job_id, lab_data)
+                logger.info(f"OCR job {job_id} completed by {worker_name} in {time.time() - start_time:.3f}s: {len(lab_data)} records")
+            except Exception as e:
+                db.rollback()
+                status = OCRJobQueue.mark_failed(db, job_id, str(e))
+                logger.error(f"OCR job {job_id} failed (attempt {attempt}, now {status}): {e}", exc_info=True)
+            return True
+        finally:
+            db.close()
+
+    def _maybe_run_maintenance(self) -> None:
+        """Requeue stale claims and purge expired jobs, at most every few minutes per process"""
+        now = time.time()
+        if now - self._last_maintenance < min(self.lock_timeout_seconds, 300):
+            return
+        if not self._maintenance_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_maintenance = now
+            db = SessionLocal()
+            try:
+                requeued = OCRJobQueue.requeue_stale(db, self.lock_timeout_seconds)
+                purged = OCRJobQueue.purge_expired(db)
+                if requeued or purged:
+                    logger.info(f"OCR job maintenance: requeued {requeued} stale, purged {purged} expired")
+            finally:
+                db.close()
+        finally:
+            self._maintenance_lock.release()
+
+
+# Global instance; local OCR workers started/stopped from app.main
+ocr_job_worker_pool = OCRJobWorkerPool(
+    handler=process_lab_ocr_job,
+    worker_count=settings.OCR_JOB_WORKERS,
+    poll_interval=settings.OCR_JOB_POLL_INTERVAL_SECONDS,
+    lock_timeout_seconds=settings.OCR_JOB_LOCK_TIMEOUT_SECONDS
+)
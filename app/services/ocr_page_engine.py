@@ -0,0 +1,156 @@
+"""
+Page-parallel OCR for PDFs.
+
+Pages are split out of the source PDF as single-page documents in the parent process
+(cheap - nothing is rasterised there) and fanned out to a bounded process pool. Each worker
+renders its page with PyMuPDF straight from memory, OCRs it with Tesseract and returns only
+the text, so at most one rasterised page per worker is alive at any time.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+import pytesseract
+from PIL import Image
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _init_ocr_worker() -> None:
+    # Parallelism comes from the pool; keep each Tesseract process single-threaded
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+
+def ocr_page_pdf(page_pdf: bytes, dpi: int, lang: str, config: str, tesseract_cmd: Optional[str] = None) -> str:
+    """Render the only page of a single-page PDF and OCR it (runs inside pool workers)"""
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+
+    with fitz.open(stream=page_pdf, filetype="pdf") as doc:
+        mat = fitz.Matrix(dpi / 72.0, dpi / 72.0)
+        pix = doc.load_page(0).get_pixmap(matrix=mat, alpha=False)
+    img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+    del pix
+
+    text = pytesseract.image_to_string(img, lang=lang, config=config)
+    return (text or "").replace("\r\n", "\n")
+
+
+def split_pdf_pages(pdf_bytes: bytes, pages: List[int]) -> Iterator[Tuple[int, bytes]]:
+    """Yield (page_number, single-page PDF bytes) for the given 1-based page numbers"""
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        for page_no in pages:
+            single = fitz.open()
+            try:
+                single.insert_pdf(doc, from_page=page_no - 1, to_page=page_no - 1)
+                yield page_no, single.tobytes()
+            finally:
+                single.close()
+
+
+class OCRPageEngine:
+    """
+    Bounded, lazily started process pool for page-level OCR.
+
+    At most 2 x workers pages are in flight (split but not yet OCR'd), so memory stays flat
+    for long documents. With a single worker, or if the pool breaks, pages are OCR'd
+    in-process instead.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or settings.OCR_MAX_WORKERS or os.cpu_count() or 1
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: the API process runs threads, which don't mix well with fork
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_ocr_worker
+                )
+                logger.info(f"Started OCR process pool with {self.max_workers} workers")
+            return self._executor
+
+    def _discard_executor(self, executor: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def ocr_pages(
+        self,
+        pdf_bytes: bytes,
+        pages: List[int],
+        dpi: int,
+        lang: str,
+        config: str
+    ) -> Iterator[Tuple[int, str]]:
+        """
+        OCR the given 1-based pages of a PDF. Yields (page_number, text) as pages finish,
+        not necessarily in page order.
+        """
+        if not pages:
+            return
+        tesseract_cmd = pytesseract.pytesseract.tesseract_cmd
+        page_iter = split_pdf_pages(pdf_bytes, pages)
+
+        if self.max_workers <= 1 or len(pages) == 1:
+            for page_no, page_pdf in page_iter:
+                yield page_no, ocr_page_pdf(page_pdf, dpi, lang, config, tesseract_cmd)
+            return
+
+        executor = self._get_executor()
+        in_flight: Dict[Future, Tuple[int, bytes]] = {}
+        try:
+            for page_no, page_pdf in page_iter:
+                while len(in_flight) >= self.max_workers * 2:
+                    yield from self._collect(in_flight)
+                in_flight[executor.submit(ocr_page_pdf, page_pdf, dpi, lang, config, tesseract_cmd)] = (page_no, page_pdf)
+            while in_flight:
+                yield from self._collect(in_flight)
+        except BrokenProcessPool:
+            logger.warning("OCR process pool broke, finishing the document in-process")
+            self._discard_executor(executor)
+            pending = sorted(in_flight.values())
+            in_flight.clear()
+            for page_no, page_pdf in pending:
+                yield page_no, ocr_page_pdf(page_pdf, dpi, lang, config, tesseract_cmd)
+            for page_no, page_pdf in page_iter:
+                yield page_no, ocr_page_pdf(page_pdf, dpi, lang, config, tesseract_cmd)
+        finally:
+            for future in in_flight:
+                future.cancel()
+            page_iter.close()
+
+    @staticmethod
+    def _collect(in_flight: Dict[Future, Tuple[int, bytes]]) -> Iterator[Tuple[int, str]]:
+        done, _ = wait(list(in_flight), timeout=settings.OCR_PAGE_TIMEOUT_SECONDS, return_when=FIRST_COMPLETED)
+        if not done:
+            raise TimeoutError(f"No OCR page finished within {settings.OCR_PAGE_TIMEOUT_SECONDS}s")
+        for future in done:
+            page_no, _ = in_flight[future]
+            # The entry stays until result() succeeds so pages lost with a broken pool are redone in-process
+            text = future.result()
+            del in_flight[future]
+            yield page_no, text
+
+
+# Global instance
+ocr_page_engine = OCRPageEngine()
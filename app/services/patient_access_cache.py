@@ -0,0 +1,143 @@
+"""
+Caches behind check_patient_access (app/core/patient_access.py).
+
+- Compiled shared access: a patient's user_shared_access row (health_professionals and
+  family_friends contact lists) compiled into a map of lower-cased contact email -> permission
+  flags of that patient's active contacts, so checking a viewer is a dictionary lookup.
+- Decisions: (patient_id, viewer_id, permission_type) -> (has_access, reason).
+
+Both expire after PATIENT_ACCESS_CACHE_TTL_SECONDS. A patient's entries are dropped when
+update_user_shared_access writes their row and when their health_record_permissions rows
+change through the ORM (listeners below).
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.core.ttl_cache import TTLCache
+from app.models.permissions import HealthRecordPermission
+
+logger = logging.getLogger(__name__)
+
+CONTACT_LISTS = ("health_professionals", "family_friends")
+PERMISSION_ACTIONS = ("view", "download", "edit", "share")
+
+DecisionKey = Tuple[int, int, str]
+Decision = Tuple[bool, Optional[str]]
+
+
+class SharedAccessGrants:
+    """One patient's user_shared_access row, indexed by contact email"""
+
+    def __init__(self, record: Optional[Dict[str, Any]]):
+        # email -> [(contact list, {"<area>_<action>": flag, ...}), ...] for active contacts
+        self.active: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}
+        self.inactive: Set[str] = set()
+        for source in CONTACT_LISTS:
+            contacts = (record or {}).get(source) or []
+            if not isinstance(contacts, list):
+                continue
+            for contact in contacts:
+                if not isinstance(contact, dict):
+                    continue
+                email = contact.get("profile_email") or contact.get("email")
+                if not email:
+                    continue
+                email = email.lower()
+                if not contact.get("is_active", True):
+                    self.inactive.add(email)
+                    continue
+                flags = {
+                    key: value for key, value in contact.items()
+                    if key.rsplit("_", 1)[-1] in PERMISSION_ACTIONS
+                }
+                self.active.setdefault(email, []).append((source, flags))
+
+    def contacts_for(self, email: str) -> List[Tuple[str, Dict[str, Any]]]:
+        return self.active.get(email.lower(), [])
+
+    def is_inactive_contact(self, email: str) -> bool:
+        return email.lower() in self.inactive
+
+
+class PatientAccessCache:
+    """Bounded caches (see TTLCache) of compiled shared access and access decisions"""
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        max_entries = settings.PATIENT_ACCESS_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        ttl_seconds = settings.PATIENT_ACCESS_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        # Keyed by Supabase UID (as update_user_shared_access invalidates), holding the internal
+        # patient id next to the grants so decisions about the patient can be found from it
+        self._grants: "TTLCache[str, Tuple[int, SharedAccessGrants]]" = TTLCache(
+            max_entries, ttl_seconds, on_evict=self._drop_grants
+        )
+        self._decisions: "TTLCache[DecisionKey, Decision]" = TTLCache(
+            max_entries, ttl_seconds, on_evict=self._unindex_decision
+        )
+        self._decisions_by_patient: Dict[int, Set[DecisionKey]] = {}
+
+    def get_grants(self, patient_supabase_id: str) -> Optional[SharedAccessGrants]:
+        entry = self._grants.get(patient_supabase_id)
+        return entry[1] if entry is not None else None
+
+    def put_grants(self, patient_id: int, patient_supabase_id: str, grants: SharedAccessGrants) -> None:
+        self._grants.put(patient_supabase_id, (patient_id, grants))
+
+    def get_decision(self, patient_id: int, viewer_id: int, permission_type: str) -> Optional[Decision]:
+        return self._decisions.get((patient_id, viewer_id, permission_type))
+
+    def put_decision(self, patient_id: int, viewer_id: int, permission_type: str, decision: Decision) -> None:
+        if self._decisions.max_entries <= 0:
+            return
+        key = (patient_id, viewer_id, permission_type)
+        with self._decisions.lock:
+            self._decisions.put(key, decision)
+            self._decisions_by_patient.setdefault(patient_id, set()).add(key)
+
+    def invalidate_patient(self, patient_id: Optional[int] = None, patient_supabase_id: Optional[str] = None) -> None:
+        """Drop a patient's compiled shared access and every cached decision about them"""
+        # Always grants before decisions, the order _drop_grants nests them in
+        with self._grants.lock, self._decisions.lock:
+            if patient_supabase_id is not None:
+                # Also drops the decisions of the patient the grants belong to
+                self._grants.pop(patient_supabase_id)
+            if patient_id is not None:
+                self._drop_decisions(patient_id)
+
+    def clear(self) -> None:
+        with self._grants.lock, self._decisions.lock:
+            self._grants.clear()
+            self._decisions.clear()
+            self._decisions_by_patient.clear()
+
+    def _drop_grants(self, patient_supabase_id: str, entry: Tuple[int, SharedAccessGrants]) -> None:
+        # Cached decisions were all derived from the patient's grants; dropping them together
+        # means a shared-access change can always reach them through the Supabase UID
+        self._drop_decisions(entry[0])
+
+    def _drop_decisions(self, patient_id: int) -> None:
+        with self._decisions.lock:
+            for key in list(self._decisions_by_patient.get(patient_id, ())):
+                self._decisions.pop(key)
+
+    def _unindex_decision(self, key: DecisionKey, decision: Decision) -> None:
+        keys = self._decisions_by_patient.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._decisions_by_patient[key[0]]
+
+
+# Global instance
+patient_access_cache = PatientAccessCache()
+
+
+def _invalidate_on_permission_change(mapper, connection, target):
+    patient_access_cache.invalidate_patient(patient_id=target.patient_id)
+
+
+for _event in ("after_insert", "after_update", "after_delete"):
+    event.listen(HealthRecordPermission, _event, _invalidate_on_permission_change)
@@ -0,0 +1,230 @@
+"""
+Two-tier cache of Supabase user profiles (SupabaseService.get_user_profile).
+
+Tier 1 is a bounded per-process LRU. Tier 2 is optional and shared by every worker process
+(Redis at REDIS_URL when PROFILE_CACHE_SHARED is on), so a profile fetched by one worker is a
+hit for the others. Entries are fresh for PROFILE_CACHE_TTL_SECONDS; for a further
+PROFILE_CACHE_STALE_SECONDS they are still served while one background refresh runs. Concurrent
+misses for the same user share a single in-flight fetch.
+
+Profile writes go through set()/invalidate(), which update both tiers; other processes may keep
+serving their local copy until it stops being fresh.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ProfileFetcher = Callable[[str], Awaitable[Optional[Dict[str, Any]]]]
+
+# Shared-tier operations give up quickly; after an error the tier is skipped for a while
+SHARED_TIMEOUT_SECONDS = 0.5
+SHARED_RETRY_AFTER_SECONDS = 30
+
+
+class InMemoryProfileStore:
+    """Shared-tier stand-in with the RedisProfileStore interface (tests, single-process setups)"""
+
+    def __init__(self):
+        self._values: Dict[str, Tuple[str, float]] = {}
+
+    async def get(self, user_id: str) -> Optional[str]:
+        entry = self._values.get(user_id)
+        if entry is None or entry[1] < time.time():
+            self._values.pop(user_id, None)
+            return None
+        return entry[0]
+
+    async def set(self, user_id: str, value: str, ttl_seconds: int) -> None:
+        self._values[user_id] = (value, time.time() + ttl_seconds)
+
+    async def delete(self, user_id: str) -> None:
+        self._values.pop(user_id, None)
+
+
+class RedisProfileStore:
+    """Shared tier in Redis; values expire on their own once they are too stale to serve"""
+
+    KEY_PREFIX = "profile:"
+
+    def __init__(self, url: Optional[str] = None):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(
+            url or settings.REDIS_URL,
+            decode_responses=True,
+            socket_timeout=SHARED_TIMEOUT_SECONDS,
+            socket_connect_timeout=SHARED_TIMEOUT_SECONDS
+        )
+
+    async def get(self, user_id: str) -> Optional[str]:
+        return await self._redis.get(self.KEY_PREFIX + user_id)
+
+    async def set(self, user_id: str, value: str, ttl_seconds: int) -> None:
+        await self._redis.set(self.KEY_PREFIX + user_id, value, ex=ttl_seconds)
+
+    async def delete(self, user_id: str) -> None:
+        await self._redis.delete(self.KEY_PREFIX + user_id)
+
+
+class ProfileCache:
+    """Per-process LRU over an optional shared store, with request coalescing and stale-while-revalidate"""
+
+    def __init__(self, shared=None, max_entries: Optional[int] = None,
+                 ttl_seconds: Optional[int] = None, stale_seconds: Optional[int] = None):
+        self.shared = shared
+        self.max_entries = settings.PROFILE_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.ttl_seconds = settings.PROFILE_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.stale_seconds = settings.PROFILE_CACHE_STALE_SECONDS if stale_seconds is None else stale_seconds
+        # {user_id: (profile, fetched_at)} - fetched_at is wall-clock time so it means the same in every process
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._shared_retry_at = 0.0
+        # shared_hits counts the hits/stale_hits that came from the shared tier
+        self.stats = {"hits": 0, "stale_hits": 0, "shared_hits": 0, "misses": 0}
+
+    async def get_or_fetch(self, user_id: str, fetch: ProfileFetcher) -> Optional[Dict[str, Any]]:
+        """
+        Cached profile of user_id, calling fetch(user_id) on a miss. fetch returns None when the
+        profile could not be loaded; that result is returned but not cached.
+        """
+        entry = self._local_get(user_id)
+        if entry is None:
+            entry = await self._shared_get(user_id)
+            if entry is not None:
+                self._local_put(user_id, *entry)
+
+        if entry is not None:
+            profile, fetched_at = entry
+            age = time.time() - fetched_at
+            if age < self.ttl_seconds:
+                self.stats["hits"] += 1
+                return profile.copy()
+            if age < self.ttl_seconds + self.stale_seconds:
+                self.stats["stale_hits"] += 1
+                self._start_fetch(user_id, fetch)
+                return profile.copy()
+
+        self.stats["misses"] += 1
+        # shield: a caller that is cancelled must not cancel the fetch the others are waiting on
+        profile = await asyncio.shield(self._start_fetch(user_id, fetch))
+        return profile.copy() if profile is not None else None
+
+    async def set(self, user_id: str, profile: Dict[str, Any]) -> None:
+        """Store a profile just written to the database (replaces any pending fetch result)"""
+        self._inflight.pop(user_id, None)
+        await self._store(user_id, profile.copy() if profile else {})
+
+    async def invalidate(self, user_id: str) -> None:
+        self._inflight.pop(user_id, None)
+        self._entries.pop(user_id, None)
+        if self._shared_available():
+            try:
+                await asyncio.wait_for(self.shared.delete(user_id), SHARED_TIMEOUT_SECONDS)
+            except Exception as e:
+                self._shared_failed("delete", e)
+
+    def hit_rate(self) -> float:
+        served = self.stats["hits"] + self.stats["stale_hits"]
+        total = served + self.stats["misses"]
+        return served / total if total else 0.0
+
+    def _start_fetch(self, user_id: str, fetch: ProfileFetcher) -> asyncio.Task:
+        task = self._inflight.get(user_id)
+        if task is None:
+            task = asyncio.create_task(self._fetch(user_id, fetch))
+            self._inflight[user_id] = task
+        return task
+
+    async def _fetch(self, user_id: str, fetch: ProfileFetcher) -> Optional[Dict[str, Any]]:
+        task = asyncio.current_task()
+        try:
+            profile = await fetch(user_id)
+        except Exception as e:
+            logger.error(f"Profile fetch failed for {user_id}: {e}")
+            profile = None
+        # A write or invalidation while the fetch ran detaches it: its result may predate the write
+        if self._inflight.get(user_id) is task:
+            if profile is not None:
+                await self._store(user_id, profile)
+            if self._inflight.get(user_id) is task:
+                del self._inflight[user_id]
+        return profile
+
+    async def _store(self, user_id: str, profile: Dict[str, Any]) -> None:
+        fetched_at = time.time()
+        self._local_put(user_id, profile, fetched_at)
+        if self._shared_available():
+            try:
+                value = json.dumps({"profile": profile, "fetched_at": fetched_at}, default=str)
+                await asyncio.wait_for(
+                    self.shared.set(user_id, value, self.ttl_seconds + self.stale_seconds),
+                    SHARED_TIMEOUT_SECONDS
+                )
+            except Exception as e:
+                self._shared_failed("write", e)
+
+    def _local_get(self, user_id: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        if time.time() - entry[1] >= self.ttl_seconds + self.stale_seconds:
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return entry
+
+    def _local_put(self, user_id: str, profile: Dict[str, Any], fetched_at: float) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[user_id] = (profile, fetched_at)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _shared_get(self, user_id: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        if not self._shared_available():
+            return None
+        try:
+            value = await asyncio.wait_for(self.shared.get(user_id), SHARED_TIMEOUT_SECONDS)
+        except Exception as e:
+            self._shared_failed("read", e)
+            return None
+        if value is None:
+            return None
+        try:
+            data = json.loads(value)
+            entry = (data["profile"], float(data["fetched_at"]))
+        except (ValueError, KeyError, TypeError):
+            return None
+        self.stats["shared_hits"] += 1
+        return entry
+
+    def _shared_available(self) -> bool:
+        return self.shared is not None and time.monotonic() >= self._shared_retry_at
+
+    def _shared_failed(self, operation: str, error: Exception) -> None:
+        logger.warning(f"Shared profile cache {operation} failed, using local cache only for "
+                       f"{SHARED_RETRY_AFTER_SECONDS}s: {error}")
+        self._shared_retry_at = time.monotonic() + SHARED_RETRY_AFTER_SECONDS
+
+
+def _shared_store():
+    if not settings.PROFILE_CACHE_SHARED:
+        return None
+    try:
+        return RedisProfileStore()
+    except ImportError:
+        logger.warning("redis package not installed, profile cache runs without the shared tier")
+        return None
+
+
+# Global instance
+profile_cache = ProfileCache(shared=_shared_store())
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Session
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Iterable
 from app.models.thryve_data_type import ThryveDataType, ThryveDailyEpoch
 
 
@@ -52,6 +52,20 @@ class ThryveDataTypeService:
         
         return data_type.name if data_type else None
     
+    @staticmethod
+    def map_data_type_ids_simple(db: Session, data_type_ids: Iterable[int]) -> Dict[int, str]:
+        """Map many dataTypeIds to names in one query - same matching rules as map_data_type_id_simple"""
+        data_type_ids = set(data_type_ids)
+        if not data_type_ids:
+            return {}
+        
+        rows = db.query(ThryveDataType.data_type_id, ThryveDataType.name).filter(
+            ThryveDataType.data_type_id.in_(data_type_ids),
+            ThryveDataType.is_active == True
+        ).all()
+        
+        return {row.data_type_id: row.name for row in rows}
+    
     @staticmethod
     def get_all_by_category(db: Session, category: str) -> List[ThryveDataType]:
         """Get all Thryve data types by category"""
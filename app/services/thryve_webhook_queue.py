@@ -0,0 +1,323 @@
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.thryve_webhook_intake import ThryveWebhookIntake, ThryveWebhookIntakeStatus
+
+logger = logging.getLogger(__name__)
+
+
+class ThryveWebhookPermanentError(Exception):
+    """Payload can never be processed (corrupt body, invalid JSON) - dead-letter without retrying"""
+
+
+class ThryveWebhookQueue:
+    """Durable intake queue for Thryve webhook payloads, backed by the thryve_webhook_intake table"""
+
+    @staticmethod
+    def enqueue(
+        db: Session,
+        compressed_body: bytes,
+        content_encoding: Optional[str],
+        headers: Optional[Dict[str, str]] = None
+    ) -> int:
+        """Append a raw payload to the spool. Returns the intake id."""
+        intake = ThryveWebhookIntake(
+            body=compressed_body,
+            content_encoding=content_encoding,
+            headers=headers or {},
+            status=ThryveWebhookIntakeStatus.PENDING.value,
+            attempts=0
+        )
+        db.add(intake)
+        db.commit()
+        return intake.id
+
+    @staticmethod
+    def claim(db: Session, worker_name: str) -> Optional[ThryveWebhookIntake]:
+        """
+        Claim the oldest available pending payload.
+        FOR UPDATE SKIP LOCKED lets any number of workers (threads or processes) poll concurrently.
+        """
+        intake = db.query(ThryveWebhookIntake).filter(
+            ThryveWebhookIntake.status == ThryveWebhookIntakeStatus.PENDING.value,
+            ThryveWebhookIntake.available_at <= func.now()
+        ).order_by(
+            ThryveWebhookIntake.available_at.asc(),
+            ThryveWebhookIntake.id.asc()
+        ).with_for_update(skip_locked=True).first()
+
+        if not intake:
+            db.rollback()
+            return None
+
+        intake.status = ThryveWebhookIntakeStatus.PROCESSING.value
+        intake.attempts = (intake.attempts or 0) + 1
+        intake.locked_at = datetime.now(timezone.utc)
+        intake.locked_by = worker_name
+        db.commit()
+        db.refresh(intake)
+        return intake
+
+    @staticmethod
+    def mark_done(
+        db: Session,
+        intake_id: int,
+        event_type: Optional[str] = None,
+        end_user_id: Optional[str] = None
+    ) -> None:
+        """Mark a payload as stored"""
+        db.query(ThryveWebhookIntake).filter(ThryveWebhookIntake.id == intake_id).update({
+            ThryveWebhookIntake.status: ThryveWebhookIntakeStatus.DONE.value,
+            ThryveWebhookIntake.event_type: event_type,
+            ThryveWebhookIntake.end_user_id: end_user_id,
+            ThryveWebhookIntake.processed_at: datetime.now(timezone.utc),
+            ThryveWebhookIntake.last_error: None,
+            ThryveWebhookIntake.locked_at: None,
+            ThryveWebhookIntake.locked_by: None
+        }, synchronize_session=False)
+        db.commit()
+
+    @staticmethod
+    def mark_failed(db: Session, intake_id: int, error: str, permanent: bool = False) -> str:
+        """
+        Record a failed attempt. Schedules a retry with exponential backoff, or moves the
+        payload to the dead letter state after THRYVE_INGEST_MAX_ATTEMPTS (or immediately if permanent).
+        Returns the new status.
+        """
+        intake = db.query(ThryveWebhookIntake).filter(ThryveWebhookIntake.id == intake_id).first()
+        if not intake:
+            return ThryveWebhookIntakeStatus.DEAD.value
+
+        attempts = intake.attempts or 0
+        intake.last_error = error[:5000] if error else None
+        intake.locked_at = None
+        intake.locked_by = None
+
+        if permanent or attempts >= settings.THRYVE_INGEST_MAX_ATTEMPTS:
+            intake.status = ThryveWebhookIntakeStatus.DEAD.value
+            intake.processed_at = datetime.now(timezone.utc)
+        else:
+            backoff = min(
+                settings.THRYVE_INGEST_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0)),
+                settings.THRYVE_INGEST_RETRY_MAX_SECONDS
+            )
+            intake.status = ThryveWebhookIntakeStatus.PENDING.value
+            intake.available_at = datetime.now(timezone.utc) + timedelta(seconds=backoff)
+
+        db.commit()
+        return intake.status
+
+    @staticmethod
+    def requeue_stale(db: Session, lock_timeout_seconds: int) -> Tuple[int, int]:
+        """
+        Return payloads whose worker died mid-processing (e.g. restart) to the pending state.
+        A claim counts as an attempt, so payloads that keep killing their worker are
+        dead-lettered once they reach THRYVE_INGEST_MAX_ATTEMPTS instead of being reclaimed forever.
+        Returns (requeued, dead_lettered).
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=lock_timeout_seconds)
+        stale = db.query(ThryveWebhookIntake).filter(
+            ThryveWebhookIntake.status == ThryveWebhookIntakeStatus.PROCESSING.value,
+            ThryveWebhookIntake.locked_at < cutoff
+        )
+        dead = stale.filter(
+            ThryveWebhookIntake.attempts >= settings.THRYVE_INGEST_MAX_ATTEMPTS
+        ).update({
+            ThryveWebhookIntake.status: ThryveWebhookIntakeStatus.DEAD.value,
+            ThryveWebhookIntake.last_error: "Worker lost while processing (claim went stale) on the final attempt",
+            ThryveWebhookIntake.processed_at: func.now(),
+            ThryveWebhookIntake.locked_at: None,
+            ThryveWebhookIntake.locked_by: None
+        }, synchronize_session=False)
+        requeued = stale.filter(
+            ThryveWebhookIntake.attempts < settings.THRYVE_INGEST_MAX_ATTEMPTS
+        ).update({
+            ThryveWebhookIntake.status: ThryveWebhookIntakeStatus.PENDING.value,
+            ThryveWebhookIntake.available_at: func.now(),
+            ThryveWebhookIntake.locked_at: None,
+            ThryveWebhookIntake.locked_by: None
+        }, synchronize_session=False)
+        db.commit()
+        return requeued, dead
+
+    @staticmethod
+    def purge_done(db: Session, retention_hours: int) -> int:
+        """Delete successfully processed payloads older than the retention window (dead letters are kept)"""
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=retention_hours)
+        count = db.query(ThryveWebhookIntake).filter(
+            ThryveWebhookIntake.status == ThryveWebhookIntakeStatus.DONE.value,
+            ThryveWebhookIntake.processed_at < cutoff
+        ).delete(synchronize_session=False)
+        db.commit()
+        return count
+
+    @staticmethod
+    def get_stats(db: Session) -> Dict[str, int]:
+        """Count payloads per status"""
+        rows = db.query(
+            ThryveWebhookIntake.status,
+            func.count(ThryveWebhookIntake.id)
+        ).group_by(ThryveWebhookIntake.status).all()
+        stats = {status.value: 0 for status in ThryveWebhookIntakeStatus}
+        stats.update({status: count for status, count in rows})
+        return stats
+
+    @staticmethod
+    def retry_dead(db: Session, intake_ids: Optional[List[int]] = None) -> int:
+        """Move dead letters (all, or the given ids) back to pending with a fresh attempt budget"""
+        query = db.query(ThryveWebhookIntake).filter(
+            ThryveWebhookIntake.status == ThryveWebhookIntakeStatus.DEAD.value
+        )
+        if intake_ids:
+            query = query.filter(ThryveWebhookIntake.id.in_(intake_ids))
+        count = query.update({
+            ThryveWebhookIntake.status: ThryveWebhookIntakeStatus.PENDING.value,
+            ThryveWebhookIntake.attempts: 0,
+            ThryveWebhookIntake.available_at: func.now(),
+            ThryveWebhookIntake.processed_at: None
+        }, synchronize_session=False)
+        db.commit()
+        return count
+
+
+class ThryveWebhookWorkerPool:
+    """
+    Pool of local ingest worker threads draining the thryve_webhook_intake spool.
+
+    Each worker claims one payload at a time and hands it to `handler(db, intake)`, which
+    decompresses, parses and stores it and returns a dict with optional "event_type" and
+    "end_user_id". Raising ThryveWebhookPermanentError dead-letters the payload, any other
+    exception schedules a retry. Several app processes can each run a pool against the
+    same table; claims never overlap.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Session, ThryveWebhookIntake], Optional[Dict[str, Any]]],
+        worker_count: int = 2,
+        poll_interval: float = 2.0,
+        lock_timeout_seconds: int = 900,
+        retention_hours: int = 72
+    ):
+        self.handler = handler
+        self.worker_count = max(worker_count, 0)
+        self.poll_interval = poll_interval
+        self.lock_timeout_seconds = lock_timeout_seconds
+        self.retention_hours = retention_hours
+        self._threads: List[threading.Thread] = []
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._maintenance_lock = threading.Lock()
+        self._last_maintenance = 0.0
+        self._name_prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+    @property
+    def is_running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    def start(self) -> None:
+        """Start the worker threads (no-op if already running or worker_count is 0)"""
+        if self.is_running or self.worker_count == 0:
+            return
+
+        self._stop_event.clear()
+        self._threads = [
+            threading.Thread(
+                target=self._run,
+                args=(f"{self._name_prefix}:{i}",),
+                name=f"thryve-ingest-{i}",
+                daemon=True
+            )
+            for i in range(self.worker_count)
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Started {self.worker_count} Thryve ingest workers")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Signal workers to stop and wait for in-flight payloads to finish"""
+        self._stop_event.set()
+        self._wake_event.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+        logger.info("Stopped Thryve ingest workers")
+
+    def wake(self) -> None:
+        """Nudge idle workers after a local enqueue so they don't wait for the next poll"""
+        self._wake_event.set()
+
+    def _run(self, worker_name: str) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self._maybe_run_maintenance()
+                processed = self.process_next(worker_name)
+            except Exception as e:
+                logger.error(f"Thryve ingest worker {worker_name} error: {e}", exc_info=True)
+                processed = False
+
+            if not processed:
+                self._wake_event.wait(self.poll_interval)
+                self._wake_event.clear()
+
+    def process_next(self, worker_name: str) -> bool:
+        """Claim and process a single payload. Returns False if the queue was empty."""
+        db = SessionLocal()
+        try:
+            intake = ThryveWebhookQueue.claim(db, worker_name)
+            if not intake:
+                return False
+
+            intake_id = intake.id
+            attempt = intake.attempts
+            start_time = time.time()
+            try:
+                result = self.handler(db, intake) or {}
+                ThryveWebhookQueue.mark_done(
+                    db, intake_id, result.get("event_type"), result.get("end_user_id")
+                )
+                logger.info(f"✅ Intake {intake_id} processed by {worker_name} in {time.time() - start_time:.3f}s")
+            except ThryveWebhookPermanentError as e:
+                db.rollback()
+                ThryveWebhookQueue.mark_failed(db, intake_id, str(e), permanent=True)
+                logger.error(f"❌ Intake {intake_id} dead-lettered: {e}")
+            except Exception as e:
+                db.rollback()
+                status = ThryveWebhookQueue.mark_failed(db, intake_id, str(e))
+                logger.error(f"❌ Intake {intake_id} failed (attempt {attempt}, now {status}): {e}", exc_info=True)
+            return True
+        finally:
+            db.close()
+
+    def _maybe_run_maintenance(self) -> None:
+        """Requeue stale claims and purge old payloads, at most once per lock-timeout period per process"""
+        now = time.time()
+        if now - self._last_maintenance < min(self.lock_timeout_seconds, 300):
+            return
+        if not self._maintenance_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_maintenance = now
+            db = SessionLocal()
+            try:
+                requeued, dead = ThryveWebhookQueue.requeue_stale(db, self.lock_timeout_seconds)
+                purged = ThryveWebhookQueue.purge_done(db, self.retention_hours)
+                if requeued or dead or purged:
+                    logger.info(f"Thryve intake maintenance: requeued {requeued} stale, "
+                                f"dead-lettered {dead} stale at max attempts, purged {purged} done")
+                if dead:
+                    logger.error(f"❌ {dead} Thryve intake payload(s) dead-lettered after repeatedly losing their worker")
+            finally:
+                db.close()
+        finally:
+            self._maintenance_lock.release()
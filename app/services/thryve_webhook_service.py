@@ -3,8 +3,8 @@ import json
 import logging
 import hmac
 import hashlib
-from typing import Dict, Any, Optional
-from datetime import datetime
+from typing import Dict, Any, Optional, List, Set, Tuple
+from datetime import datetime, timezone
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 from app.services.thryve_data_type_service import ThryveDataTypeService
@@ -156,35 +156,23 @@ class ThryveWebhookService:
         """
         mapped_payload = payload.copy()
         
-        # Process epoch data
-        if "epochData" in str(payload):
-            for data_item in payload.get("data", []):
-                if "epochData" in data_item:
-                    for epoch_entry in data_item["epochData"]:
-                        data_type_id = epoch_entry.get("dataTypeId")
-                        if data_type_id:
-                            data_type_name = self.data_type_service.map_data_type_id_simple(
-                                self.db, data_type_id
-                            )
-                            if data_type_name:
-                                epoch_entry["dataTypeName"] = data_type_name
-                            else:
-                                logger.warning(f"Data type ID {data_type_id} not found")
+        # Resolve every dataTypeId in the payload with one query instead of one per entry
+        entries = []
+        for data_item in payload.get("data", []):
+            entries.extend(data_item.get("epochData") or [])
+            entries.extend(data_item.get("dailyData") or [])
         
-        # Process daily data
-        if "dailyData" in str(payload):
-            for data_item in payload.get("data", []):
-                if "dailyData" in data_item:
-                    for daily_entry in data_item["dailyData"]:
-                        data_type_id = daily_entry.get("dataTypeId")
-                        if data_type_id:
-                            data_type_name = self.data_type_service.map_data_type_id_simple(
-                                self.db, data_type_id
-                            )
-                            if data_type_name:
-                                daily_entry["dataTypeName"] = data_type_name
-                            else:
-                                logger.warning(f"Data type ID {data_type_id} not found")
+        data_type_ids = {entry.get("dataTypeId") for entry in entries if entry.get("dataTypeId")}
+        names_by_id = self.data_type_service.map_data_type_ids_simple(self.db, data_type_ids)
+        
+        for entry in entries:
+            data_type_id = entry.get("dataTypeId")
+            if data_type_id:
+                data_type_name = names_by_id.get(data_type_id)
+                if data_type_name:
+                    entry["dataTypeName"] = data_type_name
+                else:
+                    logger.warning(f"Data type ID {data_type_id} not found")
         
         return mapped_payload
     
@@ -239,7 +227,7 @@ class ThryveWebhookService:
         try:
             # Query Supabase user_integrations to find user_id with matching thryve_access_token
             try:
-                response = supabase_service.client.table("user_integrations").select("user_id").eq("thryve_access_token", end_user_id).execute()
+                response = await supabase_service.run_blocking(lambda: supabase_service.client.table("user_integrations").select("user_id").eq("thryve_access_token", end_user_id).execute())
                 if response.data and len(response.data) > 0:
                     supabase_user_id = response.data[0].get("user_id")
                     if supabase_user_id:
@@ -249,8 +237,9 @@ class ThryveWebhookService:
                 else:
                     user = None
             except Exception as e:
+                # Lookup failure is not "unknown user": fail so the payload is retried
                 logger.error(f"Error finding user by thryve_access_token: {e}")
-                user = None
+                raise
             
             if not user:
                 logger.warning(f"User not found for Thryve end_user_id: {end_user_id}")
@@ -265,10 +254,18 @@ class ThryveWebhookService:
             # Determine if this is an update event
             is_update_event = event_type.endswith(".update")
             
+            if settings.THRYVE_BULK_INGEST_ENABLED:
+                # Bulk mode: resolve all mappings for the payload at once, write in batches
+                created_count, updated_count, skipped_count = self.store_health_data_bulk(
+                    self.db, user.id, data_items, is_update_event, event_type
+                )
+                logger.info(f"Created {created_count}, updated {updated_count}, skipped {skipped_count} health records for user {user.id} (bulk)")
+                return
+
             created_count = 0
             updated_count = 0
             skipped_count = 0
-            
+
             for data_item in data_items:
                 # Extract data source name from payload (e.g., "Nokia", "Withings", "Fitbit")
                 data_source_name = data_item.get("dataSourceName", "Unknown")
@@ -305,6 +302,7 @@ class ThryveWebhookService:
             
         except Exception as e:
             logger.error(f"Error storing health data: {e}", exc_info=True)
+            raise  # Let the ingest worker retry the payload
     
     def _get_or_create_user_section(
         self, db: Session, user_id: int, section_template_id: int
@@ -397,7 +395,267 @@ class ThryveWebhookService:
         
         logger.info(f"Created user metric {new_metric.id} from template {metric_template_id} for user {user_id}")
         return new_metric
-    
+
+    # ------------------------------------------------------------------
+    # Bulk ingest
+    # ------------------------------------------------------------------
+
+    def _resolve_metric_templates_bulk(
+        self, db: Session, data_type_ids: Set[int]
+    ) -> Dict[int, Any]:
+        """
+        Map Thryve dataTypeIds to their active metric template in two set queries.
+        Returns {dataTypeId: HealthRecordMetricTemplate}
+        """
+        from app.models.thryve_data_type import ThryveDataType
+        from app.models.health_metrics import HealthRecordMetricTemplate
+
+        if not data_type_ids:
+            return {}
+
+        thryve_rows = db.query(ThryveDataType.id, ThryveDataType.data_type_id).filter(
+            ThryveDataType.data_type_id.in_(data_type_ids),
+            ThryveDataType.is_active == True
+        ).all()
+        thryve_pk_by_data_type_id = {row.data_type_id: row.id for row in thryve_rows}
+
+        if not thryve_pk_by_data_type_id:
+            return {}
+
+        templates = db.query(HealthRecordMetricTemplate).filter(
+            HealthRecordMetricTemplate.thryve_data_type_id.in_(thryve_pk_by_data_type_id.values()),
+            HealthRecordMetricTemplate.is_active == True
+        ).order_by(HealthRecordMetricTemplate.id.asc()).all()
+
+        # Keep the first template per Thryve data type (same as the per-record path)
+        template_by_thryve_pk = {}
+        for template in templates:
+            template_by_thryve_pk.setdefault(template.thryve_data_type_id, template)
+
+        return {
+            data_type_id: template_by_thryve_pk[thryve_pk]
+            for data_type_id, thryve_pk in thryve_pk_by_data_type_id.items()
+            if thryve_pk in template_by_thryve_pk
+        }
+
+    def _get_or_create_user_metrics_bulk(
+        self, db: Session, user_id: int, metric_templates: List[Any]
+    ) -> Dict[int, HealthRecordMetric]:
+        """
+        Get or create the user's sections and metrics for a set of metric templates.
+        Returns {metric_template_id: HealthRecordMetric}
+        """
+        from app.models.health_metrics import HealthRecordSectionTemplate
+
+        if not metric_templates:
+            return {}
+
+        section_template_ids = {t.section_template_id for t in metric_templates}
+
+        # Sections: one lookup, then create whatever is missing
+        existing_sections = db.query(HealthRecordSection).filter(
+            HealthRecordSection.section_template_id.in_(section_template_ids),
+            HealthRecordSection.created_by == user_id
+        ).order_by(HealthRecordSection.id.asc()).all()
+        sections_by_template = {}
+        for section in existing_sections:
+            sections_by_template.setdefault(section.section_template_id, section)
+
+        missing_section_template_ids = section_template_ids - set(sections_by_template)
+        if missing_section_template_ids:
+            section_templates = db.query(HealthRecordSectionTemplate).filter(
+                HealthRecordSectionTemplate.id.in_(missing_section_template_ids)
+            ).all()
+            for template in section_templates:
+                new_section = HealthRecordSection(
+                    name=template.name,
+                    display_name=template.display_name,
+                    description=template.description,
+                    source_language=template.source_language,
+                    health_record_type_id=template.health_record_type_id,
+                    section_template_id=template.id,
+                    is_default=False,  # User's active section
+                    created_by=user_id
+                )
+                db.add(new_section)
+                sections_by_template[template.id] = new_section
+            db.flush()
+            logger.info(f"Created {len(section_templates)} user sections from templates for user {user_id}")
+
+        # Metrics: one lookup, then create whatever is missing
+        metric_template_ids = {t.id for t in metric_templates}
+        existing_metrics = db.query(HealthRecordMetric).filter(
+            HealthRecordMetric.metric_tmp_id.in_(metric_template_ids),
+            HealthRecordMetric.created_by == user_id
+        ).order_by(HealthRecordMetric.id.asc()).all()
+        metrics_by_key = {}
+        for metric in existing_metrics:
+            metrics_by_key.setdefault((metric.section_id, metric.metric_tmp_id), metric)
+
+        metrics_by_template = {}
+        created_metrics = 0
+        for template in metric_templates:
+            section = sections_by_template.get(template.section_template_id)
+            if not section:
+                logger.warning(f"Section template {template.section_template_id} not found")
+                continue
+
+            metric = metrics_by_key.get((section.id, template.id))
+            if not metric:
+                metric = HealthRecordMetric(
+                    section_id=section.id,
+                    metric_tmp_id=template.id,
+                    name=template.name,
+                    display_name=template.display_name,
+                    description=template.description,
+                    default_unit=template.default_unit,
+                    source_language=template.source_language,
+                    reference_data=template.reference_data,
+                    data_type=template.data_type,
+                    is_default=False,  # User's active metric
+                    created_by=user_id
+                )
+                db.add(metric)
+                metrics_by_key[(section.id, template.id)] = metric
+                created_metrics += 1
+            metrics_by_template[template.id] = metric
+
+        if created_metrics:
+            db.flush()
+            logger.info(f"Created {created_metrics} user metrics from templates for user {user_id}")
+
+        db.commit()
+        return metrics_by_template
+
+    @staticmethod
+    def _parse_entry(entry: Dict[str, Any], data_type: str) -> Optional[Tuple[datetime, Optional[datetime], float]]:
+        """
+        Parse timestamps and value of an epoch/daily entry.
+        Returns (measure_start_time, measure_end_time, value) or None if the entry is unusable.
+        """
+        if data_type == "epoch":
+            start_timestamp_ms = entry.get("startTimestamp")
+            if not start_timestamp_ms:
+                return None
+            end_timestamp_ms = entry.get("endTimestamp")
+            measure_start_time = datetime.fromtimestamp(start_timestamp_ms / 1000.0, tz=timezone.utc)
+            measure_end_time = datetime.fromtimestamp(end_timestamp_ms / 1000.0, tz=timezone.utc) if end_timestamp_ms else None
+        else:
+            day_timestamp_ms = entry.get("day")
+            if not day_timestamp_ms:
+                return None
+            if day_timestamp_ms > 1e12:  # Likely milliseconds
+                measure_start_time = datetime.fromtimestamp(day_timestamp_ms / 1000.0, tz=timezone.utc)
+            else:  # Likely seconds
+                measure_start_time = datetime.fromtimestamp(day_timestamp_ms, tz=timezone.utc)
+            measure_end_time = None
+
+        value = entry.get("value")
+        if value is None:
+            return None
+        try:
+            value_float = float(value)
+        except (ValueError, TypeError):
+            return None
+
+        return measure_start_time, measure_end_time, value_float
+
+    def store_health_data_bulk(
+        self,
+        db: Session,
+        user_id: int,
+        data_items: List[Dict[str, Any]],
+        is_update_event: bool,
+        event_type: str
+    ) -> Tuple[int, int, int]:
+        """
+        Set-based variant of the per-entry ingest loop.
+
+        Resolves every data type / template / section / metric mapping of the payload
+        with a handful of IN queries, then upserts records in batches of
+        THRYVE_INGEST_BATCH_SIZE with one INSERT ... ON CONFLICT per batch against
+        uq_health_records_natural_key. Create and update events behave the same: a
+        re-delivered measurement overwrites the stored value instead of duplicating it.
+
+        Returns (created_count, updated_count, skipped_count). A failed batch write is raised
+        after rolling back; batches already committed are upserts, so a retry of the whole
+        payload rewrites them without duplicating.
+        """
+        from app.crud.health_record import health_record_crud
+
+        # Flatten the payload into (data_type, entry, data_source_name)
+        entries = []
+        for data_item in data_items:
+            data_source_name = data_item.get("dataSourceName", "Unknown")
+            for epoch_entry in data_item.get("epochData") or []:
+                entries.append(("epoch", epoch_entry, data_source_name))
+            for daily_entry in data_item.get("dailyData") or []:
+                entries.append(("daily", daily_entry, data_source_name))
+
+        if not entries:
+            return 0, 0, 0
+
+        data_type_ids = {entry.get("dataTypeId") for _, entry, _ in entries if entry.get("dataTypeId")}
+        templates_by_data_type_id = self._resolve_metric_templates_bulk(db, data_type_ids)
+
+        # Only templates that accept at least one of the entries need a user metric
+        accepted_templates = {}
+        for data_type, entry, _ in entries:
+            template = templates_by_data_type_id.get(entry.get("dataTypeId"))
+            if template and (not template.thryve_type or template.thryve_type == data_type.capitalize()):
+                accepted_templates[template.id] = template
+        metrics_by_template = self._get_or_create_user_metrics_bulk(db, user_id, list(accepted_templates.values()))
+
+        skipped_count = 0
+        # Keyed by the natural key so repeated measurements in one payload collapse the way
+        # sequential upserts would (ON CONFLICT cannot touch the same row twice per statement)
+        rows_by_key = {}
+        repeated_keys = 0
+        for data_type, entry, data_source_name in entries:
+            template = templates_by_data_type_id.get(entry.get("dataTypeId"))
+            metric = metrics_by_template.get(template.id) if template else None
+            parsed = self._parse_entry(entry, data_type) if metric else None
+            if not parsed:
+                skipped_count += 1
+                continue
+
+            measure_start_time, measure_end_time, value_float = parsed
+            key = (metric.id, measure_start_time, data_type)
+            if key in rows_by_key:
+                repeated_keys += 1
+            rows_by_key[key] = {
+                "created_by": user_id,
+                "section_id": metric.section_id,
+                "metric_id": metric.id,
+                "value": value_float,
+                "status": "normal",  # Default status
+                "source": data_source_name,  # Use data source name instead of "thryve"
+                "measure_start_time": measure_start_time,
+                "measure_end_time": measure_end_time,
+                "data_type": data_type,
+            }
+
+        rows = list(rows_by_key.values())
+        created_count = 0
+        updated_count = repeated_keys
+        batch_size = max(settings.THRYVE_INGEST_BATCH_SIZE, 1)
+
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            try:
+                batch_created, batch_updated = health_record_crud.bulk_upsert(db, batch)
+                db.commit()
+
+                created_count += batch_created
+                updated_count += batch_updated
+
+            except Exception as e:
+                logger.error(f"Error writing health record batch ({len(batch)} rows, {event_type}): {e}", exc_info=True)
+                db.rollback()
+                raise
+
+        return created_count, updated_count, skipped_count
+
     def _create_health_record_from_epoch(
         self, db: Session, user_id: int, epoch_entry: Dict[str, Any], 
         data_source_name: str, is_update_event: bool, event_type: str
@@ -498,7 +756,8 @@ class ThryveWebhookService:
                     db, health_record_data, user_id, data_type="epoch"
                 )
             else:
-                # For create events: always create new (skip duplicate check for webhook data)
+                # For create events: skip the hour-window probe; a re-delivered measurement
+                # still lands on the natural key and overwrites instead of duplicating
                 health_record, was_created = health_record_crud.create(
                     db, health_record_data, user_id, skip_duplicate_check=True
                 )
@@ -618,7 +877,8 @@ class ThryveWebhookService:
                     db, health_record_data, user_id, data_type="daily"
                 )
             else:
-                # For create events: always create new (skip duplicate check for webhook data)
+                # For create events: skip the hour-window probe; a re-delivered measurement
+                # still lands on the natural key and overwrites instead of duplicating
                 health_record, was_created = health_record_crud.create(
                     db, health_record_data, user_id, skip_duplicate_check=True
                 )
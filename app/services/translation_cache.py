@@ -0,0 +1,107 @@
+"""
+In-process LRU cache of stored translations.
+
+Entries are keyed on (entity_type, entity_id, field_name, language, content_version) - the
+content_version the caller asked for, so a versioned entity that is edited (and gets a new
+version) simply misses. Entries are dropped for an entity when translation_crud writes or
+deletes its translations, and when a translatable text field of the source row changes (ORM
+listeners below); entries expire after TRANSLATION_CACHE_TTL_SECONDS.
+"""
+
+import logging
+from typing import Dict, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect
+
+from app.core.config import settings
+from app.core.ttl_cache import TTLCache
+from app.models.health_metrics import HealthRecordMetricTemplate, HealthRecordSectionTemplate
+from app.models.health_plans import Goal, HealthTask
+from app.models.health_record import HealthRecordMetric, HealthRecordSection
+from app.models.medication import Medication
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, int, str, str, Optional[int]]
+
+
+class TranslationCache:
+    """Bounded LRU of translated texts (see TTLCache), invalidated per entity"""
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        self._entries: "TTLCache[CacheKey, str]" = TTLCache(
+            settings.TRANSLATION_CACHE_MAX_ENTRIES if max_entries is None else max_entries,
+            settings.TRANSLATION_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds,
+            on_evict=self._unindex
+        )
+        self._by_entity: Dict[Tuple[str, int], Set[CacheKey]] = {}
+
+    def get(self, entity_type: str, entity_id: int, field_name: str, language: str,
+            content_version: Optional[int] = None) -> Optional[str]:
+        return self._entries.get((entity_type, entity_id, field_name, language, content_version))
+
+    def put(self, entity_type: str, entity_id: int, field_name: str, language: str,
+            content_version: Optional[int], translated_text: str) -> None:
+        if self._entries.max_entries <= 0:
+            return
+        key = (entity_type, entity_id, field_name, language, content_version)
+        with self._entries.lock:
+            self._entries.put(key, translated_text)
+            self._by_entity.setdefault((entity_type, entity_id), set()).add(key)
+
+    def invalidate_entity(self, entity_type: str, entity_id: int) -> None:
+        """Drop every cached field/language/version of one entity"""
+        with self._entries.lock:
+            for key in list(self._by_entity.get((entity_type, entity_id), ())):
+                self._entries.pop(key)
+
+    def clear(self) -> None:
+        with self._entries.lock:
+            self._entries.clear()
+            self._by_entity.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return self._entries.stats()
+
+    def _unindex(self, key: CacheKey, value: str) -> None:
+        keys = self._by_entity.get(key[:2])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_entity[key[:2]]
+
+
+# Global instance
+translation_cache = TranslationCache()
+
+
+# Source rows whose text fields are translated: model -> (entity_type used in translations, fields)
+TRANSLATED_MODELS = {
+    HealthRecordSection: ('health_record_sections', ('display_name', 'description')),
+    HealthRecordMetric: ('health_record_metrics', ('display_name', 'description')),
+    HealthRecordSectionTemplate: ('health_record_section_template', ('display_name', 'description')),
+    HealthRecordMetricTemplate: ('health_record_metric_template', ('display_name', 'description', 'default_unit')),
+    Goal: ('health_plan_goals', ('name',)),
+    HealthTask: ('health_plan_tasks', ('name', 'description')),
+    Medication: ('medications', ('medication_name', 'purpose', 'instructions')),
+}
+
+
+def _invalidate_on_text_change(entity_type: str, fields: Tuple[str, ...]):
+    def listener(mapper, connection, target):
+        state = inspect(target)
+        # Goal progress, task completions etc. update these rows constantly - only text edits matter
+        if any(state.attrs[field].history.has_changes() for field in fields):
+            translation_cache.invalidate_entity(entity_type, target.id)
+    return listener
+
+
+def _invalidate_on_delete(entity_type: str):
+    def listener(mapper, connection, target):
+        translation_cache.invalidate_entity(entity_type, target.id)
+    return listener
+
+
+for _model, (_entity_type, _fields) in TRANSLATED_MODELS.items():
+    event.listen(_model, "after_update", _invalidate_on_text_change(_entity_type, _fields))
+    event.listen(_model, "after_delete", _invalidate_on_delete(_entity_type))
@@ -1,11 +1,12 @@
 import os
 import json
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, NamedTuple, Tuple
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.crud.translation import translation_crud
+from app.services.translation_cache import translation_cache
 
 # Try to import OpenAI, fallback if not available
 try:
@@ -18,6 +19,22 @@ except ImportError:
 logger = logging.getLogger(__name__)
 
 
+class TranslationRequest(NamedTuple):
+    """One field of one entity to translate (the arguments of get_translated_content)"""
+    entity_type: str
+    entity_id: int
+    field_name: str
+    original_text: str
+    target_language: str
+    source_language: str = 'en'
+    current_entry_version: Optional[int] = None
+
+    @property
+    def key(self) -> Tuple[str, int, str, str]:
+        """Lookup key, matching uq_translations_entity_field_language"""
+        return (self.entity_type, self.entity_id, self.field_name, self.target_language)
+
+
 class TranslationService:
     """Service for translating user-generated and system-generated content"""
     
@@ -178,6 +195,10 @@ class TranslationService:
         if target_language == source_language or not original_text:
             return original_text
         
+        cached = translation_cache.get(entity_type, entity_id, field_name, target_language, current_entry_version)
+        if cached is not None:
+            return cached
+        
         # Check if translation exists in database
         translation = translation_crud.get_translation(
             db, entity_type, entity_id, field_name, target_language
@@ -192,6 +213,7 @@ class TranslationService:
                 # If versions match, use cached translation
                 if stored_version is not None and stored_version == current_entry_version:
                     logger.debug(f"Using cached translation for {entity_type}:{entity_id}.{field_name} (version {current_entry_version})")
+                    translation_cache.put(entity_type, entity_id, field_name, target_language, current_entry_version, translation.translated_text)
                     return translation.translated_text
                 
                 # Versions don't match or stored_version is None - need to re-translate
@@ -201,6 +223,7 @@ class TranslationService:
                     logger.info(f"No content_version stored for {entity_type}:{entity_id}.{field_name}. Translating and storing version {current_entry_version}.")
             else:
                 # No version provided - use cached translation (backward compatibility)
+                translation_cache.put(entity_type, entity_id, field_name, target_language, None, translation.translated_text)
                 return translation.translated_text
         
         # Translation not found or version mismatch - translate on-demand
@@ -228,6 +251,7 @@ class TranslationService:
                     source_language=source_language,
                     content_version=current_entry_version
                 )
+                translation_cache.put(entity_type, entity_id, field_name, target_language, current_entry_version, translated_text)
                 logger.info(f"✅ [Translation] Cached translation for {entity_type}:{entity_id}.{field_name} ({source_language}→{target_language})")
             except Exception as cache_error:
                 logger.error(f"❌ [Translation] Failed to cache translation: {cache_error}")
@@ -239,6 +263,193 @@ class TranslationService:
             logger.error(f"❌ [Translation] Failed to translate {entity_type}:{entity_id}.{field_name} from {source_language} to {target_language}: {e}", exc_info=True)
             return original_text  # Return original on error
     
+    def translate_texts_batch(
+        self,
+        texts: List[str],
+        target_language: str,
+        source_language: str = 'en'
+    ) -> Optional[List[str]]:
+        """
+        Translate several texts with a single OpenAI call
+        
+        Args:
+            texts: Texts to translate
+            target_language: Target language code ('en', 'es', 'pt')
+            source_language: Source language code ('en', 'es', 'pt')
+        
+        Returns:
+            Translations in the same order, or None if the batch could not be translated
+            (the caller decides on a fallback)
+        """
+        if not texts:
+            return []
+        if source_language == target_language:
+            return list(texts)
+        if not self.openai_enabled:
+            logger.warning(f"⚠️ [Translation] OpenAI not available, cannot batch translate from {source_language} to {target_language}.")
+            return None
+        
+        language_names = {
+            'en': 'English',
+            'es': 'Spanish',
+            'pt': 'Portuguese'
+        }
+        source_name = language_names.get(source_language, 'English')
+        target_name = language_names.get(target_language, 'English')
+        
+        # Texts may span several lines, so they are sent as a JSON array rather than a numbered list
+        prompt = f"""Translate each string in the following JSON array from {source_name} to {target_name}.
+
+Return ONLY a JSON array of {len(texts)} strings with the translations in the same order. Format: ["translation1", "translation2", ...]
+
+{json.dumps(texts, ensure_ascii=False)}"""
+        
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "You are a professional medical translator. Translate medical and health-related content accurately while preserving medical terminology and context. Always return a valid JSON array with translations in the same order as provided. You MUST return exactly the same number of translations as items provided."
+                    },
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+                temperature=0.3,
+                max_tokens=max(2000, sum(len(text) for text in texts) + 20 * len(texts) + 500)
+            )
+            
+            translated_text = response.choices[0].message.content.strip()
+            # Remove markdown code blocks if present
+            if translated_text.startswith("```"):
+                translated_text = translated_text.split("```")[1]
+                if translated_text.startswith("json"):
+                    translated_text = translated_text[4:]
+                translated_text = translated_text.strip()
+            
+            translations = json.loads(translated_text)
+            # A misaligned answer would store translations under the wrong fields - reject it
+            if not isinstance(translations, list) or len(translations) != len(texts):
+                logger.error(f"❌ [Translation] Batch translation returned {len(translations) if isinstance(translations, list) else type(translations).__name__} items for {len(texts)} texts")
+                return None
+            
+            logger.info(f"✅ [Translation] Batch translated {len(texts)} texts from {source_language} to {target_language}")
+            return [str(t) if t else original for t, original in zip(translations, texts)]
+        
+        except Exception as e:
+            logger.error(f"❌ [Translation] Failed to batch translate {len(texts)} texts from {source_language} to {target_language}: {e}", exc_info=True)
+            return None
+    
+    def get_translated_contents(
+        self,
+        db: Session,
+        requests: List[TranslationRequest]
+    ) -> Dict[Tuple[str, int, str, str], str]:
+        """
+        Batch version of get_translated_content for every field a response needs
+        
+        Stored translations are loaded with one query; misses (or stale content_version) are
+        translated with one model call per language pair (per TRANSLATION_BATCH_MAX_ITEMS texts)
+        and written back with one bulk upsert.
+        
+        Args:
+            db: Database session
+            requests: Fields to translate
+        
+        Returns:
+            Dictionary of TranslationRequest.key -> translated text (original text on failure);
+            requests that need no translation are not included
+        """
+        pending: Dict[Tuple[str, int, str, str], TranslationRequest] = {}
+        for request in requests:
+            if request.original_text and request.target_language != request.source_language:
+                pending[request.key] = request
+        if not pending:
+            return {}
+        
+        results: Dict[Tuple[str, int, str, str], str] = {}
+        for key, request in list(pending.items()):
+            cached = translation_cache.get(*key, request.current_entry_version)
+            if cached is not None:
+                results[key] = cached
+                del pending[key]
+        if not pending:
+            return results
+        
+        stored = translation_crud.get_translations_by_keys(db, list(pending))
+        misses: Dict[Tuple[str, str], List[TranslationRequest]] = {}
+        # Filled in after the upsert below, which invalidates the entities it writes
+        to_cache: List[Tuple[TranslationRequest, str]] = []
+        for key, request in pending.items():
+            translation = stored.get(key)
+            if translation and (
+                request.current_entry_version is None
+                or translation.content_version == request.current_entry_version
+            ):
+                results[key] = translation.translated_text
+                to_cache.append((request, translation.translated_text))
+            else:
+                misses.setdefault((request.source_language, request.target_language), []).append(request)
+        
+        if not misses:
+            self._cache_results(to_cache)
+            return results
+        
+        rows = []
+        batch_size = max(settings.TRANSLATION_BATCH_MAX_ITEMS, 1)
+        for (source_language, target_language), group in misses.items():
+            # Identical texts (e.g. the same unit on many metrics) are translated once
+            texts = list(dict.fromkeys(request.original_text for request in group))
+            logger.info(f"🌐 [Translation] Translating {len(group)} fields ({len(texts)} distinct texts) from {source_language} to {target_language}")
+            translated: Dict[str, str] = {}
+            cacheable = set()
+            for start in range(0, len(texts), batch_size):
+                chunk = texts[start:start + batch_size]
+                chunk_translations = self.translate_texts_batch(chunk, target_language, source_language)
+                if chunk_translations is not None:
+                    cacheable.update(chunk)
+                else:
+                    # Fall back to one call per text so a bad batch answer doesn't lose the whole chunk;
+                    # translate_text returns the original on failure, which must not be cached
+                    chunk_translations = [self.translate_text(text, target_language, source_language) for text in chunk]
+                    cacheable.update(text for text, t in zip(chunk, chunk_translations) if t != text)
+                translated.update(zip(chunk, chunk_translations))
+            
+            for request in group:
+                translated_text = translated.get(request.original_text, request.original_text)
+                results[request.key] = translated_text
+                if request.original_text not in cacheable:
+                    continue
+                to_cache.append((request, translated_text))
+                rows.append({
+                    "entity_type": request.entity_type,
+                    "entity_id": request.entity_id,
+                    "field_name": request.field_name,
+                    "language": request.target_language,
+                    "translated_text": translated_text,
+                    "source_language": request.source_language,
+                    "content_version": request.current_entry_version
+                })
+        
+        try:
+            translation_crud.upsert_translations(db, rows)
+            if rows:
+                logger.info(f"✅ [Translation] Cached {len(rows)} translations")
+        except Exception as cache_error:
+            logger.error(f"❌ [Translation] Failed to cache translations: {cache_error}")
+            # Continue anyway - return the translated text even if caching failed
+        
+        self._cache_results(to_cache)
+        return results
+    
+    @staticmethod
+    def _cache_results(entries: List[Tuple[TranslationRequest, str]]) -> None:
+        """Keep stored/new translations in the in-process cache"""
+        for request, translated_text in entries:
+            translation_cache.put(*request.key, request.current_entry_version, translated_text)
+    
     def translate_entity_fields(
         self,
         db: Session,
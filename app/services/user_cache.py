@@ -0,0 +1,142 @@
+"""
+Short-lived cache of resolved users (get_current_user and other User lookups by id).
+
+Authenticated requests resolve the caller's Supabase UID to the local users row on every
+call. Active users are kept here as immutable UserSnapshot objects - the application columns
+endpoints read (id, supabase_user_id, email, role, is_active), detached from any session -
+so resolving them is a dictionary lookup. Entries are dropped when the row is updated or
+deleted through the ORM in this process (listeners below) and expire after
+USER_CACHE_TTL_SECONDS.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.ttl_cache import TTLCache
+from app.crud.user import get_user, get_user_by_supabase_id, get_users_by_ids
+from app.models.user import User, UserRole
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Read-only copy of a User row, safe to share between requests and threads"""
+    id: int
+    supabase_user_id: Optional[str]
+    email: str
+    role: UserRole
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            supabase_user_id=user.supabase_user_id,
+            email=user.email,
+            role=user.role,
+            is_active=user.is_active
+        )
+
+
+class UserCache:
+    """Bounded LRU of UserSnapshots (see TTLCache), addressable by Supabase UID or internal id"""
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        self._entries: "TTLCache[int, UserSnapshot]" = TTLCache(
+            settings.USER_CACHE_MAX_ENTRIES if max_entries is None else max_entries,
+            settings.USER_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds,
+            on_evict=self._unindex
+        )
+        self._by_supabase_id: Dict[str, int] = {}
+
+    def get(self, supabase_user_id: str) -> Optional[UserSnapshot]:
+        with self._entries.lock:
+            return self._entries.get(self._by_supabase_id.get(supabase_user_id))
+
+    def get_by_id(self, user_id: int) -> Optional[UserSnapshot]:
+        return self._entries.get(user_id)
+
+    def put(self, user: UserSnapshot) -> None:
+        if self._entries.max_entries <= 0 or user.id is None:
+            return
+        with self._entries.lock:
+            self._entries.put(user.id, user)
+            if user.supabase_user_id:
+                self._by_supabase_id[user.supabase_user_id] = user.id
+
+    def invalidate(self, user_id: int) -> None:
+        self._entries.pop(user_id)
+
+    def clear(self) -> None:
+        with self._entries.lock:
+            self._entries.clear()
+            self._by_supabase_id.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return self._entries.stats()
+
+    def _unindex(self, user_id: int, user: UserSnapshot) -> None:
+        if self._by_supabase_id.get(user.supabase_user_id) == user_id:
+            del self._by_supabase_id[user.supabase_user_id]
+
+
+# Global instance
+user_cache = UserCache()
+
+
+def get_user_snapshot_by_supabase_id(db: Session, supabase_user_id: str) -> Optional[UserSnapshot]:
+    """UserSnapshot for a Supabase UID, from the cache or the database (None if there is no such user)"""
+    snapshot = user_cache.get(supabase_user_id)
+    if snapshot is None:
+        db_user = get_user_by_supabase_id(db, supabase_user_id=supabase_user_id)
+        if db_user is None:
+            return None
+        snapshot = UserSnapshot.from_user(db_user)
+        if snapshot.is_active:
+            user_cache.put(snapshot)
+    return snapshot
+
+
+def get_user_snapshot(db: Session, user_id: int) -> Optional[UserSnapshot]:
+    """UserSnapshot for an internal user id, from the cache or the database (None if there is no such user)"""
+    snapshot = user_cache.get_by_id(user_id)
+    if snapshot is None:
+        db_user = get_user(db, user_id)
+        if db_user is None:
+            return None
+        snapshot = UserSnapshot.from_user(db_user)
+        if snapshot.is_active:
+            user_cache.put(snapshot)
+    return snapshot
+
+
+def get_user_snapshots(db: Session, user_ids: Iterable[int]) -> Dict[int, UserSnapshot]:
+    """UserSnapshots for many internal ids, loading the uncached ones in one query (missing users are left out)"""
+    snapshots: Dict[int, UserSnapshot] = {}
+    missing = []
+    for user_id in set(user_ids):
+        snapshot = user_cache.get_by_id(user_id)
+        if snapshot is None:
+            missing.append(user_id)
+        else:
+            snapshots[user_id] = snapshot
+    for db_user in get_users_by_ids(db, missing):
+        snapshot = UserSnapshot.from_user(db_user)
+        if snapshot.is_active:
+            user_cache.put(snapshot)
+        snapshots[snapshot.id] = snapshot
+    return snapshots
+
+
+def _invalidate_user(mapper, connection, target):
+    user_cache.invalidate(target.id)
+
+
+event.listen(User, "after_update", _invalidate_user)
+event.listen(User, "after_delete", _invalidate_user)
@@ -1,14 +1,191 @@
 """
 Helper functions for applying translations to entities
+
+Each entity type has a request builder that lists the fields to translate as
+TranslationRequests; the helpers resolve every request of a response with one
+translation_service.get_translated_contents call (one lookup query, one batched
+model call for the misses, one bulk upsert) instead of one call per field.
 """
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Callable, Tuple
 from sqlalchemy.orm import Session
-from app.services.translation_service import translation_service
+from app.services.translation_service import translation_service, TranslationRequest
 from app.utils.user_language import get_user_language_from_cache
 import logging
 
 logger = logging.getLogger(__name__)
 
+# (dict to update, key in that dict, request)
+FieldRequest = Tuple[Dict[str, Any], str, TranslationRequest]
+
+
+def _field_requests(
+    entity: Dict[str, Any],
+    entity_type: str,
+    field_names: List[str],
+    target_language: str,
+    source_language: str,
+    current_entry_version: Optional[int] = None
+) -> List[FieldRequest]:
+    """Requests for the non-empty fields of an entity dictionary"""
+    entity_id = entity.get('id')
+    if not entity_id or source_language == target_language:
+        return []
+    requests = []
+    for field_name in field_names:
+        original_text = entity.get(field_name)
+        if original_text:
+            requests.append((entity, field_name, TranslationRequest(
+                entity_type=entity_type,
+                entity_id=entity_id,
+                field_name=field_name,
+                original_text=original_text,
+                target_language=target_language,
+                source_language=source_language,
+                current_entry_version=current_entry_version
+            )))
+    return requests
+
+
+def _apply_requests(db: Session, requests: List[FieldRequest]) -> None:
+    """Resolve all requests in one batch and write the translations into their dictionaries"""
+    if not requests:
+        return
+    translated = translation_service.get_translated_contents(db, [request for _, _, request in requests])
+    for target, key, request in requests:
+        target[key] = translated.get(request.key, request.original_text)
+
+
+async def _apply_translations_to_list(
+    db: Session,
+    entities: List[Dict[str, Any]],
+    build_requests: Callable[[Dict[str, Any], str], List[FieldRequest]],
+    user_id: int,
+    target_language: Optional[str],
+    label: str
+) -> List[Dict[str, Any]]:
+    """Translate a list of entity dictionaries with a single batch"""
+    try:
+        if not entities:
+            return entities
+        if target_language is None:
+            target_language = await get_user_language_from_cache(user_id, db)
+
+        requests = []
+        for entity in entities:
+            requests.extend(build_requests(entity, target_language))
+        _apply_requests(db, requests)
+        return entities
+
+    except Exception as e:
+        logger.error(f"Failed to apply translations to {label}: {e}")
+        return entities  # Return original on error
+
+
+def _section_requests(section: Dict[str, Any], target_language: str) -> List[FieldRequest]:
+    # If English, no translation needed
+    if target_language == 'en':
+        return []
+    # Get source_language from section (defaults to 'en' for backward compatibility)
+    return _field_requests(
+        section, 'health_record_sections', ['display_name', 'description'],
+        target_language, section.get('source_language', 'en')
+    )
+
+
+def _metric_requests(metric: Dict[str, Any], target_language: str) -> List[FieldRequest]:
+    if target_language == 'en':
+        return []
+    return _field_requests(
+        metric, 'health_record_metrics', ['display_name', 'description'],
+        target_language, metric.get('source_language', 'en')
+    )
+
+
+def _medical_condition_requests(condition: Dict[str, Any], target_language: str) -> List[FieldRequest]:
+    return _field_requests(
+        condition, 'medical_conditions', ['condition_name', 'description', 'treatment_plan'],
+        target_language, condition.get('source_language', 'en'), condition.get('version', 1)
+    )
+
+
+def _family_history_requests(history: Dict[str, Any], target_language: str) -> List[FieldRequest]:
+    source_language = history.get('source_language', 'en')
+    if not history.get('id') or source_language == target_language:
+        return []
+    current_version = history.get('version', 1)
+    requests = _field_requests(
+        history, 'family_medical_history', ['cause_of_death', 'condition_name', 'description', 'outcome'],
+        target_language, source_language, current_version
+    )
+
+    # Translate chronic_diseases JSON array entries in-place
+    chronic_diseases = history.get('chronic_diseases')
+    if chronic_diseases and isinstance(chronic_diseases, list):
+        for i, disease in enumerate(chronic_diseases):
+            for field in ('disease', 'comments'):
+                if field in disease and disease[field]:
+                    requests.append((disease, field, TranslationRequest(
+                        entity_type='family_medical_history',
+                        entity_id=history['id'],
+                        field_name=f'chronic_diseases[{i}].{field}',
+                        original_text=disease[field],
+                        target_language=target_language,
+                        source_language=source_language,
+                        current_entry_version=current_version
+                    )))
+    return requests
+
+
+def _imaging_document_requests(image: Dict[str, Any], target_language: str) -> List[FieldRequest]:
+    if target_language == 'en':
+        return []
+    return _field_requests(
+        image, 'health_record_doc_exam', ['body_part', 'conclusions', 'interpretation', 'notes'],
+        target_language, 'en'
+    )
+
+
+def _section_template_requests(section_template: Dict[str, Any], target_language: str) -> List[FieldRequest]:
+    return _field_requests(
+        section_template, 'health_record_section_template', ['display_name', 'description'],
+        target_language, section_template.get('source_language', 'en')
+    )
+
+
+def _metric_template_requests(metric_template: Dict[str, Any], target_language: str) -> List[FieldRequest]:
+    return _field_requests(
+        metric_template, 'health_record_metric_template', ['display_name', 'description', 'default_unit'],
+        target_language, metric_template.get('source_language', 'en')
+    )
+
+
+def _surgery_hospitalization_requests(surgery: Dict[str, Any], target_language: str) -> List[FieldRequest]:
+    return _field_requests(
+        surgery, 'surgeries_hospitalizations', ['name', 'reason', 'treatment', 'body_area', 'notes'],
+        target_language, surgery.get('source_language', 'en'), surgery.get('version', 1)
+    )
+
+
+def _goal_requests(goal: Dict[str, Any], target_language: str) -> List[FieldRequest]:
+    return _field_requests(
+        goal, 'health_plan_goals', ['name'],
+        target_language, goal.get('source_language', 'en'), goal.get('version', 1)
+    )
+
+
+def _task_requests(task: Dict[str, Any], target_language: str) -> List[FieldRequest]:
+    return _field_requests(
+        task, 'health_plan_tasks', ['name', 'description'],
+        target_language, task.get('source_language', 'en'), task.get('version', 1)
+    )
+
+
+def _medication_requests(medication: Dict[str, Any], target_language: str) -> List[FieldRequest]:
+    return _field_requests(
+        medication, 'medications', ['medication_name', 'purpose', 'instructions'],
+        target_language, medication.get('source_language', 'en'), medication.get('version', 1)
+    )
+
 
 async def apply_translations_to_section(
     db: Session,
@@ -19,14 +196,14 @@ async def apply_translations_to_section(
 ) -> Dict[str, Any]:
     """
     Apply translations to a section dictionary
-    
+
     Args:
         db: Database session
         section: Section dictionary with id, display_name, description, etc.
         user_id: User ID to get language preference
         target_language: Optional target language (if None, gets from cached user profile)
         request: Optional FastAPI Request object (deprecated, kept for backward compatibility)
-    
+
     Returns:
         Section dictionary with translated fields
     """
@@ -34,50 +211,10 @@ async def apply_translations_to_section(
         # Get user's language preference from cache
         if target_language is None:
             target_language = await get_user_language_from_cache(user_id, db)
-        
-        # If English, return as-is (no translation needed)
-        if target_language == 'en':
-            return section
-        
-        section_id = section.get('id')
-        if not section_id:
-            return section
-        
-        # Get source_language from section (defaults to 'en' for backward compatibility)
-        source_language = section.get('source_language', 'en')
-        
-        # Only translate if source and target languages are different
-        if source_language == target_language:
-            return section
-        
-        # Translate display_name
-        display_name = section.get('display_name', '')
-        if display_name:
-            section['display_name'] = translation_service.get_translated_content(
-                db=db,
-                entity_type='health_record_sections',
-                entity_id=section_id,
-                field_name='display_name',
-                original_text=display_name,
-                target_language=target_language,
-                source_language=source_language
-            )
-        
-        # Translate description
-        description = section.get('description')
-        if description:
-            section['description'] = translation_service.get_translated_content(
-                db=db,
-                entity_type='health_record_sections',
-                entity_id=section_id,
-                field_name='description',
-                original_text=description,
-                target_language=target_language,
-                source_language=source_language
-            )
-        
+
+        _apply_requests(db, _section_requests(section, target_language))
         return section
-        
+
     except Exception as e:
         logger.error(f"Failed to apply translations to section: {e}")
         return section  # Return original on error
@@ -92,14 +229,14 @@ async def apply_translations_to_metric(
 ) -> Dict[str, Any]:
     """
     Apply translations to a metric dictionary
-    
+
     Args:
         db: Database session
         metric: Metric dictionary with id, display_name, description, etc.
         user_id: User ID to get language preference
         target_language: Optional target language (if None, gets from cached user profile)
         request: Optional FastAPI Request object (deprecated, kept for backward compatibility)
-    
+
     Returns:
         Metric dictionary with translated fields
     """
@@ -107,55 +244,25 @@ async def apply_translations_to_metric(
         # Get user's language preference from cache
         if target_language is None:
             target_language = await get_user_language_from_cache(user_id, db)
-        
-        # If English, return as-is
-        if target_language == 'en':
-            return metric
-        
-        metric_id = metric.get('id')
-        if not metric_id:
-            return metric
-        
-        # Get source_language from metric (defaults to 'en' for backward compatibility)
-        source_language = metric.get('source_language', 'en')
-        
-        # Only translate if source and target languages are different
-        if source_language == target_language:
-            return metric
-        
-        # Translate display_name
-        display_name = metric.get('display_name', '')
-        if display_name:
-            metric['display_name'] = translation_service.get_translated_content(
-                db=db,
-                entity_type='health_record_metrics',
-                entity_id=metric_id,
-                field_name='display_name',
-                original_text=display_name,
-                target_language=target_language,
-                source_language=source_language
-            )
-        
-        # Translate description
-        description = metric.get('description')
-        if description:
-            metric['description'] = translation_service.get_translated_content(
-                db=db,
-                entity_type='health_record_metrics',
-                entity_id=metric_id,
-                field_name='description',
-                original_text=description,
-                target_language=target_language,
-                source_language=source_language
-            )
-        
+
+        _apply_requests(db, _metric_requests(metric, target_language))
         return metric
-        
+
     except Exception as e:
         logger.error(f"Failed to apply translations to metric: {e}")
         return metric  # Return original on error
 
 
+async def apply_translations_to_metrics(
+    db: Session,
+    metrics: List[Dict[str, Any]],
+    user_id: int,
+    target_language: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Apply translations to a list of metric dictionaries in one batch"""
+    return await _apply_translations_to_list(db, metrics, _metric_requests, user_id, target_language, "metrics")
+
+
 async def apply_translations_to_sections_with_metrics(
     db: Session,
     sections: List[Dict[str, Any]],
@@ -165,14 +272,14 @@ async def apply_translations_to_sections_with_metrics(
 ) -> List[Dict[str, Any]]:
     """
     Apply translations to a list of sections with their metrics
-    
+
     Args:
         db: Database session
         sections: List of section dictionaries with nested metrics
         user_id: User ID to get language preference
         target_language: Optional target language (if None, gets from cached user profile)
         request: Optional FastAPI Request object (deprecated, kept for backward compatibility)
-    
+
     Returns:
         List of sections with translated fields
     """
@@ -180,28 +287,19 @@ async def apply_translations_to_sections_with_metrics(
         # Get user's language preference from cache
         if target_language is None:
             target_language = await get_user_language_from_cache(user_id, db)
-        
-        translated_sections = []
+
+        # Sections and all their metrics are translated in one batch
+        requests = []
         for section in sections:
-            # Translate section fields
-            translated_section = await apply_translations_to_section(
-                db, section, user_id, target_language, request
-            )
-            
-            # Translate metrics within section
+            requests.extend(_section_requests(section, target_language))
             metrics = section.get('metrics', [])
-            translated_metrics = []
             for metric in metrics:
-                translated_metric = await apply_translations_to_metric(
-                    db, metric, user_id, target_language, request
-                )
-                translated_metrics.append(translated_metric)
-            
-            translated_section['metrics'] = translated_metrics
-            translated_sections.append(translated_section)
-        
-        return translated_sections
-        
+                requests.extend(_metric_requests(metric, target_language))
+            section['metrics'] = metrics
+        _apply_requests(db, requests)
+
+        return sections
+
     except Exception as e:
         logger.error(f"Failed to apply translations to sections: {e}")
         return sections  # Return original on error
@@ -215,88 +313,42 @@ async def apply_translations_to_medical_condition(
 ) -> Dict[str, Any]:
     """
     Apply translations to a medical condition dictionary
-    
+
     Args:
         db: Database session
         condition: Condition dictionary with id, condition_name, description, treatment_plan, source_language
         user_id: User ID to get language preference
         target_language: Optional target language
-    
+
     Returns:
         Condition dictionary with translated fields
     """
     try:
         if target_language is None:
             target_language = await get_user_language_from_cache(user_id, db)
-        
+
         logger.info(f"🌐 [Medical Condition Translation] User {user_id}, Target: {target_language}, Condition ID: {condition.get('id')}")
-        
-        # Get source_language from condition dict (defaults to 'en' for backward compatibility)
-        source_language = condition.get('source_language', 'en')
-        
-        logger.info(f"🌐 [Medical Condition Translation] Source: {source_language}, Target: {target_language}")
-        
-        # Only translate if source and target languages are different
-        if source_language == target_language:
-            logger.debug(f"🌐 [Medical Condition Translation] Source and target match ({source_language}), skipping translation")
-            return condition
-        
-        condition_id = condition.get('id')
-        if not condition_id:
-            return condition
-        
-        # Get current version from condition dict
-        current_version = condition.get('version', 1)
-        
-        # Translate condition_name
-        condition_name = condition.get('condition_name', '')
-        if condition_name:
-            condition['condition_name'] = translation_service.get_translated_content(
-                db=db,
-                entity_type='medical_conditions',
-                entity_id=condition_id,
-                field_name='condition_name',
-                original_text=condition_name,
-                target_language=target_language,
-                source_language=source_language,
-                current_entry_version=current_version
-            )
-        
-        # Translate description
-        description = condition.get('description')
-        if description:
-            condition['description'] = translation_service.get_translated_content(
-                db=db,
-                entity_type='medical_conditions',
-                entity_id=condition_id,
-                field_name='description',
-                original_text=description,
-                target_language=target_language,
-                source_language=source_language,
-                current_entry_version=current_version
-            )
-        
-        # Translate treatment_plan
-        treatment_plan = condition.get('treatment_plan')
-        if treatment_plan:
-            condition['treatment_plan'] = translation_service.get_translated_content(
-                db=db,
-                entity_type='medical_conditions',
-                entity_id=condition_id,
-                field_name='treatment_plan',
-                original_text=treatment_plan,
-                target_language=target_language,
-                source_language=source_language,
-                current_entry_version=current_version
-            )
-        
+
+        _apply_requests(db, _medical_condition_requests(condition, target_language))
         return condition
-        
+
     except Exception as e:
         logger.error(f"Failed to apply translations to medical condition: {e}")
         return condition
 
 
+async def apply_translations_to_medical_conditions(
+    db: Session,
+    conditions: List[Dict[str, Any]],
+    user_id: int,
+    target_language: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Apply translations to a list of medical condition dictionaries in one batch"""
+    return await _apply_translations_to_list(
+        db, conditions, _medical_condition_requests, user_id, target_language, "medical conditions"
+    )
+
+
 async def apply_translations_to_family_history(
     db: Session,
     history: Dict[str, Any],
@@ -305,130 +357,40 @@ async def apply_translations_to_family_history(
 ) -> Dict[str, Any]:
     """
     Apply translations to a family medical history dictionary
-    
+
     Args:
         db: Database session
         history: History dictionary with id, cause_of_death, chronic_diseases, source_language, etc.
         user_id: User ID to get language preference
         target_language: Optional target language
-    
+
     Returns:
         History dictionary with translated fields
     """
     try:
         if target_language is None:
             target_language = await get_user_language_from_cache(user_id, db)
-        
-        # Get source_language from history dict (defaults to 'en' for backward compatibility)
-        source_language = history.get('source_language', 'en')
-        
-        # Only translate if source and target languages are different
-        if source_language == target_language:
-            return history
-        
-        history_id = history.get('id')
-        if not history_id:
-            return history
-        
-        # Get current version from history dict
-        current_version = history.get('version', 1)
-        
-        # Translate cause_of_death
-        cause_of_death = history.get('cause_of_death')
-        if cause_of_death:
-            history['cause_of_death'] = translation_service.get_translated_content(
-                db=db,
-                entity_type='family_medical_history',
-                entity_id=history_id,
-                field_name='cause_of_death',
-                original_text=cause_of_death,
-                target_language=target_language,
-                source_language=source_language,
-                current_entry_version=current_version
-            )
-        
-        # Translate chronic_diseases JSON array
-        chronic_diseases = history.get('chronic_diseases')
-        if chronic_diseases and isinstance(chronic_diseases, list):
-            translated_diseases = translation_service.translate_json_array(
-                chronic_diseases,
-                target_language,
-                source_language='en',
-                fields_to_translate=['disease', 'comments']
-            )
-            # Store translated version (we'll need to handle this specially)
-            # For now, we'll translate in-place
-            for i, disease in enumerate(chronic_diseases):
-                if 'disease' in disease and disease['disease']:
-                    disease['disease'] = translation_service.get_translated_content(
-                        db=db,
-                        entity_type='family_medical_history',
-                        entity_id=history_id,
-                        field_name=f'chronic_diseases[{i}].disease',
-                        original_text=disease['disease'],
-                        target_language=target_language,
-                        source_language=source_language,
-                        current_entry_version=current_version
-                    )
-                if 'comments' in disease and disease['comments']:
-                    disease['comments'] = translation_service.get_translated_content(
-                        db=db,
-                        entity_type='family_medical_history',
-                        entity_id=history_id,
-                        field_name=f'chronic_diseases[{i}].comments',
-                        original_text=disease['comments'],
-                        target_language=target_language,
-                        source_language=source_language,
-                        current_entry_version=current_version
-                    )
-        
-        # Translate legacy fields
-        condition_name = history.get('condition_name')
-        if condition_name:
-            history['condition_name'] = translation_service.get_translated_content(
-                db=db,
-                entity_type='family_medical_history',
-                entity_id=history_id,
-                field_name='condition_name',
-                original_text=condition_name,
-                target_language=target_language,
-                source_language=source_language,
-                current_entry_version=current_version
-            )
-        
-        description = history.get('description')
-        if description:
-            history['description'] = translation_service.get_translated_content(
-                db=db,
-                entity_type='family_medical_history',
-                entity_id=history_id,
-                field_name='description',
-                original_text=description,
-                target_language=target_language,
-                source_language=source_language,
-                current_entry_version=current_version
-            )
-        
-        outcome = history.get('outcome')
-        if outcome:
-            history['outcome'] = translation_service.get_translated_content(
-                db=db,
-                entity_type='family_medical_history',
-                entity_id=history_id,
-                field_name='outcome',
-                original_text=outcome,
-                target_language=target_language,
-                source_language=source_language,
-                current_entry_version=current_version
-            )
-        
+
+        _apply_requests(db, _family_history_requests(history, target_language))
         return history
-        
+
     except Exception as e:
         logger.error(f"Failed to apply translations to family history: {e}")
         return history
 
 
+async def apply_translations_to_family_histories(
+    db: Session,
+    histories: List[Dict[str, Any]],
+    user_id: int,
+    target_language: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Apply translations to a list of family medical history dictionaries in one batch"""
+    return await _apply_translations_to_list(
+        db, histories, _family_history_requests, user_id, target_language, "family history"
+    )
+
+
 async def apply_translations_to_imaging_document(
     db: Session,
     image: Dict[str, Any],
@@ -437,86 +399,40 @@ async def apply_translations_to_imaging_document(
 ) -> Dict[str, Any]:
     """
     Apply translations to an imaging document dictionary
-    
+
     Args:
         db: Database session
         image: Image dictionary with id, body_part, conclusions, interpretation, notes
         user_id: User ID to get language preference
         target_language: Optional target language
-    
+
     Returns:
         Image dictionary with translated fields
     """
     try:
         if target_language is None:
             target_language = await get_user_language_from_cache(user_id, db)
-        
-        if target_language == 'en':
-            return image
-        
-        image_id = image.get('id')
-        if not image_id:
-            return image
-        
-        # Translate body_part
-        body_part = image.get('body_part', '')
-        if body_part:
-            image['body_part'] = translation_service.get_translated_content(
-                db=db,
-                entity_type='health_record_doc_exam',
-                entity_id=image_id,
-                field_name='body_part',
-                original_text=body_part,
-                target_language=target_language,
-                source_language='en'
-            )
-        
-        # Translate conclusions
-        conclusions = image.get('conclusions')
-        if conclusions:
-            image['conclusions'] = translation_service.get_translated_content(
-                db=db,
-                entity_type='health_record_doc_exam',
-                entity_id=image_id,
-                field_name='conclusions',
-                original_text=conclusions,
-                target_language=target_language,
-                source_language='en'
-            )
-        
-        # Translate interpretation
-        interpretation = image.get('interpretation')
-        if interpretation:
-            image['interpretation'] = translation_service.get_translated_content(
-                db=db,
-                entity_type='health_record_doc_exam',
-                entity_id=image_id,
-                field_name='interpretation',
-                original_text=interpretation,
-                target_language=target_language,
-                source_language='en'
-            )
-        
-        # Translate notes
-        notes = image.get('notes')
-        if notes:
-            image['notes'] = translation_service.get_translated_content(
-                db=db,
-                entity_type='health_record_doc_exam',
-                entity_id=image_id,
-                field_name='notes',
-                original_text=notes,
-                target_language=target_language,
-                source_language='en'
-            )
-        
+
+        _apply_requests(db, _imaging_document_requests(image, target_language))
         return image
-        
+
     except Exception as e:
         logger.error(f"Failed to apply translations to imaging document: {e}")
         return image
 
 
+async def apply_translations_to_imaging_documents(
+    db: Session,
+    images: List[Dict[str, Any]],
+    user_id: int,
+    target_language: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Apply translations to a list of imaging document dictionaries in one batch"""
+    return await _apply_translations_to_list(
+        db, images, _imaging_document_requests, user_id, target_language, "imaging documents"
+    )
+
+
 async def apply_translations_to_section_template(
     db: Session,
     section_template: Dict[str, Any],
@@ -525,13 +441,13 @@ async def apply_translations_to_section_template(
 ) -> Dict[str, Any]:
     """
     Apply translations to a section template dictionary
-    
+
     Args:
         db: Database session
         section_template: Template dictionary with id, display_name, description, source_language
         user_id: User ID to get language preference
         target_language: Optional target language (if None, gets from user profile)
-    
+
     Returns:
         Template dictionary with translated fields
     """
@@ -539,51 +455,27 @@ async def apply_translations_to_section_template(
         # Get user's language preference
         if target_language is None:
             target_language = await get_user_language_from_cache(user_id, db)
-        
-        # Get template's source language
-        source_language = section_template.get('source_language', 'en')
-        
-        # If target matches source, return as-is (no translation needed)
-        if target_language == source_language:
-            return section_template
-        
-        section_template_id = section_template.get('id')
-        if not section_template_id:
-            return section_template
-        
-        # Translate display_name
-        display_name = section_template.get('display_name', '')
-        if display_name:
-            section_template['display_name'] = translation_service.get_translated_content(
-                db=db,
-                entity_type='health_record_section_template',
-                entity_id=section_template_id,
-                field_name='display_name',
-                original_text=display_name,
-                target_language=target_language,
-                source_language=source_language
-            )
-        
-        # Translate description
-        description = section_template.get('description')
-        if description:
-            section_template['description'] = translation_service.get_translated_content(
-                db=db,
-                entity_type='health_record_section_template',
-                entity_id=section_template_id,
-                field_name='description',
-                original_text=description,
-                target_language=target_language,
-                source_language=source_language
-            )
-        
+
+        _apply_requests(db, _section_template_requests(section_template, target_language))
         return section_template
-        
+
     except Exception as e:
         logger.error(f"Failed to apply translations to section template: {e}")
         return section_template  # Return original on error
 
 
+async def apply_translations_to_section_templates(
+    db: Session,
+    section_templates: List[Dict[str, Any]],
+    user_id: int,
+    target_language: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Apply translations to a list of section template dictionaries in one batch"""
+    return await _apply_translations_to_list(
+        db, section_templates, _section_template_requests, user_id, target_language, "section templates"
+    )
+
+
 async def apply_translations_to_metric_template(
     db: Session,
     metric_template: Dict[str, Any],
@@ -592,13 +484,13 @@ async def apply_translations_to_metric_template(
 ) -> Dict[str, Any]:
     """
     Apply translations to a metric template dictionary
-    
+
     Args:
         db: Database session
         metric_template: Template dictionary with id, display_name, description, default_unit, source_language
         user_id: User ID to get language preference
         target_language: Optional target language (if None, gets from user profile)
-    
+
     Returns:
         Template dictionary with translated fields
     """
@@ -606,64 +498,27 @@ async def apply_translations_to_metric_template(
         # Get user's language preference
         if target_language is None:
             target_language = await get_user_language_from_cache(user_id, db)
-        
-        # Get template's source language
-        source_language = metric_template.get('source_language', 'en')
-        
-        # If target matches source, return as-is
-        if target_language == source_language:
-            return metric_template
-        
-        metric_template_id = metric_template.get('id')
-        if not metric_template_id:
-            return metric_template
-        
-        # Translate display_name
-        display_name = metric_template.get('display_name', '')
-        if display_name:
-            metric_template['display_name'] = translation_service.get_translated_content(
-                db=db,
-                entity_type='health_record_metric_template',
-                entity_id=metric_template_id,
-                field_name='display_name',
-                original_text=display_name,
-                target_language=target_language,
-                source_language=source_language
-            )
-        
-        # Translate description
-        description = metric_template.get('description')
-        if description:
-            metric_template['description'] = translation_service.get_translated_content(
-                db=db,
-                entity_type='health_record_metric_template',
-                entity_id=metric_template_id,
-                field_name='description',
-                original_text=description,
-                target_language=target_language,
-                source_language=source_language
-            )
-        
-        # Translate default_unit
-        default_unit = metric_template.get('default_unit')
-        if default_unit:
-            metric_template['default_unit'] = translation_service.get_translated_content(
-                db=db,
-                entity_type='health_record_metric_template',
-                entity_id=metric_template_id,
-                field_name='default_unit',
-                original_text=default_unit,
-                target_language=target_language,
-                source_language=source_language
-            )
-        
+
+        _apply_requests(db, _metric_template_requests(metric_template, target_language))
         return metric_template
-        
+
     except Exception as e:
         logger.error(f"Failed to apply translations to metric template: {e}")
         return metric_template  # Return original on error
 
 
+async def apply_translations_to_metric_templates(
+    db: Session,
+    metric_templates: List[Dict[str, Any]],
+    user_id: int,
+    target_language: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Apply translations to a list of metric template dictionaries in one batch"""
+    return await _apply_translations_to_list(
+        db, metric_templates, _metric_template_requests, user_id, target_language, "metric templates"
+    )
+
+
 async def apply_translations_to_surgery_hospitalization(
     db: Session,
     surgery: Dict[str, Any],
@@ -672,111 +527,40 @@ async def apply_translations_to_surgery_hospitalization(
 ) -> Dict[str, Any]:
     """
     Apply translations to a surgery/hospitalization dictionary
-    
+
     Args:
         db: Database session
         surgery: Surgery/hospitalization dictionary with id, name, reason, treatment, body_area, notes, source_language
         user_id: User ID to get language preference
         target_language: Optional target language
-    
+
     Returns:
         Surgery/hospitalization dictionary with translated fields
     """
     try:
         if target_language is None:
             target_language = await get_user_language_from_cache(user_id, db)
-        
-        # Get source_language from surgery dict (defaults to 'en' for backward compatibility)
-        source_language = surgery.get('source_language', 'en')
-        
-        # Only translate if source and target languages are different
-        if source_language == target_language:
-            return surgery
-        
-        surgery_id = surgery.get('id')
-        if not surgery_id:
-            return surgery
-        
-        # Get current version from surgery dict
-        current_version = surgery.get('version', 1)
-        
-        # Translate name
-        name = surgery.get('name', '')
-        if name:
-            surgery['name'] = translation_service.get_translated_content(
-                db=db,
-                entity_type='surgeries_hospitalizations',
-                entity_id=surgery_id,
-                field_name='name',
-                original_text=name,
-                target_language=target_language,
-                source_language=source_language,
-                current_entry_version=current_version
-            )
-        
-        # Translate reason
-        reason = surgery.get('reason')
-        if reason:
-            surgery['reason'] = translation_service.get_translated_content(
-                db=db,
-                entity_type='surgeries_hospitalizations',
-                entity_id=surgery_id,
-                field_name='reason',
-                original_text=reason,
-                target_language=target_language,
-                source_language=source_language,
-                current_entry_version=current_version
-            )
-        
-        # Translate treatment
-        treatment = surgery.get('treatment')
-        if treatment:
-            surgery['treatment'] = translation_service.get_translated_content(
-                db=db,
-                entity_type='surgeries_hospitalizations',
-                entity_id=surgery_id,
-                field_name='treatment',
-                original_text=treatment,
-                target_language=target_language,
-                source_language=source_language,
-                current_entry_version=current_version
-            )
-        
-        # Translate body_area
-        body_area = surgery.get('body_area')
-        if body_area:
-            surgery['body_area'] = translation_service.get_translated_content(
-                db=db,
-                entity_type='surgeries_hospitalizations',
-                entity_id=surgery_id,
-                field_name='body_area',
-                original_text=body_area,
-                target_language=target_language,
-                source_language=source_language,
-                current_entry_version=current_version
-            )
-        
-        # Translate notes
-        notes = surgery.get('notes')
-        if notes:
-            surgery['notes'] = translation_service.get_translated_content(
-                db=db,
-                entity_type='surgeries_hospitalizations',
-                entity_id=surgery_id,
-                field_name='notes',
-                original_text=notes,
-                target_language=target_language,
-                source_language=source_language,
-                current_entry_version=current_version
-            )
-        
+
+        _apply_requests(db, _surgery_hospitalization_requests(surgery, target_language))
         return surgery
-        
+
     except Exception as e:
         logger.error(f"Failed to apply translations to surgery/hospitalization: {e}")
         return surgery
 
 
+async def apply_translations_to_surgeries_hospitalizations(
+    db: Session,
+    surgeries: List[Dict[str, Any]],
+    user_id: int,
+    target_language: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Apply translations to a list of surgery/hospitalization dictionaries in one batch"""
+    return await _apply_translations_to_list(
+        db, surgeries, _surgery_hospitalization_requests, user_id, target_language, "surgeries/hospitalizations"
+    )
+
+
 async def apply_translations_to_goal(
     db: Session,
     goal: Dict[str, Any],
@@ -785,60 +569,40 @@ async def apply_translations_to_goal(
 ) -> Dict[str, Any]:
     """
     Apply translations to a health goal dictionary
-    
+
     Args:
         db: Database session
         goal: Goal dictionary with id, name, source_language
         user_id: User ID to get language preference
         target_language: Optional target language
-    
+
     Returns:
         Goal dictionary with translated fields
     """
     try:
         if target_language is None:
             target_language = await get_user_language_from_cache(user_id, db)
-        
+
         logger.info(f"🌐 [Goal Translation] User {user_id}, Target: {target_language}, Goal ID: {goal.get('id')}")
-        
-        # Get source_language from goal dict (defaults to 'en' for backward compatibility)
-        source_language = goal.get('source_language', 'en')
-        
-        logger.info(f"🌐 [Goal Translation] Source: {source_language}, Target: {target_language}")
-        
-        # Only translate if source and target languages are different
-        if source_language == target_language:
-            logger.debug(f"🌐 [Goal Translation] Source and target match ({source_language}), skipping translation")
-            return goal
-        
-        goal_id = goal.get('id')
-        if not goal_id:
-            return goal
-        
-        # Get current version from goal dict
-        current_version = goal.get('version', 1)
-        
-        # Translate name
-        name = goal.get('name', '')
-        if name:
-            goal['name'] = translation_service.get_translated_content(
-                db=db,
-                entity_type='health_plan_goals',
-                entity_id=goal_id,
-                field_name='name',
-                original_text=name,
-                target_language=target_language,
-                source_language=source_language,
-                current_entry_version=current_version
-            )
-        
+
+        _apply_requests(db, _goal_requests(goal, target_language))
         return goal
-        
+
     except Exception as e:
         logger.error(f"Failed to apply translations to goal: {e}")
         return goal
 
 
+async def apply_translations_to_goals(
+    db: Session,
+    goals: List[Dict[str, Any]],
+    user_id: int,
+    target_language: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Apply translations to a list of health goal dictionaries in one batch"""
+    return await _apply_translations_to_list(db, goals, _goal_requests, user_id, target_language, "goals")
+
+
 async def apply_translations_to_task(
     db: Session,
     task: Dict[str, Any],
@@ -847,74 +611,40 @@ async def apply_translations_to_task(
 ) -> Dict[str, Any]:
     """
     Apply translations to a health task dictionary
-    
+
     Args:
         db: Database session
         task: Task dictionary with id, name, description, source_language
         user_id: User ID to get language preference
         target_language: Optional target language
-    
+
     Returns:
         Task dictionary with translated fields
     """
     try:
         if target_language is None:
             target_language = await get_user_language_from_cache(user_id, db)
-        
+
         logger.info(f"🌐 [Task Translation] User {user_id}, Target: {target_language}, Task ID: {task.get('id')}")
-        
-        # Get source_language from task dict (defaults to 'en' for backward compatibility)
-        source_language = task.get('source_language', 'en')
-        
-        logger.info(f"🌐 [Task Translation] Source: {source_language}, Target: {target_language}")
-        
-        # Only translate if source and target languages are different
-        if source_language == target_language:
-            logger.debug(f"🌐 [Task Translation] Source and target match ({source_language}), skipping translation")
-            return task
-        
-        task_id = task.get('id')
-        if not task_id:
-            return task
-        
-        # Get current version from task dict
-        current_version = task.get('version', 1)
-        
-        # Translate name
-        name = task.get('name', '')
-        if name:
-            task['name'] = translation_service.get_translated_content(
-                db=db,
-                entity_type='health_plan_tasks',
-                entity_id=task_id,
-                field_name='name',
-                original_text=name,
-                target_language=target_language,
-                source_language=source_language,
-                current_entry_version=current_version
-            )
-        
-        # Translate description
-        description = task.get('description')
-        if description:
-            task['description'] = translation_service.get_translated_content(
-                db=db,
-                entity_type='health_plan_tasks',
-                entity_id=task_id,
-                field_name='description',
-                original_text=description,
-                target_language=target_language,
-                source_language=source_language,
-                current_entry_version=current_version
-            )
-        
+
+        _apply_requests(db, _task_requests(task, target_language))
         return task
-        
+
     except Exception as e:
         logger.error(f"Failed to apply translations to task: {e}")
         return task
 
 
+async def apply_translations_to_tasks(
+    db: Session,
+    tasks: List[Dict[str, Any]],
+    user_id: int,
+    target_language: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Apply translations to a list of health task dictionaries in one batch"""
+    return await _apply_translations_to_list(db, tasks, _task_requests, user_id, target_language, "tasks")
+
+
 async def apply_translations_to_medication(
     db: Session,
     medication: Dict[str, Any],
@@ -923,84 +653,37 @@ async def apply_translations_to_medication(
 ) -> Dict[str, Any]:
     """
     Apply translations to a medication dictionary
-    
+
     Args:
         db: Database session
         medication: Medication dictionary with id, medication_name, purpose, instructions, source_language
         user_id: User ID to get language preference
         target_language: Optional target language
-    
+
     Returns:
         Medication dictionary with translated fields
     """
     try:
         if target_language is None:
             target_language = await get_user_language_from_cache(user_id, db)
-        
+
         logger.info(f"🌐 [Medication Translation] User {user_id}, Target: {target_language}, Medication ID: {medication.get('id')}")
-        
-        # Get source_language from medication dict (defaults to 'en' for backward compatibility)
-        source_language = medication.get('source_language', 'en')
-        
-        logger.info(f"🌐 [Medication Translation] Source: {source_language}, Target: {target_language}")
-        
-        # Only translate if source and target languages are different
-        if source_language == target_language:
-            logger.debug(f"🌐 [Medication Translation] Source and target match ({source_language}), skipping translation")
-            return medication
-        
-        medication_id = medication.get('id')
-        if not medication_id:
-            return medication
-        
-        # Get current version from medication dict
-        current_version = medication.get('version', 1)
-        
-        # Translate medication_name
-        medication_name = medication.get('medication_name', '')
-        if medication_name:
-            medication['medication_name'] = translation_service.get_translated_content(
-                db=db,
-                entity_type='medications',
-                entity_id=medication_id,
-                field_name='medication_name',
-                original_text=medication_name,
-                target_language=target_language,
-                source_language=source_language,
-                current_entry_version=current_version
-            )
-        
-        # Translate purpose
-        purpose = medication.get('purpose')
-        if purpose:
-            medication['purpose'] = translation_service.get_translated_content(
-                db=db,
-                entity_type='medications',
-                entity_id=medication_id,
-                field_name='purpose',
-                original_text=purpose,
-                target_language=target_language,
-                source_language=source_language,
-                current_entry_version=current_version
-            )
-        
-        # Translate instructions
-        instructions = medication.get('instructions')
-        if instructions:
-            medication['instructions'] = translation_service.get_translated_content(
-                db=db,
-                entity_type='medications',
-                entity_id=medication_id,
-                field_name='instructions',
-                original_text=instructions,
-                target_language=target_language,
-                source_language=source_language,
-                current_entry_version=current_version
-            )
-        
+
+        _apply_requests(db, _medication_requests(medication, target_language))
         return medication
-        
+
     except Exception as e:
         logger.error(f"Failed to apply translations to medication: {e}")
         return medication  # Return original on error
 
+
+async def apply_translations_to_medications(
+    db: Session,
+    medications: List[Dict[str, Any]],
+    user_id: int,
+    target_language: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Apply translations to a list of medication dictionaries in one batch"""
+    return await _apply_translations_to_list(
+        db, medications, _medication_requests, user_id, target_language, "medications"
+    )
@@ -4,7 +4,7 @@ Utility functions for getting user language preference from cache
 from typing import Optional
 from sqlalchemy.orm import Session
 from app.core.supabase_client import supabase_service
-from app.models.user import User
+from app.services.user_cache import get_user_snapshot
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,8 +23,8 @@ async def get_user_language_from_cache(user_id: int, db: Session) -> str:
         Language code: 'en', 'es', or 'pt' (defaults to 'en')
     """
     try:
-        # Get user from database to get Supabase user ID
-        user = db.query(User).filter(User.id == user_id).first()
+        # Supabase user ID from the shared user cache (database on a miss)
+        user = get_user_snapshot(db, user_id)
         if not user or not user.supabase_user_id:
             logger.warning(f"User {user_id} not found or no Supabase ID")
             return 'en'
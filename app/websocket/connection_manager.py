@@ -1,6 +1,9 @@
 """
 WebSocket Connection Manager
 Handles real-time connections, user status, and message broadcasting
+
+Each worker process holds only its own sockets; deliveries and presence are shared with the
+other workers through app.websocket.pubsub.
 """
 import json
 import asyncio
@@ -10,6 +13,7 @@ from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.models.user import User
 from app.models.websocket_connection import WebSocketConnection
+from app.websocket.pubsub import pubsub as default_pubsub
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,13 +21,18 @@ logger = logging.getLogger(__name__)
 class ConnectionManager:
     """Manages WebSocket connections and user status"""
     
-    def __init__(self):
+    def __init__(self, pubsub=None):
+        # Fan-out to and presence on the other workers
+        self.pubsub = pubsub or default_pubsub
         # Active connections: {connection_id: websocket}
         self.active_connections: Dict[str, WebSocket] = {}
         # User connections: {user_id: set of connection_ids}
         self.user_connections: Dict[int, Set[str]] = {}
         # Connection metadata: {connection_id: {"user_id": int, "connected_at": datetime}}
         self.connection_metadata: Dict[str, Dict] = {}
+        # Pub/sub channels this worker listens on: "broadcast" flag and user channels
+        self._broadcast_subscribed = False
+        self._subscribed_users: Set[int] = set()
     
     async def connect(self, websocket: WebSocket, connection_id: str, user_id: int) -> bool:
         """Accept a new WebSocket connection"""
@@ -47,6 +56,9 @@ class ConnectionManager:
                 "connected_at": asyncio.get_event_loop().time()
             }
             
+            # Receive this user's messages published by other workers, report presence
+            await self._join_cluster(user_id)
+            
             # Store in database
             await self._store_connection_in_db(connection_id, user_id)
             
@@ -64,23 +76,19 @@ class ConnectionManager:
         """Handle WebSocket disconnection"""
         try:
             if connection_id in self.connection_metadata:
-                user_id = self.connection_metadata[connection_id]["user_id"]
-                
-                # Remove from active connections
-                if connection_id in self.active_connections:
-                    del self.active_connections[connection_id]
-                
-                # Remove from user connections
+                # Local state first, so nothing below can leave a dead connection registered
+                user_id = self.connection_metadata.pop(connection_id)["user_id"]
+                self.active_connections.pop(connection_id, None)
                 if user_id in self.user_connections:
                     self.user_connections[user_id].discard(connection_id)
-                    
-                    # If user has no more connections, mark as offline
                     if not self.user_connections[user_id]:
                         del self.user_connections[user_id]
-                        await self._broadcast_user_status(user_id, "offline")
                 
-                # Remove metadata
-                del self.connection_metadata[connection_id]
+                await self._leave_cluster(user_id)
+                
+                # If user has no more connections on any worker, mark as offline
+                if user_id not in self.user_connections and await self.get_user_connection_count(user_id) == 0:
+                    await self._broadcast_user_status(user_id, "offline")
                 
                 # Update database
                 await self._remove_connection_from_db(connection_id)
@@ -91,11 +99,16 @@ class ConnectionManager:
             logger.error(f"Error during disconnect for connection {connection_id}: {e}")
     
     async def send_personal_message(self, message: dict, user_id: int):
-        """Send message to all connections of a specific user"""
+        """Send message to all connections of a specific user, on every worker"""
+        await self._send_local(message, user_id)
+        await self._publish(self._user_channel(user_id), {"user_id": user_id, "message": message})
+    
+    async def _send_local(self, message: dict, user_id: int):
+        """Send message to the connections of a user held by this worker"""
         if user_id in self.user_connections:
             connections_to_remove = []
             
-            for connection_id in self.user_connections[user_id]:
+            for connection_id in list(self.user_connections[user_id]):
                 try:
                     websocket = self.active_connections.get(connection_id)
                     if websocket:
@@ -110,8 +123,19 @@ class ConnectionManager:
             for connection_id in connections_to_remove:
                 await self.disconnect(connection_id)
     
-    async def send_to_connection(self, message: dict, connection_id: str):
-        """Send message to a specific connection"""
+    async def send_to_connection(self, message: dict, connection_id: str, user_id: Optional[int] = None):
+        """
+        Send message to a specific connection. If it is not held by this worker and user_id is
+        given, the message is handed to the worker that holds it (True means it was published).
+        """
+        if connection_id not in self.active_connections and user_id is not None:
+            return await self._publish(
+                self._user_channel(user_id),
+                {"user_id": user_id, "connection_id": connection_id, "message": message}
+            )
+        return await self._send_to_local_connection(message, connection_id)
+    
+    async def _send_to_local_connection(self, message: dict, connection_id: str) -> bool:
         try:
             websocket = self.active_connections.get(connection_id)
             if websocket:
@@ -123,10 +147,14 @@ class ConnectionManager:
             return False
     
     async def broadcast_to_all(self, message: dict):
-        """Broadcast message to all connected users"""
+        """Broadcast message to all connected users, on every worker"""
+        await self._broadcast_local(message)
+        await self._publish("broadcast", {"message": message})
+    
+    async def _broadcast_local(self, message: dict):
         connections_to_remove = []
         
-        for connection_id, websocket in self.active_connections.items():
+        for connection_id, websocket in list(self.active_connections.items()):
             try:
                 await websocket.send_text(json.dumps(message))
             except Exception as e:
@@ -139,18 +167,86 @@ class ConnectionManager:
     
     async def get_user_status(self, user_id: int) -> str:
         """Get online/offline status of a user"""
-        return "online" if user_id in self.user_connections else "offline"
+        return "online" if await self.get_user_connection_count(user_id) else "offline"
     
     async def get_online_users(self) -> List[int]:
-        """Get list of all online user IDs"""
-        online_users = list(self.user_connections.keys())
+        """Get list of all online user IDs (all workers)"""
+        online_users = list((await self._online_users()).keys())
         print(f"🔌 ConnectionManager: Online users: {online_users}")
-        print(f"🔌 ConnectionManager: User connections: {self.user_connections}")
+        print(f"🔌 ConnectionManager: Local user connections: {self.user_connections}")
         return online_users
     
     async def get_user_connection_count(self, user_id: int) -> int:
-        """Get number of active connections for a user"""
-        return len(self.user_connections.get(user_id, set()))
+        """Get number of active connections for a user (all workers)"""
+        return (await self._online_users()).get(user_id, 0)
+    
+    async def _online_users(self) -> Dict[int, int]:
+        try:
+            return await self.pubsub.online_users()
+        except Exception as e:
+            # Pub/sub backend unreachable: fall back to this worker's view
+            logger.error(f"Failed to read cluster presence: {e}")
+            return {user_id: len(ids) for user_id, ids in self.user_connections.items()}
+    
+    @staticmethod
+    def _user_channel(user_id: int) -> str:
+        return f"user:{user_id}"
+    
+    async def _join_cluster(self, user_id: int):
+        """Subscribe to the user's channel and report presence; on failure only cross-worker delivery is lost"""
+        try:
+            if not self._broadcast_subscribed:
+                await self.pubsub.subscribe("broadcast", self._on_broadcast)
+                self._broadcast_subscribed = True
+            if user_id not in self._subscribed_users:
+                await self.pubsub.subscribe(self._user_channel(user_id), self._on_user_message)
+                self._subscribed_users.add(user_id)
+            await self.pubsub.set_presence(user_id, len(self.user_connections.get(user_id, ())))
+        except Exception as e:
+            logger.error(f"Pub/sub unavailable while connecting user {user_id}: {e}")
+    
+    async def _leave_cluster(self, user_id: int):
+        """Update presence and drop the user's channel once this worker holds none of their connections"""
+        # The user can reconnect here during any await below (e.g. a page refresh), so the local
+        # count is re-read after each one instead of acting on a stale value
+        try:
+            local_count = len(self.user_connections.get(user_id, ()))
+            await self.pubsub.set_presence(user_id, local_count)
+            if not self.user_connections.get(user_id) and user_id in self._subscribed_users:
+                self._subscribed_users.discard(user_id)
+                await self.pubsub.unsubscribe(self._user_channel(user_id))
+                if self.user_connections.get(user_id):
+                    # Reconnected while unsubscribing: its subscribe may have been undone
+                    await self.pubsub.subscribe(self._user_channel(user_id), self._on_user_message)
+                    self._subscribed_users.add(user_id)
+            if len(self.user_connections.get(user_id, ())) != local_count:
+                # Don't leave the stale count written above standing
+                await self.pubsub.set_presence(user_id, len(self.user_connections.get(user_id, ())))
+        except Exception as e:
+            logger.error(f"Pub/sub unavailable while disconnecting user {user_id}: {e}")
+    
+    async def _publish(self, channel: str, payload: dict) -> bool:
+        try:
+            await self.pubsub.publish(channel, payload)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to publish WebSocket message on {channel}: {e}")
+            return False
+    
+    async def _on_user_message(self, payload: dict):
+        """Deliver a personal message published by another worker"""
+        if payload.get("origin") == self.pubsub.worker_id:
+            return
+        if payload.get("connection_id"):
+            await self._send_to_local_connection(payload["message"], payload["connection_id"])
+        else:
+            await self._send_local(payload["message"], int(payload["user_id"]))
+    
+    async def _on_broadcast(self, payload: dict):
+        """Deliver a broadcast published by another worker"""
+        if payload.get("origin") == self.pubsub.worker_id:
+            return
+        await self._broadcast_local(payload["message"])
     
     async def _store_connection_in_db(self, connection_id: str, user_id: int):
         """Store connection in database"""
@@ -50,7 +50,8 @@ class WebSocketNotificationService:
             for connection in active_connections:
                 success = await manager.send_to_connection(
                     notification_message, 
-                    connection.connection_id
+                    connection.connection_id,
+                    user_id=connection.user_id
                 )
                 if success:
                     sent_count += 1
@@ -95,7 +96,8 @@ class WebSocketNotificationService:
             for connection in active_connections:
                 success = await manager.send_to_connection(
                     notification_message, 
-                    connection.connection_id
+                    connection.connection_id,
+                    user_id=connection.user_id
                 )
                 if success:
                     sent_count += 1
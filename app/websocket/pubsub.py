@@ -0,0 +1,238 @@
+"""
+Cross-worker pub/sub for WebSocket delivery and presence.
+
+Each uvicorn worker holds only its own sockets. Connection managers subscribe to a channel per
+user they hold (and to broadcast channels) and publish every delivery, so a message reaches the
+user on whichever workers they are connected to. Payloads carry the publishing worker's id;
+managers ignore their own publications, having already delivered locally.
+
+Presence is tracked per worker: each worker reports how many connections it holds per user,
+and online users / connection counts are summed over all live workers.
+
+Backends (WEBSOCKET_PUBSUB_BACKEND):
+- "memory": in-process only (a single worker, and tests - instances sharing an InMemoryHub
+  behave like separate workers)
+- "redis": Redis at REDIS_URL; a worker's liveness key and presence expire
+  PRESENCE_TTL_SECONDS after its last heartbeat, so crashed workers drop out on their own
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MessageHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+PRESENCE_TTL_SECONDS = 30
+HEARTBEAT_INTERVAL_SECONDS = 10
+
+
+class InMemoryHub:
+    """Channels and presence shared by InMemoryPubSub instances (one per simulated worker)"""
+
+    def __init__(self):
+        self.subscribers: Dict[str, Set[Tuple["InMemoryPubSub", MessageHandler]]] = {}
+        self.presence: Dict[str, Dict[int, int]] = {}  # worker_id -> {user_id: connections}
+
+
+class InMemoryPubSub:
+    """Pub/sub and presence within one process"""
+
+    def __init__(self, hub: Optional[InMemoryHub] = None):
+        self.worker_id = uuid.uuid4().hex
+        self.hub = hub or InMemoryHub()
+        self._handlers: Dict[str, MessageHandler] = {}
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        for channel in list(self._handlers):
+            await self.unsubscribe(channel)
+        self.hub.presence.pop(self.worker_id, None)
+
+    async def publish(self, channel: str, payload: Dict[str, Any]) -> None:
+        payload = {**payload, "origin": self.worker_id}
+        for _, handler in list(self.hub.subscribers.get(channel, ())):
+            try:
+                await handler(payload)
+            except Exception as e:
+                logger.error(f"Pub/sub handler failed on {channel}: {e}")
+
+    async def subscribe(self, channel: str, handler: MessageHandler) -> None:
+        self._handlers[channel] = handler
+        self.hub.subscribers.setdefault(channel, set()).add((self, handler))
+
+    async def unsubscribe(self, channel: str) -> None:
+        handler = self._handlers.pop(channel, None)
+        subscribers = self.hub.subscribers.get(channel)
+        if handler is not None and subscribers is not None:
+            subscribers.discard((self, handler))
+            if not subscribers:
+                del self.hub.subscribers[channel]
+
+    async def set_presence(self, user_id: int, connection_count: int) -> None:
+        presence = self.hub.presence.setdefault(self.worker_id, {})
+        if connection_count > 0:
+            presence[user_id] = connection_count
+        else:
+            presence.pop(user_id, None)
+
+    async def online_users(self) -> Dict[int, int]:
+        """{user_id: connections} over all workers"""
+        totals: Dict[int, int] = {}
+        for presence in self.hub.presence.values():
+            for user_id, count in presence.items():
+                totals[user_id] = totals.get(user_id, 0) + count
+        return totals
+
+
+class RedisPubSub:
+    """Pub/sub and presence across processes and hosts through Redis"""
+
+    CHANNEL_PREFIX = "ws:"
+    WORKERS_KEY = "ws:workers"
+    PRESENCE_PREFIX = "ws:presence:"
+    ALIVE_PREFIX = "ws:alive:"
+
+    def __init__(self, url: Optional[str] = None):
+        import redis.asyncio as redis
+
+        self.worker_id = uuid.uuid4().hex
+        self._redis = redis.from_url(url or settings.REDIS_URL, decode_responses=True)
+        self._pubsub = self._redis.pubsub()
+        self._handlers: Dict[str, MessageHandler] = {}
+        self._presence: Dict[int, int] = {}
+        self._tasks = []
+        self._dispatches: Set[asyncio.Task] = set()  # Handler runs in flight (strong references)
+
+    @property
+    def _presence_key(self) -> str:
+        return self.PRESENCE_PREFIX + self.worker_id
+
+    @property
+    def _alive_key(self) -> str:
+        return self.ALIVE_PREFIX + self.worker_id
+
+    async def _announce(self) -> None:
+        # Liveness is its own key: a worker without connected users writes no presence hash
+        await self._redis.set(self._alive_key, 1, ex=PRESENCE_TTL_SECONDS)
+        await self._redis.sadd(self.WORKERS_KEY, self.worker_id)
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        await self._announce()
+        self._tasks = [
+            asyncio.create_task(self._listen(), name="ws-pubsub-listen"),
+            asyncio.create_task(self._heartbeat(), name="ws-pubsub-heartbeat"),
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks + list(self._dispatches):
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._dispatches, return_exceptions=True)
+        self._tasks = []
+        try:
+            await self._redis.delete(self._presence_key, self._alive_key)
+            await self._redis.srem(self.WORKERS_KEY, self.worker_id)
+            await self._pubsub.aclose()
+            await self._redis.aclose()
+        except Exception as e:
+            logger.warning(f"Error closing Redis pub/sub: {e}")
+
+    async def publish(self, channel: str, payload: Dict[str, Any]) -> None:
+        payload = {**payload, "origin": self.worker_id}
+        await self._redis.publish(self.CHANNEL_PREFIX + channel, json.dumps(payload, default=str))
+
+    async def subscribe(self, channel: str, handler: MessageHandler) -> None:
+        self._handlers[channel] = handler
+        await self._pubsub.subscribe(self.CHANNEL_PREFIX + channel)
+
+    async def unsubscribe(self, channel: str) -> None:
+        if self._handlers.pop(channel, None) is not None:
+            await self._pubsub.unsubscribe(self.CHANNEL_PREFIX + channel)
+
+    async def set_presence(self, user_id: int, connection_count: int) -> None:
+        if connection_count > 0:
+            self._presence[user_id] = connection_count
+            await self._redis.hset(self._presence_key, str(user_id), connection_count)
+            await self._redis.expire(self._presence_key, PRESENCE_TTL_SECONDS)
+        else:
+            self._presence.pop(user_id, None)
+            await self._redis.hdel(self._presence_key, str(user_id))
+
+    async def online_users(self) -> Dict[int, int]:
+        """{user_id: connections} over all live workers"""
+        worker_ids = list(await self._redis.smembers(self.WORKERS_KEY))
+        if not worker_ids:
+            return {}
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for worker_id in worker_ids:
+                pipe.hgetall(self.PRESENCE_PREFIX + worker_id)
+                pipe.exists(self.ALIVE_PREFIX + worker_id)
+            results = await pipe.execute()
+        totals: Dict[int, int] = {}
+        for worker_id, presence, alive in zip(worker_ids, results[::2], results[1::2]):
+            if not alive and worker_id != self.worker_id:
+                # Liveness expired: the worker stopped heartbeating (crashed or shut down)
+                await self._redis.srem(self.WORKERS_KEY, worker_id)
+                continue
+            for user_id, count in presence.items():
+                totals[int(user_id)] = totals.get(int(user_id), 0) + int(count)
+        return totals
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                if not self._handlers:
+                    await asyncio.sleep(1.0)  # Nothing subscribed yet: get_message raises without a subscription
+                    continue
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is None:
+                    continue
+                channel = message["channel"][len(self.CHANNEL_PREFIX):]
+                handler = self._handlers.get(channel)
+                if handler is not None:
+                    # One task per message: a slow socket must not hold up delivery for the worker
+                    task = asyncio.create_task(self._dispatch(channel, handler, json.loads(message["data"])))
+                    self._dispatches.add(task)
+                    task.add_done_callback(self._dispatches.discard)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Redis pub/sub listener error: {e}")
+                await asyncio.sleep(1)
+
+    async def _dispatch(self, channel: str, handler: MessageHandler, payload: Dict[str, Any]) -> None:
+        try:
+            await handler(payload)
+        except Exception as e:
+            logger.error(f"Pub/sub handler failed on {channel}: {e}")
+
+    async def _heartbeat(self) -> None:
+        while True:
+            try:
+                await self._announce()
+                if self._presence:
+                    # Rewrite in full: the key may have expired during a Redis outage
+                    await self._redis.hset(self._presence_key, mapping={str(k): v for k, v in self._presence.items()})
+                    await self._redis.expire(self._presence_key, PRESENCE_TTL_SECONDS)
+            except Exception as e:
+                logger.warning(f"Redis presence heartbeat failed: {e}")
+            await asyncio.sleep(HEARTBEAT_INTERVAL_SECONDS)
+
+
+def create_pubsub():
+    if settings.WEBSOCKET_PUBSUB_BACKEND == "redis":
+        return RedisPubSub()
+    return InMemoryPubSub()
+
+
+# Global instance
+pubsub = create_pubsub()
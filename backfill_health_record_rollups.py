@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Build health_record_rollups from existing health_records.
+
+Migration 0008 already fills the rollups and new writes keep them current; this
+repairs them if they ever drift and is safe to re-run at any time. Each user is
+rebuilt in its own transaction.
+
+Usage: python backfill_health_record_rollups.py [user_id]
+"""
+import logging
+import sys
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.health_record_rollup_service import HealthRecordRollupService
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG if settings.DEBUG else logging.INFO)
+
+    user_id = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    db = SessionLocal()
+    try:
+        result = HealthRecordRollupService.backfill(db, user_id=user_id)
+        print(f"Backfilled {result['rollups']} rollups for {result['users']} users")
+    finally:
+        db.close()
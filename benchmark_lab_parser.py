@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Golden-file benchmark for the lab report line parser (app/services/lab_line_parser.py).
+
+Each sample is a .txt file holding the extracted text of one lab report, pages separated
+by a blank line (what LabDocumentAnalysisService._extract_text_from_pdf produces). Both
+parser vocabularies run over every sample: "text" (LabDocumentAnalysisService) and "ocr"
+(ocr_lab_extractor.parse_from_pages). Results are compared with <sample>.<vocabulary>.golden.json
+next to the sample, and throughput is reported as the best of --repeat runs.
+
+Real reports contain patient data: keep the samples directory out of the repository.
+
+Usage:
+    python benchmark_lab_parser.py SAMPLES_DIR            # check parity + measure
+    python benchmark_lab_parser.py SAMPLES_DIR --update   # (re)write golden files
+Exits with status 1 if any result differs from its golden file.
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+from app.services.lab_document_analysis_service import LabDocumentAnalysisService
+from app.services.ocr_lab_extractor import parse_from_pages
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lab parser golden-file benchmark")
+    parser.add_argument("samples_dir", type=Path)
+    parser.add_argument("--update", action="store_true", help="Write golden files from the current parser")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per vocabulary (best is reported)")
+    args = parser.parse_args()
+
+    # The service logs every extracted record at INFO
+    logging.basicConfig(level=logging.WARNING)
+
+    samples = sorted(args.samples_dir.glob("*.txt"))
+    if not samples:
+        sys.exit(f"No .txt samples in {args.samples_dir}")
+    texts = {path: path.read_text(encoding="utf-8") for path in samples}
+    total_lines = sum(len(text.splitlines()) for text in texts.values())
+
+    lab_service = LabDocumentAnalysisService()
+    vocabularies = {
+        "text": lab_service._parse_lab_text,
+        "ocr": lambda text: parse_from_pages(text.split("\n\n")),
+    }
+
+    mismatches = 0
+    for vocabulary, parse in vocabularies.items():
+        results = {path: parse(text) for path, text in texts.items()}
+
+        for path, rows in results.items():
+            golden_path = path.with_name(f"{path.stem}.{vocabulary}.golden.json")
+            if args.update:
+                golden_path.write_text(json.dumps(rows, ensure_ascii=False, indent=1), encoding="utf-8")
+                continue
+            if not golden_path.exists():
+                print(f"[{vocabulary}] {path.name}: no golden file (run with --update)")
+                mismatches += 1
+                continue
+            golden = json.loads(golden_path.read_text(encoding="utf-8"))
+            if rows != golden:
+                mismatches += 1
+                missing = [row for row in golden if row not in rows]
+                extra = [row for row in rows if row not in golden]
+                print(f"[{vocabulary}] {path.name}: {len(golden)} golden rows, {len(rows)} now "
+                      f"({len(missing)} missing, {len(extra)} new{', order changed' if not missing and not extra else ''})")
+                for row in missing[:3]:
+                    print(f"    - {row}")
+                for row in extra[:3]:
+                    print(f"    + {row}")
+
+        best = float("inf")
+        for _ in range(max(args.repeat, 1)):
+            start = time.perf_counter()
+            for text in texts.values():
+                parse(text)
+            best = min(best, time.perf_counter() - start)
+        row_count = sum(len(rows) for rows in results.values())
+        print(f"[{vocabulary}] {len(samples)} reports, {total_lines} lines, {row_count} rows: "
+              f"{best * 1000:.1f} ms, {total_lines / best:,.0f} lines/s, {best * 1000 / len(samples):.2f} ms/report")
+
+    if args.update:
+        print(f"Wrote golden files for {len(samples)} samples")
+    elif mismatches:
+        print(f"{mismatches} results differ from their golden files")
+        sys.exit(1)
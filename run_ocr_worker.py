@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Run lab document OCR job workers in a separate process.
+
+Claims jobs from the same ocr_jobs table as the in-app workers, so OCR capacity
+can be scaled (or moved to dedicated machines) independently of the API
+(set OCR_JOB_WORKERS=0 on the API processes to leave all OCR to these).
+
+Usage: python run_ocr_worker.py [worker_count]
+"""
+import logging
+import signal
+import sys
+import threading
+
+from app.core.config import settings
+from app.services.ocr_job_queue import OCRJobWorkerPool, process_lab_ocr_job
+from app.services.ocr_page_engine import ocr_page_engine
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG if settings.DEBUG else logging.INFO)
+
+    worker_count = int(sys.argv[1]) if len(sys.argv) > 1 else max(settings.OCR_JOB_WORKERS, 1)
+    pool = OCRJobWorkerPool(
+        handler=process_lab_ocr_job,
+        worker_count=worker_count,
+        poll_interval=settings.OCR_JOB_POLL_INTERVAL_SECONDS,
+        lock_timeout_seconds=settings.OCR_JOB_LOCK_TIMEOUT_SECONDS
+    )
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+
+    pool.start()
+    stop_event.wait()
+    pool.stop()
+    ocr_page_engine.shutdown()
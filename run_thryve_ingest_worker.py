@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Run Thryve webhook ingest workers in a separate process.
+
+Drains the same thryve_webhook_intake spool as the in-app workers, so ingest
+capacity can be scaled independently of the API (set THRYVE_INGEST_WORKERS=0
+on the API processes to leave all ingest to these).
+
+Usage: python run_thryve_ingest_worker.py [worker_count]
+"""
+import logging
+import signal
+import sys
+import threading
+
+from app.core.config import settings
+from app.api.routers.thryve_webhook import process_webhook_intake
+from app.services.thryve_webhook_queue import ThryveWebhookWorkerPool
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG if settings.DEBUG else logging.INFO)
+
+    worker_count = int(sys.argv[1]) if len(sys.argv) > 1 else max(settings.THRYVE_INGEST_WORKERS, 1)
+    pool = ThryveWebhookWorkerPool(
+        handler=process_webhook_intake,
+        worker_count=worker_count,
+        poll_interval=settings.THRYVE_INGEST_POLL_INTERVAL_SECONDS,
+        lock_timeout_seconds=settings.THRYVE_INGEST_LOCK_TIMEOUT_SECONDS,
+        retention_hours=settings.THRYVE_INGEST_RETENTION_HOURS
+    )
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+
+    pool.start()
+    stop_event.wait()
+    pool.stop()